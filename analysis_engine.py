@@ -2,6 +2,8 @@ import json
 import re
 import numpy as np
 
+from engine.segments import PackedSegments
+
 class DigitalPulpitBrain:
     def __init__(self, config_path='digital_pulpit_config.json'):
         with open(config_path, 'r') as f:
@@ -33,28 +35,44 @@ class DigitalPulpitBrain:
     def analyze_sermon(self, transcript_segments, duration_seconds=None):
         total_weighted_score = 0
         
+        # Packed segments are read column-wise; no per-segment dicts are built.
+        packed = isinstance(transcript_segments, PackedSegments)
+
         # Safe duration extraction (Refinement 5)
         if not duration_seconds and transcript_segments:
-            ends = [s.get("end") for s in transcript_segments if isinstance(s.get("end"), (int, float))]
-            duration_seconds = max(ends) if ends else 0
+            if packed:
+                duration_seconds = transcript_segments.duration
+            else:
+                ends = [s.get("end") for s in transcript_segments if isinstance(s.get("end"), (int, float))]
+                duration_seconds = max(ends) if ends else 0
         
         total_minutes = (duration_seconds / 60) if duration_seconds > 0 else 1
 
-        for i, segment in enumerate(transcript_segments):
+        texts = transcript_segments.texts() if packed else (s['text'] for s in transcript_segments)
+        lowered = [t.lower() for t in texts]
+
+        for i, seg_text in enumerate(lowered):
+            if packed:
+                has_verse = transcript_segments.flag(i, 'verse_citation_match')
+                has_imp = transcript_segments.flag(i, 'imperative_language_match')
+            else:
+                segment = transcript_segments[i]
+                has_verse = segment.get('verse_citation_match')
+                has_imp = segment.get('imperative_language_match')
             # Normalize whitespace for multi-word tags (Refinement 4)
-            text = re.sub(r"\s+", " ", segment['text'].lower())
+            text = re.sub(r"\s+", " ", seg_text)
             segment_score = 0
             
             # Detect Multipliers
-            m_verse = self.multipliers.get('verse_citation_match', 1.0) if segment.get('verse_citation_match') else 1.0
-            m_imp = self.multipliers.get('imperative_language_match', 1.0) if segment.get('imperative_language_match') else 1.0
+            m_verse = self.multipliers.get('verse_citation_match', 1.0) if has_verse else 1.0
+            m_imp = self.multipliers.get('imperative_language_match', 1.0) if has_imp else 1.0
             
             # Implement Gospel Anchor Proximity (Refinement 2)
             # Checks current, previous, and next segment for an anchor term
             context_window = [
                 text,
-                transcript_segments[i-1]['text'].lower() if i > 0 else "",
-                transcript_segments[i+1]['text'].lower() if i < len(transcript_segments)-1 else ""
+                lowered[i-1] if i > 0 else "",
+                lowered[i+1] if i < len(lowered)-1 else ""
             ]
             has_anchor = any(anchor in " ".join(context_window) for anchor in self.gospel_anchors)
             m_gospel = self.multipliers.get('gospel_anchor_proximity', 1.0) if has_anchor else 1.0
@@ -8,7 +8,9 @@ Select random audit cases from axis flips and export summaries/transcripts.
 import sqlite3
 import random
 import os
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Set, Tuple
+
+from engine import db
 
 
 def load_baseline(csv_path: str) -> Dict[str, Dict[str, float]]:
@@ -28,27 +30,16 @@ def load_baseline(csv_path: str) -> Dict[str, Dict[str, float]]:
     return baseline
 
 
-def get_current_results(db_path: str) -> Dict[str, Dict[str, float]]:
-    """Get current brain_results from database."""
-    con = sqlite3.connect(db_path)
-    con.row_factory = sqlite3.Row
-
-    query = """
-        SELECT video_id, grace_vs_effort, hope_vs_fear,
-               doctrine_vs_experience, scripture_vs_story
-        FROM brain_results
-    """
+def get_current_results(db_path: str, video_ids: Optional[Set[str]] = None) -> Dict[str, Dict[str, float]]:
+    """Get current brain_results from database (only video_ids, when given)."""
+    axes = ['grace_vs_effort', 'hope_vs_fear', 'doctrine_vs_experience', 'scripture_vs_story']
 
     current = {}
-    for row in con.execute(query):
-        current[row['video_id']] = {
-            'grace_vs_effort': row['grace_vs_effort'],
-            'hope_vs_fear': row['hope_vs_fear'],
-            'doctrine_vs_experience': row['doctrine_vs_experience'],
-            'scripture_vs_story': row['scripture_vs_story'],
-        }
+    for row in db.iter_table('brain_results', ['video_id'] + axes, db_path=db_path):
+        if video_ids is not None and row['video_id'] not in video_ids:
+            continue
+        current[row['video_id']] = {axis: row[axis] for axis in axes}
 
-    con.close()
     return current
 
 
@@ -56,10 +47,11 @@ def get_video_data(db_path: str, video_id: str) -> Dict:
     """Get title, summary, and transcript for a video."""
     con = sqlite3.connect(db_path)
     con.row_factory = sqlite3.Row
+    db.register_functions(con)
 
-    query = """
+    query = f"""
         SELECT v.title, v.channel_id, c.channel_name,
-               t.summary_text, t.full_text
+               t.summary_text, {db.transcript_text_sql("t", con)} AS full_text
         FROM videos v
         JOIN transcripts t ON v.video_id = t.video_id
         LEFT JOIN channels c ON v.channel_id = c.channel_id
@@ -148,7 +140,7 @@ def write_audit_file(video_id: str, data: Dict, before: float, after: float,
 
 def main():
     baseline = load_baseline('out/brain_results_before_v2_1.csv')
-    current = get_current_results('db/digital_pulpit.db')
+    current = get_current_results('db/digital_pulpit.db', set(baseline))
 
     hope_flips, grace_flips, doctrine_flips = find_flips(baseline, current)
 
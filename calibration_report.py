@@ -5,24 +5,32 @@ calibration_report.py
 Generate comprehensive report on calibration patch results.
 """
 
-import sqlite3
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
+from engine import db
 
-def get_brain_results(db_path: str) -> List[Dict]:
-    """Get all brain results."""
-    con = sqlite3.connect(db_path)
-    con.row_factory = sqlite3.Row
+AXIS_COLUMNS = [
+    "grace_vs_effort", "hope_vs_fear", "doctrine_vs_experience",
+    "scripture_vs_story", "theological_density",
+]
 
-    query = """
-        SELECT video_id, grace_vs_effort, hope_vs_fear,
-               doctrine_vs_experience, scripture_vs_story, theological_density
-        FROM brain_results
-    """
 
-    results = [dict(row) for row in con.execute(query)]
-    con.close()
-    return results
+def get_brain_results(db_path: str) -> Dict[str, List[float]]:
+    """Axis columns of every brain result, streamed column-wise."""
+    columns: Dict[str, List[float]] = {c: [] for c in AXIS_COLUMNS}
+    for row in db.iter_table("brain_results", AXIS_COLUMNS, db_path=db_path):
+        for c in AXIS_COLUMNS:
+            columns[c].append(row[c])
+    return columns
+
+
+def get_brain_result(db_path: str, video_id: str) -> Optional[Dict]:
+    """One video's brain result."""
+    for row in db.iter_table("brain_results", ["video_id"] + AXIS_COLUMNS,
+                             where="video_id = ?", params=(video_id,),
+                             limit=1, db_path=db_path):
+        return dict(row)
+    return None
 
 
 def binned_distribution(scores: List[float], axis_name: str) -> Dict:
@@ -55,7 +63,7 @@ def binned_distribution(scores: List[float], axis_name: str) -> Dict:
 
 def main():
     results = get_brain_results('db/digital_pulpit.db')
-    total = len(results)
+    total = len(results['hope_vs_fear'])
 
     print("=" * 80)
     print("CALIBRATION PATCH REPORT")
@@ -73,7 +81,7 @@ def main():
     print("1. HOPE_VS_FEAR DISTRIBUTION")
     print("-" * 80)
 
-    hope_scores = [r['hope_vs_fear'] for r in results]
+    hope_scores = results['hope_vs_fear']
     hope_dist = binned_distribution(hope_scores, 'hope_vs_fear')
 
     print(f"{'Bucket':<20} {'Count':<10} {'Percentage':<15}")
@@ -89,10 +97,10 @@ def main():
     print("2. CORPUS-WIDE AVERAGES")
     print("-" * 80)
 
-    avg_gve = sum(r['grace_vs_effort'] for r in results) / total
-    avg_hvf = sum(r['hope_vs_fear'] for r in results) / total
-    avg_dve = sum(r['doctrine_vs_experience'] for r in results) / total
-    avg_svs = sum(r['scripture_vs_story'] for r in results) / total
+    avg_gve = sum(results['grace_vs_effort']) / total
+    avg_hvf = sum(results['hope_vs_fear']) / total
+    avg_dve = sum(results['doctrine_vs_experience']) / total
+    avg_svs = sum(results['scripture_vs_story']) / total
 
     print(f"{'Axis':<30} {'Average':<15}")
     print("-" * 80)
@@ -106,7 +114,7 @@ def main():
     print("3. 1 TIMOTHY TEST CASE (78db72267e74fa70)")
     print("-" * 80)
 
-    timothy = next((r for r in results if r['video_id'] == '78db72267e74fa70'), None)
+    timothy = get_brain_result('db/digital_pulpit.db', '78db72267e74fa70')
     if timothy:
         print(f"{'Axis':<30} {'Score':<15}")
         print("-" * 80)
@@ -124,8 +132,8 @@ def main():
     print("4. PERCENTAGE AT EXACTLY ±1.000 ON HOPE_VS_FEAR")
     print("-" * 80)
 
-    perfect_pos = sum(1 for r in results if abs(r['hope_vs_fear'] - 1.0) < 0.0001)
-    perfect_neg = sum(1 for r in results if abs(r['hope_vs_fear'] - (-1.0)) < 0.0001)
+    perfect_pos = sum(1 for s in hope_scores if abs(s - 1.0) < 0.0001)
+    perfect_neg = sum(1 for s in hope_scores if abs(s - (-1.0)) < 0.0001)
     perfect_total = perfect_pos + perfect_neg
 
     print(f"Exactly +1.000:  {perfect_pos} ({perfect_pos/total*100:.1f}%)")
@@ -137,7 +145,7 @@ def main():
     print("5. GRACE_VS_EFFORT DISTRIBUTION (for comparison)")
     print("-" * 80)
 
-    grace_scores = [r['grace_vs_effort'] for r in results]
+    grace_scores = results['grace_vs_effort']
     grace_dist = binned_distribution(grace_scores, 'grace_vs_effort')
 
     print(f"{'Bucket':<20} {'Count':<10} {'Percentage':<15}")
@@ -149,8 +157,8 @@ def main():
 
     print()
 
-    perfect_grace_pos = sum(1 for r in results if abs(r['grace_vs_effort'] - 1.0) < 0.0001)
-    perfect_grace_neg = sum(1 for r in results if abs(r['grace_vs_effort'] - (-1.0)) < 0.0001)
+    perfect_grace_pos = sum(1 for s in grace_scores if abs(s - 1.0) < 0.0001)
+    perfect_grace_neg = sum(1 for s in grace_scores if abs(s - (-1.0)) < 0.0001)
     perfect_grace_total = perfect_grace_pos + perfect_grace_neg
 
     print(f"Grace at exactly ±1.000: {perfect_grace_total} ({perfect_grace_total/total*100:.1f}%)")
@@ -160,7 +168,7 @@ def main():
     print("6. THEOLOGICAL DENSITY AVERAGE")
     print("-" * 80)
 
-    avg_density = sum(r['theological_density'] for r in results) / total
+    avg_density = sum(results['theological_density']) / total
     print(f"Average: {avg_density:.1f} (should be unchanged)")
     print()
 
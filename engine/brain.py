@@ -173,6 +173,7 @@ def generate_weekly_drift():
 
 
 def run_brain():
+    db.init_db()
     run_id = db.create_run("brain")
     logger.info(f"Starting Brain run #{run_id}")
     count = 0
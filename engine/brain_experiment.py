@@ -22,6 +22,7 @@ import sqlite3
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
+from engine import db
 from engine.brain import (
     load_brain_config,
     score_categories,
@@ -40,6 +41,7 @@ def _connect(db_path: str) -> sqlite3.Connection:
     con = sqlite3.connect(db_path)
     con.row_factory = sqlite3.Row
     con.execute("PRAGMA busy_timeout=5000;")
+    db.register_functions(con)
     return con
 
 
@@ -49,13 +51,15 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
     Returns list of dicts with all needed fields.
     """
     sermons = []
+    text = db.transcript_text_sql("t", con)
+    has_text = db.has_transcript_text_sql("t", con)
 
     # Sermon 1: Controlled ground truth
-    row = con.execute("""
+    row = con.execute(f"""
         SELECT
             v.video_id, v.title,
             c.channel_name,
-            t.full_text, t.summary_text,
+            {text} AS full_text, t.summary_text,
             sa.claims_json,
             br.theological_density as db_density,
             br.grace_vs_effort as db_gve,
@@ -81,11 +85,11 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
         print("Warning: Ground truth sermon not found")
 
     # Sermon 2: Grace-heavy
-    row = con.execute("""
+    row = con.execute(f"""
         SELECT
             v.video_id, v.title,
             c.channel_name,
-            t.full_text, t.summary_text,
+            {text} AS full_text, t.summary_text,
             sa.claims_json,
             br.theological_density as db_density,
             br.grace_vs_effort as db_gve,
@@ -99,8 +103,7 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
         LEFT JOIN sermon_analysis sa ON v.video_id = sa.video_id
         JOIN brain_results br ON v.video_id = br.video_id
         WHERE br.grace_vs_effort > 0.5
-          AND t.full_text IS NOT NULL
-          AND LENGTH(t.full_text) > 0
+          AND {has_text}
         ORDER BY br.grace_vs_effort DESC
         LIMIT 1
     """).fetchone()
@@ -112,11 +115,11 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
         })
     else:
         # Fallback
-        row = con.execute("""
+        row = con.execute(f"""
             SELECT
                 v.video_id, v.title,
                 c.channel_name,
-                t.full_text, t.summary_text,
+                {text} AS full_text, t.summary_text,
                 sa.claims_json,
                 br.theological_density as db_density,
                 br.grace_vs_effort as db_gve,
@@ -129,8 +132,7 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
             JOIN transcripts t ON v.video_id = t.video_id
             LEFT JOIN sermon_analysis sa ON v.video_id = sa.video_id
             JOIN brain_results br ON v.video_id = br.video_id
-            WHERE t.full_text IS NOT NULL
-              AND LENGTH(t.full_text) > 0
+            WHERE {has_text}
             ORDER BY br.grace_vs_effort DESC
             LIMIT 1
         """).fetchone()
@@ -141,11 +143,11 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
             })
 
     # Sermon 3: Effort-heavy
-    row = con.execute("""
+    row = con.execute(f"""
         SELECT
             v.video_id, v.title,
             c.channel_name,
-            t.full_text, t.summary_text,
+            {text} AS full_text, t.summary_text,
             sa.claims_json,
             br.theological_density as db_density,
             br.grace_vs_effort as db_gve,
@@ -159,8 +161,7 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
         LEFT JOIN sermon_analysis sa ON v.video_id = sa.video_id
         JOIN brain_results br ON v.video_id = br.video_id
         WHERE br.grace_vs_effort < -0.5
-          AND t.full_text IS NOT NULL
-          AND LENGTH(t.full_text) > 0
+          AND {has_text}
         ORDER BY br.grace_vs_effort ASC
         LIMIT 1
     """).fetchone()
@@ -172,11 +173,11 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
         })
     else:
         # Fallback
-        row = con.execute("""
+        row = con.execute(f"""
             SELECT
                 v.video_id, v.title,
                 c.channel_name,
-                t.full_text, t.summary_text,
+                {text} AS full_text, t.summary_text,
                 sa.claims_json,
                 br.theological_density as db_density,
                 br.grace_vs_effort as db_gve,
@@ -189,8 +190,7 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
             JOIN transcripts t ON v.video_id = t.video_id
             LEFT JOIN sermon_analysis sa ON v.video_id = sa.video_id
             JOIN brain_results br ON v.video_id = br.video_id
-            WHERE t.full_text IS NOT NULL
-              AND LENGTH(t.full_text) > 0
+            WHERE {has_text}
             ORDER BY br.grace_vs_effort ASC
             LIMIT 1
         """).fetchone()
@@ -201,11 +201,11 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
             })
 
     # Sermon 4: Doctrinal
-    row = con.execute("""
+    row = con.execute(f"""
         SELECT
             v.video_id, v.title,
             c.channel_name,
-            t.full_text, t.summary_text,
+            {text} AS full_text, t.summary_text,
             sa.claims_json,
             br.theological_density as db_density,
             br.grace_vs_effort as db_gve,
@@ -219,8 +219,7 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
         LEFT JOIN sermon_analysis sa ON v.video_id = sa.video_id
         JOIN brain_results br ON v.video_id = br.video_id
         WHERE br.doctrine_vs_experience > 0.3
-          AND t.full_text IS NOT NULL
-          AND LENGTH(t.full_text) > 0
+          AND {has_text}
         ORDER BY br.doctrine_vs_experience DESC
         LIMIT 1
     """).fetchone()
@@ -232,11 +231,11 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
         })
     else:
         # Fallback
-        row = con.execute("""
+        row = con.execute(f"""
             SELECT
                 v.video_id, v.title,
                 c.channel_name,
-                t.full_text, t.summary_text,
+                {text} AS full_text, t.summary_text,
                 sa.claims_json,
                 br.theological_density as db_density,
                 br.grace_vs_effort as db_gve,
@@ -249,8 +248,7 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
             JOIN transcripts t ON v.video_id = t.video_id
             LEFT JOIN sermon_analysis sa ON v.video_id = sa.video_id
             JOIN brain_results br ON v.video_id = br.video_id
-            WHERE t.full_text IS NOT NULL
-              AND LENGTH(t.full_text) > 0
+            WHERE {has_text}
             ORDER BY br.doctrine_vs_experience DESC
             LIMIT 1
         """).fetchone()
@@ -270,7 +268,7 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
             SELECT
                 v.video_id, v.title,
                 c.channel_name,
-                t.full_text, t.summary_text,
+                {text} AS full_text, t.summary_text,
                 sa.claims_json,
                 br.theological_density as db_density,
                 br.grace_vs_effort as db_gve,
@@ -283,19 +281,18 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
             JOIN transcripts t ON v.video_id = t.video_id
             LEFT JOIN sermon_analysis sa ON v.video_id = sa.video_id
             JOIN brain_results br ON v.video_id = br.video_id
-            WHERE t.full_text IS NOT NULL
-              AND LENGTH(t.full_text) > 0
+            WHERE {has_text}
               AND v.video_id NOT IN ({placeholders})
             ORDER BY br.theological_density DESC
             LIMIT 1
         """
         row = con.execute(query, already_selected).fetchone()
     else:
-        row = con.execute("""
+        row = con.execute(f"""
             SELECT
                 v.video_id, v.title,
                 c.channel_name,
-                t.full_text, t.summary_text,
+                {text} AS full_text, t.summary_text,
                 sa.claims_json,
                 br.theological_density as db_density,
                 br.grace_vs_effort as db_gve,
@@ -308,8 +305,7 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
             JOIN transcripts t ON v.video_id = t.video_id
             LEFT JOIN sermon_analysis sa ON v.video_id = sa.video_id
             JOIN brain_results br ON v.video_id = br.video_id
-            WHERE t.full_text IS NOT NULL
-              AND LENGTH(t.full_text) > 0
+            WHERE {has_text}
             ORDER BY br.theological_density DESC
             LIMIT 1
         """).fetchone()
@@ -321,11 +317,11 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
         })
     else:
         # Last resort fallback
-        row = con.execute("""
+        row = con.execute(f"""
             SELECT
                 v.video_id, v.title,
                 c.channel_name,
-                t.full_text, t.summary_text,
+                {text} AS full_text, t.summary_text,
                 sa.claims_json,
                 br.theological_density as db_density,
                 br.grace_vs_effort as db_gve,
@@ -338,8 +334,7 @@ def _select_5_sermons(con: sqlite3.Connection) -> List[Dict[str, Any]]:
             JOIN transcripts t ON v.video_id = t.video_id
             LEFT JOIN sermon_analysis sa ON v.video_id = sa.video_id
             JOIN brain_results br ON v.video_id = br.video_id
-            WHERE t.full_text IS NOT NULL
-              AND LENGTH(t.full_text) > 0
+            WHERE {has_text}
             ORDER BY RANDOM()
             LIMIT 1
         """).fetchone()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+engine/channel_resolver.py - Bulk channel ID resolution
+
+Resolves every channels.csv row on a thread pool through
+youtube.resolve_channel_id, filling the channel_resolution cache. Cached
+rows cost nothing; uncached ones share its CHANNEL_RESOLVE_RATE pacing
+(replacing the fixed 5s sleeps of the old extract_channel_ids_slow.py).
+
+    python -m engine.channel_resolver                        # fill the cache
+    python -m engine.channel_resolver --out data/channels_with_ids.csv
+    python -m engine.channel_resolver --refresh              # ignore cached results
+"""
+
+import argparse
+import csv
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from engine import db, youtube
+from engine.config import DISCOVERY_WORKERS, load_channels_csv
+
+logger = logging.getLogger("digital_pulpit")
+
+
+def resolve_channels(channels: List[Dict[str, str]], workers: int = DISCOVERY_WORKERS,
+                     refresh: bool = False) -> List[Tuple[Optional[str], str]]:
+    """(channel_id, method) per channel, in input order."""
+
+    def _one(ch):
+        try:
+            return youtube.resolve_channel_id(ch, refresh=refresh)
+        except Exception as e:
+            logger.warning(f"Resolution failed for {ch.get('name', '(unknown)')}: "
+                           f"{type(e).__name__}: {e}")
+            return None, "error"
+
+    with ThreadPoolExecutor(max_workers=max(1, workers),
+                            thread_name_prefix="resolve") as pool:
+        return list(pool.map(_one, channels))
+
+
+def write_channels_csv(path: str, channels: List[Dict[str, str]],
+                       resolved: List[Tuple[Optional[str], str]]) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["channel_name", "channel_url", "channel_id"])
+        writer.writeheader()
+        for ch, (cid, _) in zip(channels, resolved):
+            writer.writerow({
+                "channel_name": ch.get("name", ""),
+                "channel_url": ch.get("url", ""),
+                "channel_id": cid or ch.get("channel_id", ""),
+            })
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Resolve channels.csv rows to YouTube channel IDs.")
+    ap.add_argument("--csv", default="data/channels.csv", help="Channels CSV/TSV to resolve")
+    ap.add_argument("--out", default=None, help="Also write channel_name,channel_url,channel_id here")
+    ap.add_argument("--workers", type=int, default=DISCOVERY_WORKERS)
+    ap.add_argument("--rate", type=float, default=None,
+                    help="Uncached lookups per second (default: CHANNEL_RESOLVE_RATE)")
+    ap.add_argument("--refresh", action="store_true", help="Re-resolve even when cached")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    db.init_db()
+    if args.rate:
+        youtube.set_resolve_rate(args.rate)
+
+    channels = load_channels_csv(args.csv)
+    if not channels:
+        print(f"No channels found in {args.csv}")
+        return
+
+    resolved = resolve_channels(channels, workers=args.workers, refresh=args.refresh)
+    if args.out:
+        write_channels_csv(args.out, channels, resolved)
+
+    methods = Counter(method for _, method in resolved)
+    ok = sum(1 for cid, _ in resolved if cid)
+    print(f"Resolved {ok}/{len(channels)} channels "
+          f"({', '.join(f'{m}: {n}' for m, n in methods.most_common())})")
+    if args.out:
+        print(f"Saved to: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,7 @@ from typing import Any, Dict, List, Optional
 
 from engine.doc_writer import write_doc
 from engine.climate_snapshot import generate_climate_snapshot
-from engine.config import DATABASE_PATH
+from engine import db
 from engine.quote_bank import get_quotes_for_video
 from engine.elias_writer import write_elias_section
 
@@ -80,12 +80,6 @@ def _dedupe_quotes(quotes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
 # DB
 # ---------------------------
 
-def _connect(db_path: str = DATABASE_PATH) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
 def _safe_json_load(s: Optional[str], default):
     if not s:
         return default
@@ -104,7 +98,11 @@ def _norm_key(s: str) -> str:
 # ---------------------------
 
 def fetch_period_sermons(conn: sqlite3.Connection, start_date: str, end_date: str) -> List[Dict[str, Any]]:
-    q = """
+    # Near duplicates (engine/dedupe.py) count once, under their canonical video.
+    has_dups = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='near_duplicates'"
+    ).fetchone() is not None
+    q = f"""
     SELECT
         br.video_id,
         br.theological_density,
@@ -121,6 +119,7 @@ def fetch_period_sermons(conn: sqlite3.Connection, start_date: str, end_date: st
     JOIN videos v ON br.video_id = v.video_id
     JOIN channels c ON v.channel_id = c.channel_id
     WHERE v.published_at >= ? AND v.published_at < ?
+    {"AND br.video_id NOT IN (SELECT video_id FROM near_duplicates)" if has_dups else ""}
     ORDER BY v.published_at DESC
     """
     rows = conn.execute(q, (start_date, end_date)).fetchall()
@@ -832,59 +831,58 @@ def _build_elias_pack(
 # ---------------------------
 
 def generate_climate_agenda(days: int = 30, limit: int = 120, limit_each: int = 2) -> Dict[str, Any]:
-    conn = _connect()
-
-    snapshot = generate_climate_snapshot(days=days)
-
-    now = datetime.utcnow()
-    current_end = now.strftime("%Y-%m-%d %H:%M:%S")
-    current_start = (now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
-    window_key = f"{current_start.split(' ')[0]}..{current_end.split(' ')[0]}"
-
-    items = fetch_period_sermons(conn, current_start, current_end)
-    if limit and len(items) > limit:
-        items = items[:limit]
-
-    themes = identify_theme_convergence(items, top_n=3)
-    scripture = identify_scripture_focus(items, top_n=5)
-
-    intent_climate_v2 = build_intent_climate_v2(items, window_key=window_key, days=days)
-
-    generated_at_iso = datetime.utcnow().isoformat() + "Z"
-
-    elias_pack = _build_elias_pack(
-        conn=conn,
-        snapshot=snapshot,
-        themes=themes,
-        scripture=scripture,
-        days=days,
-        quotes_per_section=3
-    )
-
-    resonant = select_resonant_sermons(conn, items, themes, limit_each=limit_each)
-    outliers = select_outliers(items, top_n=3)
-
-    agenda = {
-        "climate_snapshot": snapshot,
-        "intent_climate_v2": intent_climate_v2,
-        "theme_convergence": themes,
-        "scripture_focus": scripture,
-        "elias_preface": elias_pack.get("preface", ""),
-        "observations": elias_pack.get("observations", []),
-        "elias_closing_style": elias_pack.get("closing_style", ""),
-        "elias_closing_line": elias_pack.get("closing_line", ""),
-        "resonant_sermons": resonant,
-        "outliers": outliers,
-        "metadata": {
-            "days": int(days),
-            "limit": int(limit),
-            "total_sermons": len(items),
-            "generated_at": generated_at_iso,
-            "window_key": window_key,
+    with db.connection() as conn:
+        snapshot = generate_climate_snapshot(days=days)
+
+        now = datetime.utcnow()
+        current_end = now.strftime("%Y-%m-%d %H:%M:%S")
+        current_start = (now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        window_key = f"{current_start.split(' ')[0]}..{current_end.split(' ')[0]}"
+
+        items = fetch_period_sermons(conn, current_start, current_end)
+        if limit and len(items) > limit:
+            items = items[:limit]
+
+        themes = identify_theme_convergence(items, top_n=3)
+        scripture = identify_scripture_focus(items, top_n=5)
+
+        intent_climate_v2 = build_intent_climate_v2(items, window_key=window_key, days=days)
+
+        generated_at_iso = datetime.utcnow().isoformat() + "Z"
+
+        elias_pack = _build_elias_pack(
+            conn=conn,
+            snapshot=snapshot,
+            themes=themes,
+            scripture=scripture,
+            days=days,
+            quotes_per_section=3
+        )
+
+        resonant = select_resonant_sermons(conn, items, themes, limit_each=limit_each)
+        outliers = select_outliers(items, top_n=3)
+
+        agenda = {
+            "climate_snapshot": snapshot,
+            "intent_climate_v2": intent_climate_v2,
+            "theme_convergence": themes,
+            "scripture_focus": scripture,
+            "elias_preface": elias_pack.get("preface", ""),
+            "observations": elias_pack.get("observations", []),
+            "elias_closing_style": elias_pack.get("closing_style", ""),
+            "elias_closing_line": elias_pack.get("closing_line", ""),
+            "resonant_sermons": resonant,
+            "outliers": outliers,
+            "metadata": {
+                "days": int(days),
+                "limit": int(limit),
+                "total_sermons": len(items),
+                "generated_at": generated_at_iso,
+                "window_key": window_key,
+            }
         }
-    }
 
-    return agenda
+        return agenda
 
 
 # ---------------------------
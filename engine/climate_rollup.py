@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+engine/climate_rollup.py - Incremental daily rollups of climate metrics
+
+climate_daily holds, per (day, channel_id), the sermon count and the sum and
+sum of squares of theological_density and the four axes. climate_daily_facets
+holds per-day totals for the keyed parts of raw_scores_json: category_density
+("category"), scripture_refs ("book") and drift_level counts ("drift").
+
+Triggers on brain_results (and on videos, if a video is re-dated or moved to
+another channel) keep both tables in step, so a window comparison is a
+GROUP BY over a few hundred rollup rows instead of decoding raw_scores_json
+for every sermon. `day` is date(videos.published_at); videos whose
+published_at SQLite cannot parse are left out, and so are near-duplicate
+transcripts (engine/dedupe.py): a sermon is counted once, under its
+canonical video, and a video flagged later is taken back out.
+
+    python -m engine.climate_rollup --rebuild
+"""
+
+import argparse
+import logging
+import math
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from engine import db
+
+logger = logging.getLogger("digital_pulpit")
+
+METRICS = [
+    "theological_density",
+    "grace_vs_effort",
+    "hope_vs_fear",
+    "doctrine_vs_experience",
+    "scripture_vs_story",
+]
+AXES = METRICS[1:]
+
+# kind -> JSON path inside raw_scores_json of a {key: number} object
+FACETS = {
+    "category": "$.category_density",
+    "book": "$.scripture_refs",
+}
+
+_RAW = "CASE WHEN json_valid(b.raw_scores_json) THEN b.raw_scores_json ELSE '{}' END"
+_NOT_DUPLICATE = "b.video_id NOT IN (SELECT video_id FROM near_duplicates)"
+
+
+def _create_tables(conn: sqlite3.Connection) -> None:
+    metric_cols = ",\n".join(
+        f"    {m}_sum REAL NOT NULL DEFAULT 0,\n    {m}_sumsq REAL NOT NULL DEFAULT 0"
+        for m in METRICS
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS climate_daily (
+            day TEXT NOT NULL,
+            channel_id TEXT NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+        {metric_cols},
+            PRIMARY KEY (day, channel_id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS climate_daily_facets (
+            day TEXT NOT NULL,
+            channel_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, channel_id, kind, key)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _apply_sql(sign: int, source: str, day: str, channel: str, where: str,
+               duplicates: bool = False) -> List[str]:
+    """
+    Statements adding (sign=1) or removing (sign=-1) the brain_results rows
+    produced by `source` (aliased b) to the rollups. Near duplicates are
+    skipped unless duplicates is set.
+    """
+    vals = ", ".join(
+        f"{sign} * COALESCE(b.{m}, 0.0), {sign} * COALESCE(b.{m}, 0.0) * COALESCE(b.{m}, 0.0)"
+        for m in METRICS
+    )
+    cols = ", ".join(f"{m}_sum, {m}_sumsq" for m in METRICS)
+    sets = ", ".join(
+        f"{m}_sum = {m}_sum + excluded.{m}_sum, {m}_sumsq = {m}_sumsq + excluded.{m}_sumsq"
+        for m in METRICS
+    )
+    where = f"{day} IS NOT NULL" + (f" AND {where}" if where else "")
+    if not duplicates:
+        where += f" AND {_NOT_DUPLICATE}"
+
+    stmts = [
+        f"""
+        INSERT INTO climate_daily (day, channel_id, n, {cols})
+        SELECT {day}, {channel}, {sign}, {vals}
+        FROM {source} WHERE {where}
+        ON CONFLICT(day, channel_id) DO UPDATE SET n = n + excluded.n, {sets}
+        """
+    ]
+    facet_upsert = (
+        "ON CONFLICT(day, channel_id, kind, key) DO UPDATE SET "
+        "total = total + excluded.total, n = n + excluded.n"
+    )
+    for kind, path in FACETS.items():
+        stmts.append(
+            f"""
+            INSERT INTO climate_daily_facets (day, channel_id, kind, key, total, n)
+            SELECT {day}, {channel}, '{kind}', j.key, {sign} * COALESCE(CAST(j.value AS REAL), 0.0), {sign}
+            FROM {source}, json_each({_RAW}, '{path}') j
+            WHERE {where} AND json_type({_RAW}, '{path}') = 'object'
+            {facet_upsert}
+            """
+        )
+    stmts.append(
+        f"""
+        INSERT INTO climate_daily_facets (day, channel_id, kind, key, total, n)
+        SELECT {day}, {channel}, 'drift',
+               COALESCE(json_extract({_RAW}, '$.drift_level'), 'unknown'), {sign}, {sign}
+        FROM {source} WHERE {where}
+        {facet_upsert}
+        """
+    )
+    if sign < 0:
+        days = f"SELECT {day} FROM {source} WHERE {where}"
+        stmts.append(f"DELETE FROM climate_daily WHERE n <= 0 AND day IN ({days})")
+        stmts.append(f"DELETE FROM climate_daily_facets WHERE n <= 0 AND day IN ({days})")
+    return stmts
+
+
+def _row_source(ref: str) -> str:
+    # NEW/OLD cannot be joined directly; lift the row into a one-row subquery.
+    cols = ", ".join(f"{ref}.{c} AS {c}" for c in ["video_id", "raw_scores_json"] + METRICS)
+    return f"(SELECT {cols}) b JOIN videos v ON v.video_id = b.video_id"
+
+
+def _trigger_sql() -> Dict[str, str]:
+    from_row = {ref: _row_source(ref) for ref in ("NEW", "OLD")}
+    day, channel = "date(v.published_at)", "v.channel_id"
+
+    def body(*parts: List[str]) -> str:
+        return ";\n".join(s.strip() for part in parts for s in part) + ";"
+
+    add_new = _apply_sql(1, from_row["NEW"], day, channel, "")
+    sub_old = _apply_sql(-1, from_row["OLD"], day, channel, "")
+    moved_out = _apply_sql(-1, "brain_results b", "date(OLD.published_at)", "OLD.channel_id",
+                           "b.video_id = OLD.video_id")
+    moved_in = _apply_sql(1, "brain_results b", "date(NEW.published_at)", "NEW.channel_id",
+                          "b.video_id = NEW.video_id")
+    joined = "brain_results b JOIN videos v ON v.video_id = b.video_id"
+    dup_flagged = _apply_sql(-1, joined, day, channel, "b.video_id = NEW.video_id", duplicates=True)
+    dup_cleared = _apply_sql(1, joined, day, channel, "b.video_id = OLD.video_id", duplicates=True)
+    return {
+        "climate_rollup_ai": f"AFTER INSERT ON brain_results BEGIN\n{body(add_new)}\nEND",
+        "climate_rollup_ad": f"AFTER DELETE ON brain_results BEGIN\n{body(sub_old)}\nEND",
+        "climate_rollup_au": f"AFTER UPDATE ON brain_results BEGIN\n{body(sub_old, add_new)}\nEND",
+        "climate_rollup_vu": (
+            "AFTER UPDATE OF published_at, channel_id ON videos "
+            "WHEN OLD.published_at IS NOT NEW.published_at OR OLD.channel_id IS NOT NEW.channel_id "
+            f"BEGIN\n{body(moved_out, moved_in)}\nEND"
+        ),
+        "climate_rollup_di": f"AFTER INSERT ON near_duplicates BEGIN\n{body(dup_flagged)}\nEND",
+        "climate_rollup_dd": f"AFTER DELETE ON near_duplicates BEGIN\n{body(dup_cleared)}\nEND",
+    }
+
+
+def ensure_climate_rollup(conn: sqlite3.Connection) -> bool:
+    """
+    Create the rollup tables and triggers if missing, backfilling on first
+    creation or when a trigger's definition has changed. Returns False when
+    brain_results/videos/near_duplicates do not exist yet or this SQLite
+    build has no JSON support.
+    """
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    if not {"brain_results", "videos", "near_duplicates"} <= tables:
+        return False
+    try:
+        conn.execute("SELECT json_valid('{}')").fetchone()
+    except sqlite3.OperationalError:
+        logger.warning("SQLite JSON functions unavailable; climate rollups disabled")
+        return False
+
+    fresh = "climate_daily" not in tables
+    _create_tables(conn)
+    triggers = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger'").fetchall())
+    for name, sql in _trigger_sql().items():
+        ddl = f"CREATE TRIGGER {name} {sql}"
+        if triggers.get(name) == ddl:
+            continue
+        if name in triggers:
+            # Older definition: the rollups it maintained may not match this one.
+            conn.execute(f"DROP TRIGGER {name}")
+            fresh = True
+        conn.execute(ddl)
+    if fresh:
+        _backfill(conn)
+    return True
+
+
+def _backfill(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM climate_daily")
+    conn.execute("DELETE FROM climate_daily_facets")
+    for stmt in _apply_sql(1, "brain_results b JOIN videos v ON v.video_id = b.video_id",
+                           "date(v.published_at)", "v.channel_id", ""):
+        conn.execute(stmt)
+
+
+def rebuild_climate_rollup(db_path: Optional[str] = None) -> None:
+    """Recompute both rollup tables from brain_results."""
+    with db.transaction(db_path) as conn:
+        if ensure_climate_rollup(conn):
+            _backfill(conn)
+
+
+def _rollup_available(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='climate_daily'"
+    ).fetchone() is not None
+
+
+def window_stats(conn: sqlite3.Connection, start_day: str, end_day: str,
+                 channel_id: Optional[str] = None, top_n: int = 5) -> Optional[Dict[str, Any]]:
+    """
+    Aggregate stats for days in [start_day, end_day), optionally one channel.
+
+    Same shape as climate_snapshot.compute_climate_stats. Returns None when
+    the rollup tables do not exist (callers fall back to raw rows).
+    """
+    if not _rollup_available(conn):
+        return None
+
+    where = "day >= ? AND day < ?"
+    params: List[Any] = [start_day, end_day]
+    if channel_id:
+        where += " AND channel_id = ?"
+        params.append(channel_id)
+
+    sums = ", ".join(f"SUM({m}_sum), SUM({m}_sumsq)" for m in METRICS)
+    row = conn.execute(f"SELECT SUM(n), {sums} FROM climate_daily WHERE {where}", params).fetchone()
+    count = int(row[0] or 0)
+
+    facets: Dict[str, Dict[str, float]] = {"category": {}, "book": {}, "drift": {}}
+    for kind, key, total in conn.execute(
+        f"SELECT kind, key, SUM(total) FROM climate_daily_facets WHERE {where} "
+        "GROUP BY kind, key",
+        params,
+    ):
+        facets.setdefault(kind, {})[key] = total
+
+    if not count:
+        return {
+            'count': 0,
+            'avg_density': 0.0,
+            'avg_axes': {},
+            'top_categories': [],
+            'top_books': [],
+            'drift_distribution': {},
+        }
+
+    mean: Dict[str, float] = {}
+    std: Dict[str, float] = {}
+    for i, m in enumerate(METRICS):
+        s, sq = float(row[1 + 2 * i] or 0.0), float(row[2 + 2 * i] or 0.0)
+        mean[m] = s / count
+        std[m] = math.sqrt(max(sq / count - mean[m] ** 2, 0.0))
+
+    def top(totals: Dict[str, float]):
+        return sorted(totals.items(), key=lambda x: x[1], reverse=True)[:top_n]
+
+    return {
+        'count': count,
+        'avg_density': mean["theological_density"],
+        'avg_axes': {a: mean[a] for a in AXES},
+        'std_density': std["theological_density"],
+        'std_axes': {a: std[a] for a in AXES},
+        'top_categories': top(facets["category"]),
+        'top_books': [(b, int(round(c))) for b, c in top(facets["book"])],
+        'drift_distribution': {k: int(round(v)) for k, v in facets["drift"].items()},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Maintain the climate rollup tables.")
+    ap.add_argument("--db", default=None, help="Path to SQLite DB (default: DATABASE_PATH)")
+    ap.add_argument("--rebuild", action="store_true", help="Recompute rollups from brain_results")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    if args.rebuild:
+        rebuild_climate_rollup(args.db)
+    else:
+        with db.transaction(args.db) as conn:
+            ensure_climate_rollup(conn)
+    with db.connection(args.db) as conn:
+        n = conn.execute("SELECT COUNT(*), COALESCE(SUM(n), 0) FROM climate_daily").fetchone()
+    print(f"climate_daily: {n[0]} day/channel rows covering {n[1]} sermons")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,16 @@
 engine/climate_snapshot.py - Climate-First Reporting
 
 Compares current 30 days vs previous 30 days across the sermon corpus.
-Focuses on theological climate rather than drift anomalies.
+Focuses on theological climate rather than drift anomalies. Period stats
+come from the daily rollups in engine/climate_rollup.py when present.
 """
 
 import sqlite3
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
 
-from .config import DATABASE_PATH
-
-
-def _connect(db_path: str = DATABASE_PATH) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+from . import db
+from .climate_rollup import window_stats
 
 
 def _safe_json_load(s: str, default):
@@ -31,7 +27,11 @@ def _safe_json_load(s: str, default):
 
 def fetch_period_data(conn: sqlite3.Connection, start_date: str, end_date: str) -> List[Dict]:
     """Fetch brain_results for a date range."""
-    q = """
+    # Near duplicates (engine/dedupe.py) count once, as in the rollups.
+    has_dups = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='near_duplicates'"
+    ).fetchone() is not None
+    q = f"""
     SELECT
         br.video_id,
         br.theological_density,
@@ -44,6 +44,7 @@ def fetch_period_data(conn: sqlite3.Connection, start_date: str, end_date: str)
     FROM brain_results br
     JOIN videos v ON br.video_id = v.video_id
     WHERE v.published_at >= ? AND v.published_at < ?
+    {"AND br.video_id NOT IN (SELECT video_id FROM near_duplicates)" if has_dups else ""}
     """
 
     rows = conn.execute(q, (start_date, end_date)).fetchall()
@@ -92,6 +93,13 @@ def compute_climate_stats(items: List[Dict]) -> Dict:
     # Average density
     avg_density = sum(i['theological_density'] for i in items) / len(items)
 
+    # Spread (population std), matching climate_rollup.window_stats
+    def _std(key: str, mean: float) -> float:
+        return (sum((i[key] - mean) ** 2 for i in items) / len(items)) ** 0.5
+
+    std_density = _std('theological_density', avg_density)
+    std_axes = {axis: _std(axis, mean) for axis, mean in avg_axes.items()}
+
     # Aggregate categories
     category_totals = {}
     for item in items:
@@ -118,6 +126,8 @@ def compute_climate_stats(items: List[Dict]) -> Dict:
         'count': len(items),
         'avg_density': avg_density,
         'avg_axes': avg_axes,
+        'std_density': std_density,
+        'std_axes': std_axes,
         'top_categories': top_categories,
         'top_books': top_books,
         'drift_distribution': drift_distribution,
@@ -126,19 +136,24 @@ def compute_climate_stats(items: List[Dict]) -> Dict:
 
 def generate_climate_snapshot(days: int = 30) -> Dict:
     """Generate climate snapshot comparing current vs previous period."""
-    conn = _connect()
-
     now = datetime.utcnow()
-    current_end = now.strftime('%Y-%m-%d %H:%M:%S')
-    current_start = (now - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
-    previous_end = current_start
-    previous_start = (now - timedelta(days=days * 2)).strftime('%Y-%m-%d %H:%M:%S')
-
-    current_items = fetch_period_data(conn, current_start, current_end)
-    previous_items = fetch_period_data(conn, previous_start, previous_end)
-
-    current_stats = compute_climate_stats(current_items)
-    previous_stats = compute_climate_stats(previous_items)
+    with db.connection() as conn:
+        # Whole days from the rollup tables: the window ends after today.
+        end_day = (now + timedelta(days=1)).strftime('%Y-%m-%d')
+        mid_day = (now + timedelta(days=1 - days)).strftime('%Y-%m-%d')
+        start_day = (now + timedelta(days=1 - days * 2)).strftime('%Y-%m-%d')
+        current_stats = window_stats(conn, mid_day, end_day)
+        previous_stats = window_stats(conn, start_day, mid_day)
+
+        if current_stats is None or previous_stats is None:
+            # No rollups (not migrated yet): decode brain_results directly.
+            current_end = now.strftime('%Y-%m-%d %H:%M:%S')
+            current_start = (now - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+            previous_end = current_start
+            previous_start = (now - timedelta(days=days * 2)).strftime('%Y-%m-%d %H:%M:%S')
+
+            current_stats = compute_climate_stats(fetch_period_data(conn, current_start, current_end))
+            previous_stats = compute_climate_stats(fetch_period_data(conn, previous_start, previous_end))
 
     # Compute deltas
     deltas = {}
@@ -166,8 +181,6 @@ def generate_climate_snapshot(days: int = 30) -> Dict:
         )
         drift_rate_previous = (drift_count_prev / previous_stats['count']) * 100
 
-    conn.close()
-
     return {
         'period_days': days,
         'current': current_stats,
@@ -6,14 +6,106 @@ import logging
 logger = logging.getLogger("digital_pulpit")
 
 DATABASE_PATH = os.environ.get("DATABASE_PATH", "db/digital_pulpit.db")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_BATCH_SIZE = int(os.environ.get("DB_BATCH_SIZE", "200"))
+DB_FLUSH_SECONDS = float(os.environ.get("DB_FLUSH_SECONDS", "30"))
+# Rows per fetchmany() for db.iter_rows / iter_batches / iter_table
+DB_ITER_BATCH_SIZE = int(os.environ.get("DB_ITER_BATCH_SIZE", "500"))
+# Read-only copy of the database for the dashboard (see engine/snapshot.py)
+DB_SNAPSHOT_PATH = os.environ.get(
+    "DB_SNAPSHOT_PATH", os.path.splitext(DATABASE_PATH)[0] + ".snapshot.db")
+DB_SNAPSHOT_MAX_AGE = float(os.environ.get("DB_SNAPSHOT_MAX_AGE", "300"))
+# Snapshot copy step: pages per backup step, and the pause between steps (seconds)
+DB_SNAPSHOT_PAGES = int(os.environ.get("DB_SNAPSHOT_PAGES", "1024"))
+DB_SNAPSHOT_STEP_SLEEP = float(os.environ.get("DB_SNAPSHOT_STEP_SLEEP", "0.005"))
+# Transcript body storage: "none" (plain TEXT), "zlib" or "zstd" (needs zstandard)
+TRANSCRIPT_CODEC = os.environ.get("TRANSCRIPT_CODEC", "none").strip().lower() or "none"
+# Segment storage: "json" (segments_json TEXT) or "packed" (segments_bin, see engine/segments.py)
+SEGMENT_FORMAT = os.environ.get("SEGMENT_FORMAT", "json").strip().lower() or "json"
 MAX_MINUTES_PER_RUN = int(os.environ.get("MAX_MINUTES_PER_RUN", "180"))
 MAX_VIDEOS_PER_RUN = int(os.environ.get("MAX_VIDEOS_PER_RUN", "120"))
+# A queued video longer than the minutes a run has left waits this long
+# (seconds) before it can be claimed again, so shorter ones go first
+VACUUM_DEFER_SECONDS = float(os.environ.get("VACUUM_DEFER_SECONDS", "600"))
 KEEP_AUDIO_ON_FAIL = os.environ.get("KEEP_AUDIO_ON_FAIL", "false").lower() == "true"
 CAPTIONS_ONLY = os.environ.get("CAPTIONS_ONLY", "0").strip() in ("1", "true", "yes")
 YOUTUBE_API_KEY = os.environ.get("YOUTUBE_API_KEY", "")
+# YouTube Data API quota: daily units, pacing rate (units/s) and burst (engine/quota.py)
+YT_QUOTA_DAILY = int(os.environ.get("YT_QUOTA_DAILY", "10000"))
+YT_QUOTA_RATE = float(os.environ.get("YT_QUOTA_RATE", "1000"))
+YT_QUOTA_BURST = float(os.environ.get("YT_QUOTA_BURST", "2000"))
+# Channels resolved/discovered concurrently by Vacuum
+DISCOVERY_WORKERS = int(os.environ.get("DISCOVERY_WORKERS", "8"))
+# Channel resolution cache (engine/youtube.py): how long a resolved / failed
+# lookup is trusted, and the pace of uncached lookups (yt-dlp, HTML, API)
+CHANNEL_CACHE_TTL_DAYS = float(os.environ.get("CHANNEL_CACHE_TTL_DAYS", "30"))
+CHANNEL_CACHE_NEGATIVE_TTL_HOURS = float(os.environ.get("CHANNEL_CACHE_NEGATIVE_TTL_HOURS", "24"))
+CHANNEL_RESOLVE_RATE = float(os.environ.get("CHANNEL_RESOLVE_RATE", "1"))
+# "uploads": incremental, via uploads playlists and per-channel high-water
+# marks (~1-2 units/channel); "search": search.list over the last 14 days (100+)
+DISCOVERY_MODE = os.environ.get("DISCOVERY_MODE", "uploads").strip().lower() or "uploads"
+# Channel scheduler (engine/scheduler.py): "cadence" polls only channels likely
+# to have new uploads, best expected yield first; "all" polls every channel.
+# SCHEDULE_MAX_CHANNELS caps channels polled per run (0 = no cap).
+CHANNEL_SCHEDULE = os.environ.get("CHANNEL_SCHEDULE", "cadence").strip().lower() or "cadence"
+SCHEDULE_MIN_PROBABILITY = float(os.environ.get("SCHEDULE_MIN_PROBABILITY", "0.5"))
+SCHEDULE_MAX_STALE_DAYS = float(os.environ.get("SCHEDULE_MAX_STALE_DAYS", "7"))
+SCHEDULE_MAX_CHANNELS = int(os.environ.get("SCHEDULE_MAX_CHANNELS", "0"))
+# Vacuum pipeline stages (engine/stages.py): workers per stage, and how many
+# finished items each stage may hold before it blocks the one upstream
+DOWNLOAD_WORKERS = int(os.environ.get("DOWNLOAD_WORKERS", "2"))
+PREP_WORKERS = int(os.environ.get("PREP_WORKERS", "1"))
+TRANSCRIBE_WORKERS = int(os.environ.get("TRANSCRIBE_WORKERS", "3"))
+# Chunks of one oversized file sent to the API at once, and attempts per chunk
+CHUNK_WORKERS = int(os.environ.get("CHUNK_WORKERS", "4"))
+CHUNK_ATTEMPTS = int(os.environ.get("CHUNK_ATTEMPTS", "3"))
+CAPTION_WORKERS = int(os.environ.get("CAPTION_WORKERS", "2"))
+STAGE_QUEUE_SIZE = int(os.environ.get("STAGE_QUEUE_SIZE", "2"))
+# Job queue (engine/jobs.py): lease length (renewed by a heartbeat while the
+# worker lives), attempts before dead-lettering, first retry delay (doubles)
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_SECONDS = float(os.environ.get("JOB_BACKOFF_SECONDS", "60"))
+# RSS feed poller (engine/feeds.py): feeds fetched at once (and pooled
+# connections), request timeout in seconds
+FEED_POLL_WORKERS = int(os.environ.get("FEED_POLL_WORKERS", "8"))
+FEED_TIMEOUT = float(os.environ.get("FEED_TIMEOUT", "30"))
+# Near-duplicate transcripts (engine/dedupe.py): index every transcript as it
+# is written, and the estimated word-shingle Jaccard at which a transcript is
+# collapsed into an earlier one (captions and Whisper of one sermon differ in
+# enough words to stay well below 1)
+NEAR_DUP_INDEX = os.environ.get("NEAR_DUP_INDEX", "1").strip() in ("1", "true", "yes")
+NEAR_DUP_THRESHOLD = float(os.environ.get("NEAR_DUP_THRESHOLD", "0.5"))
+# Audio downloads (engine/downloads.py): content-addressed store of fetched
+# enclosures and its size cap (least recently used pruned first), concurrent
+# downloads per host, and attempts per download (each resumes the last)
+AUDIO_STORE_DIR = os.environ.get("AUDIO_STORE_DIR", "audio_store")
+AUDIO_STORE_MAX_MB = float(os.environ.get("AUDIO_STORE_MAX_MB", "2048"))
+DOWNLOAD_PER_HOST = int(os.environ.get("DOWNLOAD_PER_HOST", "2"))
+DOWNLOAD_ATTEMPTS = int(os.environ.get("DOWNLOAD_ATTEMPTS", "4"))
+# Local transcription (engine/whisper_pool.py): ASR backend ("whisper" =
+# openai-whisper, "faster_whisper" = CTranslate2, needs faster-whisper) and
+# its CPU compute type, Whisper model size, worker processes that each load
+# it once (0 = one per WHISPER_THREADS available cores) and threads per worker
+LOCAL_ASR_BACKEND = os.environ.get("LOCAL_ASR_BACKEND", "whisper").strip().lower() or "whisper"
+ASR_COMPUTE_TYPE = os.environ.get("ASR_COMPUTE_TYPE", "int8")
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base")
+WHISPER_WORKERS = int(os.environ.get("WHISPER_WORKERS", "0"))
+WHISPER_THREADS = int(os.environ.get("WHISPER_THREADS", "4"))
+# Vacuum transcription: "openai" (API, engine/transcription.py) or "local"
+# (the Whisper pool above)
+VACUUM_TRANSCRIBER = os.environ.get("VACUUM_TRANSCRIBER", "openai").strip().lower() or "openai"
+# Podcast ingestion (engine/podcasts.py): newest episodes taken per feed
+PODCAST_EPISODES_PER_FEED = int(os.environ.get("PODCAST_EPISODES_PER_FEED", "5"))
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 DASHBOARD_PASSWORD = os.environ.get("DASHBOARD_PASSWORD", "")
 TMP_AUDIO_DIR = "tmp_audio"
+# YouTube audio: stream yt-dlp straight into one ffmpeg encode to 16 kHz mono
+# (off = yt-dlp's own MP3 extraction), written to AUDIO_STREAM_DIR, e.g. a
+# tmpfs such as /dev/shm/digital_pulpit (default: TMP_AUDIO_DIR)
+AUDIO_STREAM = os.environ.get("AUDIO_STREAM", "1").strip() in ("1", "true", "yes")
+AUDIO_STREAM_DIR = os.environ.get("AUDIO_STREAM_DIR", "").strip() or TMP_AUDIO_DIR
 
 
 def load_channels_csv(path="data/channels.csv"):
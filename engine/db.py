@@ -1,17 +1,45 @@
+import atexit
+import functools
 import hashlib
+import json
 import sqlite3
 import logging
-from typing import Dict, List, Optional
+import threading
+import time
+import weakref
+import zlib
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from engine.config import DATABASE_PATH
+try:
+    import zstandard
+except ImportError:  # optional; only needed for TRANSCRIPT_CODEC=zstd
+    zstandard = None
+
+from engine.config import (
+    DATABASE_PATH,
+    DB_BATCH_SIZE,
+    DB_FLUSH_SECONDS,
+    DB_ITER_BATCH_SIZE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    NEAR_DUP_INDEX,
+    SEGMENT_FORMAT,
+    TRANSCRIPT_CODEC,
+)
+from engine.segments import PackedSegments, encode_segments, load_segments
 
 logger = logging.getLogger("digital_pulpit")
 
-_TABLE_COL_CACHE: Dict[str, List[str]] = {}
+# (db_path, table, schema_version) -> column names
+_TABLE_COL_CACHE: Dict[Tuple[str, str, int], List[str]] = {}
+
+
+# ---------------- CONNECTIONS ----------------
 
 
-def get_conn():
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30)
+def _apply_pragmas(conn: sqlite3.Connection) -> None:
     try:
         conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("PRAGMA synchronous=NORMAL")
@@ -19,23 +47,466 @@ def get_conn():
         conn.execute("PRAGMA busy_timeout=8000")
     except Exception:
         pass
-    return conn
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    """SQL functions the schema relies on: dp_text() (see TRANSCRIPT STORAGE)."""
+    conn.create_function("dp_text", 3, _sql_text, deterministic=True)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection owned by a ConnectionPool.
+
+    close() hands the connection back to its pool instead of closing it,
+    so legacy callers that do `conn = ...; ...; conn.close()` keep working.
+    """
+
+    _pool: Optional["ConnectionPool"] = None
+    _tx_depth: int = 0
+    db_path: str = ""
+
+    def close(self):
+        if self._pool is None:
+            super().close()
+        else:
+            self._pool.release(self)
+
+    def _really_close(self):
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of configured connections to one database file.
+
+    A thread that acquires twice gets the same connection back (re-entrant);
+    it is returned to the idle list once the outermost acquire is released.
+    PRAGMAs are applied once, when a connection is first opened.
+    """
+
+    def __init__(self, db_path: str, size: int = DB_POOL_SIZE,
+                 timeout: float = DB_POOL_TIMEOUT):
+        self.db_path = db_path
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self._idle: List[PooledConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._local = threading.local()
+        self._closed = False
+        self.opened = 0
+        self.reused = 0
+
+    def _open(self) -> PooledConnection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=30,
+            factory=PooledConnection,
+            check_same_thread=False,
+        )
+        _apply_pragmas(conn)
+        conn.row_factory = sqlite3.Row
+        register_functions(conn)
+        conn._pool = self
+        conn.db_path = self.db_path
+        self.opened += 1
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.depth += 1
+            return conn
+
+        if self._closed:
+            raise sqlite3.ProgrammingError(f"Connection pool for {self.db_path} is closed")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(
+                f"Connection pool exhausted ({self.size} connections to {self.db_path})"
+            )
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._open()
+            else:
+                self.reused += 1
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn: PooledConnection) -> None:
+        if getattr(self._local, "conn", None) is not conn:
+            return
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+
+        self._local.conn = None
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn._tx_depth = 0
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            conn._really_close()
+            conn = None
+
+        with self._lock:
+            if conn is not None and not self._closed:
+                self._idle.append(conn)
+                conn = None
+        if conn is not None:
+            conn._really_close()
+        self._slots.release()
+
+    def close_all(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn._really_close()
+            except Exception:
+                pass
+
+
+_POOLS: Dict[str, ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(db_path: Optional[str] = None) -> ConnectionPool:
+    path = db_path or DATABASE_PATH
+    with _POOLS_LOCK:
+        pool = _POOLS.get(path)
+        if pool is None:
+            pool = ConnectionPool(path)
+            _POOLS[path] = pool
+        return pool
+
+
+def close_pools() -> None:
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+atexit.register(close_pools)
+
+
+def get_conn(db_path: Optional[str] = None) -> PooledConnection:
+    """
+    Check out this thread's pooled connection.
+
+    Call close() when done to return it to the pool. Prefer connection()
+    or transaction() in new code.
+
+    Unlike the old per-call sqlite3.connect(), rows come back as
+    sqlite3.Row: positional access and unpacking work as before, but a row
+    is not a tuple (no tuple equality, concatenation or json.dumps). The
+    connection is shared with this thread's other users, so code that
+    needs plain tuples sets row_factory on its own cursor, not on conn.
+    """
+    return get_pool(db_path).acquire()
 
 
 get_connection = get_conn
 
 
+@contextmanager
+def connection(db_path: Optional[str] = None) -> Iterator[PooledConnection]:
+    pool = get_pool(db_path)
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+@contextmanager
+def transaction(db_path: Optional[str] = None) -> Iterator[PooledConnection]:
+    """
+    Explicit transaction scope on this thread's pooled connection.
+
+    The outermost scope issues BEGIN IMMEDIATE and commits on success (rolls
+    back on error). Nested scopes become SAVEPOINTs, so an inner failure
+    only unwinds the inner work.
+
+    IMMEDIATE takes the write lock up front, waiting out busy_timeout: a
+    deferred BEGIN that reads first cannot upgrade to a write once another
+    thread has committed, and fails with "database is locked" instead.
+    """
+    with connection(db_path) as conn:
+        depth = conn._tx_depth
+        savepoint = f"dp_sp_{depth}"
+        if depth == 0:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+        else:
+            conn.execute(f"SAVEPOINT {savepoint}")
+        conn._tx_depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            conn._tx_depth = depth
+            if depth == 0:
+                conn.rollback()
+            else:
+                conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+            raise
+        conn._tx_depth = depth
+        if depth == 0:
+            conn.commit()
+        else:
+            conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+
+
+@contextmanager
+def reading(conn: Optional[sqlite3.Connection] = None,
+            db_path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    """Use the caller's connection if given, else a pooled checkout."""
+    if conn is not None:
+        yield conn
+    else:
+        with connection(db_path) as pooled:
+            yield pooled
+
+
+# ---------------- BATCHED WRITES ----------------
+
+
+_LIVE_WRITERS: "weakref.WeakSet[BatchWriter]" = weakref.WeakSet()
+
+
+class BatchWriter:
+    """
+    Buffers video inserts, transcripts and status transitions and writes
+    them in a single transaction (videos, then transcripts, then statuses).
+
+    A flush happens when batch_size rows are pending, when flush_seconds
+    have passed since the last flush, on close()/context exit (including
+    exit by exception) and at interpreter exit. Status updates are
+    coalesced per video: only the latest transition is written. A
+    transcript's on_commit callback runs once its flush has committed.
+    """
+
+    def __init__(self, batch_size: int = DB_BATCH_SIZE,
+                 flush_seconds: float = DB_FLUSH_SECONDS,
+                 db_path: Optional[str] = None):
+        self.batch_size = max(1, int(batch_size))
+        self.flush_seconds = flush_seconds
+        self.db_path = db_path
+        self._videos: List[tuple] = []
+        self._transcripts: List[Tuple[Dict[str, Any], Optional[Callable[[], Any]]]] = []
+        self._statuses: Dict[str, tuple] = {}
+        self._lock = threading.RLock()
+        self._last_flush = time.monotonic()
+        self.flushes = 0
+        self.rows_written = 0
+        _LIVE_WRITERS.add(self)
+
+    def __enter__(self) -> "BatchWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._videos) + len(self._transcripts) + len(self._statuses)
+
+    def upsert_video(self, video_id, channel_id, title, published_at,
+                     duration_seconds, status="discovered"):
+        with self._lock:
+            self._videos.append(
+                (video_id, channel_id, title, published_at, duration_seconds, status)
+            )
+        self._maybe_flush()
+
+    def insert_transcript(self, video_id: str, transcript_text: str, segments_json,
+                          language: str, word_count: int, model: str,
+                          provider: str = "openai_api",
+                          on_commit: Optional[Callable[[], Any]] = None):
+        """Buffer an insert_transcript() call; on_commit runs after it is committed."""
+        minhash = None
+        if NEAR_DUP_INDEX:
+            # Hashed on the caller's thread, not inside the flush transaction.
+            from engine import dedupe
+            minhash = dedupe.signature(transcript_text)
+        with self._lock:
+            self._transcripts.append((dict(
+                video_id=video_id, transcript_text=transcript_text,
+                segments_json=segments_json, language=language, word_count=word_count,
+                model=model, provider=provider, minhash=minhash,
+            ), on_commit))
+        self._maybe_flush()
+
+    def update_video_status(self, video_id: str, status: str,
+                            error_message: Optional[str] = None):
+        with self._lock:
+            self._statuses.pop(video_id, None)
+            self._statuses[video_id] = (status, error_message)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        due = (time.monotonic() - self._last_flush) >= self.flush_seconds
+        if due or self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            videos = self._videos
+            transcripts = self._transcripts
+            statuses = self._statuses
+            if not videos and not transcripts and not statuses:
+                self._last_flush = time.monotonic()
+                return 0
+
+            with transaction(self.db_path) as conn:
+                if videos:
+                    conn.executemany(
+                        """
+                        INSERT OR IGNORE INTO videos
+                        (video_id, channel_id, title, published_at, duration_seconds, status)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        videos,
+                    )
+                for kwargs, _ in transcripts:
+                    # Nested scope: a SAVEPOINT inside this transaction.
+                    insert_transcript(**kwargs, db_path=self.db_path)
+                if statuses:
+                    sql, _ = _STATEMENTS.get(conn, "update_video_status",
+                                             _build_update_video_status)
+                    conn.executemany(
+                        sql,
+                        [(s, e, vid) for vid, (s, e) in statuses.items()],
+                    )
+
+            written = len(videos) + len(transcripts) + len(statuses)
+            self._videos = []
+            self._transcripts = []
+            self._statuses = {}
+            self._last_flush = time.monotonic()
+            self.flushes += 1
+            self.rows_written += written
+
+        for _, on_commit in transcripts:
+            if on_commit is not None:
+                try:
+                    on_commit()
+                except Exception:
+                    logger.exception("Transcript on_commit callback failed")
+        return written
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            _LIVE_WRITERS.discard(self)
+
+
+def _flush_live_writers():
+    for writer in list(_LIVE_WRITERS):
+        try:
+            writer.close()
+        except Exception:
+            logger.exception("Failed to flush pending batched writes at exit")
+
+
+# Registered after close_pools so it runs first (atexit is LIFO).
+atexit.register(_flush_live_writers)
+
+
+# ---------------- STATEMENT CACHE ----------------
+
+
+def _schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA schema_version").fetchone()[0]
+
+
 def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
-    if table in _TABLE_COL_CACHE:
-        return _TABLE_COL_CACHE[table]
-    cols = [
-        row[1]
-        for row in conn.execute(f"PRAGMA table_info({table})").fetchall()
-    ]
-    _TABLE_COL_CACHE[table] = cols
+    key = (getattr(conn, "db_path", ""), table, _schema_version(conn))
+    cols = _TABLE_COL_CACHE.get(key)
+    if cols is None:
+        cols = [
+            row[1]
+            for row in conn.execute(f"PRAGMA table_info({table})").fetchall()
+        ]
+        _TABLE_COL_CACHE[key] = cols
     return cols
 
 
+class StatementCache:
+    """
+    Column-adaptive SQL built once per (database, statement, schema_version).
+
+    A builder receives the connection and returns (sql, params), where
+    params names the value keys to bind, in placeholder order. Any DDL bumps
+    PRAGMA schema_version, so entries for an older schema simply stop
+    matching and are dropped on the next miss.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Tuple[int, str, Tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, conn: sqlite3.Connection, name: str,
+            build: Callable[[sqlite3.Connection], Tuple[str, List[str]]]
+            ) -> Tuple[str, Tuple[str, ...]]:
+        version = _schema_version(conn)
+        key = (getattr(conn, "db_path", ""), name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+
+        sql, params = build(conn)
+        with self._lock:
+            self._entries[key] = (version, sql, tuple(params))
+            stale = [k for k in _TABLE_COL_CACHE if k[0] == key[0] and k[2] != version]
+            for k in stale:
+                _TABLE_COL_CACHE.pop(k, None)
+        return sql, tuple(params)
+
+    def execute(self, conn: sqlite3.Connection, name: str,
+                build: Callable[[sqlite3.Connection], Tuple[str, List[str]]],
+                values: Dict[str, Any]) -> sqlite3.Cursor:
+        sql, params = self.get(conn, name, build)
+        return conn.execute(sql, [values[p] for p in params])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            _TABLE_COL_CACHE.clear()
+
+
+_STATEMENTS = StatementCache()
+
+
+def statement_cache_stats() -> Dict[str, int]:
+    return _STATEMENTS.stats()
+
+
 def _pick_col(cols: List[str], candidates: List[str]) -> Optional[str]:
     for c in candidates:
         if c in cols:
@@ -43,9 +514,88 @@ def _pick_col(cols: List[str], candidates: List[str]) -> Optional[str]:
     return None
 
 
+# ---------------- STREAMING READS ----------------
+#
+# Cursor-backed iterators for scans over large tables: at most batch_size
+# rows are held at once, instead of fetchall() materializing the result.
+# The connection stays checked out until the iterator is exhausted or
+# closed, so break out of a loop only when the iterator is about to be
+# dropped (or wrap it in contextlib.closing()).
+
+
+def iter_batches(sql: str, params: Sequence[Any] = (),
+                 batch_size: int = DB_ITER_BATCH_SIZE,
+                 db_path: Optional[str] = None,
+                 conn: Optional[sqlite3.Connection] = None) -> Iterator[List[sqlite3.Row]]:
+    """Run `sql` and yield its rows in lists of up to batch_size."""
+    with reading(conn, db_path) as c:
+        cur = c.execute(sql, tuple(params))
+        cur.arraysize = max(1, int(batch_size))
+        try:
+            while True:
+                batch = cur.fetchmany()
+                if not batch:
+                    return
+                yield batch
+        finally:
+            cur.close()
+
+
+def iter_rows(sql: str, params: Sequence[Any] = (),
+              batch_size: int = DB_ITER_BATCH_SIZE,
+              db_path: Optional[str] = None,
+              conn: Optional[sqlite3.Connection] = None) -> Iterator[sqlite3.Row]:
+    """Run `sql` and yield rows one at a time, fetched batch_size at a time."""
+    for batch in iter_batches(sql, params, batch_size, db_path, conn):
+        yield from batch
+
+
+def projection(conn: sqlite3.Connection, table: str, columns: Sequence[str],
+               alias: str = "") -> str:
+    """
+    SELECT list for `columns` of `table`; columns this schema lacks come
+    back as NULL so callers can index rows by name either way.
+    """
+    have = set(_table_columns(conn, table))
+    prefix = f"{alias}." if alias else ""
+    return ", ".join(
+        f"{prefix}{c}" if c in have else f"NULL AS {c}" for c in columns
+    )
+
+
+def iter_table(table: str, columns: Optional[Sequence[str]] = None,
+               where: str = "", params: Sequence[Any] = (),
+               order_by: str = "", limit: Optional[int] = None,
+               batch_size: int = DB_ITER_BATCH_SIZE,
+               db_path: Optional[str] = None,
+               conn: Optional[sqlite3.Connection] = None) -> Iterator[sqlite3.Row]:
+    """
+    Stream `table`, reading only `columns` (all columns when None).
+
+    Select only the columns you use: a scan that skips full_text or
+    raw_scores_json never pulls those bodies off disk.
+    """
+    with reading(conn, db_path) as c:
+        cols = projection(c, table, columns) if columns else "*"
+        sql = f"SELECT {cols} FROM {table}"
+        if where:
+            sql += f" WHERE {where}"
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        yield from iter_rows(sql, params, batch_size, conn=c)
+
+
+def init_db(db_path: Optional[str] = None) -> List[int]:
+    """Create the base schema and apply pending migrations (engine/migrate.py)."""
+    from engine import migrate
+
+    return migrate.init_db(db_path)
+
+
 def migrate_channels_table():
-    _TABLE_COL_CACHE.pop("channels", None)
-    with get_conn() as conn:
+    with connection() as conn:
         cur = conn.execute("PRAGMA table_info(channels)")
         existing_cols = {row[1]: row for row in cur.fetchall()}
         if not existing_cols:
@@ -141,7 +691,7 @@ def migrate_channels_table():
 
 
 def create_run(run_type: str) -> int:
-    with get_conn() as conn:
+    with transaction() as conn:
         cur = conn.execute(
             "INSERT INTO runs (run_type, status) VALUES (?, 'running')",
             (run_type,),
@@ -150,8 +700,9 @@ def create_run(run_type: str) -> int:
 
 
 def finish_run(run_id: int, status: str, videos_processed: int,
-               minutes_processed: float, notes: str):
-    with get_conn() as conn:
+               minutes_processed: float, notes: str,
+               quota_units: Optional[int] = None):
+    with transaction() as conn:
         conn.execute(
             """
             UPDATE runs
@@ -161,60 +712,186 @@ def finish_run(run_id: int, status: str, videos_processed: int,
             """,
             (status, videos_processed, minutes_processed, notes, run_id),
         )
+        if quota_units is not None and "quota_units" in _table_columns(conn, "runs"):
+            conn.execute("UPDATE runs SET quota_units = ? WHERE run_id = ?",
+                         (quota_units, run_id))
+
+
+def get_db_stats() -> Dict[str, Any]:
+    """Row counts for the main tables and videos per status."""
+    stats: Dict[str, Any] = {}
+    with connection() as conn:
+        for table in ("channels", "videos", "transcripts", "brain_results"):
+            try:
+                stats[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            except sqlite3.OperationalError:  # brain_results before the first analysis
+                stats[table] = 0
+        stats["video_statuses"] = dict(conn.execute(
+            "SELECT status, COUNT(*) FROM videos GROUP BY status ORDER BY COUNT(*) DESC"
+        ).fetchall())
+    return stats
 
 
 # ---------------- CHANNELS ----------------
 
 
+def _build_upsert_channel(conn: sqlite3.Connection) -> Tuple[str, List[str]]:
+    cols = _table_columns(conn, "channels")
+
+    col_name = _pick_col(cols, ["name", "channel_name"])
+    col_url = _pick_col(cols, ["url", "channel_url", "source_url"])
+    col_method = _pick_col(cols, [
+        "resolution_method", "resolved_via", "resolved_method",
+        "resolution_source", "method"
+    ])
+
+    insert_cols = ["channel_id"]
+    params = ["channel_id"]
+    update_sets = []
+
+    for col, param in [(col_name, "name"), (col_url, "url"), (col_method, "method")]:
+        if col:
+            insert_cols.append(col)
+            params.append(param)
+            update_sets.append(f"{col}=excluded.{col}")
+
+    if update_sets:
+        sql = f"""
+        INSERT INTO channels ({', '.join(insert_cols)})
+        VALUES ({', '.join(['?']*len(insert_cols))})
+        ON CONFLICT(channel_id) DO UPDATE SET
+            {', '.join(update_sets)}
+        """
+    else:
+        sql = f"INSERT OR IGNORE INTO channels ({', '.join(insert_cols)}) VALUES ({', '.join(['?']*len(insert_cols))})"
+    return sql, params
+
+
 def upsert_channel(channel_id: str, name: str, url: str, method: str):
-    with get_conn() as conn:
-        cols = _table_columns(conn, "channels")
-
-        col_name = _pick_col(cols, ["name", "channel_name"])
-        col_url = _pick_col(cols, ["url", "channel_url", "source_url"])
-        col_method = _pick_col(cols, [
-            "resolution_method", "resolved_via", "resolved_method",
-            "resolution_source", "method"
-        ])
+    has_channel_id = bool(channel_id and str(channel_id).strip())
 
-        has_channel_id = bool(channel_id and str(channel_id).strip())
+    if not has_channel_id:
+        if url and str(url).strip():
+            channel_id = "URL_" + hashlib.sha256(url.strip().encode()).hexdigest()[:16]
+            logger.info("Generated surrogate channel_id %s for url %s", channel_id, url)
+        else:
+            logger.warning("No channel_id and no url — cannot upsert channel %s", name)
+            return
 
-        if not has_channel_id:
-            if url and str(url).strip():
-                channel_id = "URL_" + hashlib.sha256(url.strip().encode()).hexdigest()[:16]
-                has_channel_id = True
-                logger.info("Generated surrogate channel_id %s for url %s", channel_id, url)
-            else:
-                logger.warning("No channel_id and no url — cannot upsert channel %s", name)
-                return
-
-        insert_cols = ["channel_id"]
-        insert_vals = [channel_id]
-        update_sets = []
-
-        if col_name:
-            insert_cols.append(col_name)
-            insert_vals.append(name)
-            update_sets.append(f"{col_name}=excluded.{col_name}")
-        if col_url:
-            insert_cols.append(col_url)
-            insert_vals.append(url)
-            update_sets.append(f"{col_url}=excluded.{col_url}")
-        if col_method:
-            insert_cols.append(col_method)
-            insert_vals.append(method)
-            update_sets.append(f"{col_method}=excluded.{col_method}")
-
-        if update_sets:
-            sql = f"""
-            INSERT INTO channels ({', '.join(insert_cols)})
-            VALUES ({', '.join(['?']*len(insert_cols))})
+    with transaction() as conn:
+        _STATEMENTS.execute(conn, "upsert_channel", _build_upsert_channel, {
+            "channel_id": channel_id,
+            "name": name,
+            "url": url,
+            "method": method,
+        })
+
+
+def get_discovery_marks(channel_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """channel_discovery rows (high-water marks) keyed by channel_id."""
+    marks: Dict[str, Dict[str, Any]] = {}
+    ids = list(channel_ids)
+    with connection() as conn:
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            rows = conn.execute(
+                "SELECT channel_id, uploads_playlist_id, last_video_id, last_published_at, checked_at "
+                f"FROM channel_discovery WHERE channel_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for r in rows:
+                marks[r[0]] = {
+                    "uploads_playlist_id": r[1],
+                    "last_video_id": r[2],
+                    "last_published_at": r[3],
+                    "checked_at": r[4],
+                }
+    return marks
+
+
+def get_publish_history(channel_ids: Sequence[str],
+                        per_channel: int = 20) -> Dict[str, List[str]]:
+    """Newest `per_channel` videos.published_at values of each channel, newest first."""
+    history: Dict[str, List[str]] = {}
+    ids = list(channel_ids)
+    with connection() as conn:
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            rows = conn.execute(
+                f"""
+                SELECT channel_id, published_at FROM (
+                    SELECT channel_id, published_at,
+                           ROW_NUMBER() OVER (PARTITION BY channel_id
+                                              ORDER BY published_at DESC) AS rn
+                    FROM videos
+                    WHERE published_at IS NOT NULL
+                      AND channel_id IN ({','.join('?' * len(chunk))})
+                ) WHERE rn <= ?
+                ORDER BY channel_id, published_at DESC
+                """,
+                [*chunk, per_channel],
+            ).fetchall()
+            for r in rows:
+                history.setdefault(r[0], []).append(r[1])
+    return history
+
+
+def set_discovery_mark(channel_id: str, uploads_playlist_id: Optional[str],
+                       last_video_id: Optional[str], last_published_at: Optional[str]):
+    """Record a channel's newest seen upload (keeps the old mark if none given)."""
+    with transaction() as conn:
+        conn.execute(
+            """
+            INSERT INTO channel_discovery
+            (channel_id, uploads_playlist_id, last_video_id, last_published_at, checked_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
             ON CONFLICT(channel_id) DO UPDATE SET
-                {', '.join(update_sets)}
+                uploads_playlist_id = COALESCE(excluded.uploads_playlist_id, uploads_playlist_id),
+                last_video_id = COALESCE(excluded.last_video_id, last_video_id),
+                last_published_at = COALESCE(excluded.last_published_at, last_published_at),
+                checked_at = CURRENT_TIMESTAMP
+            """,
+            (channel_id, uploads_playlist_id, last_video_id, last_published_at),
+        )
+
+
+def get_channel_resolution(key: str, ttl_seconds: float,
+                           negative_ttl_seconds: float) -> Optional[Dict[str, Any]]:
+    """
+    Cached resolution for a channel key if still fresh, else None.
+    A fresh negative entry comes back with channel_id None.
+    """
+    with connection() as conn:
+        row = conn.execute(
             """
-        else:
-            sql = f"INSERT OR IGNORE INTO channels ({', '.join(insert_cols)}) VALUES ({', '.join(['?']*len(insert_cols))})"
-        conn.execute(sql, insert_vals)
+            SELECT channel_id, method, resolved_at, attempts FROM channel_resolution
+            WHERE key = ?
+              AND resolved_at >= datetime('now',
+                    CASE WHEN channel_id IS NULL THEN ? ELSE ? END)
+            """,
+            (key, f"-{int(negative_ttl_seconds)} seconds", f"-{int(ttl_seconds)} seconds"),
+        ).fetchone()
+    if row is None:
+        return None
+    return {"channel_id": row[0], "method": row[1], "resolved_at": row[2], "attempts": row[3]}
+
+
+def set_channel_resolution(key: str, channel_id: Optional[str], method: str):
+    """Store a resolution; channel_id None records a failure (negative entry)."""
+    with transaction() as conn:
+        conn.execute(
+            """
+            INSERT INTO channel_resolution (key, channel_id, method, resolved_at, attempts)
+            VALUES (?1, ?2, ?3, CURRENT_TIMESTAMP, CASE WHEN ?2 IS NULL THEN 1 ELSE 0 END)
+            ON CONFLICT(key) DO UPDATE SET
+                channel_id = excluded.channel_id,
+                method = excluded.method,
+                resolved_at = excluded.resolved_at,
+                attempts = CASE WHEN excluded.channel_id IS NULL
+                                THEN channel_resolution.attempts + 1 ELSE 0 END
+            """,
+            (key, channel_id, method),
+        )
 
 
 # ---------------- VIDEOS ----------------
@@ -222,7 +899,7 @@ def upsert_channel(channel_id: str, name: str, url: str, method: str):
 
 def upsert_video(video_id, channel_id, title, published_at,
                  duration_seconds, status="discovered"):
-    with get_conn() as conn:
+    with transaction() as conn:
         conn.execute(
             """
             INSERT OR IGNORE INTO videos
@@ -233,6 +910,25 @@ def upsert_video(video_id, channel_id, title, published_at,
         )
 
 
+def _build_insert_or_ignore_video(conn: sqlite3.Connection) -> Tuple[str, List[str]]:
+    cols = _table_columns(conn, "videos")
+
+    insert_cols = ["video_id"]
+    for col in ["channel_id", "title", "published_at", "duration_seconds",
+                "status", "error_message"]:
+        if col in cols:
+            insert_cols.append(col)
+    params = list(insert_cols)
+
+    placeholders = ["?"] * len(insert_cols)
+    if "discovered_at" in cols:
+        insert_cols.append("discovered_at")
+        placeholders.append("CURRENT_TIMESTAMP")
+
+    sql = f"INSERT OR IGNORE INTO videos ({', '.join(insert_cols)}) VALUES ({', '.join(placeholders)})"
+    return sql, params
+
+
 def insert_or_ignore_video(
     video_id: str,
     channel_id: str,
@@ -242,111 +938,642 @@ def insert_or_ignore_video(
     status: str = "discovered",
     error_message: Optional[str] = None,
 ):
-    with get_conn() as conn:
-        cols = _table_columns(conn, "videos")
-
-        insert_cols = ["video_id"]
-        insert_vals = [video_id]
-
-        for col, val in [
-            ("channel_id", channel_id),
-            ("title", title),
-            ("published_at", published_at),
-            ("duration_seconds", duration_seconds),
-            ("status", status),
-            ("error_message", error_message),
-        ]:
-            if col in cols:
-                insert_cols.append(col)
-                insert_vals.append(val)
-
-        if "discovered_at" in cols:
-            insert_cols.append("discovered_at")
-            sql_values = ", ".join(["?"] * (len(insert_cols) - 1) +
-                                   ["CURRENT_TIMESTAMP"])
-            sql = f"INSERT OR IGNORE INTO videos ({', '.join(insert_cols)}) VALUES ({sql_values})"
-            conn.execute(sql, insert_vals)
-        else:
-            sql = f"INSERT OR IGNORE INTO videos ({', '.join(insert_cols)}) VALUES ({', '.join(['?']*len(insert_cols))})"
-            conn.execute(sql, insert_vals)
+    with transaction() as conn:
+        _STATEMENTS.execute(conn, "insert_or_ignore_video", _build_insert_or_ignore_video, {
+            "video_id": video_id,
+            "channel_id": channel_id,
+            "title": title,
+            "published_at": published_at,
+            "duration_seconds": duration_seconds,
+            "status": status,
+            "error_message": error_message,
+        })
+
+
+def _build_update_video_status(conn: sqlite3.Connection) -> Tuple[str, List[str]]:
+    set_updated = ", updated_at = CURRENT_TIMESTAMP" \
+        if "updated_at" in _table_columns(conn, "videos") else ""
+    sql = f"UPDATE videos SET status = ?, error_message = ?{set_updated} WHERE video_id = ?"
+    return sql, ["status", "error_message", "video_id"]
 
 
 def update_video_status(video_id: str, status: str,
                         error_message: Optional[str]):
-    with get_conn() as conn:
-        cols = _table_columns(conn, "videos")
-
-        if "updated_at" in cols:
-            conn.execute(
-                """
-                UPDATE videos
-                SET status = ?, error_message = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE video_id = ?
-                """,
-                (status, error_message, video_id),
-            )
-        else:
-            conn.execute(
-                """
-                UPDATE videos
-                SET status = ?, error_message = ?
-                WHERE video_id = ?
-                """,
-                (status, error_message, video_id),
-            )
+    with transaction() as conn:
+        _STATEMENTS.execute(conn, "update_video_status", _build_update_video_status, {
+            "status": status,
+            "error_message": error_message,
+            "video_id": video_id,
+        })
 
 
 # ---------------- TRANSCRIPTS ----------------
 
 
+def _transcript_upsert_sql(insert_cols: List[str]) -> str:
+    placeholders = ", ".join(["?"] * len(insert_cols))
+    update_cols = [c for c in insert_cols if c != "video_id"]
+    if update_cols:
+        update_set = ", ".join([f"{c}=excluded.{c}" for c in update_cols])
+        return f"""
+        INSERT INTO transcripts ({', '.join(insert_cols)})
+        VALUES ({placeholders})
+        ON CONFLICT(video_id) DO UPDATE SET
+            {update_set}
+        """
+    return f"""
+        INSERT OR IGNORE INTO transcripts ({', '.join(insert_cols)})
+        VALUES ({placeholders})
+        """
+
+
+def _transcript_insert_columns(conn: sqlite3.Connection, compressed: bool,
+                               packed: bool) -> Tuple[List[str], List[str]]:
+    cols = _table_columns(conn, "transcripts")
+    # Bodies stored elsewhere (compressed / packed) bind their plain column to NULL.
+    body = "null" if compressed else "transcript_text"
+    segments = "null" if compressed or packed else "segments_json"
+
+    insert_cols = ["video_id"]
+    params = ["video_id"]
+    for col, param in [
+        ("transcript_text", body),
+        ("full_text", body),
+        ("segments_json", segments),
+        ("language", "language"),
+        ("word_count", "word_count"),
+        ("model", "model"),
+        ("transcript_model", "model"),
+        ("transcript_provider", "provider"),
+        ("text_codec", "text_codec"),
+        ("full_text_z", "full_text_z"),
+        ("segments_z", "segments_z"),
+        ("segments_bin", "segments_bin"),
+    ]:
+        if col in cols:
+            insert_cols.append(col)
+            params.append(param)
+    return insert_cols, params
+
+
+def _build_insert_transcript(conn: sqlite3.Connection, compressed: bool = False,
+                             packed: bool = False) -> Tuple[str, List[str]]:
+    insert_cols, params = _transcript_insert_columns(conn, compressed, packed)
+    return _transcript_upsert_sql(insert_cols), params
+
+
 def insert_transcript(
     video_id: str,
     transcript_text: str,
-    segments_json: str,
+    segments_json,
     language: str,
     word_count: int,
     model: str,
     provider: str = "openai_api",
+    codec: Optional[str] = None,
+    segment_format: Optional[str] = None,
+    db_path: Optional[str] = None,
+    minhash: Optional[Sequence[int]] = None,
 ):
-    with get_conn() as conn:
-        cols = _table_columns(conn, "transcripts")
-
-        data = {"video_id": video_id}
-
-        if "transcript_text" in cols:
-            data["transcript_text"] = transcript_text
-        if "full_text" in cols:
-            data["full_text"] = transcript_text
-        if "segments_json" in cols:
-            data["segments_json"] = segments_json
-        if "language" in cols:
-            data["language"] = language
-        if "word_count" in cols:
-            data["word_count"] = word_count
-        if "model" in cols:
-            data["model"] = model
-        if "transcript_model" in cols:
-            data["transcript_model"] = model
-        if "transcript_provider" in cols:
-            data["transcript_provider"] = provider
-
-        insert_cols = list(data.keys())
-        placeholders = ", ".join(["?"] * len(insert_cols))
-        insert_vals = [data[c] for c in insert_cols]
-
-        update_cols = [c for c in insert_cols if c != "video_id"]
-        if update_cols:
-            update_set = ", ".join([f"{c}=excluded.{c}" for c in update_cols])
-            sql = f"""
-            INSERT INTO transcripts ({', '.join(insert_cols)})
-            VALUES ({placeholders})
-            ON CONFLICT(video_id) DO UPDATE SET
-                {update_set}
-            """
+    """
+    Upsert a transcript. segments_json may be a JSON string or the segment
+    list itself; storage follows TRANSCRIPT_CODEC and SEGMENT_FORMAT unless
+    codec / segment_format are given. With NEAR_DUP_INDEX the transcript is
+    added to the near-duplicate index in the same transaction; minhash is
+    its dedupe.signature() if the caller already computed it.
+    """
+    codec = codec or TRANSCRIPT_CODEC
+    packed = (segment_format or SEGMENT_FORMAT) == "packed"
+    compressed = codec != "none"
+
+    if packed:
+        segments = json.loads(segments_json) if isinstance(segments_json, str) else segments_json
+        segments_bin = encode_segments(segments or [])
+        segments_json = None
+    else:
+        segments_bin = None
+        if not isinstance(segments_json, str) and segments_json is not None:
+            segments_json = json.dumps(segments_json)
+
+    values = {
+        "video_id": video_id,
+        "transcript_text": transcript_text,
+        "segments_json": segments_json,
+        "language": language,
+        "word_count": word_count,
+        "model": model,
+        "provider": provider,
+        "null": None,
+        # Cleared on plain writes so no stale body from an earlier format survives.
+        "text_codec": codec if compressed else None,
+        "full_text_z": _compress(codec, transcript_text) if compressed else None,
+        "segments_z": _compress(codec, segments_json) if compressed else None,
+        "segments_bin": segments_bin,
+    }
+    name = f"insert_transcript:{codec if compressed else 'none'}:{'packed' if packed else 'json'}"
+    build = functools.partial(_build_insert_transcript, compressed=compressed, packed=packed)
+
+    if NEAR_DUP_INDEX:
+        from engine import dedupe
+        if minhash is None:
+            minhash = dedupe.signature(transcript_text)
+
+    with transaction(db_path) as conn:
+        if compressed or packed:
+            ensure_transcript_storage_columns(conn)
+        _STATEMENTS.execute(conn, name, build, values)
+        if NEAR_DUP_INDEX:
+            dedupe.index_signature(conn, video_id, minhash)
+
+
+# ---------------- TRANSCRIPT STORAGE ----------------
+#
+# Opt-in compressed storage (TRANSCRIPT_CODEC=zlib|zstd). A compressed row
+# has text_codec set, full_text/transcript_text/segments_json NULL and the
+# bodies in full_text_z/segments_z. Read through get_transcript() or, in
+# SQL, transcript_text_sql() (dp_text(text_codec, full_text, full_text_z))
+# on a connection with register_functions(); filter with
+# has_transcript_text_sql(), which does not decompress.
+#
+# With SEGMENT_FORMAT=packed, segments go to segments_bin in the columnar
+# format from engine/segments.py instead of segments_json. segments_bin is
+# never compressed, so it can be read without copying.
+
+
+def _compress(codec: str, text: Optional[str]) -> Optional[bytes]:
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    if codec == "zlib":
+        return zlib.compress(data, 9)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("TRANSCRIPT_CODEC=zstd requires the zstandard package")
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    raise ValueError(f"Unknown transcript codec: {codec}")
+
+
+def _decompress(codec: Optional[str], blob: Optional[bytes]) -> Optional[str]:
+    if blob is None:
+        return None
+    if codec == "zlib":
+        return zlib.decompress(blob).decode("utf-8")
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Reading zstd transcripts requires the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+    raise ValueError(f"Unknown transcript codec: {codec}")
+
+
+def _sql_text(codec, plain, blob):
+    if not codec or codec == "none":
+        return plain
+    return _decompress(codec, blob)
+
+
+def compressed_transcript_storage(conn: sqlite3.Connection) -> bool:
+    """
+    True when transcripts may hold compressed text (TRANSCRIPT_CODEC).
+
+    False for a database that predates the storage columns, e.g. one opened
+    with plain sqlite3.connect() and never migrated by init_db().
+    """
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(transcripts)")}
+    return {"text_codec", "full_text_z"} <= cols
+
+
+def transcript_text_sql(alias: str = "t", conn: Optional[sqlite3.Connection] = None) -> str:
+    """
+    SQL expression for a transcripts row's text, however it is stored.
+
+    Given `conn`, the plain column is used on a database without compressed
+    storage, and dp_text() is registered on `conn` otherwise.
+    """
+    p = f"{alias}." if alias else ""
+    if conn is not None:
+        if not compressed_transcript_storage(conn):
+            return f"{p}full_text"
+        register_functions(conn)
+    return f"dp_text({p}text_codec, {p}full_text, {p}full_text_z)"
+
+
+def has_transcript_text_sql(alias: str = "t", conn: Optional[sqlite3.Connection] = None) -> str:
+    """
+    SQL condition: the transcripts row has non-blank text, plain or compressed.
+    Given `conn`, only plain text is checked on a database without compressed storage.
+    """
+    p = f"{alias}." if alias else ""
+    if conn is not None and not compressed_transcript_storage(conn):
+        return f"(COALESCE(LENGTH(TRIM({p}full_text)), 0) > 0)"
+    return f"(COALESCE(LENGTH(TRIM({p}full_text)), 0) > 0 OR {p}full_text_z IS NOT NULL)"
+
+
+def ensure_transcript_storage_columns(conn: sqlite3.Connection) -> None:
+    cols = _table_columns(conn, "transcripts")
+    for col, decl in [("text_codec", "TEXT"), ("full_text_z", "BLOB"),
+                      ("segments_z", "BLOB"), ("segments_bin", "BLOB")]:
+        if col not in cols:
+            conn.execute(f"ALTER TABLE transcripts ADD COLUMN {col} {decl}")
+
+
+class LazyTranscript(Mapping):
+    """
+    Read-only view of a transcripts row.
+
+    full_text / transcript_text / segments_json are decompressed on first
+    access, so callers that only need metadata never pay for the body.
+    `segments` gives PackedSegments for packed rows and a list otherwise.
+    """
+
+    _TEXT_KEYS = ("full_text", "transcript_text")
+
+    def __init__(self, row: sqlite3.Row):
+        self._row = row
+        self._keys = list(row.keys())
+        self._codec = row["text_codec"] if "text_codec" in self._keys else None
+        self._decoded: Dict[str, Optional[str]] = {}
+
+    @property
+    def compressed(self) -> bool:
+        return bool(self._codec) and self._codec != "none"
+
+    @property
+    def text(self) -> Optional[str]:
+        return self["full_text"]
+
+    @property
+    def segments(self):
+        blob = self._row["segments_bin"] if "segments_bin" in self._keys else None
+        if blob is not None:
+            return PackedSegments(blob)
+        return load_segments(self["segments_json"])
+
+    def __getitem__(self, key: str):
+        if key not in self._keys:
+            raise KeyError(key)
+        if key == "segments_json" and self._row["segments_json"] is None \
+                and "segments_bin" in self._keys and self._row["segments_bin"] is not None:
+            return self.segments.to_json()
+        if not self.compressed or key not in self._TEXT_KEYS + ("segments_json",):
+            return self._row[key]
+        if key not in self._decoded:
+            blob_col = "segments_z" if key == "segments_json" else "full_text_z"
+            self._decoded[key] = _decompress(self._codec, self._row[blob_col])
+        return self._decoded[key]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def get_transcript(video_id: str) -> Optional[LazyTranscript]:
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT * FROM transcripts WHERE video_id = ?", (video_id,)
+        ).fetchone()
+    return LazyTranscript(row) if row is not None else None
+
+
+def convert_transcripts(codec: str, batch_size: int = 200,
+                        db_path: Optional[str] = None) -> int:
+    """
+    Re-encode stored transcripts to `codec` ("none" decompresses back to
+    plain TEXT), one transaction per batch. Returns rows converted.
+    Run VACUUM afterwards to return freed pages to the filesystem.
+    """
+    if codec != "none":
+        _compress(codec, "")  # fail fast on an unavailable codec
+
+    converted = 0
+    with transaction(db_path) as conn:
+        ensure_transcript_storage_columns(conn)
+        has_transcript_text = "transcript_text" in _table_columns(conn, "transcripts")
+
+    while True:
+        with transaction(db_path) as conn:
+            rows = conn.execute(
+                """
+                SELECT transcript_id, text_codec, full_text, segments_json,
+                       full_text_z, segments_z
+                FROM transcripts
+                WHERE COALESCE(text_codec, 'none') != ?
+                LIMIT ?
+                """,
+                (codec, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+
+            updates = []
+            for r in rows:
+                text = _sql_text(r["text_codec"], r["full_text"], r["full_text_z"])
+                segments = _sql_text(r["text_codec"], r["segments_json"], r["segments_z"])
+                if codec == "none":
+                    updates.append((text, text, segments, None, None, None, r["transcript_id"]))
+                else:
+                    updates.append((None, None, None, codec, _compress(codec, text),
+                                    _compress(codec, segments), r["transcript_id"]))
+
+            set_transcript_text = "transcript_text = ?, " if has_transcript_text else ""
+            if not has_transcript_text:
+                updates = [u[:1] + u[2:] for u in updates]
+            conn.executemany(
+                f"""
+                UPDATE transcripts
+                SET full_text = ?, {set_transcript_text}segments_json = ?,
+                    text_codec = ?, full_text_z = ?, segments_z = ?
+                WHERE transcript_id = ?
+                """,
+                updates,
+            )
+            converted += len(rows)
+        logger.info(f"Converted {converted} transcripts to codec={codec}")
+
+    return converted
+
+
+def pack_transcript_segments(batch_size: int = 200,
+                             db_path: Optional[str] = None) -> int:
+    """
+    Move segments_json / segments_z into the packed segments_bin format,
+    one transaction per batch. Returns rows converted.
+    """
+    converted = 0
+    with transaction(db_path) as conn:
+        ensure_transcript_storage_columns(conn)
+
+    while True:
+        with transaction(db_path) as conn:
+            rows = conn.execute(
+                """
+                SELECT transcript_id, text_codec, segments_json, segments_z
+                FROM transcripts
+                WHERE segments_bin IS NULL
+                  AND (segments_json IS NOT NULL OR segments_z IS NOT NULL)
+                LIMIT ?
+                """,
+                (batch_size,),
+            ).fetchall()
+            if not rows:
+                break
+
+            updates = []
+            for r in rows:
+                raw = _sql_text(r["text_codec"], r["segments_json"], r["segments_z"])
+                try:
+                    segments = json.loads(raw) if raw else []
+                except ValueError:
+                    logger.warning(f"Unparseable segments_json for transcript {r['transcript_id']}; storing empty")
+                    segments = []
+                updates.append((encode_segments(segments), r["transcript_id"]))
+
+            conn.executemany(
+                """
+                UPDATE transcripts
+                SET segments_bin = ?, segments_json = NULL, segments_z = NULL
+                WHERE transcript_id = ?
+                """,
+                updates,
+            )
+            converted += len(rows)
+        logger.info(f"Packed segments for {converted} transcripts")
+
+    return converted
+
+
+# ---------------- FULL-TEXT SEARCH ----------------
+#
+# External-content FTS5 indexes: the index references the source text
+# instead of copying it, and triggers keep it in step with inserts, updates
+# and deletes. Transcripts are indexed through the transcripts_text view,
+# which reads rows stored compressed (TRANSCRIPT_CODEC) with dp_text(), so
+# connections that write transcripts or search them must have dp_text
+# (register_functions(); pooled and snapshot connections do).
+
+# fts -> (source table, indexed column, content table or view, the column's
+#         value for a source row, columns whose update re-indexes the row)
+_FTS_SOURCES = {
+    "transcripts_fts": ("transcripts", "full_text", "transcripts_text",
+                        "dp_text({row}.text_codec, {row}.full_text, {row}.full_text_z)",
+                        ("full_text", "text_codec", "full_text_z")),
+    "brain_evidence_fts": ("brain_evidence", "excerpt", "brain_evidence",
+                           "{row}.excerpt", ("excerpt",)),
+}
+_FTS_READY: Dict[Tuple[str, str], bool] = {}
+
+_SNIPPET_OPEN = "\x02"
+_SNIPPET_CLOSE = "\x03"
+
+
+def _rowid_col(conn: sqlite3.Connection, table: str) -> str:
+    # An INTEGER PRIMARY KEY survives VACUUM; a bare rowid may be renumbered.
+    pks = [r for r in conn.execute(f"PRAGMA table_info({table})").fetchall() if r[5]]
+    if len(pks) == 1 and (pks[0][2] or "").upper() == "INTEGER":
+        return pks[0][1]
+    return "rowid"
+
+
+def _fts_schema(fts: str, rid: str) -> Dict[str, str]:
+    """name -> CREATE statement for the index, its content view and triggers."""
+    table, col, content, value, watched = _FTS_SOURCES[fts]
+    new, old = value.format(row="new"), value.format(row="old")
+    ddl = {}
+    if content != table:
+        ddl[content] = (f"CREATE VIEW {content} AS SELECT {rid}, "
+                        f"{value.format(row=table)} AS {col} FROM {table}")
+    ddl[fts] = (f"CREATE VIRTUAL TABLE {fts} USING fts5("
+                f"{col}, content='{content}', content_rowid='{rid}', tokenize='porter unicode61')")
+    ddl[f"{fts}_ai"] = f"""
+        CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {col}) VALUES (new.{rid}, {new});
+        END
+    """
+    ddl[f"{fts}_ad"] = f"""
+        CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.{rid}, {old});
+        END
+    """
+    ddl[f"{fts}_au"] = f"""
+        CREATE TRIGGER {fts}_au AFTER UPDATE OF {', '.join(watched)} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.{rid}, {old});
+            INSERT INTO {fts}(rowid, {col}) VALUES (new.{rid}, {new});
+        END
+    """
+    return ddl
+
+
+def ensure_fts(conn: sqlite3.Connection) -> List[str]:
+    """
+    Create the FTS5 tables, content views and sync triggers for every
+    source table that exists. An index that is new, or whose definition has
+    changed, is (re)built from its source. Returns the FTS tables now
+    available.
+    """
+    ready = []
+    schema = {
+        r[0]: r[1] for r in conn.execute("SELECT name, sql FROM sqlite_master")
+    }
+    for fts, (table, col, content, _, watched) in _FTS_SOURCES.items():
+        cols = _table_columns(conn, table) if table in schema else []
+        if not set(watched) <= set(cols):
+            continue
+        ready.append(fts)
+        wanted = _fts_schema(fts, _rowid_col(conn, table))
+        if all(" ".join((schema.get(name) or "").split()) == " ".join(sql.split())
+               for name, sql in wanted.items()):
+            continue
+
+        # Missing or an older definition: drop the lot (the index last, as
+        # the triggers write to it) and build it again from the source.
+        for name in reversed(list(wanted)):
+            if name in schema:
+                kind = "VIEW" if name == content != table else "TRIGGER" if name != fts else "TABLE"
+                conn.execute(f"DROP {kind} {name}")
+        for sql in wanted.values():
+            conn.execute(sql)
+        conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        logger.info(f"Built full-text index {fts} over {table}.{col}")
+    return ready
+
+
+def rebuild_fts(db_path: Optional[str] = None) -> None:
+    """Rebuild every FTS index from its source table."""
+    with transaction(db_path) as conn:
+        for fts in ensure_fts(conn):
+            conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _fts_available(conn: sqlite3.Connection, fts: str) -> bool:
+    if not isinstance(conn, PooledConnection):
+        # Caller-owned (e.g. read-only snapshot) connection: use what is there.
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (fts,)
+        ).fetchone() is not None
+    key = (getattr(conn, "db_path", ""), fts)
+    if not _FTS_READY.get(key):
+        with transaction(getattr(conn, "db_path", None) or None) as tx:
+            for name in ensure_fts(tx):
+                _FTS_READY[(key[0], name)] = True
+    return bool(_FTS_READY.get(key))
+
+
+def fts_query(terms: List[str], mode: str = "any", prefix: bool = False) -> str:
+    """
+    Build a MATCH expression from plain words or phrases, quoting each so
+    user input cannot inject FTS syntax. mode is "any" (OR) or "all" (AND).
+    """
+    parts = []
+    for term in terms:
+        term = (term or "").strip()
+        if not term:
+            continue
+        quoted = '"' + term.replace('"', '""') + '"'
+        parts.append(quoted + ("*" if prefix else ""))
+    return (" OR " if mode == "any" else " AND ").join(parts)
+
+
+def _snippet_offsets(marked: str) -> Tuple[str, List[Tuple[int, int]]]:
+    # FTS5 snippet() marks hits with our control characters; strip them and
+    # report where each hit sits in the clean snippet.
+    out: List[str] = []
+    offsets: List[Tuple[int, int]] = []
+    pos = 0
+    start = None
+    for ch in marked or "":
+        if ch == _SNIPPET_OPEN:
+            start = pos
+        elif ch == _SNIPPET_CLOSE:
+            if start is not None:
+                offsets.append((start, pos))
+            start = None
         else:
-            sql = f"""
-            INSERT OR IGNORE INTO transcripts ({', '.join(insert_cols)})
-            VALUES ({placeholders})
-            """
+            out.append(ch)
+            pos += 1
+    return "".join(out), offsets
+
+
+def search_transcripts(query: str, limit: int = 20, snippet_tokens: int = 24,
+                       db_path: Optional[str] = None,
+                       conn: Optional[sqlite3.Connection] = None) -> List[Dict[str, Any]]:
+    """
+    BM25-ranked transcript search. `query` is an FTS5 MATCH expression (see
+    fts_query). Each hit has video_id, score (lower is better), snippet and
+    offsets: (start, end) character spans of the matches inside snippet.
+    Pass `conn` to search a caller-owned connection such as a snapshot.
+    """
+    with reading(conn, db_path) as conn:
+        if not _fts_available(conn, "transcripts_fts"):
+            return []
+        rid = _rowid_col(conn, "transcripts")
+        rows = conn.execute(
+            f"""
+            SELECT t.video_id, bm25(transcripts_fts) AS score,
+                   snippet(transcripts_fts, 0, ?, ?, '…', ?) AS snip
+            FROM transcripts_fts
+            JOIN transcripts t ON t.{rid} = transcripts_fts.rowid
+            WHERE transcripts_fts MATCH ?
+            ORDER BY score
+            LIMIT ?
+            """,
+            (_SNIPPET_OPEN, _SNIPPET_CLOSE, snippet_tokens, query, limit),
+        ).fetchall()
+
+    out = []
+    for r in rows:
+        snippet, offsets = _snippet_offsets(r["snip"])
+        out.append({
+            "video_id": r["video_id"],
+            "score": r["score"],
+            "snippet": snippet,
+            "offsets": offsets,
+        })
+    return out
+
+
+def search_evidence(query: str, limit: int = 50, category: Optional[str] = None,
+                    video_id: Optional[str] = None,
+                    db_path: Optional[str] = None,
+                    conn: Optional[sqlite3.Connection] = None) -> List[Dict[str, Any]]:
+    """BM25-ranked brain_evidence search; same result shape plus excerpt/category."""
+    where = ["brain_evidence_fts MATCH ?"]
+    params: List[Any] = [_SNIPPET_OPEN, _SNIPPET_CLOSE, query]
+    if category:
+        where.append("be.category = ?")
+        params.append(category)
+    if video_id:
+        where.append("be.video_id = ?")
+        params.append(video_id)
+    params.append(limit)
+
+    with reading(conn, db_path) as conn:
+        if not _fts_available(conn, "brain_evidence_fts"):
+            return []
+        rid = _rowid_col(conn, "brain_evidence")
+        rows = conn.execute(
+            f"""
+            SELECT be.video_id, be.category, be.excerpt,
+                   bm25(brain_evidence_fts) AS score,
+                   highlight(brain_evidence_fts, 0, ?, ?) AS snip
+            FROM brain_evidence_fts
+            JOIN brain_evidence be ON be.{rid} = brain_evidence_fts.rowid
+            WHERE {' AND '.join(where)}
+            ORDER BY score
+            LIMIT ?
+            """,
+            params,
+        ).fetchall()
 
-        conn.execute(sql, insert_vals)
+    out = []
+    for r in rows:
+        snippet, offsets = _snippet_offsets(r["snip"])
+        out.append({
+            "video_id": r["video_id"],
+            "category": r["category"],
+            "excerpt": r["excerpt"],
+            "score": r["score"],
+            "snippet": snippet,
+            "offsets": offsets,
+        })
+    return out
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+engine/dedupe.py - Near-duplicate transcript detection (MinHash LSH)
+
+The same sermon reaches the corpus as a YouTube video, a podcast episode
+and re-uploads, each with its own video_id and slightly different ASR
+wording. Every transcript gets a MinHash signature over its word
+3-shingles (migrations/007_near_duplicates.sql):
+
+  transcript_minhash  signature per video_id
+  minhash_bands       LSH buckets: NUM_BANDS bands of ROWS_PER_BAND values
+  near_duplicates     video_id -> canonical_id, for every transcript whose
+                      estimated Jaccard with an earlier one reaches
+                      NEAR_DUP_THRESHOLD
+
+db.insert_transcript() indexes each transcript as it is written, so a
+new transcript is checked only against the few already-indexed ones
+that share a bucket with it. The first transcript of a group is its
+canonical. The other members are in near_duplicates: sermon_analyst does
+not analyze them, and climate rollups leave out their brain_results.
+
+    python -m engine.dedupe --backfill      # index transcripts written before this
+    python -m engine.dedupe                 # list near-duplicate groups
+"""
+
+import argparse
+import hashlib
+import logging
+import random
+import re
+import sqlite3
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from engine import db
+from engine.config import NEAR_DUP_THRESHOLD
+
+logger = logging.getLogger("digital_pulpit")
+
+# Words per shingle. Short shingles survive the word-level differences
+# between two ASR passes over the same audio; unrelated sermons still
+# share only a few percent of their 3-shingles.
+SHINGLE_WORDS = 3
+# Fewer shingles than this and the transcript is not indexed (a clip or a
+# failed transcription would match anything equally short)
+MIN_SHINGLES = 100
+NUM_PERM = 128
+# 32 x 4 puts the LSH threshold near 0.42: pairs at 0.5 are candidates
+# ~87% of the time, pairs at 0.6 ~99%
+NUM_BANDS = 32
+ROWS_PER_BAND = NUM_PERM // NUM_BANDS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20261016)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def shingles(text: str) -> set:
+    """64-bit hashes of the text's lowercased word 3-grams."""
+    words = _WORD_RE.findall((text or "").lower())
+    k = SHINGLE_WORDS
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(words[i:i + k]).encode(), digest_size=8).digest(),
+                       "little") % _PRIME
+        for i in range(len(words) - k + 1)
+    }
+
+
+def signature(text: str) -> Optional[List[int]]:
+    """MinHash signature of text, or None when it is too short to index."""
+    sh = shingles(text)
+    if len(sh) < MIN_SHINGLES:
+        return None
+    return [min((a * x + b) % _PRIME for x in sh) for a, b in _PERMS]
+
+
+def similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of the two transcripts' shingle sets."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def _bands(sig: Sequence[int]) -> List[int]:
+    keys = []
+    for band in range(NUM_BANDS):
+        chunk = array("Q", sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]).tobytes()
+        keys.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(),
+                                   "little", signed=True))
+    return keys
+
+
+def _unpack(blob: bytes) -> List[int]:
+    return array("Q", blob).tolist()
+
+
+# ---------------- INDEX ----------------
+
+
+def index_signature(conn: sqlite3.Connection, video_id: str, sig: Optional[Sequence[int]],
+                    threshold: float = NEAR_DUP_THRESHOLD) -> Optional[str]:
+    """
+    Add (or replace) video_id's signature in the index, inside the caller's
+    transaction. Returns the canonical video_id when it is a near duplicate.
+    """
+    conn.execute("DELETE FROM minhash_bands WHERE video_id = ?", (video_id,))
+    conn.execute("DELETE FROM transcript_minhash WHERE video_id = ?", (video_id,))
+    if sig is None:
+        conn.execute("DELETE FROM near_duplicates WHERE video_id = ?", (video_id,))
+        return None
+
+    keys = _bands(sig)
+    candidates = set()
+    for band, bucket in enumerate(keys):
+        candidates.update(r[0] for r in conn.execute(
+            "SELECT video_id FROM minhash_bands WHERE band = ? AND bucket = ?", (band, bucket)))
+    candidates.discard(video_id)
+
+    best_id, best_sim = None, 0.0
+    for cid in sorted(candidates):
+        row = conn.execute("SELECT signature FROM transcript_minhash WHERE video_id = ?",
+                           (cid,)).fetchone()
+        if row is None:
+            continue
+        sim = similarity(sig, _unpack(row[0]))
+        if sim > best_sim:
+            best_id, best_sim = cid, sim
+
+    canonical = None
+    if best_id is not None and best_sim >= threshold:
+        row = conn.execute("SELECT canonical_id FROM near_duplicates WHERE video_id = ?",
+                           (best_id,)).fetchone()
+        canonical = row[0] if row else best_id
+    if canonical is not None and canonical != video_id:
+        # Upsert rather than REPLACE: climate rollup triggers fire on
+        # insert/delete of this table, and REPLACE's delete would not.
+        conn.execute(
+            """
+            INSERT INTO near_duplicates (video_id, canonical_id, matched_id, similarity)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET
+                canonical_id = excluded.canonical_id, matched_id = excluded.matched_id,
+                similarity = excluded.similarity, detected_at = CURRENT_TIMESTAMP
+            """,
+            (video_id, canonical, best_id, round(best_sim, 4)),
+        )
+    else:
+        canonical = None
+        conn.execute("DELETE FROM near_duplicates WHERE video_id = ?", (video_id,))
+
+    conn.execute("INSERT INTO transcript_minhash (video_id, signature) VALUES (?, ?)",
+                 (video_id, array("Q", sig).tobytes()))
+    conn.executemany("INSERT OR IGNORE INTO minhash_bands (band, bucket, video_id) VALUES (?, ?, ?)",
+                     [(band, bucket, video_id) for band, bucket in enumerate(keys)])
+    if canonical:
+        logger.info(f"Transcript {video_id} is a near duplicate of {canonical} "
+                    f"(similarity {best_sim:.2f} with {best_id})")
+    return canonical
+
+
+def backfill(batch_size: int = 200) -> int:
+    """
+    Index transcripts that have no signature yet, oldest publish date
+    first so an original upload becomes its group's canonical.
+    """
+    pending = [r[0] for r in db.iter_rows(
+        """
+        SELECT t.video_id FROM transcripts t
+        LEFT JOIN videos v ON v.video_id = t.video_id
+        LEFT JOIN transcript_minhash m ON m.video_id = t.video_id
+        WHERE m.video_id IS NULL
+        ORDER BY v.published_at IS NULL, v.published_at, t.video_id
+        """
+    )]
+    dups = 0
+    for i in range(0, len(pending), batch_size):
+        # Signatures first, so the write transaction only touches the index.
+        sigs = []
+        for vid in pending[i:i + batch_size]:
+            transcript = db.get_transcript(vid)
+            sigs.append((vid, signature(transcript["full_text"] if transcript else "")))
+        with db.transaction() as conn:
+            dups += sum(1 for vid, sig in sigs if index_signature(conn, vid, sig))
+    logger.info(f"Indexed {len(pending)} transcripts, {dups} near duplicates")
+    return len(pending)
+
+
+def groups() -> Dict[str, List[Dict]]:
+    """canonical_id -> [{video_id, similarity}] for every near-duplicate group."""
+    out: Dict[str, List[Dict]] = {}
+    for vid, canonical, sim in db.iter_rows(
+            "SELECT video_id, canonical_id, similarity FROM near_duplicates "
+            "ORDER BY canonical_id, similarity DESC"):
+        out.setdefault(canonical, []).append({"video_id": vid, "similarity": sim})
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Near-duplicate transcript index.")
+    ap.add_argument("--backfill", action="store_true", help="Index transcripts without a signature")
+    ap.add_argument("--limit", type=int, default=50, help="Groups to list")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    db.init_db()
+
+    if args.backfill:
+        backfill()
+
+    found = groups()
+    titles = {}
+    with db.connection() as conn:
+        for canonical, members in list(found.items())[:args.limit]:
+            ids = [canonical] + [m["video_id"] for m in members]
+            titles.update(conn.execute(
+                f"SELECT video_id, title FROM videos WHERE video_id IN ({','.join('?' * len(ids))})",
+                ids).fetchall())
+    for canonical, members in list(found.items())[:args.limit]:
+        print(f"{canonical}  {(titles.get(canonical) or '')[:60]}")
+        for m in members:
+            print(f"  {m['similarity']:.2f}  {m['video_id']}  {(titles.get(m['video_id']) or '')[:60]}")
+    print(f"\n{len(found)} groups, {sum(len(m) for m in found.values())} near duplicates collapsed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+engine/downloads.py - Resumable, verified audio downloads
+
+Enclosures land in a content-addressed store under AUDIO_STORE_DIR
+(<sha256[:2]>/<sha256><ext>), indexed by the audio_blobs / audio_urls
+tables (migrations/006_audio_store.sql):
+
+  - A URL fetched before, or one that redirects to a final URL fetched
+    before (feeds wrap the same CDN file in different tracking prefixes),
+    is served from the store without downloading it again.
+  - Bytes stream into partial/<key>.part. A failed attempt keeps them and
+    the next attempt asks for the rest with Range (If-Range on the ETag /
+    Last-Modified, so a changed file starts over).
+  - The finished file must match Content-Length / the Content-Range
+    total. It is then hashed; identical content from another URL is
+    stored once.
+  - At most DOWNLOAD_PER_HOST downloads run against one host at a time.
+
+The store is capped at AUDIO_STORE_MAX_MB; prune_store() drops the least
+recently used blobs.
+
+    res = downloads.fetch_to(url, Path("tmp_audio/ep.mp3"))   # hard link to the blob
+    python -m engine.downloads URL [URL ...]    # download into the store
+    python -m engine.downloads --prune          # enforce AUDIO_STORE_MAX_MB
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from engine import db, feeds
+from engine.config import AUDIO_STORE_DIR, AUDIO_STORE_MAX_MB, DOWNLOAD_ATTEMPTS, DOWNLOAD_PER_HOST
+
+logger = logging.getLogger("digital_pulpit")
+
+CHUNK_SIZE = 1 << 16
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)|bytes\s+\*/(\d+)")
+
+
+@dataclass
+class DownloadResult:
+    url: str
+    sha256: str
+    size: int
+    path: Path                  # the blob in the store
+    reused: bool = False        # served from the store, nothing fetched
+    resumed_bytes: int = 0      # bytes from an earlier run the server resumed after (206)
+
+
+# ---------------- HOST LIMITS ----------------
+
+
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_url_locks: Dict[str, threading.Lock] = {}
+_slots_lock = threading.Lock()
+
+
+def host_slot(url: str) -> threading.BoundedSemaphore:
+    """The semaphore bounding concurrent downloads from url's host."""
+    host = (urlsplit(url).hostname or "").lower()
+    with _slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(max(1, DOWNLOAD_PER_HOST))
+        return slot
+
+
+def _url_lock(key: str) -> threading.Lock:
+    # Two threads after the same URL would share one .part file.
+    with _slots_lock:
+        return _url_locks.setdefault(key, threading.Lock())
+
+
+# ---------------- STORE ----------------
+
+
+def store_root() -> Path:
+    return Path(AUDIO_STORE_DIR)
+
+
+def _extension(url: str) -> str:
+    ext = os.path.splitext(urlsplit(url).path)[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,5}", ext) else ""
+
+
+def _partial_paths(url: str) -> Tuple[Path, Path]:
+    key = hashlib.sha1(url.encode()).hexdigest()[:24]
+    base = store_root() / "partial"
+    return base / f"{key}.part", base / f"{key}.json"
+
+
+def lookup(*urls: str) -> Optional[DownloadResult]:
+    """Stored blob for any of these URLs (as requested or after redirects)."""
+    urls = tuple(u for u in urls if u)
+    if not urls:
+        return None
+    marks = ",".join("?" * len(urls))
+    with db.connection() as conn:
+        row = conn.execute(
+            f"""
+            SELECT b.sha256, b.size_bytes, b.path FROM audio_urls u
+            JOIN audio_blobs b ON b.sha256 = u.sha256
+            WHERE u.url IN ({marks}) OR u.final_url IN ({marks})
+            LIMIT 1
+            """,
+            urls + urls,
+        ).fetchone()
+    if row is None:
+        return None
+    path = store_root() / row[2]
+    try:
+        if path.stat().st_size != row[1]:
+            return None
+    except OSError:
+        return None
+    with db.transaction() as conn:
+        conn.execute("UPDATE audio_blobs SET last_used_at = CURRENT_TIMESTAMP WHERE sha256 = ?",
+                     (row[0],))
+    return DownloadResult(urls[0], row[0], row[1], path, reused=True)
+
+
+def _record(url: str, meta: Dict, sha: str, size: int, rel: str) -> None:
+    with db.transaction() as conn:
+        conn.execute(
+            """
+            INSERT INTO audio_blobs (sha256, size_bytes, path) VALUES (?, ?, ?)
+            ON CONFLICT(sha256) DO UPDATE SET last_used_at = CURRENT_TIMESTAMP
+            """,
+            (sha, size, rel),
+        )
+        conn.execute(
+            """
+            INSERT INTO audio_urls (url, final_url, sha256, etag, last_modified)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                final_url = excluded.final_url, sha256 = excluded.sha256,
+                etag = excluded.etag, last_modified = excluded.last_modified,
+                fetched_at = CURRENT_TIMESTAMP
+            """,
+            (url, meta.get("final_url"), sha, meta.get("etag"), meta.get("last_modified")),
+        )
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ---------------- DOWNLOAD ----------------
+
+
+def _attempt(url: str, part: Path, meta_path: Path, timeout: float,
+             on_restart: Callable[[], None] = lambda: None):
+    """
+    One GET, resuming part if it has bytes. Returns the part's metadata once
+    it is complete, or a DownloadResult if the redirect target is already
+    stored. Raises (keeping the part) when the transfer stops short.
+    on_restart is called whenever the bytes part had are thrown away.
+    """
+    have = part.stat().st_size if part.exists() else 0
+    meta = json.loads(meta_path.read_text()) if have and meta_path.exists() else {}
+    headers = {}
+    if have:
+        headers["Range"] = f"bytes={have}-"
+        validator = meta.get("etag") or meta.get("last_modified")
+        if validator:
+            headers["If-Range"] = validator
+
+    with host_slot(url):
+        with feeds.get_session().get(url, headers=headers, stream=True, timeout=timeout) as resp:
+            if resp.url and resp.url != url:
+                stored = lookup(resp.url)
+                if stored is not None:
+                    stored.url = resp.url
+                    return stored
+
+            content_range = _CONTENT_RANGE.match(resp.headers.get("Content-Range", ""))
+            if resp.status_code == 416:
+                # Nothing left to send: complete if the part is the whole file.
+                total = content_range and content_range.group(4)
+                if total and int(total) == have:
+                    return meta
+                part.unlink(missing_ok=True)
+                on_restart()
+                raise IOError(f"Range not satisfiable at {have} bytes; restarting")
+            resp.raise_for_status()
+
+            if resp.status_code == 206 and content_range and content_range.group(1):
+                start = int(content_range.group(1))
+                total = None if content_range.group(3) == "*" else int(content_range.group(3))
+                if start != have or (meta.get("total") and total and total != meta["total"]):
+                    part.unlink(missing_ok=True)
+                    on_restart()
+                    raise IOError(f"Server resumed at {start}, expected {have}; restarting")
+                mode = "ab"
+            else:
+                # Full body: no resume support, or If-Range saw a changed file.
+                length = resp.headers.get("Content-Length")
+                total = int(length) if length and not resp.headers.get("Content-Encoding") else None
+                mode = "wb"
+                if have:
+                    on_restart()
+
+            meta = {
+                "url": url,
+                "final_url": resp.url or url,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "total": total,
+            }
+            part.parent.mkdir(parents=True, exist_ok=True)
+            meta_path.write_text(json.dumps(meta))
+            with open(part, mode) as f:
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+
+    size = part.stat().st_size
+    if total is not None and size != total:
+        if size > total:
+            part.unlink(missing_ok=True)
+            on_restart()
+        raise IOError(f"Incomplete download: {size} of {total} bytes")
+    return meta
+
+
+def download(url: str, timeout: float = 300, attempts: int = DOWNLOAD_ATTEMPTS) -> DownloadResult:
+    """Fetch url into the store (or find it there). Raises IOError when every attempt fails."""
+    stored = lookup(url)
+    if stored is not None:
+        return stored
+
+    part, meta_path = _partial_paths(url)
+    with _url_lock(part.name):
+        # Bytes this call did not fetch: an earlier run's part, for as long
+        # as the server keeps resuming it with 206. A 200 (Range ignored, or
+        # If-Range saw a changed file) refetches them, and so counts them.
+        resumed = part.stat().st_size if part.exists() else 0
+
+        def restarted():
+            nonlocal resumed
+            resumed = 0
+
+        for attempt in range(1, attempts + 1):
+            try:
+                outcome = _attempt(url, part, meta_path, timeout, on_restart=restarted)
+                break
+            except Exception as e:
+                kept = part.stat().st_size if part.exists() else 0
+                logger.warning(f"Download attempt {attempt}/{attempts} failed for {url}: "
+                               f"{type(e).__name__}: {e} ({kept} bytes kept)")
+                if attempt == attempts:
+                    raise IOError(f"Download failed after {attempts} attempts: "
+                                  f"{type(e).__name__}: {e}") from e
+                time.sleep(min(2 ** attempt, 30))
+
+        if isinstance(outcome, DownloadResult):
+            part.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+            _record(url, {"final_url": outcome.url}, outcome.sha256, outcome.size,
+                    str(outcome.path.relative_to(store_root())))
+            outcome.url = url
+            return outcome
+
+        size = part.stat().st_size
+        if not size:
+            part.unlink()
+            raise IOError(f"Empty download from {url}")
+        sha = _sha256(part)
+        rel = f"{sha[:2]}/{sha}{_extension(outcome.get('final_url') or url)}"
+        blob = store_root() / rel
+        if blob.exists() and blob.stat().st_size == size:
+            part.unlink()       # same content already stored from another URL
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(part, blob)
+        meta_path.unlink(missing_ok=True)
+        _record(url, outcome, sha, size, rel)
+
+    return DownloadResult(url, sha, size, blob, resumed_bytes=resumed)
+
+
+def fetch_to(url: str, dest: Path, timeout: float = 300) -> DownloadResult:
+    """download(), then hard-link (or copy) the blob to dest, which the caller may delete."""
+    result = download(url, timeout=timeout)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(result.path, dest)
+    except OSError:
+        shutil.copyfile(result.path, dest)
+    return result
+
+
+def prune_store(max_bytes: Optional[float] = None) -> Tuple[int, int]:
+    """Drop least recently used blobs past max_bytes. Returns (blobs removed, bytes freed)."""
+    if max_bytes is None:
+        max_bytes = AUDIO_STORE_MAX_MB * 1024 * 1024
+    kept, drop = 0, []
+    for sha, size, rel in db.iter_rows(
+            "SELECT sha256, size_bytes, path FROM audio_blobs ORDER BY last_used_at DESC, created_at DESC"):
+        if kept + size <= max_bytes:
+            kept += size
+        else:
+            drop.append((sha, size, rel))
+    for sha, _, rel in drop:
+        (store_root() / rel).unlink(missing_ok=True)
+    if drop:
+        with db.transaction() as conn:
+            conn.executemany("DELETE FROM audio_urls WHERE sha256 = ?", [(d[0],) for d in drop])
+            conn.executemany("DELETE FROM audio_blobs WHERE sha256 = ?", [(d[0],) for d in drop])
+        logger.info(f"Pruned {len(drop)} blobs ({sum(d[1] for d in drop) / 1048576:.0f} MB) "
+                    f"from the audio store")
+    return len(drop), sum(d[1] for d in drop)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Download audio into the content-addressed store.")
+    ap.add_argument("urls", nargs="*")
+    ap.add_argument("--prune", action="store_true", help="Enforce AUDIO_STORE_MAX_MB")
+    ap.add_argument("--max-mb", type=float, default=AUDIO_STORE_MAX_MB)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    db.init_db()
+
+    for url in args.urls:
+        r = download(url)
+        how = "reused" if r.reused else (f"resumed at {r.resumed_bytes}" if r.resumed_bytes else "fetched")
+        print(f"{r.sha256[:12]}  {r.size / 1048576:7.1f} MB  {how:<20} {url}")
+    if args.prune:
+        removed, freed = prune_store(args.max_mb * 1024 * 1024)
+        print(f"Pruned {removed} blobs, {freed / 1048576:.0f} MB freed")
+
+    with db.connection() as conn:
+        n, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM audio_blobs").fetchone()
+    print(f"Audio store: {n} blobs, {total / 1048576:.0f} MB in {store_root()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+engine/feeds.py - Conditional-GET RSS feed poller
+
+feedparser.parse(url) downloads the whole feed every time. Here feeds are
+fetched through one pooled requests.Session, replaying the ETag and
+Last-Modified the server sent last time (feed_state table,
+migrations/005_feed_state.sql):
+
+  changed       200 with a new body; parsed with feedparser
+  not_modified  304, or a 200 whose body hashes the same as last time
+                (for servers that send no validators); nothing parsed
+  error         network / HTTP error; validators are kept for next time
+
+    polled = feeds.poll_feeds(urls)             # {url: FeedResult}, concurrently
+    for url, r in polled.items():
+        if r.changed:
+            for entry in r.feed.entries: ...
+
+A caller that acts on the entries later passes defer_validators=True and
+calls save_validators() once the work is safely recorded (podcasts.ingest
+does it in the transaction that enqueues the episodes). Until then the
+old validators stay, so a crash in between means a refetch, not a feed
+that looks unchanged while its episodes were never queued.
+
+    python -m engine.feeds URL [URL ...]        # poll and print each status
+    python -m engine.feeds --file feeds.txt --force
+"""
+
+import argparse
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Collection, Dict, Iterable, List, Optional, Union
+
+import feedparser
+import requests
+
+from engine import db
+from engine.config import FEED_POLL_WORKERS, FEED_TIMEOUT
+
+logger = logging.getLogger("digital_pulpit")
+
+USER_AGENT = "DigitalPulpit/1.0 (+feed poller)"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> "requests.Session":
+    """Process-wide session, with a connection pool sized for FEED_POLL_WORKERS."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=FEED_POLL_WORKERS,
+                                                    pool_maxsize=FEED_POLL_WORKERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session = session
+        return _session
+
+
+@dataclass
+class FeedResult:
+    url: str
+    status: str                      # changed | not_modified | error
+    feed: Any = None                 # feedparser result when changed
+    http_status: Optional[int] = None
+    error: Optional[str] = None
+    bytes: int = 0
+    elapsed: float = 0.0
+    validators: Optional[Dict[str, Optional[str]]] = None   # changed: not yet saved if deferred
+
+    @property
+    def changed(self) -> bool:
+        return self.status == "changed"
+
+
+# ---------------- STATE ----------------
+
+
+def get_feed_state(url: str) -> Optional[Dict[str, Any]]:
+    with db.connection() as conn:
+        row = conn.execute(
+            "SELECT etag, last_modified, content_hash FROM feed_state WHERE url = ?", (url,)
+        ).fetchone()
+    if row is None:
+        return None
+    return {"etag": row[0], "last_modified": row[1], "content_hash": row[2]}
+
+
+def _save_state(url: str, result: FeedResult, etag: Optional[str] = None,
+                last_modified: Optional[str] = None, content_hash: Optional[str] = None) -> None:
+    # Validators only move forward on a fresh body; a 304 or an error keeps them.
+    with db.transaction() as conn:
+        conn.execute(
+            """
+            INSERT INTO feed_state (url, etag, last_modified, content_hash, http_status,
+                                    last_error, polls, not_modified, checked_at, changed_at)
+            VALUES (:url, :etag, :last_modified, :content_hash, :http_status, :error, 1,
+                    :not_modified, CURRENT_TIMESTAMP,
+                    CASE WHEN :changed THEN CURRENT_TIMESTAMP END)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = CASE WHEN :changed THEN excluded.etag ELSE etag END,
+                last_modified = CASE WHEN :changed THEN excluded.last_modified ELSE last_modified END,
+                content_hash = CASE WHEN :changed THEN excluded.content_hash ELSE content_hash END,
+                http_status = excluded.http_status,
+                last_error = excluded.last_error,
+                polls = polls + 1,
+                not_modified = not_modified + excluded.not_modified,
+                checked_at = CURRENT_TIMESTAMP,
+                changed_at = COALESCE(excluded.changed_at, changed_at)
+            """,
+            {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": content_hash,
+                "http_status": result.http_status,
+                "error": result.error,
+                "not_modified": 1 if result.status == "not_modified" else 0,
+                "changed": 1 if result.changed else 0,
+            },
+        )
+
+
+# ---------------- POLLING ----------------
+
+
+def save_validators(results: Iterable[FeedResult]) -> int:
+    """Persist the validators of changed results polled with defer_validators."""
+    saved = 0
+    with db.transaction():
+        for r in results:
+            if r.changed and r.validators is not None:
+                _save_state(r.url, r, **r.validators)
+                r.validators = None
+                saved += 1
+    return saved
+
+
+def fetch_feed(url: str, force: bool = False, timeout: float = FEED_TIMEOUT,
+               defer_validators: bool = False) -> FeedResult:
+    """
+    Poll one feed. force sends no validators and parses whatever comes back.
+    defer_validators leaves a changed feed's new validators on the result,
+    for save_validators(), instead of saving them now.
+    """
+    started = time.monotonic()
+    state = None if force else get_feed_state(url)
+    headers = {}
+    if state:
+        if state["etag"]:
+            headers["If-None-Match"] = state["etag"]
+        if state["last_modified"]:
+            headers["If-Modified-Since"] = state["last_modified"]
+
+    try:
+        resp = get_session().get(url, headers=headers, timeout=timeout)
+        if resp.status_code != 304:
+            resp.raise_for_status()
+    except Exception as e:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+        result = FeedResult(url, "error", http_status=status, error=f"{type(e).__name__}: {e}",
+                            elapsed=time.monotonic() - started)
+        logger.warning(f"Feed poll failed for {url}: {result.error}")
+        _save_state(url, result)
+        return result
+
+    elapsed = time.monotonic() - started
+    if resp.status_code == 304:
+        result = FeedResult(url, "not_modified", http_status=304, elapsed=elapsed)
+        _save_state(url, result)
+        return result
+
+    body = resp.content
+    content_hash = hashlib.sha256(body).hexdigest()
+    if state and state["content_hash"] == content_hash:
+        result = FeedResult(url, "not_modified", http_status=resp.status_code,
+                            bytes=len(body), elapsed=elapsed)
+        _save_state(url, result)
+        return result
+
+    parsed = feedparser.parse(body, response_headers={
+        "content-location": resp.url or url,
+        "content-type": resp.headers.get("Content-Type", ""),
+    })
+    result = FeedResult(url, "changed", feed=parsed, http_status=resp.status_code,
+                        bytes=len(body), elapsed=elapsed,
+                        validators={"etag": resp.headers.get("ETag"),
+                                    "last_modified": resp.headers.get("Last-Modified"),
+                                    "content_hash": content_hash})
+    if not defer_validators:
+        save_validators([result])
+    return result
+
+
+def poll_feeds(urls: List[str], workers: int = FEED_POLL_WORKERS,
+               force: Union[bool, Collection[str]] = False,
+               defer_validators: bool = False) -> Dict[str, FeedResult]:
+    """
+    Poll feeds concurrently; {url: FeedResult} in input order. force is
+    True for every feed, or the collection of URLs to fetch unconditionally.
+    With defer_validators, call save_validators(results.values()) once the
+    changed feeds have been handled.
+    """
+    urls = list(dict.fromkeys(urls))
+
+    def _one(url):
+        return fetch_feed(url, force=force if isinstance(force, bool) else url in force,
+                          defer_validators=defer_validators)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls) or 1)),
+                            thread_name_prefix="feeds") as pool:
+        results = dict(zip(urls, pool.map(_one, urls)))
+
+    counts: Dict[str, int] = {}
+    for r in results.values():
+        counts[r.status] = counts.get(r.status, 0) + 1
+    logger.info(
+        f"Polled {len(urls)} feeds in {time.monotonic() - started:.1f}s: "
+        + ", ".join(f"{n} {s}" for s, n in sorted(counts.items()))
+        + f" ({sum(r.bytes for r in results.values()) / 1024:.0f} KB downloaded)"
+    )
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Poll RSS feeds with conditional GETs.")
+    ap.add_argument("urls", nargs="*", help="Feed URLs")
+    ap.add_argument("--file", help="Read feed URLs from this file, one per line")
+    ap.add_argument("--workers", type=int, default=FEED_POLL_WORKERS)
+    ap.add_argument("--force", action="store_true", help="Ignore stored ETag / Last-Modified")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    db.init_db()
+
+    urls = list(args.urls)
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            urls += [line.strip() for line in f if line.strip().startswith("http")]
+    if not urls:
+        ap.error("no feed URLs given")
+
+    for url, r in poll_feeds(urls, workers=args.workers, force=args.force).items():
+        detail = f"{len(r.feed.entries)} entries" if r.changed else (r.error or "")
+        print(f"{r.status:<13} {r.http_status or '-':<4} {url}  {detail}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+engine/jobs.py - Durable, leased job queue in SQLite
+
+Work items live in the jobs table (migrations/004_jobs.sql), one row per
+(kind, key). A worker claims items with a single UPDATE ... RETURNING
+under BEGIN IMMEDIATE, so two processes never get the same row. A claim
+is a lease: the process heartbeat renews it every JOB_LEASE_SECONDS / 3
+while the worker is alive, and a lease left to expire (crash, kill -9)
+makes the item claimable again.
+
+A failed item is retried after JOB_BACKOFF_SECONDS * 2^(attempts-1) (with
+jitter, capped at MAX_BACKOFF_SECONDS); after max_attempts it is moved to
+the dead state for a human to look at.
+
+    jobs.enqueue_many("vacuum", [(video_id, {"duration_min": 42.0})])
+    for job in jobs.claim("vacuum", limit=4):
+        ...
+        job.complete()          # or job.fail("why"), job.release()
+
+    job = jobs.claim_key("rss_episode", episode_id)   # None: not ours to do now
+
+    python -m engine.jobs                       # counts per kind / state
+    python -m engine.jobs --dead rss_episode    # list dead-lettered items
+    python -m engine.jobs --retry-dead rss_episode
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from engine import db
+from engine.config import JOB_BACKOFF_SECONDS, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS
+
+logger = logging.getLogger("digital_pulpit")
+
+MAX_BACKOFF_SECONDS = 6 * 3600
+
+_CLAIMABLE = """
+    ((state = 'queued' AND run_after <= :now)
+     OR (state = 'leased' AND lease_expires_at < :now))
+    AND attempts < max_attempts
+"""
+_RETURNING = "RETURNING job_id, kind, key, payload_json, attempts, max_attempts"
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class Job:
+    job_id: int
+    kind: str
+    key: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    worker: str
+    db_path: Optional[str] = None
+    finished: bool = field(default=False, repr=False)
+
+    def complete(self) -> bool:
+        self.finished = True
+        return complete(self.job_id, self.worker, self.db_path)
+
+    def fail(self, error: str, retry: bool = True) -> str:
+        self.finished = True
+        return fail(self.job_id, self.worker, error, retry=retry, db_path=self.db_path)
+
+    def release(self, delay: float = 0.0) -> bool:
+        self.finished = True
+        return release(self.job_id, self.worker, delay=delay, db_path=self.db_path)
+
+
+def _job(row, worker: str, db_path: Optional[str]) -> Job:
+    payload = json.loads(row[3]) if row[3] else {}
+    return Job(row[0], row[1], row[2], payload, row[4], row[5], worker, db_path)
+
+
+def backoff_seconds(attempts: int, base: float = JOB_BACKOFF_SECONDS) -> float:
+    delay = min(base * (2 ** max(attempts - 1, 0)), MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+# ---------------- ENQUEUE ----------------
+
+
+def enqueue(kind: str, key: str, payload: Optional[Dict[str, Any]] = None,
+            max_attempts: int = JOB_MAX_ATTEMPTS, db_path: Optional[str] = None) -> bool:
+    """Add one item; False if (kind, key) is already queued, running or finished."""
+    return enqueue_many(kind, [(key, payload)], max_attempts=max_attempts, db_path=db_path) == 1
+
+
+def enqueue_many(kind: str, items: Iterable[Tuple[str, Optional[Dict[str, Any]]]],
+                 max_attempts: int = JOB_MAX_ATTEMPTS, db_path: Optional[str] = None) -> int:
+    """Add (key, payload) items, skipping keys already known. Returns rows added."""
+    rows = [(kind, key, json.dumps(payload) if payload else None, max_attempts)
+            for key, payload in items]
+    if not rows:
+        return 0
+    with db.transaction(db_path) as conn:
+        before = conn.total_changes
+        conn.executemany(
+            """
+            INSERT INTO jobs (kind, key, payload_json, max_attempts, run_after)
+            VALUES (?, ?, ?, ?, 0)
+            ON CONFLICT(kind, key) DO NOTHING
+            """,
+            rows,
+        )
+        return conn.total_changes - before
+
+
+# ---------------- CLAIM / LEASE ----------------
+
+
+def _bury_expired(conn, kind: str, now: float) -> None:
+    # A lease that ran out on its last attempt: the worker died every time.
+    conn.execute(
+        """
+        UPDATE jobs SET state = 'dead', lease_owner = NULL, updated_at = CURRENT_TIMESTAMP,
+               last_error = COALESCE(last_error || '; ', '') || 'lease expired on final attempt'
+        WHERE kind = ? AND state = 'leased' AND lease_expires_at < ? AND attempts >= max_attempts
+        """,
+        (kind, now),
+    )
+
+
+def claim(kind: str, worker: Optional[str] = None, limit: int = 1,
+          lease_seconds: float = JOB_LEASE_SECONDS,
+          payload_in: Optional[Tuple[str, Iterable[Any]]] = None,
+          db_path: Optional[str] = None) -> List[Job]:
+    """
+    Lease up to `limit` runnable items of `kind`, oldest first.
+    payload_in=(field, values) only takes items whose payload[field] is in values.
+    """
+    worker = worker or default_worker_id()
+    now = time.time()
+    only = ""
+    params = {"worker": worker, "expires": now + lease_seconds, "kind": kind,
+              "now": now, "limit": int(limit)}
+    if payload_in is not None:
+        only = ("AND json_extract(payload_json, '$.' || :field) "
+                "IN (SELECT value FROM json_each(:values))")
+        params["field"], params["values"] = payload_in[0], json.dumps(list(payload_in[1]))
+    with db.transaction(db_path) as conn:
+        _bury_expired(conn, kind, now)
+        rows = conn.execute(
+            f"""
+            UPDATE jobs
+            SET state = 'leased', lease_owner = :worker, lease_expires_at = :expires,
+                attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE job_id IN (
+                SELECT job_id FROM jobs
+                WHERE kind = :kind AND {_CLAIMABLE} {only}
+                ORDER BY run_after, job_id
+                LIMIT :limit
+            )
+            {_RETURNING}
+            """,
+            params,
+        ).fetchall()
+    claimed = sorted((_job(r, worker, db_path) for r in rows), key=lambda j: j.job_id)
+    heartbeat.track(claimed, lease_seconds)
+    return claimed
+
+
+def claim_key(kind: str, key: str, payload: Optional[Dict[str, Any]] = None,
+              worker: Optional[str] = None, lease_seconds: float = JOB_LEASE_SECONDS,
+              max_attempts: int = JOB_MAX_ATTEMPTS, reopen: bool = False,
+              db_path: Optional[str] = None) -> Optional[Job]:
+    """
+    Enqueue (kind, key) if new and lease it. None when another worker holds
+    it, it is done or dead, or it is waiting out a retry backoff.
+    reopen=True first puts a done or dead item back in the queue.
+    """
+    worker = worker or default_worker_id()
+    now = time.time()
+    with db.transaction(db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO jobs (kind, key, payload_json, max_attempts, run_after)
+            VALUES (?, ?, ?, ?, 0)
+            ON CONFLICT(kind, key) DO NOTHING
+            """,
+            (kind, key, json.dumps(payload) if payload else None, max_attempts),
+        )
+        if reopen:
+            conn.execute(
+                """
+                UPDATE jobs SET state = 'queued', attempts = 0, run_after = 0,
+                       last_error = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE kind = ? AND key = ? AND state IN ('done', 'dead')
+                """,
+                (kind, key),
+            )
+        _bury_expired(conn, kind, now)
+        row = conn.execute(
+            f"""
+            UPDATE jobs
+            SET state = 'leased', lease_owner = :worker, lease_expires_at = :expires,
+                attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE kind = :kind AND key = :key AND {_CLAIMABLE}
+            {_RETURNING}
+            """,
+            {"worker": worker, "expires": now + lease_seconds, "kind": kind,
+             "key": key, "now": now},
+        ).fetchone()
+    if row is None:
+        return None
+    job = _job(row, worker, db_path)
+    heartbeat.track([job], lease_seconds)
+    return job
+
+
+def renew(job_ids: List[int], worker: str, lease_seconds: float = JOB_LEASE_SECONDS,
+          db_path: Optional[str] = None) -> List[int]:
+    """Extend leases still held by `worker`. Returns the job IDs renewed."""
+    if not job_ids:
+        return []
+    expires = time.time() + lease_seconds
+    marks = ",".join("?" * len(job_ids))
+    with db.transaction(db_path) as conn:
+        rows = conn.execute(
+            f"""
+            UPDATE jobs SET lease_expires_at = ?
+            WHERE job_id IN ({marks}) AND state = 'leased' AND lease_owner = ?
+            RETURNING job_id
+            """,
+            [expires, *job_ids, worker],
+        ).fetchall()
+    return [r[0] for r in rows]
+
+
+def _finish(job_id: int, worker: str, sql: str, params: Tuple,
+            db_path: Optional[str]) -> bool:
+    heartbeat.forget(job_id)
+    with db.transaction(db_path) as conn:
+        cur = conn.execute(sql, params + (job_id, worker))
+        held = cur.rowcount > 0
+    if not held:
+        logger.warning(f"Job {job_id} lease was lost before it finished (another worker may redo it)")
+    return held
+
+
+def complete(job_id: int, worker: str, db_path: Optional[str] = None) -> bool:
+    return _finish(
+        job_id, worker,
+        """
+        UPDATE jobs SET state = 'done', lease_owner = NULL, lease_expires_at = NULL,
+               last_error = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE job_id = ? AND state = 'leased' AND lease_owner = ?
+        """,
+        (),
+        db_path,
+    )
+
+
+def fail(job_id: int, worker: str, error: str, retry: bool = True,
+         db_path: Optional[str] = None) -> str:
+    """Record a failed attempt. Returns the new state: 'queued' (retry later) or 'dead'."""
+    heartbeat.forget(job_id)
+    with db.transaction(db_path) as conn:
+        # Read attempts in the writing transaction, so a reopen or reclaim
+        # cannot slip in between and skew the backoff or the dead-letter.
+        row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE job_id = ?",
+                           (job_id,)).fetchone()
+        attempts, max_attempts = (row[0], row[1]) if row else (0, 0)
+        state = "queued" if retry and attempts < max_attempts else "dead"
+        run_after = time.time() + backoff_seconds(attempts) if state == "queued" else 0
+        cur = conn.execute(
+            """
+            UPDATE jobs SET state = ?, run_after = ?, last_error = ?, lease_owner = NULL,
+                   lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE job_id = ? AND state = 'leased' AND lease_owner = ?
+            """,
+            (state, run_after, (error or "")[:2000], job_id, worker),
+        )
+        held = cur.rowcount > 0
+    if not held:
+        logger.warning(f"Job {job_id} lease was lost before it finished (another worker may redo it)")
+    elif state == "dead":
+        logger.error(f"Job {job_id} dead-lettered after {attempts} attempt(s): {error}")
+    return state
+
+
+def release(job_id: int, worker: str, delay: float = 0.0,
+            db_path: Optional[str] = None) -> bool:
+    """
+    Hand a claimed item back untouched (the attempt does not count). With a
+    delay it cannot be claimed again for that many seconds.
+    """
+    return _finish(
+        job_id, worker,
+        """
+        UPDATE jobs SET state = 'queued', attempts = MAX(attempts - 1, 0), run_after = ?,
+               lease_owner = NULL, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE job_id = ? AND state = 'leased' AND lease_owner = ?
+        """,
+        (time.time() + delay if delay > 0 else 0,),
+        db_path,
+    )
+
+
+# ---------------- HEARTBEAT ----------------
+
+
+class Heartbeat:
+    """
+    One daemon thread per process renewing every lease this process holds.
+    Jobs are tracked from claim until complete / fail / release.
+    """
+
+    def __init__(self):
+        self._held: Dict[int, Tuple[str, float, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, jobs: List[Job], lease_seconds: float) -> None:
+        if not jobs:
+            return
+        with self._lock:
+            for j in jobs:
+                self._held[j.job_id] = (j.worker, lease_seconds, j.db_path)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="job-heartbeat", daemon=True)
+                self._thread.start()
+        # An idle loop may be sleeping longer than this lease allows.
+        self._wake.set()
+
+    def forget(self, job_id: int) -> None:
+        with self._lock:
+            self._held.pop(job_id, None)
+
+    def held(self) -> List[int]:
+        with self._lock:
+            return list(self._held)
+
+    def _loop(self) -> None:
+        while True:
+            with self._lock:
+                held = dict(self._held)
+            if not held:
+                interval = 5.0
+            else:
+                interval = max(1.0, min(h[1] for h in held.values()) / 3)
+                groups: Dict[Tuple[str, float, Optional[str]], List[int]] = {}
+                for job_id, held_by in held.items():
+                    groups.setdefault(held_by, []).append(job_id)
+                for (worker, lease, db_path), ids in groups.items():
+                    try:
+                        kept = set(renew(ids, worker, lease, db_path))
+                    except Exception as e:
+                        logger.warning(f"Job heartbeat failed: {type(e).__name__}: {e}")
+                        continue
+                    for job_id in set(ids) - kept:
+                        # Finished meanwhile, or expired and taken over.
+                        self.forget(job_id)
+            if self._wake.wait(interval):
+                self._wake.clear()
+
+
+heartbeat = Heartbeat()
+
+
+# ---------------- INSPECTION ----------------
+
+
+def stats(kind: Optional[str] = None, db_path: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """{kind: {state: count}}"""
+    sql = "SELECT kind, state, COUNT(*) FROM jobs"
+    params: List[Any] = []
+    if kind:
+        sql += " WHERE kind = ?"
+        params.append(kind)
+    out: Dict[str, Dict[str, int]] = {}
+    with db.connection(db_path) as conn:
+        for k, state, n in conn.execute(sql + " GROUP BY kind, state", params):
+            out.setdefault(k, {})[state] = n
+    return out
+
+
+def retry_dead(kind: str, db_path: Optional[str] = None) -> int:
+    """Put every dead item of `kind` back in the queue with fresh attempts."""
+    with db.transaction(db_path) as conn:
+        cur = conn.execute(
+            """
+            UPDATE jobs SET state = 'queued', attempts = 0, run_after = 0,
+                   last_error = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE kind = ? AND state = 'dead'
+            """,
+            (kind,),
+        )
+        return cur.rowcount
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect the Digital Pulpit job queue.")
+    ap.add_argument("--db", default=None, help="Path to SQLite DB (default: DATABASE_PATH)")
+    ap.add_argument("--dead", metavar="KIND", help="List dead-lettered items of KIND")
+    ap.add_argument("--retry-dead", metavar="KIND", help="Requeue dead-lettered items of KIND")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    db.init_db(args.db)
+
+    if args.retry_dead:
+        print(f"Requeued {retry_dead(args.retry_dead, args.db)} dead {args.retry_dead} job(s)")
+        return
+    if args.dead:
+        with db.connection(args.db) as conn:
+            for key, attempts, err in conn.execute(
+                "SELECT key, attempts, last_error FROM jobs WHERE kind = ? AND state = 'dead' "
+                "ORDER BY updated_at DESC",
+                (args.dead,),
+            ):
+                print(f"{key}  attempts={attempts}  {err or ''}")
+        return
+
+    for kind, states in sorted(stats(db_path=args.db).items()):
+        print(f"{kind}: " + ", ".join(f"{s}={n}" for s, n in sorted(states.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+engine/migrate.py - Versioned schema migrations
+
+Applies migrations/NNN_name.sql and migrations/NNN_name.py (which define
+upgrade(conn)) in version order, each in its own transaction, recording
+them in schema_migrations. After the versioned steps it makes sure the
+managed index set below, the FTS indexes and the climate rollups exist, so a database restored
+from cache ends up with the same indexes as the tuned one.
+
+Usage:
+    python -m engine.migrate            # apply pending migrations
+    python -m engine.migrate --status   # list applied / pending
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import logging
+import os
+import re
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from engine import climate_rollup, db
+
+logger = logging.getLogger("digital_pulpit")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+MIGRATIONS_DIR = os.path.join(ROOT_DIR, "migrations")
+SCHEMA_PATH = os.path.join(ROOT_DIR, "schema.sql")
+
+# Migrations up to this version were applied by hand before the runner
+# existed. On first contact they are recorded as applied, never executed
+# (001 archives YouTube channels and must not re-run against live data).
+BASELINE_VERSION = 1
+
+# (index name, table, columns) for the hot read paths. Names match the
+# indexes created by hand earlier so existing databases are not duplicated.
+INDEXES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ("idx_videos_published_at", "videos", ("published_at",)),
+    ("idx_videos_channel_id", "videos", ("channel_id",)),
+    ("idx_videos_channel_published", "videos", ("channel_id", "published_at")),
+    ("idx_videos_status", "videos", ("status",)),
+    ("idx_transcripts_video_id", "transcripts", ("video_id",)),
+    ("idx_brain_results_video_id", "brain_results", ("video_id",)),
+    ("idx_brain_evidence_axis", "brain_evidence", ("axis",)),
+    ("idx_brain_evidence_category", "brain_evidence", ("category",)),
+    ("idx_brain_evidence_video_category", "brain_evidence", ("video_id", "category")),
+    ("idx_sermon_analysis_video_id", "sermon_analysis", ("video_id",)),
+]
+
+_MIGRATION_RE = re.compile(r"^(\d+)_([\w-]+)\.(sql|py)$")
+
+
+def _ensure_migrations_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            checksum TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def discover_migrations(path: str = MIGRATIONS_DIR) -> List[Tuple[int, str, str]]:
+    """(version, name, file path) for every migration file, in version order."""
+    found: Dict[int, Tuple[int, str, str]] = {}
+    if not os.path.isdir(path):
+        return []
+    for fname in os.listdir(path):
+        m = _MIGRATION_RE.match(fname)
+        if not m:
+            continue
+        version = int(m.group(1))
+        if version in found:
+            raise ValueError(f"Duplicate migration version {version}: {fname}")
+        found[version] = (version, m.group(2), os.path.join(path, fname))
+    return [found[v] for v in sorted(found)]
+
+
+def _checksum(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def applied_versions(conn: sqlite3.Connection) -> Dict[int, str]:
+    _ensure_migrations_table(conn)
+    return {r[0]: r[1] for r in conn.execute("SELECT version, checksum FROM schema_migrations")}
+
+
+def _apply_sql(conn: sqlite3.Connection, version: int, name: str, path: str, checksum: str) -> None:
+    with open(path, "r", encoding="utf-8") as f:
+        sql = f.read()
+    # executescript manages its own transaction; wrap the file and the
+    # bookkeeping row in one so a failure leaves nothing half-applied.
+    conn.commit()
+    try:
+        conn.executescript(
+            "BEGIN IMMEDIATE;\n"
+            f"{sql}\n;\n"
+            "INSERT INTO schema_migrations (version, name, checksum) "
+            f"VALUES ({version}, '{name}', '{checksum}');\n"
+            "COMMIT;"
+        )
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+
+def _apply_py(conn: sqlite3.Connection, version: int, name: str, path: str, checksum: str) -> None:
+    spec = importlib.util.spec_from_file_location(f"dp_migration_{version:03d}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    with db.transaction(conn.db_path or None) as tx:
+        module.upgrade(tx)
+        tx.execute(
+            "INSERT INTO schema_migrations (version, name, checksum) VALUES (?, ?, ?)",
+            (version, name, checksum),
+        )
+
+
+def _has_covering_index(conn: sqlite3.Connection, table: str, cols: Tuple[str, ...]) -> bool:
+    for idx in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        idx_cols = tuple(r[2] for r in conn.execute(f"PRAGMA index_info({idx[1]})").fetchall())
+        if idx_cols[:len(cols)] == cols:
+            return True
+    return False
+
+
+def ensure_indexes(conn: sqlite3.Connection) -> List[str]:
+    """Create any managed index whose table exists and is not already covered."""
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    created = []
+    for name, table, cols in INDEXES:
+        if table not in tables:
+            continue
+        if not set(cols) <= set(db._table_columns(conn, table)):
+            continue
+        if _has_covering_index(conn, table, cols):
+            continue
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(cols)})")
+        created.append(name)
+    if created:
+        logger.info(f"Created indexes: {', '.join(created)}")
+    return created
+
+
+def migrate(db_path: Optional[str] = None, migrations_dir: str = MIGRATIONS_DIR) -> List[int]:
+    """Apply pending migrations, then managed indexes. Returns versions applied."""
+    applied: List[int] = []
+    with db.connection(db_path) as conn:
+        with db.transaction(db_path) as tx:
+            done = applied_versions(tx)
+            if not done:
+                for version, name, path in discover_migrations(migrations_dir):
+                    if version <= BASELINE_VERSION:
+                        tx.execute(
+                            "INSERT INTO schema_migrations (version, name, checksum) VALUES (?, ?, ?)",
+                            (version, name, _checksum(path)),
+                        )
+                        logger.info(f"Baselined migration {version:03d}_{name} (not executed)")
+                done = applied_versions(tx)
+
+        for version, name, path in discover_migrations(migrations_dir):
+            checksum = _checksum(path)
+            if version in done:
+                if done[version] and done[version] != checksum:
+                    logger.warning(f"Migration {version:03d}_{name} changed after it was applied")
+                continue
+
+            logger.info(f"Applying migration {version:03d}_{name}")
+            if path.endswith(".sql"):
+                _apply_sql(conn, version, name, path, checksum)
+            else:
+                _apply_py(conn, version, name, path, checksum)
+            applied.append(version)
+
+        with db.transaction(db_path) as tx:
+            ensure_indexes(tx)
+            db.ensure_transcript_storage_columns(tx)
+            db.ensure_fts(tx)
+            climate_rollup.ensure_climate_rollup(tx)
+
+    return applied
+
+
+def init_db(db_path: Optional[str] = None) -> List[int]:
+    """Create the base schema if needed, then bring it up to date."""
+    path = db_path or db.DATABASE_PATH
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with db.connection(db_path) as conn:
+        with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+            conn.executescript(f.read())
+    return migrate(db_path)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Apply Digital Pulpit schema migrations.")
+    ap.add_argument("--db", default=None, help="Path to SQLite DB (default: DATABASE_PATH)")
+    ap.add_argument("--status", action="store_true", help="Show applied/pending migrations and exit")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    if args.status:
+        with db.connection(args.db) as conn:
+            done = applied_versions(conn)
+            conn.commit()
+        for version, name, _ in discover_migrations():
+            state = "applied" if version in done else "pending"
+            print(f"{version:03d}_{name}: {state}")
+        return
+
+    applied = init_db(args.db)
+    print(f"Applied {len(applied)} migration(s): {applied}" if applied else "Schema is up to date.")
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,15 @@ def _wrap_result(run_type: str, result: Any) -> Dict[str, Any]:
     }
 
 
+def _publish_snapshot() -> None:
+    """Refresh the dashboard's read-only DB snapshot after a run."""
+    try:
+        from engine.snapshot import publish_snapshot
+        publish_snapshot()
+    except Exception:
+        logger.exception("DB snapshot publish failed")
+
+
 def run_vacuum():
     """
     UI-safe wrapper for the Vacuum pipeline.
@@ -54,6 +63,8 @@ def run_vacuum():
             "run_id": None,
             "error": str(e)
         }
+    finally:
+        _publish_snapshot()
 
 
 def run_brain():
@@ -72,6 +83,8 @@ def run_brain():
             "run_id": None,
             "error": str(e)
         }
+    finally:
+        _publish_snapshot()
 
 
 def run_assembly():
@@ -90,6 +103,8 @@ def run_assembly():
             "run_id": None,
             "error": str(e)
         }
+    finally:
+        _publish_snapshot()
 
 
 def run_all():
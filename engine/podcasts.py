@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+engine/podcasts.py - Podcast ingestion (RSS, Apple Podcasts, Subsplash)
+
+Source adapters turn their input into PodcastFeeds:
+
+  rss_feeds(urls)            plain RSS feed URLs
+  apple_feeds(apple_urls)    Apple Podcasts pages, via the iTunes lookup API
+  subsplash_feeds(urls)      podcasts.subsplash.com feed URLs (feeds.txt)
+
+ingest() runs every feed through one pipeline (engine/stages.py):
+
+  poll        all feeds at once with conditional GETs (engine/feeds.py);
+              the newest episodes of changed feeds become rss_episode jobs
+  download    enclosures, DOWNLOAD_WORKERS at a time, through the
+              resumable content-addressed store (engine/downloads.py)
+  transcribe  the local Whisper worker pool (engine/whisper_pool.py)
+  persist     transcripts and statuses through one BatchWriter
+
+Episodes are leased from the job queue (engine/jobs.py): a failed download
+or transcription comes around again on a later run even if its feed has
+not changed, and two ingest processes never take the same episode.
+
+    python -m engine.podcasts rss https://example.org/podcast.rss
+    python -m engine.podcasts apple --file apple_podcasts.txt
+    python -m engine.podcasts subsplash --file feeds.txt --episodes 3
+"""
+
+import argparse
+import hashlib
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from engine import db, downloads, feeds, jobs, whisper_pool
+from engine.config import (DOWNLOAD_WORKERS, FEED_POLL_WORKERS, PODCAST_EPISODES_PER_FEED,
+                           STAGE_QUEUE_SIZE, TMP_AUDIO_DIR, WHISPER_WORKERS)
+from engine.stages import Pipeline, Stage
+from engine.transcription import TranscriptResult
+
+logger = logging.getLogger("digital_pulpit")
+
+RSS_EPISODE_JOB_KIND = "rss_episode"
+ITUNES_LOOKUP_URL = "https://itunes.apple.com/lookup"
+
+
+@dataclass
+class PodcastFeed:
+    feed_id: str            # channels.channel_id for the feed's episodes
+    url: str
+    name: str = ""          # filled from the feed title when empty
+    source: str = "rss"
+
+
+@dataclass
+class Episode:
+    episode_id: str
+    feed_id: str
+    title: str
+    audio_url: str
+    published_at: Optional[str] = None
+    duration_seconds: Optional[int] = None
+    lease: Optional[jobs.Job] = None
+    audio_path: Optional[Path] = None
+    bytes: int = 0
+    result: Optional[TranscriptResult] = None
+
+    @property
+    def payload(self) -> Dict:
+        return {"feed_id": self.feed_id, "audio_url": self.audio_url, "title": self.title,
+                "duration_seconds": self.duration_seconds}
+
+
+@dataclass
+class IngestReport:
+    results: Dict[str, List[Dict]]      # feed_id -> [{episode_id, title, status, word_count}]
+    feeds_polled: int = 0
+    feeds_changed: int = 0
+    transcribed: int = 0
+    failed: int = 0
+    audio_minutes: float = 0.0
+    downloaded_bytes: int = 0
+    reused_downloads: int = 0
+    elapsed: float = 0.0
+    stages: str = ""
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, ep: Episode, status: str, word_count: Optional[int] = None,
+               error: Optional[str] = None) -> None:
+        with self._lock:
+            self.results.setdefault(ep.feed_id, []).append({
+                "episode_id": ep.episode_id,
+                "title": ep.title,
+                "status": status,
+                "word_count": word_count,
+                "error": error,
+            })
+            if status == "success":
+                self.transcribed += 1
+            elif status == "error":
+                self.failed += 1
+
+
+# ---------------- SOURCES ----------------
+
+
+def parse_duration_str(duration_str) -> Optional[int]:
+    """Parse iTunes duration string to seconds."""
+    if not duration_str or not str(duration_str).strip():
+        return None
+
+    duration_str = str(duration_str).strip()
+
+    # Try parsing as integer (already in seconds)
+    try:
+        return int(duration_str)
+    except ValueError:
+        pass
+
+    # Try parsing MM:SS or HH:MM:SS format
+    parts = duration_str.split(':')
+    try:
+        if len(parts) == 2:  # MM:SS
+            return int(parts[0]) * 60 + int(parts[1])
+        elif len(parts) == 3:  # HH:MM:SS
+            return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
+    except (ValueError, IndexError):
+        pass
+
+    return None
+
+
+def url_feed_id(url: str) -> str:
+    return hashlib.md5(url.encode()).hexdigest()[:16]
+
+
+def subsplash_feed_id(url: str) -> str:
+    match = re.search(r'podcasts\.subsplash\.com/([A-Za-z0-9]+)/', url)
+    return match.group(1) if match else url_feed_id(url)
+
+
+def _read_urls(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip().startswith("http")]
+
+
+def rss_feeds(urls: List[str]) -> List[PodcastFeed]:
+    return [PodcastFeed(url_feed_id(u), u, source="rss") for u in urls]
+
+
+def subsplash_feeds(urls: List[str]) -> List[PodcastFeed]:
+    return [PodcastFeed(subsplash_feed_id(u), u, source="subsplash") for u in urls]
+
+
+def lookup_apple_feed(apple_url: str) -> Optional[PodcastFeed]:
+    """RSS feed behind an Apple Podcasts page, via the iTunes lookup API."""
+    podcast_id = apple_url.split('/id')[-1].split('?')[0]
+    try:
+        resp = feeds.get_session().get(ITUNES_LOOKUP_URL,
+                                       params={"id": podcast_id, "entity": "podcast"},
+                                       timeout=10)
+        resp.raise_for_status()
+        data = resp.json()
+    except Exception as e:
+        logger.error(f"Failed to extract RSS from {apple_url}: {type(e).__name__}: {e}")
+        return None
+
+    for result in data.get('results') or []:
+        if result.get('feedUrl'):
+            return PodcastFeed(url_feed_id(result['feedUrl']), result['feedUrl'],
+                               result.get('collectionName') or "", source="apple")
+    logger.warning(f"No RSS feed found for: {apple_url}")
+    return None
+
+
+def apple_feeds(apple_urls: List[str], workers: int = FEED_POLL_WORKERS) -> List[PodcastFeed]:
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(apple_urls) or 1)),
+                            thread_name_prefix="itunes") as pool:
+        return [f for f in pool.map(lookup_apple_feed, apple_urls) if f]
+
+
+def episodes_from_feed(feed: PodcastFeed, parsed, max_episodes: int) -> List[Episode]:
+    """Episodes among the newest max_episodes entries (entries without audio are skipped)."""
+    if not feed.name:
+        feed.name = parsed.feed.get('title', 'Unknown Podcast')
+
+    episodes = []
+    for entry in parsed.entries[:max_episodes]:
+        title = entry.get('title', 'Untitled')
+
+        audio_url = None
+        for link in list(entry.get('enclosures') or []) + list(entry.get('links') or []):
+            if link.get('type', '').startswith('audio/') and link.get('href'):
+                audio_url = link['href']
+                break
+        if not audio_url:
+            logger.warning(f"No audio URL found for episode: {title}")
+            continue
+
+        published = entry.get('published_parsed') or entry.get('updated_parsed')
+        episodes.append(Episode(
+            episode_id=hashlib.md5(audio_url.encode()).hexdigest()[:16],
+            feed_id=feed.feed_id,
+            title=title,
+            audio_url=audio_url,
+            published_at=time.strftime('%Y-%m-%d %H:%M:%S', published) if published else None,
+            duration_seconds=parse_duration_str(entry.get('itunes_duration')),
+        ))
+    return episodes
+
+
+# ---------------- DOWNLOAD / TRANSCRIBE ----------------
+
+
+def download_enclosure(url: str, output_path: Path, timeout: float = 300) -> downloads.DownloadResult:
+    """Fetch an enclosure through the audio store and link it at output_path."""
+    return downloads.fetch_to(url, output_path, timeout=timeout)
+
+
+def transcribe_whisper(audio_path: Path) -> TranscriptResult:
+    """Transcribe on the shared local Whisper pool; raises on an empty transcript."""
+    return whisper_pool.get_pool().transcribe(audio_path)
+
+
+# ---------------- PIPELINE ----------------
+
+
+def _transcribed_ids(episode_ids: List[str]) -> set:
+    done = set()
+    for i in range(0, len(episode_ids), 500):
+        chunk = episode_ids[i:i + 500]
+        done.update(r[0] for r in db.iter_rows(
+            f"SELECT video_id FROM transcripts WHERE video_id IN ({','.join('?' * len(chunk))})",
+            chunk))
+    return done
+
+
+def _build_pipeline(writer: db.BatchWriter, report: IngestReport, audio_dir: Path,
+                    download_workers: int, whisper_workers: int) -> Pipeline:
+
+    def cleanup(ep):
+        if ep.audio_path is not None:
+            try:
+                ep.audio_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def on_error(ep, stage_name, exc):
+        msg = f"{stage_name} failed: {type(exc).__name__}: {exc}"
+        # Settle in any case: a lease left unfailed is renewed by the
+        # heartbeat for as long as the process lives, and never retried.
+        try:
+            cleanup(ep)
+            writer.update_video_status(ep.episode_id, 'error', msg)
+        finally:
+            report.record(ep, "error", error=msg)
+            try:
+                ep.lease.fail(msg)
+            except Exception as e:
+                # Stop renewing it: the lease expires and the episode is reclaimed.
+                jobs.heartbeat.forget(ep.lease.job_id)
+                logger.error(f"Could not settle job for {ep.episode_id}: {type(e).__name__}: {e}")
+
+    def download(ep):
+        writer.update_video_status(ep.episode_id, 'downloading_audio', None)
+        ep.audio_path = audio_dir / f"{ep.episode_id}.mp3"
+        fetched = download_enclosure(ep.audio_url, ep.audio_path)
+        ep.bytes = fetched.size
+        with report._lock:
+            if fetched.reused:
+                report.reused_downloads += 1
+            else:
+                report.downloaded_bytes += fetched.size - fetched.resumed_bytes
+        return ep
+
+    def transcribe(ep):
+        writer.update_video_status(ep.episode_id, 'transcribing', None)
+        try:
+            ep.result = transcribe_whisper(ep.audio_path)
+        finally:
+            cleanup(ep)
+        return ep
+
+    def persist(ep):
+        result = ep.result
+        if result.segments:
+            minutes = result.segments[-1]['end'] / 60.0
+        else:
+            minutes = (ep.duration_seconds or 0) / 60.0
+
+        def committed():
+            ep.lease.complete()
+            report.record(ep, "success", word_count=result.word_count)
+            with report._lock:
+                report.audio_minutes += minutes
+
+        writer.insert_transcript(ep.episode_id, result.text, result.segments, result.language,
+                                 result.word_count, result.model, provider=result.provider,
+                                 on_commit=committed)
+        writer.update_video_status(ep.episode_id, 'transcribed', None)
+        return ep
+
+    return Pipeline([
+        Stage("download", download, download_workers, STAGE_QUEUE_SIZE),
+        Stage("transcribe", transcribe, whisper_workers, STAGE_QUEUE_SIZE),
+        Stage("persist", persist, 1, STAGE_QUEUE_SIZE),
+    ], on_error=on_error)
+
+
+def ingest(podcast_feeds: List[PodcastFeed], max_episodes: int = PODCAST_EPISODES_PER_FEED,
+           force: bool = False, download_workers: int = DOWNLOAD_WORKERS,
+           whisper_workers: int = WHISPER_WORKERS) -> IngestReport:
+    """
+    Poll, download, transcribe and save the newest episodes of every feed.
+    Also picks up this set of feeds' episodes whose retry backoff is over.
+    """
+    started = time.monotonic()
+    by_url = {f.url: f for f in podcast_feeds}
+    feed_ids = list(dict.fromkeys(f.feed_id for f in podcast_feeds))
+    report = IngestReport(results={fid: [] for fid in feed_ids}, feeds_polled=len(by_url))
+    audio_dir = Path(TMP_AUDIO_DIR)
+    audio_dir.mkdir(parents=True, exist_ok=True)
+
+    with db.BatchWriter() as writer:
+        episodes: List[Episode] = []
+        polled_feeds = feeds.poll_feeds(list(by_url), force=force, defer_validators=True)
+        for url, polled in polled_feeds.items():
+            if not polled.changed:
+                continue
+            report.feeds_changed += 1
+            feed = by_url[url]
+            found = episodes_from_feed(feed, polled.feed, max_episodes)
+            logger.info(f"{feed.name or feed.url}: {len(found)} episodes")
+            db.upsert_channel(feed.feed_id, feed.name, feed.url, "rss_feed")
+            for ep in found:
+                writer.upsert_video(ep.episode_id, ep.feed_id, ep.title, ep.published_at,
+                                    ep.duration_seconds or 0, "discovered")
+            episodes.extend(found)
+        # Video rows must exist before transcripts reference them.
+        writer.flush()
+
+        done = _transcribed_ids([ep.episode_id for ep in episodes])
+        for ep in episodes:
+            if ep.episode_id in done:
+                report.record(ep, "already_transcribed")
+        # The feeds' new ETag / Last-Modified commit with the queued episodes:
+        # saved earlier, a crash here would leave them unqueued behind a 304.
+        with db.transaction():
+            queued = jobs.enqueue_many(RSS_EPISODE_JOB_KIND, [
+                (ep.episode_id, ep.payload) for ep in episodes if ep.episode_id not in done])
+            feeds.save_validators(polled_feeds.values())
+        logger.info(f"{report.feeds_changed}/{report.feeds_polled} feeds changed; "
+                    f"{len(episodes)} episodes, {len(done)} already transcribed, {queued} new")
+
+        # One transcribe thread per worker process: each just waits on its file.
+        pool = whisper_pool.get_pool(whisper_workers)
+        pipe = _build_pipeline(writer, report, audio_dir, download_workers, pool.processes)
+        with pipe:
+            while True:
+                claimed = jobs.claim(RSS_EPISODE_JOB_KIND, payload_in=("feed_id", feed_ids))
+                if not claimed:
+                    break
+                lease = claimed[0]
+                p = lease.payload
+                pipe.submit(Episode(lease.key, p.get("feed_id"), p.get("title") or "Untitled",
+                                    p.get("audio_url"), duration_seconds=p.get("duration_seconds"),
+                                    lease=lease))
+
+    downloads.prune_store()
+    report.elapsed = time.monotonic() - started
+    report.stages = pipe.summary()
+    logger.info(f"Podcast pipeline ({pipe.elapsed:.0f}s): {report.stages}")
+    logger.info(pool.summary())
+    return report
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Ingest podcast episodes: poll feeds, download, "
+                                             "transcribe with local Whisper, save.")
+    ap.add_argument("source", choices=["rss", "apple", "subsplash"])
+    ap.add_argument("urls", nargs="*", help="Feed URLs (rss) or Apple Podcasts URLs (apple)")
+    ap.add_argument("--file", help="Read URLs from this file (subsplash default: feeds.txt)")
+    ap.add_argument("--episodes", type=int, default=PODCAST_EPISODES_PER_FEED,
+                    help="Newest episodes to take per feed")
+    ap.add_argument("--force", action="store_true", help="Ignore stored ETag / Last-Modified")
+    ap.add_argument("--download-workers", type=int, default=DOWNLOAD_WORKERS)
+    ap.add_argument("--whisper-workers", type=int, default=WHISPER_WORKERS,
+                    help="Whisper worker processes (0 = one per WHISPER_THREADS cores)")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    urls = list(args.urls)
+    if args.file or (args.source == "subsplash" and not urls):
+        urls += _read_urls(args.file or "feeds.txt")
+    if not urls:
+        ap.error("no URLs given")
+
+    db.init_db()
+    if args.source == "apple":
+        podcast_feeds = apple_feeds(urls)
+    elif args.source == "subsplash":
+        podcast_feeds = subsplash_feeds(urls)
+    else:
+        podcast_feeds = rss_feeds(urls)
+
+    run_id = db.create_run(f"podcast_{args.source}")
+    try:
+        report = ingest(podcast_feeds, max_episodes=args.episodes, force=args.force,
+                        download_workers=args.download_workers,
+                        whisper_workers=args.whisper_workers)
+    except Exception as e:
+        logger.error(f"Podcast ingestion failed: {type(e).__name__}: {e}", exc_info=True)
+        db.finish_run(run_id, "failed", 0, 0.0, f"Run failed: {type(e).__name__}: {e}")
+        raise
+
+    notes = (f"{report.feeds_changed}/{report.feeds_polled} feeds changed, "
+             f"{report.transcribed} transcribed, {report.failed} failed")
+    db.finish_run(run_id, "completed", report.transcribed, round(report.audio_minutes, 2), notes)
+
+    wall_min = report.elapsed / 60.0
+    print(f"{notes} in {wall_min:.1f} min")
+    print(f"Downloaded {report.downloaded_bytes / (1024 * 1024):.1f} MB "
+          f"({report.reused_downloads} episodes from the audio store); "
+          f"{report.audio_minutes:.1f} audio min transcribed "
+          f"({report.audio_minutes / wall_min if wall_min else 0:.1f} audio min / wall min)")
+    print(f"Stages: {report.stages}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
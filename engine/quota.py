@@ -0,0 +1,148 @@
+"""
+engine/quota.py - Process-wide YouTube Data API quota governor
+
+Every API call goes through youtube_quota.acquire(method) before it is made.
+Calls are priced in quota units (search.list costs 100, most list calls 1),
+and a token bucket refilled at YT_QUOTA_RATE units/second (bursting to
+YT_QUOTA_BURST) paces them across all worker threads. A daily budget of
+YT_QUOTA_DAILY units (reset at midnight Pacific, like the API's own) stops
+callers before the API starts rejecting them.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+from engine.config import YT_QUOTA_BURST, YT_QUOTA_DAILY, YT_QUOTA_RATE
+
+logger = logging.getLogger("digital_pulpit")
+
+# https://developers.google.com/youtube/v3/determine_quota_cost
+YOUTUBE_COSTS: Dict[str, int] = {
+    "search.list": 100,
+    "videos.list": 1,
+    "channels.list": 1,
+    "playlistItems.list": 1,
+    "playlists.list": 1,
+}
+
+
+class QuotaExhausted(Exception):
+    """The daily YouTube quota is spent; retrying before the reset is pointless."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._stamp = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, cost: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until `cost` tokens are available and take them."""
+        # A call costing more than the bucket holds waits for a full bucket.
+        cost = min(float(cost), self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._refill()
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return True
+                wait = (cost - self._tokens) / self.rate if self.rate > 0 else 1.0
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+
+def _quota_day() -> str:
+    tz = ZoneInfo("America/Los_Angeles") if ZoneInfo else None
+    return datetime.now(tz).strftime("%Y-%m-%d")
+
+
+class QuotaGovernor:
+    """Token-bucket pacing plus a daily budget, with per-method accounting."""
+
+    def __init__(self, costs: Dict[str, int], rate: float, burst: float, daily: int):
+        self.costs = dict(costs)
+        self.daily = int(daily)
+        self.bucket = TokenBucket(rate, burst)
+        self._lock = threading.Lock()
+        self._day = _quota_day()
+        self._spent_today = 0
+        self._exhausted = False
+        self.spent: Counter = Counter()
+        self.calls: Counter = Counter()
+
+    def cost(self, method: str) -> int:
+        return self.costs.get(method, 1)
+
+    def _roll_day(self) -> None:
+        day = _quota_day()
+        if day != self._day:
+            self._day = day
+            self._spent_today = 0
+            self._exhausted = False
+
+    def acquire(self, method: str) -> int:
+        """Reserve quota for one call of `method`; raises QuotaExhausted."""
+        cost = self.cost(method)
+        with self._lock:
+            self._roll_day()
+            if self._exhausted or (self.daily and self._spent_today + cost > self.daily):
+                raise QuotaExhausted(
+                    f"YouTube quota exhausted ({self._spent_today}/{self.daily} units today)"
+                )
+            self._spent_today += cost
+            self.spent[method] += cost
+            self.calls[method] += 1
+        self.bucket.acquire(cost)
+        return cost
+
+    def mark_exhausted(self) -> None:
+        """The API reported quotaExceeded: stop every worker until the reset."""
+        with self._lock:
+            if not self._exhausted:
+                logger.error("YouTube API reports daily quota exceeded; pausing API calls until reset")
+            self._exhausted = True
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.spent.values())
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        """{method: {"calls": n, "units": u}} spent by this process."""
+        with self._lock:
+            return {m: {"calls": self.calls[m], "units": self.spent[m]} for m in self.spent}
+
+    def report_since(self, before: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+        """report() minus an earlier report(): what was spent in between."""
+        spent = {}
+        for m, now in self.report().items():
+            was = before.get(m, {})
+            calls = now["calls"] - was.get("calls", 0)
+            if calls:
+                spent[m] = {"calls": calls, "units": now["units"] - was.get("units", 0)}
+        return spent
+
+
+youtube_quota = QuotaGovernor(YOUTUBE_COSTS, YT_QUOTA_RATE, YT_QUOTA_BURST, YT_QUOTA_DAILY)
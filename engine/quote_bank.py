@@ -18,6 +18,8 @@ import sqlite3
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
+from engine.db import fts_query
+
 
 # ---------- SIGNAL WORDS ----------
 
@@ -125,6 +127,13 @@ def _intelligence_score(text: str) -> float:
 
 # ---------- MAIN ----------
 
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = ? LIMIT 1", (name,)
+    ).fetchone()
+    return row is not None
+
+
 def get_quotes(
     conn: sqlite3.Connection,
     days: int = 30,
@@ -151,6 +160,16 @@ def get_quotes(
     where.append("v.published_at >= ?")
     params.append(cutoff)
 
+    # Let the FTS index narrow candidates before the 4000-row cap; the
+    # substring check below still applies to whatever comes back.
+    if must_contain and _has_table(conn, "brain_evidence_fts"):
+        match = fts_query(must_contain, mode="any", prefix=True)
+        if match:
+            where.append(
+                "be.rowid IN (SELECT rowid FROM brain_evidence_fts WHERE brain_evidence_fts MATCH ?)"
+            )
+            params.append(match)
+
     where_sql = "WHERE " + " AND ".join(where)
 
     sql = f"""
@@ -16,6 +16,8 @@ import sqlite3
 import sys
 from typing import List, Dict, Any
 
+from engine import db
+
 # Import OpenAI client
 try:
     from openai import OpenAI
@@ -199,6 +201,7 @@ def _connect(db_path: str) -> sqlite3.Connection:
     con = sqlite3.connect(db_path)
     con.row_factory = sqlite3.Row
     con.execute("PRAGMA busy_timeout=5000;")
+    db.register_functions(con)
     return con
 
 
@@ -209,11 +212,10 @@ def _get_transcripts(con: sqlite3.Connection, video_ids: List[str]) -> Dict[str,
     """
     placeholders = ",".join("?" * len(video_ids))
     query = f"""
-        SELECT video_id, full_text
+        SELECT video_id, {db.transcript_text_sql("", con)} AS full_text
         FROM transcripts
         WHERE video_id IN ({placeholders})
-          AND full_text IS NOT NULL
-          AND LENGTH(full_text) > 0
+          AND {db.has_transcript_text_sql("", con)}
     """
 
     rows = con.execute(query, video_ids).fetchall()
@@ -237,12 +239,14 @@ def _get_all_video_ids(con: sqlite3.Connection) -> List[str]:
     Get all video_ids from transcripts where full_text is not null
     and word count >= 100.
     """
-    query = """
+    query = f"""
         SELECT video_id
         FROM transcripts
-        WHERE full_text IS NOT NULL
-          AND LENGTH(full_text) > 0
-          AND LENGTH(full_text) - LENGTH(REPLACE(full_text, ' ', '')) + 1 >= 100
+        WHERE {db.has_transcript_text_sql("", con)}
+          -- compressed rows: the stored word_count instead of decompressing
+          AND CASE WHEN full_text IS NULL THEN word_count
+                   ELSE LENGTH(full_text) - LENGTH(REPLACE(full_text, ' ', '')) + 1
+              END >= 100
         ORDER BY video_id
     """
     rows = con.execute(query).fetchall()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+engine/scheduler.py - Cadence-aware channel polling
+
+Learns each channel's upload rate and publishing weekdays from the
+publish dates already in the videos table, and decides which channels
+are worth polling on this run:
+
+  expected_new  uploads expected since the channel was last checked
+                (channel_discovery.checked_at): its upload rate, spread
+                over the weekdays it publishes on
+  probability   chance of at least one new upload, 1 - exp(-expected_new)
+
+A channel is polled when probability >= SCHEDULE_MIN_PROBABILITY, when it
+has not been checked for SCHEDULE_MAX_STALE_DAYS, or while there is too
+little history to learn from. Polled channels go most expected uploads
+first, so a quota or time limit cuts off the least productive ones.
+
+Skipping is safe in "uploads" discovery mode: the next poll reads back to
+the channel's high-water mark. In "search" mode discovery only looks 14
+days back, so keep SCHEDULE_MAX_STALE_DAYS below that.
+
+    python -m engine.scheduler          # plan for every active channel
+    python -m engine.scheduler --due    # only the channels this run would poll
+"""
+
+import argparse
+import logging
+import math
+import statistics
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+
+from engine import db
+from engine.config import SCHEDULE_MAX_CHANNELS, SCHEDULE_MAX_STALE_DAYS, SCHEDULE_MIN_PROBABILITY
+
+logger = logging.getLogger("digital_pulpit")
+
+# Publish dates learned from per channel, and the fewest to trust
+HISTORY_SIZE = 20
+MIN_HISTORY = 3
+# Pseudo-count per weekday, so a weekday never seen is unlikely, not impossible
+WEEKDAY_SMOOTHING = 0.5
+# expected_new assumed for a channel with too little history: one upload
+PRIOR_EXPECTED = 1.0
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def format_schedule(interval_days):
+    """Convert interval to readable schedule"""
+    if interval_days is None:
+        return "Unknown"
+    if interval_days <= 1.5:
+        return "Daily"
+    elif interval_days <= 4:
+        return "2-3 times per week"
+    elif interval_days <= 8:
+        return "Weekly"
+    elif interval_days <= 15:
+        return "Bi-weekly"
+    else:
+        return f"Every {interval_days:.0f} days"
+
+
+def _parse_utc(value) -> Optional[datetime]:
+    # videos.published_at is ISO 8601 from the API ("...Z"); checked_at is
+    # SQLite CURRENT_TIMESTAMP ("YYYY-MM-DD HH:MM:SS", UTC).
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+@dataclass
+class ChannelCadence:
+    channel_id: str
+    uploads: int                        # publish dates learned from
+    interval_days: Optional[float]      # median gap between uploads
+    rate_per_day: Optional[float]
+    weekday_share: Optional[List[float]]
+    checked_at: Optional[datetime]
+    expected_new: float = PRIOR_EXPECTED
+    probability: float = 1.0
+    due: bool = True
+    reason: str = ""
+
+    @property
+    def schedule(self) -> str:
+        return format_schedule(self.interval_days)
+
+    @property
+    def weekday(self) -> Optional[str]:
+        """Most common publishing weekday (UTC)."""
+        if not self.weekday_share:
+            return None
+        return WEEKDAYS[max(range(7), key=lambda d: self.weekday_share[d])]
+
+
+def learn_cadence(channel_id: str, published: Sequence[str], checked_at=None,
+                  now: Optional[datetime] = None) -> ChannelCadence:
+    """Upload rate, median interval and weekday profile from publish dates."""
+    now = now or datetime.now(timezone.utc)
+    dates = sorted((d for d in map(_parse_utc, published) if d), reverse=True)
+    checked = _parse_utc(checked_at)
+    if len(dates) < MIN_HISTORY:
+        return ChannelCadence(channel_id, len(dates), None, None, None, checked)
+
+    gaps = [(a - b).total_seconds() / 86400 for a, b in zip(dates, dates[1:])]
+    gaps = [g for g in gaps if g > 0]
+    interval = statistics.median(gaps) if gaps else None
+
+    counts = [0] * 7
+    for d in dates:
+        counts[d.weekday()] += 1
+    total = len(dates) + 7 * WEEKDAY_SMOOTHING
+    share = [(c + WEEKDAY_SMOOTHING) / total for c in counts]
+
+    # Uploads per day from the oldest sampled upload up to now, so a channel
+    # that has gone quiet decays instead of keeping its old rate.
+    rate = len(dates) / max((now - dates[-1]).total_seconds() / 86400, 1.0)
+    return ChannelCadence(channel_id, len(dates), interval, rate, share, checked,
+                          expected_new=0.0, probability=0.0)
+
+
+def _expected_between(cad: ChannelCadence, start: datetime, end: datetime) -> float:
+    # rate_per_day * 7 * share[weekday] averages to rate_per_day over a
+    # week; integrate it over [start, end) one calendar day at a time.
+    expected = 0.0
+    t = start
+    while t < end:
+        next_day = datetime(t.year, t.month, t.day, tzinfo=timezone.utc) + timedelta(days=1)
+        step = min(next_day, end)
+        expected += (step - t).total_seconds() / 86400 * cad.weekday_share[t.weekday()] * 7
+        t = step
+    return expected * cad.rate_per_day
+
+
+def score(cad: ChannelCadence, now: datetime,
+          min_probability: float = SCHEDULE_MIN_PROBABILITY,
+          max_stale_days: float = SCHEDULE_MAX_STALE_DAYS) -> ChannelCadence:
+    """Fill in expected_new / probability / due for a channel as of `now`."""
+    if cad.checked_at is None:
+        cad.expected_new, cad.probability, cad.due, cad.reason = PRIOR_EXPECTED, 1.0, True, "never checked"
+        return cad
+    if cad.weekday_share is None:
+        cad.expected_new, cad.probability, cad.due, cad.reason = PRIOR_EXPECTED, 1.0, True, "learning"
+        return cad
+
+    cad.expected_new = _expected_between(cad, cad.checked_at, now)
+    cad.probability = 1.0 - math.exp(-cad.expected_new)
+
+    stale_days = (now - cad.checked_at).total_seconds() / 86400
+    if stale_days >= max_stale_days:
+        cad.due, cad.reason = True, f"stale ({stale_days:.0f}d)"
+    elif cad.probability >= min_probability:
+        cad.due, cad.reason = True, "likely new"
+    else:
+        cad.due, cad.reason = False, "not due"
+    return cad
+
+
+def plan(channel_ids: Sequence[str], now: Optional[datetime] = None,
+         min_probability: float = SCHEDULE_MIN_PROBABILITY,
+         max_stale_days: float = SCHEDULE_MAX_STALE_DAYS,
+         max_channels: int = SCHEDULE_MAX_CHANNELS) -> List[ChannelCadence]:
+    """
+    Cadence and polling decision for every channel, due channels first in
+    order of expected new uploads. Past max_channels (0 = no cap) due
+    channels are deferred to a later run, when they will rank higher.
+    """
+    now = now or datetime.now(timezone.utc)
+    ids = list(dict.fromkeys(channel_ids))
+    history = db.get_publish_history(ids, per_channel=HISTORY_SIZE)
+    marks = db.get_discovery_marks(ids)
+
+    cadences = []
+    for cid in ids:
+        cad = learn_cadence(cid, history.get(cid, []),
+                            (marks.get(cid) or {}).get("checked_at"), now)
+        cadences.append(score(cad, now, min_probability, max_stale_days))
+
+    cadences.sort(key=lambda c: (not c.due, -c.expected_new))
+    if max_channels > 0:
+        for cad in [c for c in cadences if c.due][max_channels:]:
+            cad.due, cad.reason = False, "deferred (SCHEDULE_MAX_CHANNELS)"
+    return cadences
+
+
+def due_channels(channel_ids: Sequence[str], **kwargs) -> List[str]:
+    """Channels to poll now, most expected new uploads first."""
+    cadences = plan(channel_ids, **kwargs)
+    due = [c.channel_id for c in cadences if c.due]
+    expected = sum(c.expected_new for c in cadences if c.due)
+    logger.info(f"Channel schedule: polling {len(due)}/{len(cadences)} channels "
+                f"(~{expected:.1f} new uploads expected), skipping {len(cadences) - len(due)}")
+    return due
+
+
+def _active_channels() -> Dict[str, str]:
+    names = {}
+    for row in db.iter_table("channels", ["channel_id", "channel_name", "active"]):
+        cid = row["channel_id"]
+        # Surrogate URL_ ids belong to channels that never resolved.
+        if not cid or cid.startswith("URL_") or row["active"] == 0:
+            continue
+        names[cid] = row["channel_name"] or ""
+    return names
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Show which channels the next Vacuum run would poll.")
+    ap.add_argument("--due", action="store_true", help="Only list channels due now")
+    ap.add_argument("--min-probability", type=float, default=SCHEDULE_MIN_PROBABILITY)
+    ap.add_argument("--max-stale-days", type=float, default=SCHEDULE_MAX_STALE_DAYS)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    db.init_db()
+
+    names = _active_channels()
+    cadences = plan(list(names), min_probability=args.min_probability,
+                    max_stale_days=args.max_stale_days)
+    for c in cadences:
+        if args.due and not c.due:
+            continue
+        checked = c.checked_at.strftime("%Y-%m-%d %H:%M") if c.checked_at else "never"
+        print(f"{'DUE ' if c.due else '    '}{c.channel_id}  {names[c.channel_id][:30]:<30}  "
+              f"{c.schedule:<18} {c.weekday or '-':<4} checked {checked:<16}  "
+              f"expect {c.expected_new:4.1f}  p={c.probability:.2f}  {c.reason}")
+
+    due = sum(1 for c in cadences if c.due)
+    print(f"\n{due}/{len(cadences)} channels due, "
+          f"~{sum(c.expected_new for c in cadences if c.due):.1f} new uploads expected")
+
+
+if __name__ == "__main__":
+    main()
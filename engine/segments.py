@@ -0,0 +1,166 @@
+"""
+engine/segments.py - Packed columnar transcript segments
+
+Layout (little-endian):
+
+    header   16 bytes   b"DPSG", u16 version, u16 reserved, u32 count, u32 text_bytes
+    starts   float32[count]
+    ends     float32[count]
+    offsets  uint32[count + 1]   byte offsets into text
+    flags    uint8[count]        version 2: bit i set when FLAG_FIELDS[i] is true
+    text     UTF-8, all segment texts concatenated
+
+Version 1 buffers (no flags column) still read, with every flag false.
+
+PackedSegments reads this straight out of the stored BLOB: starts/ends/offsets
+are memoryviews over the buffer and a segment's text is only decoded when it
+is asked for.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+MAGIC = b"DPSG"
+VERSION = 2
+# Per-segment booleans the analysis brain weights (see digital_pulpit_config.json).
+FLAG_FIELDS = ("verse_citation_match", "imperative_language_match")
+_HEADER = struct.Struct("<4sHHII")
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def encode_segments(segments: Iterable[Dict[str, Any]]) -> bytes:
+    """Pack [{start, end, text, <FLAG_FIELDS>}, ...] into the columnar format."""
+    starts = array("f")
+    ends = array("f")
+    offsets = array("I", [0])
+    flags = bytearray()
+    text = bytearray()
+
+    for seg in segments:
+        starts.append(float(seg.get("start") or 0.0))
+        ends.append(float(seg.get("end") or 0.0))
+        flags.append(sum(1 << bit for bit, name in enumerate(FLAG_FIELDS) if seg.get(name)))
+        text += (seg.get("text") or "").encode("utf-8")
+        offsets.append(len(text))
+
+    if sys.byteorder != "little":
+        for arr in (starts, ends, offsets):
+            arr.byteswap()
+
+    header = _HEADER.pack(MAGIC, VERSION, 0, len(starts), len(text))
+    return b"".join([header, starts.tobytes(), ends.tobytes(), offsets.tobytes(), bytes(flags),
+                     bytes(text)])
+
+
+def is_packed(blob: Optional[Buffer]) -> bool:
+    return blob is not None and bytes(blob[:4]) == MAGIC
+
+
+class PackedSegments(Sequence):
+    """
+    Lazy, read-only view over a packed segment buffer.
+
+    Indexing returns a {start, end, text} dict (plus any FLAG_FIELDS that
+    are set) for drop-in use where a segments list was expected; bulk
+    consumers should use starts / ends / texts() / flag() (or as_arrays()
+    with NumPy) to avoid per-segment objects.
+    """
+
+    def __init__(self, blob: Buffer):
+        buf = memoryview(blob)
+        magic, version, _, count, text_bytes = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a packed segment buffer")
+        if version not in (1, VERSION):
+            raise ValueError(f"Unsupported packed segment version: {version}")
+
+        self._buf = buf
+        self._count = count
+        pos = _HEADER.size
+        self._starts_at = pos
+        pos += 4 * count
+        self._ends_at = pos
+        pos += 4 * count
+        self._offsets_at = pos
+        pos += 4 * (count + 1)
+        self._flags_at = pos if version >= 2 else None
+        if version >= 2:
+            pos += count
+        self._text_at = pos
+        if len(buf) < pos + text_bytes:
+            raise ValueError("Truncated packed segment buffer")
+
+        self.starts = self._column(self._starts_at, count, "f")
+        self.ends = self._column(self._ends_at, count, "f")
+        self.offsets = self._column(self._offsets_at, count + 1, "I")
+        self.flags = (buf[self._flags_at:self._flags_at + count] if self._flags_at is not None
+                      else bytes(count))
+        self._text = buf[pos:pos + text_bytes]
+
+    def _column(self, at: int, n: int, fmt: str):
+        raw = self._buf[at:at + 4 * n]
+        if sys.byteorder == "little":
+            return raw.cast(fmt)
+        arr = array(fmt)
+        arr.frombytes(raw)
+        arr.byteswap()
+        return arr
+
+    def __len__(self) -> int:
+        return self._count
+
+    def text(self, i: int) -> str:
+        return bytes(self._text[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def texts(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self.text(i)
+
+    def flag(self, i: int, name: str) -> bool:
+        """Segment i's FLAG_FIELDS boolean `name`."""
+        return bool(self.flags[i] >> FLAG_FIELDS.index(name) & 1)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("segment index out of range")
+        seg = {"start": self.starts[i], "end": self.ends[i], "text": self.text(i)}
+        for bit, name in enumerate(FLAG_FIELDS):
+            if self.flags[i] >> bit & 1:
+                seg[name] = True
+        return seg
+
+    @property
+    def duration(self) -> float:
+        return max(self.ends) if self._count else 0.0
+
+    def as_arrays(self):
+        """(starts, ends) as zero-copy NumPy float32 arrays."""
+        import numpy as np
+
+        starts = np.frombuffer(self._buf, dtype="<f4", count=self._count, offset=self._starts_at)
+        ends = np.frombuffer(self._buf, dtype="<f4", count=self._count, offset=self._ends_at)
+        return starts, ends
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [self[i] for i in range(self._count)]
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_list())
+
+
+def load_segments(value: Optional[Union[str, Buffer]]):
+    """Segments from either storage format: packed BLOB or JSON text."""
+    if value is None:
+        return []
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return PackedSegments(value)
+    return json.loads(value) if value else []
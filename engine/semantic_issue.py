@@ -41,6 +41,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
+from engine import db
 from engine.config import DATABASE_PATH
 from engine.doc_writer import write_doc
 
@@ -78,7 +79,7 @@ def _cos(a: np.ndarray, b: np.ndarray) -> float:
 # ----------------------------
 
 def connect() -> sqlite3.Connection:
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = db.get_conn(DATABASE_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
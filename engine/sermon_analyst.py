@@ -7,6 +7,7 @@ Bottom-up Sermon Analyst layer (GPT-4.1):
 - Produces structured semantic analysis (themes, claims, receipts)
 - Adds 4 triads (1,2,4,5) with normalized weights
 - Stores results in sermon_analysis (skip if already analyzed unless --force)
+- Skips near-duplicate transcripts (engine/dedupe.py); their canonical is analyzed
 
 Testing controls:
   --dry_run
@@ -30,6 +31,8 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
+from engine import db, jobs
+
 # ----------------------------
 # Config
 # ----------------------------
@@ -137,9 +140,8 @@ def _call_gpt41_json(system: str, user: str, max_output_tokens: int = 2000) -> D
 # ----------------------------
 
 def _connect(db_path: str = DATABASE_PATH) -> sqlite3.Connection:
-    con = sqlite3.connect(db_path)
+    con = db.get_conn(db_path)
     con.row_factory = sqlite3.Row
-    con.execute("PRAGMA busy_timeout=5000;")
     return con
 
 
@@ -279,10 +281,11 @@ def _parse_iso(dt_str: str) -> Optional[datetime]:
 
 
 def _fetch_candidates(con: sqlite3.Connection, days: int, limit: int, video_id: Optional[str] = None) -> List[sqlite3.Row]:
+    text = db.transcript_text_sql("t")
     if video_id:
         rows = con.execute(
-            """
-            SELECT v.video_id, v.title, c.channel_name, v.published_at, t.full_text
+            f"""
+            SELECT v.video_id, v.title, c.channel_name, v.published_at, {text} AS full_text
             FROM videos v
             JOIN transcripts t ON t.video_id = v.video_id
             JOIN channels c ON v.channel_id = c.channel_id
@@ -295,21 +298,25 @@ def _fetch_candidates(con: sqlite3.Connection, days: int, limit: int, video_id:
 
     cutoff = datetime.utcnow() - timedelta(days=days)
 
-    rows = con.execute(
-        """
-        SELECT v.video_id, v.title, c.channel_name, v.published_at, t.full_text
+    # Stream and stop at `limit`: only kept candidates hold their full_text.
+    rows = db.iter_rows(
+        f"""
+        SELECT v.video_id, v.title, c.channel_name, v.published_at, {text} AS full_text
         FROM videos v
         JOIN transcripts t ON t.video_id = v.video_id
         JOIN channels c ON v.channel_id = c.channel_id
         LEFT JOIN sermon_analysis s ON s.video_id = v.video_id
+        LEFT JOIN near_duplicates d ON d.video_id = v.video_id
         WHERE s.video_id IS NULL
-          AND t.full_text IS NOT NULL
-          AND LENGTH(TRIM(t.full_text)) > 0
+          AND d.video_id IS NULL  -- canonical copy is analyzed instead
+          AND {db.has_transcript_text_sql("t")}
         ORDER BY v.published_at DESC
         LIMIT ?;
         """,
         (limit * 5,),
-    ).fetchall()
+        batch_size=max(1, min(limit, 100)),
+        conn=con,
+    )
 
     out: List[sqlite3.Row] = []
     for r in rows:
@@ -320,6 +327,7 @@ def _fetch_candidates(con: sqlite3.Connection, days: int, limit: int, video_id:
             if pub.replace(tzinfo=None) >= cutoff:
                 out.append(r)
         if len(out) >= limit:
+            rows.close()
             break
 
     return out
@@ -401,6 +409,7 @@ def main():
     ap.add_argument("--max_cost_usd", type=float, default=9999.0)
     args = ap.parse_args()
 
+    db.init_db(args.db)
     con = _connect(args.db)
     try:
         _ensure_sermon_analysis_table(con)
@@ -434,12 +443,22 @@ def main():
         for r in queue:
             vid = r["video_id"]
             title = r["title"] or ""
+            # Leased so several analyst processes can share one candidate list.
+            job = jobs.claim_key("sermon_analysis", vid, reopen=args.force, db_path=args.db)
+            if job is None:
+                print(f"\nSkipping {vid}: claimed by another worker or waiting to retry")
+                continue
             print(f"\nAnalyzing {vid} | {title}")
             t0 = time.time()
 
-            analysis = _analyze_one(r)
-            cost = _estimate_cost_usd(r["full_text"] or "", output_tokens=2000)
-            _store_analysis(con, r, analysis, cost)
+            try:
+                analysis = _analyze_one(r)
+                cost = _estimate_cost_usd(r["full_text"] or "", output_tokens=2000)
+                _store_analysis(con, r, analysis, cost)
+            except Exception as e:
+                job.fail(f"{type(e).__name__}: {e}")
+                raise
+            job.complete()
 
             dt = time.time() - t0
             themes = analysis.get("semantic_themes") or []
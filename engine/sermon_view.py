@@ -10,16 +10,15 @@ Run:
 
 import argparse
 import json
-import sqlite3
 from typing import Any, Dict
 
+from engine import db
 from engine.config import DATABASE_PATH
 
 
 def connect():
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Pooled connection; close() returns it to the pool."""
+    return db.get_conn(DATABASE_PATH)
 
 
 def load_analysis(conn, video_id: str) -> Dict[str, Any]:
@@ -104,8 +103,8 @@ def main():
     parser.add_argument("--video_id", required=True)
     args = parser.parse_args()
 
-    conn = connect()
-    analysis = load_analysis(conn, args.video_id)
+    with db.connection(DATABASE_PATH) as conn:
+        analysis = load_analysis(conn, args.video_id)
     output = render(analysis)
 
     print(output)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+engine/snapshot.py - Read-only database snapshots for the dashboard
+
+The pipeline writes to DATABASE_PATH; the dashboard reads a copy of it
+published with the sqlite3 online backup API. A snapshot is written to a
+temp file next to DB_SNAPSHOT_PATH and moved into place with os.replace, so
+readers only ever see a complete file. Readers open it with immutable=1:
+the file is never modified in place, so there is no locking and no
+contention with Vacuum / Brain writes.
+
+Snapshots are published after each pipeline run (engine/pipeline.py), and
+refreshed in the background by ensure_snapshot() when the current one is
+older than DB_SNAPSHOT_MAX_AGE, or on a fixed schedule. Refreshes skip the
+copy when the database and its WAL are unchanged (same mtime and size)
+since the last publish, and copy DB_SNAPSHOT_PAGES pages per step so a
+large database does not hold the connection in one long call:
+
+    python -m engine.snapshot               # publish once
+    python -m engine.snapshot --every 300   # refresh every 5 minutes, when changed
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+from urllib.request import pathname2url
+
+from engine import db
+from engine.config import (DB_SNAPSHOT_MAX_AGE, DB_SNAPSHOT_PAGES, DB_SNAPSHOT_PATH,
+                           DB_SNAPSHOT_STEP_SLEEP)
+
+logger = logging.getLogger("digital_pulpit")
+
+_PUBLISH_LOCK = threading.Lock()
+_SCHEDULER: Optional[threading.Thread] = None
+# (source, snapshot) -> source signature the current snapshot was copied at
+_PUBLISHED: Dict[Tuple[str, str], tuple] = {}
+_REFRESHING: Set[str] = set()
+_REFRESH_LOCK = threading.Lock()
+
+
+def _source_signature(source: str) -> tuple:
+    """mtime and size of the database and its WAL: any commit moves one of them."""
+    sig = []
+    for path in (source, source + "-wal"):
+        try:
+            st = os.stat(path)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+
+def _copy(src: sqlite3.Connection, dst: sqlite3.Connection) -> None:
+    def _pause(status, remaining, total):
+        time.sleep(DB_SNAPSHOT_STEP_SLEEP)
+
+    # An open read transaction pins one WAL snapshot for every step, so
+    # writers can commit between steps without restarting the copy and the
+    # result is still consistent (WAL readers do not block writers).
+    own = not src.in_transaction
+    if own:
+        src.execute("BEGIN")
+        src.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+    try:
+        src.backup(dst, pages=DB_SNAPSHOT_PAGES,
+                   progress=_pause if DB_SNAPSHOT_STEP_SLEEP > 0 else None,
+                   sleep=max(DB_SNAPSHOT_STEP_SLEEP, 0.001))
+    finally:
+        if own:
+            src.rollback()
+
+
+def publish_snapshot(db_path: Optional[str] = None,
+                     snapshot_path: Optional[str] = None,
+                     if_changed: bool = False) -> str:
+    """
+    Copy the live database to the snapshot path. Returns the snapshot path.
+
+    With if_changed, an existing snapshot of an unchanged database is only
+    touched (its age restarts) instead of copied again.
+    """
+    source = db_path or db.DATABASE_PATH
+    if not os.path.exists(source):
+        raise sqlite3.OperationalError(f"No database at {source}")
+    snapshot_path = snapshot_path or DB_SNAPSHOT_PATH
+    parent = os.path.dirname(snapshot_path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp_path = f"{snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    key = (os.path.abspath(source), os.path.abspath(snapshot_path))
+
+    started = time.monotonic()
+    with _PUBLISH_LOCK:
+        # Taken before the copy: a commit during it shows up as a change next time.
+        signature = _source_signature(source)
+        if if_changed and _PUBLISHED.get(key) == signature and os.path.exists(snapshot_path):
+            os.utime(snapshot_path)
+            logger.debug(f"DB snapshot {snapshot_path} is current; nothing to copy")
+            return snapshot_path
+        try:
+            dst = sqlite3.connect(tmp_path)
+            try:
+                with db.connection(db_path) as src:
+                    _copy(src, dst)
+                # A standalone file: no -wal/-shm needed to open it read-only.
+                dst.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                dst.close()
+            os.replace(tmp_path, snapshot_path)
+            _PUBLISHED[key] = signature
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    logger.info(
+        f"Published DB snapshot {snapshot_path} "
+        f"({os.path.getsize(snapshot_path) / 1e6:.1f} MB in {time.monotonic() - started:.2f}s)"
+    )
+    return snapshot_path
+
+
+def snapshot_age(snapshot_path: Optional[str] = None) -> Optional[float]:
+    """Seconds since the snapshot was published, or None if there is none."""
+    try:
+        return time.time() - os.path.getmtime(snapshot_path or DB_SNAPSHOT_PATH)
+    except OSError:
+        return None
+
+
+def ensure_snapshot(max_age: float = DB_SNAPSHOT_MAX_AGE,
+                    db_path: Optional[str] = None,
+                    snapshot_path: Optional[str] = None) -> Optional[str]:
+    """
+    Path of the snapshot to read, or None when there is none.
+
+    Only the very first snapshot is published inline; one older than
+    max_age is returned as is while a background refresh replaces it.
+    If that first publish fails (e.g. the live database does not exist
+    yet) None is returned.
+    """
+    snapshot_path = snapshot_path or DB_SNAPSHOT_PATH
+    age = snapshot_age(snapshot_path)
+    if age is None:
+        try:
+            return publish_snapshot(db_path, snapshot_path)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"DB snapshot publish failed: {e}")
+            return None
+    if age > max_age:
+        refresh_in_background(db_path, snapshot_path)
+    return snapshot_path
+
+
+def refresh_in_background(db_path: Optional[str] = None,
+                          snapshot_path: Optional[str] = None) -> bool:
+    """Start an if_changed publish on a daemon thread; False if one is already running."""
+    snapshot_path = snapshot_path or DB_SNAPSHOT_PATH
+    with _REFRESH_LOCK:
+        if snapshot_path in _REFRESHING:
+            return False
+        _REFRESHING.add(snapshot_path)
+
+    def _run():
+        try:
+            publish_snapshot(db_path, snapshot_path, if_changed=True)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"DB snapshot publish failed: {e}")
+        finally:
+            with _REFRESH_LOCK:
+                _REFRESHING.discard(snapshot_path)
+
+    threading.Thread(target=_run, name="db-snapshot-refresh", daemon=True).start()
+    return True
+
+
+def connect(snapshot_path: Optional[str] = None) -> sqlite3.Connection:
+    """Read-only connection to a published snapshot."""
+    path = os.path.abspath(snapshot_path or DB_SNAPSHOT_PATH)
+    if not os.path.exists(path):
+        raise sqlite3.OperationalError(f"No DB snapshot at {path}")
+    conn = sqlite3.connect(f"file:{pathname2url(path)}?mode=ro&immutable=1",
+                           uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    db.register_functions(conn)
+    return conn
+
+
+def start_scheduler(interval: float = DB_SNAPSHOT_MAX_AGE,
+                    db_path: Optional[str] = None) -> threading.Thread:
+    """Refresh every `interval` seconds on a daemon thread (one per process)."""
+    global _SCHEDULER
+    if _SCHEDULER is not None and _SCHEDULER.is_alive():
+        return _SCHEDULER
+
+    def _loop():
+        while True:
+            try:
+                publish_snapshot(db_path, if_changed=True)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"DB snapshot publish failed: {e}")
+            time.sleep(interval)
+
+    _SCHEDULER = threading.Thread(target=_loop, name="db-snapshot", daemon=True)
+    _SCHEDULER.start()
+    return _SCHEDULER
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Publish a read-only snapshot of the Digital Pulpit DB.")
+    ap.add_argument("--db", default=None, help="Path to SQLite DB (default: DATABASE_PATH)")
+    ap.add_argument("--out", default=None, help="Snapshot path (default: DB_SNAPSHOT_PATH)")
+    ap.add_argument("--every", type=float, default=0,
+                    help="Keep publishing every N seconds (default: publish once)")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    while True:
+        try:
+            publish_snapshot(args.db, args.out, if_changed=bool(args.every))
+        except (sqlite3.Error, OSError) as e:
+            if not args.every:
+                raise
+            logger.warning(f"DB snapshot publish failed: {e}")
+        if not args.every:
+            return
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
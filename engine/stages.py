@@ -0,0 +1,156 @@
+"""
+engine/stages.py - Bounded, multi-worker stage pipelines
+
+A Pipeline is a chain of Stages, each with its own worker threads and a
+bounded input queue. A stage function takes an item and returns it (or a
+replacement) for the next stage, or None to drop it. When a stage falls
+behind its queue fills up and the stage before it blocks on put(), so a
+slow transcription stage holds back downloads instead of letting audio
+pile up on disk.
+
+    pipe = Pipeline([Stage("download", fetch, workers=2),
+                     Stage("transcribe", transcribe, workers=3)],
+                    on_error=failed)
+    with pipe:
+        for item in items:
+            pipe.submit(item)      # blocks while the first stage is full
+    print(pipe.summary())
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger("digital_pulpit")
+
+_STOP = object()
+
+
+class Stage:
+    """One step of a Pipeline: fn(item) -> item | None, run on `workers` threads."""
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], workers: int = 1,
+                 queue_size: int = 2):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers))
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._alive = 0
+
+    def _record(self, seconds: float, outcome: str) -> None:
+        with self._lock:
+            self.busy_seconds += seconds
+            if outcome == "ok":
+                self.processed += 1
+            elif outcome == "dropped":
+                self.dropped += 1
+            else:
+                self.errors += 1
+
+
+class Pipeline:
+    """
+    Runs items through a list of Stages.
+
+    If a stage function raises, on_error(item, stage_name, exc) is called
+    and the item goes no further; the worker keeps going. Items the last
+    stage returns are discarded, so the last stage should persist its
+    results itself.
+    """
+
+    def __init__(self, stages: List[Stage],
+                 on_error: Optional[Callable[[Any, str, BaseException], None]] = None):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.on_error = on_error
+        self._threads: List[threading.Thread] = []
+        self._started = None
+        self.elapsed = 0.0
+
+    def __enter__(self) -> "Pipeline":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._started = time.monotonic()
+        for i, stage in enumerate(self.stages):
+            stage._alive = stage.workers
+            for n in range(stage.workers):
+                t = threading.Thread(target=self._work, args=(i,),
+                                     name=f"{stage.name}-{n}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, item: Any) -> None:
+        """Hand an item to the first stage, blocking while its queue is full."""
+        self.stages[0].queue.put(item)
+
+    def close(self) -> None:
+        """Let every queued item finish, then stop the workers."""
+        if not self._threads:
+            return
+        first = self.stages[0]
+        for _ in range(first.workers):
+            first.queue.put(_STOP)
+        for t in self._threads:
+            t.join()
+        self._threads = []
+        self.elapsed = time.monotonic() - self._started
+
+    def _work(self, index: int) -> None:
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                break
+            started = time.monotonic()
+            try:
+                result = stage.fn(item)
+            except Exception as e:
+                stage._record(time.monotonic() - started, "error")
+                logger.error(f"Stage {stage.name} failed: {type(e).__name__}: {e}", exc_info=True)
+                if self.on_error is not None:
+                    try:
+                        self.on_error(item, stage.name, e)
+                    except Exception:
+                        logger.exception(f"on_error handler failed in stage {stage.name}")
+                continue
+            stage._record(time.monotonic() - started, "dropped" if result is None else "ok")
+            if result is not None and downstream is not None:
+                downstream.queue.put(result)
+
+        # The last worker of a stage to stop passes the stop on downstream,
+        # after every item this stage produced is already queued there.
+        with stage._lock:
+            stage._alive -= 1
+            last = stage._alive == 0
+        if last and downstream is not None:
+            for _ in range(downstream.workers):
+                downstream.queue.put(_STOP)
+
+    def summary(self) -> str:
+        """One line per stage: items, throughput, drops, errors and time spent busy."""
+        lines = []
+        for s in self.stages:
+            util = s.busy_seconds / (self.elapsed * s.workers) if self.elapsed else 0.0
+            rate = s.processed / self.elapsed * 60 if self.elapsed else 0.0
+            lines.append(
+                f"{s.name}: {s.processed} ok ({rate:.1f}/min), {s.dropped} dropped, {s.errors} errors, "
+                f"{s.busy_seconds:.1f}s busy on {s.workers} worker(s) ({util:.0%} utilized)"
+            )
+        return "; ".join(lines)
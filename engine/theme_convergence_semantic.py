@@ -29,6 +29,7 @@ from typing import Any, Dict, List, Tuple
 
 import numpy as np
 
+from engine import db
 from engine.config import DATABASE_PATH
 
 
@@ -51,12 +52,6 @@ def embed_texts(texts: List[str], model: str = "text-embedding-3-small", batch_s
     return np.array(vecs, dtype=np.float32)
 
 
-def _connect() -> sqlite3.Connection:
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
 def _cos(a: np.ndarray, b: np.ndarray) -> float:
     denom = (np.linalg.norm(a) * np.linalg.norm(b)) + 1e-8
     return float(np.dot(a, b) / denom)
@@ -171,9 +166,8 @@ def main() -> None:
     if not os.environ.get("OPENAI_API_KEY"):
         raise SystemExit("OPENAI_API_KEY is not set in environment.")
 
-    conn = _connect()
-    items = fetch_claims(conn, days=args.days, limit=args.limit)
-    conn.close()
+    with db.connection(DATABASE_PATH) as conn:
+        items = fetch_claims(conn, days=args.days, limit=args.limit)
 
     if not items:
         print("No claims found. Run sermon_analyst first.")
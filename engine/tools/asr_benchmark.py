@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+ASR Backend Benchmark
+
+Transcribes a fixed reference set of sermons with each ASR backend (see
+ASR BACKENDS in engine/transcription.py) and reports, per backend:
+
+  RTF  real-time factor: transcription seconds / audio seconds (lower is
+       faster; 0.25 = four audio minutes per wall minute)
+  WER  word error rate against the reference transcripts, after
+       lowercasing and dropping punctuation
+
+The reference set is a CSV manifest (default data/asr_reference/manifest.csv)
+with columns audio_path,reference_path, both relative to the manifest. Each
+reference is a plain-text, hand-checked transcript of the audio.
+
+Usage:
+    python -m engine.tools.asr_benchmark
+    python -m engine.tools.asr_benchmark --backends whisper faster_whisper --model small
+    python -m engine.tools.asr_benchmark --manifest data/asr_reference/manifest.csv --out reports/asr
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from engine.config import WHISPER_MODEL
+from engine.transcription import ASR_BACKENDS, get_backend, probe_duration
+from engine.whisper_pool import available_cores
+
+DEFAULT_MANIFEST = "data/asr_reference/manifest.csv"
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def normalize_words(text: str) -> List[str]:
+    return _WORD_RE.findall((text or "").lower())
+
+
+def word_errors(reference: List[str], hypothesis: List[str]) -> int:
+    """Substitutions + deletions + insertions (word-level Levenshtein)."""
+    prev = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        cur = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ref_word != hyp_word))
+        prev = cur
+    return prev[-1]
+
+
+def load_manifest(path: str) -> List[Tuple[str, str]]:
+    """[(audio_path, reference_text)] from the manifest CSV."""
+    base = Path(path).parent
+    items = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            ref_path = base / row['reference_path']
+            items.append((str(base / row['audio_path']), ref_path.read_text(encoding='utf-8')))
+    return items
+
+
+def benchmark_backend(name: str, items: List[Tuple[str, str]], model: str,
+                      threads: int) -> Dict:
+    """Transcribe every item with one backend; per-file and overall RTF / WER."""
+    started = time.monotonic()
+    backend = get_backend(name, model=model if name != 'openai' else None, threads=threads)
+    load_seconds = time.monotonic() - started
+
+    files = []
+    for audio_path, reference in items:
+        t0 = time.monotonic()
+        try:
+            result = backend.transcribe(audio_path)
+        except Exception as e:
+            files.append({'audio': audio_path, 'error': f"{type(e).__name__}: {e}"})
+            print(f"  ✗ {os.path.basename(audio_path)}: {type(e).__name__}: {e}")
+            continue
+        elapsed = time.monotonic() - t0
+
+        duration = probe_duration(audio_path)
+        if duration is None and result.segments:
+            duration = result.segments[-1]['end']
+        ref_words = normalize_words(reference)
+        errors = word_errors(ref_words, normalize_words(result.text))
+        files.append({
+            'audio': audio_path,
+            'audio_seconds': duration,
+            'seconds': elapsed,
+            'rtf': elapsed / duration if duration else None,
+            'reference_words': len(ref_words),
+            'errors': errors,
+            'wer': errors / len(ref_words) if ref_words else None,
+        })
+        print(f"  ✓ {os.path.basename(audio_path)}: RTF {files[-1]['rtf'] or 0:.3f}, "
+              f"WER {files[-1]['wer'] or 0:.1%}")
+
+    done = [f for f in files if 'error' not in f and f['audio_seconds']]
+    audio = sum(f['audio_seconds'] for f in done)
+    ref_words = sum(f['reference_words'] for f in done)
+    return {
+        'backend': name,
+        'model': backend.label,
+        'load_seconds': load_seconds,
+        'files': files,
+        'failed': len(files) - len(done),
+        'rtf': sum(f['seconds'] for f in done) / audio if audio else None,
+        'wer': sum(f['errors'] for f in done) / ref_words if ref_words else None,
+    }
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description='Compare ASR backends by real-time factor and word error rate'
+    )
+    parser.add_argument(
+        '--manifest',
+        default=DEFAULT_MANIFEST,
+        help=f'Reference set manifest CSV (default: {DEFAULT_MANIFEST})'
+    )
+    parser.add_argument(
+        '--backends',
+        nargs='+',
+        choices=list(ASR_BACKENDS),
+        default=['whisper', 'faster_whisper'],
+        help='Backends to compare (default: whisper faster_whisper)'
+    )
+    parser.add_argument(
+        '--model',
+        default=WHISPER_MODEL,
+        help=f'Whisper model size for the local backends (default: {WHISPER_MODEL})'
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=available_cores(),
+        help='CPU threads for the local backends (default: all available cores)'
+    )
+    parser.add_argument(
+        '--out',
+        help='Directory to write asr_benchmark.json to'
+    )
+
+    args = parser.parse_args()
+
+    try:
+        items = load_manifest(args.manifest)
+    except FileNotFoundError as e:
+        parser.error(f"cannot read the reference set ({e.strerror}: {e.filename}); "
+                     f"pass --manifest with a CSV of audio_path,reference_path")
+    if not items:
+        print(f"No reference sermons in {args.manifest}")
+        return
+    print(f"Reference set: {len(items)} sermons from {args.manifest}")
+
+    results = []
+    for name in args.backends:
+        print(f"\n{name}:")
+        try:
+            results.append(benchmark_backend(name, items, args.model, args.threads))
+        except Exception as e:
+            print(f"  ✗ backend unavailable: {type(e).__name__}: {e}")
+
+    print(f"\n{'Backend':<16} {'Model':<14} {'Load s':>7} {'RTF':>7} {'WER':>7} {'Failed':>7}")
+    for r in results:
+        rtf = f"{r['rtf']:.3f}" if r['rtf'] is not None else "-"
+        wer = f"{r['wer']:.1%}" if r['wer'] is not None else "-"
+        print(f"{r['backend']:<16} {r['model']:<14} {r['load_seconds']:>7.1f} {rtf:>7} "
+              f"{wer:>7} {r['failed']:>7}")
+
+    if args.out:
+        out_dir = Path(args.out)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_path = out_dir / 'asr_benchmark.json'
+        with open(out_path, 'w', encoding='utf-8') as f:
+            json.dump({'manifest': args.manifest, 'threads': args.threads, 'results': results},
+                      f, indent=2)
+        print(f"\n✓ Wrote {out_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Transcript Storage Conversion Tool
+
+Re-encodes transcript bodies and segments between plain TEXT and the
+compressed BLOB format (see TRANSCRIPT_CODEC in engine/config.py), in
+batches, optionally packs segments into the columnar segments_bin format,
+then optionally VACUUMs so the database file actually shrinks.
+
+Usage:
+    python -m engine.tools.compress_transcripts --codec zlib --vacuum
+    python -m engine.tools.compress_transcripts --codec none
+    python -m engine.tools.compress_transcripts --pack-segments --vacuum
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from engine import db
+from engine.config import DATABASE_PATH
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description='Convert stored transcripts to a storage codec'
+    )
+    parser.add_argument(
+        '--db',
+        default=DATABASE_PATH,
+        help=f'Path to SQLite database (default: {DATABASE_PATH})'
+    )
+    parser.add_argument(
+        '--codec',
+        choices=['zlib', 'zstd', 'none'],
+        default='zlib',
+        help='Target codec; "none" restores plain TEXT (default: zlib)'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=200,
+        help='Rows converted per transaction (default: 200)'
+    )
+    parser.add_argument(
+        '--pack-segments',
+        action='store_true',
+        help='Also convert segments to the packed columnar format'
+    )
+    parser.add_argument(
+        '--vacuum',
+        action='store_true',
+        help='Run VACUUM afterwards to reclaim freed pages'
+    )
+
+    args = parser.parse_args()
+
+    size_before = os.path.getsize(args.db) if os.path.exists(args.db) else 0
+    converted = db.convert_transcripts(args.codec, batch_size=args.batch_size, db_path=args.db)
+    print(f"Converted {converted} transcripts to codec={args.codec}")
+
+    if args.pack_segments:
+        packed = db.pack_transcript_segments(batch_size=args.batch_size, db_path=args.db)
+        print(f"Packed segments for {packed} transcripts")
+
+    if args.vacuum:
+        with db.connection(args.db) as conn:
+            conn.execute("VACUUM")
+        size_after = os.path.getsize(args.db)
+        print(f"Database size: {size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -25,6 +25,8 @@ from collections import Counter, defaultdict
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+from engine import db
+
 
 class TranscriptQualityAuditor:
     """Audit transcript quality and generate reports."""
@@ -49,97 +51,98 @@ class TranscriptQualityAuditor:
             conn = sqlite3.connect(self.db_path, timeout=5.0)
 
         conn.execute("PRAGMA busy_timeout=5000")
+        conn.row_factory = sqlite3.Row
+        db.register_functions(conn)
         return conn
 
+    @staticmethod
+    def _compressed_storage(conn: sqlite3.Connection) -> bool:
+        """True when transcripts may hold compressed text (TRANSCRIPT_CODEC)."""
+        return db.compressed_transcript_storage(conn)
+
+    SAMPLE_COLUMNS = [
+        'transcript_id', 'video_id', 'full_text', 'language', 'word_count',
+        'transcript_provider', 'transcript_model', 'transcript_version',
+        'transcribed_at',
+    ]
+
     def get_sample_transcripts(self, conn: sqlite3.Connection) -> List[Dict]:
         """Get representative sample of transcripts."""
         samples = []
 
-        # Non-empty filter
-        non_empty_filter = "full_text IS NOT NULL AND trim(full_text) != ''"
-
-        # Get shortest 5
-        cursor = conn.execute(f"""
-            SELECT transcript_id, video_id, full_text, segments_json, language,
-                   word_count, transcript_provider, transcript_model,
-                   transcript_version, transcribed_at,
-                   COALESCE(word_count, length(full_text)) as size_metric
-            FROM transcripts
-            WHERE {non_empty_filter}
-            ORDER BY size_metric ASC
-            LIMIT ?
-        """, (self.sample_size,))
-        for row in cursor.fetchall():
-            samples.append(self._row_to_dict(row, 'shortest'))
-
-        # Get longest 5
-        cursor = conn.execute(f"""
-            SELECT transcript_id, video_id, full_text, segments_json, language,
-                   word_count, transcript_provider, transcript_model,
-                   transcript_version, transcribed_at,
-                   COALESCE(word_count, length(full_text)) as size_metric
-            FROM transcripts
-            WHERE {non_empty_filter}
-            ORDER BY size_metric DESC
-            LIMIT ?
-        """, (self.sample_size,))
-        for row in cursor.fetchall():
-            samples.append(self._row_to_dict(row, 'longest'))
-
-        # Get middle 5 (around median)
-        cursor = conn.execute(f"""
-            WITH ranked AS (
-                SELECT transcript_id, video_id, full_text, segments_json, language,
-                       word_count, transcript_provider, transcript_model,
-                       transcript_version, transcribed_at,
-                       COALESCE(word_count, length(full_text)) as size_metric,
-                       ROW_NUMBER() OVER (ORDER BY COALESCE(word_count, length(full_text))) as rn,
-                       COUNT(*) OVER () as total
+        # Non-empty filter (compressed rows count as non-empty)
+        if self._compressed_storage(conn):
+            non_empty_filter = db.has_transcript_text_sql("")
+        else:
+            non_empty_filter = "full_text IS NOT NULL AND trim(full_text) != ''"
+        size_metric = "COALESCE(word_count, length(full_text))"
+
+        # Pick ids first so sorting/ranking never carries full_text around,
+        # then load just the chosen rows.
+        picks = {
+            'shortest': (f"""
+                SELECT transcript_id, {size_metric} as size_metric
                 FROM transcripts
                 WHERE {non_empty_filter}
-            )
-            SELECT transcript_id, video_id, full_text, segments_json, language,
-                   word_count, transcript_provider, transcript_model,
-                   transcript_version, transcribed_at, size_metric
-            FROM ranked
-            WHERE rn BETWEEN (total/2 - ?) AND (total/2 + ?)
-            LIMIT ?
-        """, (self.sample_size // 2, self.sample_size // 2, self.sample_size))
-        for row in cursor.fetchall():
-            samples.append(self._row_to_dict(row, 'middle'))
-
-        # Get random 5
-        cursor = conn.execute(f"""
-            SELECT transcript_id, video_id, full_text, segments_json, language,
-                   word_count, transcript_provider, transcript_model,
-                   transcript_version, transcribed_at,
-                   COALESCE(word_count, length(full_text)) as size_metric
-            FROM transcripts
-            WHERE {non_empty_filter}
-            ORDER BY RANDOM()
-            LIMIT ?
-        """, (self.sample_size,))
-        for row in cursor.fetchall():
-            samples.append(self._row_to_dict(row, 'random'))
+                ORDER BY size_metric ASC
+                LIMIT ?
+            """, (self.sample_size,)),
+            'longest': (f"""
+                SELECT transcript_id, {size_metric} as size_metric
+                FROM transcripts
+                WHERE {non_empty_filter}
+                ORDER BY size_metric DESC
+                LIMIT ?
+            """, (self.sample_size,)),
+            # Middle (around median)
+            'middle': (f"""
+                WITH ranked AS (
+                    SELECT transcript_id, {size_metric} as size_metric,
+                           ROW_NUMBER() OVER (ORDER BY {size_metric}) as rn,
+                           COUNT(*) OVER () as total
+                    FROM transcripts
+                    WHERE {non_empty_filter}
+                )
+                SELECT transcript_id, size_metric
+                FROM ranked
+                WHERE rn BETWEEN (total/2 - ?) AND (total/2 + ?)
+                LIMIT ?
+            """, (self.sample_size // 2, self.sample_size // 2, self.sample_size)),
+            'random': (f"""
+                SELECT transcript_id, {size_metric} as size_metric
+                FROM transcripts
+                WHERE {non_empty_filter}
+                ORDER BY RANDOM()
+                LIMIT ?
+            """, (self.sample_size,)),
+        }
+
+        for group, (sql, params) in picks.items():
+            picked = [(row[0], row[1]) for row in db.iter_rows(sql, params, conn=conn)]
+            if not picked:
+                continue
+            ids = [tid for tid, _ in picked]
+            rows = {
+                row['transcript_id']: row
+                for row in db.iter_table(
+                    'transcripts', self.SAMPLE_COLUMNS + ['text_codec', 'full_text_z'],
+                    where=f"transcript_id IN ({', '.join('?' * len(ids))})",
+                    params=ids, conn=conn,
+                )
+            }
+            for tid, size in picked:
+                if tid in rows:
+                    samples.append(self._row_to_dict(rows[tid], size, group))
 
         return samples
 
-    def _row_to_dict(self, row: Tuple, sample_group: str) -> Dict:
+    def _row_to_dict(self, row: sqlite3.Row, size_metric, sample_group: str) -> Dict:
         """Convert database row to dictionary."""
-        return {
-            'transcript_id': row[0],
-            'video_id': row[1],
-            'full_text': row[2],
-            'segments_json': row[3],
-            'language': row[4],
-            'word_count': row[5],
-            'transcript_provider': row[6],
-            'transcript_model': row[7],
-            'transcript_version': row[8],
-            'transcribed_at': row[9],
-            'size_metric': row[10],
-            'sample_group': sample_group
-        }
+        transcript = db.LazyTranscript(row)  # decompresses full_text if needed
+        out = {col: transcript[col] for col in self.SAMPLE_COLUMNS}
+        out['size_metric'] = size_metric
+        out['sample_group'] = sample_group
+        return out
 
     def compute_metrics(self, conn: sqlite3.Connection) -> Dict:
         """Compute basic health metrics."""
@@ -150,10 +153,14 @@ class TranscriptQualityAuditor:
         metrics['total_transcripts'] = cursor.fetchone()[0]
 
         # Empty/NULL text
-        cursor = conn.execute("""
-            SELECT COUNT(*) FROM transcripts
-            WHERE full_text IS NULL OR trim(full_text) = ''
-        """)
+        if self._compressed_storage(conn):
+            cursor = conn.execute(
+                f"SELECT COUNT(*) FROM transcripts WHERE NOT {db.has_transcript_text_sql('')}")
+        else:
+            cursor = conn.execute("""
+                SELECT COUNT(*) FROM transcripts
+                WHERE full_text IS NULL OR trim(full_text) = ''
+            """)
         metrics['empty_text_count'] = cursor.fetchone()[0]
 
         # NULL word_count
@@ -224,6 +231,23 @@ class TranscriptQualityAuditor:
             for row in duplicates
         ]
 
+        # Near-duplicate groups from the MinHash index (engine/dedupe.py)
+        has_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='near_duplicates'"
+        ).fetchone()
+        metrics['near_duplicate_groups'] = []
+        if has_index:
+            cursor = conn.execute("""
+                SELECT canonical_id, COUNT(*) AS cnt, MIN(similarity)
+                FROM near_duplicates
+                GROUP BY canonical_id
+                ORDER BY cnt DESC
+            """)
+            metrics['near_duplicate_groups'] = [
+                {'canonical_id': row[0], 'duplicates': row[1], 'min_similarity': row[2]}
+                for row in cursor.fetchall()
+            ]
+
         # Language distribution
         cursor = conn.execute("""
             SELECT language, COUNT(*) as cnt
@@ -506,6 +530,15 @@ class TranscriptQualityAuditor:
             else:
                 f.write("✓ No duplicate video_ids found\n\n")
 
+            groups = metrics['near_duplicate_groups']
+            if groups:
+                f.write(f"### ⚠️ Near-Duplicate Groups: {len(groups)} "
+                       f"({sum(g['duplicates'] for g in groups)} transcripts collapsed)\n\n")
+                for g in groups[:20]:
+                    f.write(f"- `{g['canonical_id']}`: {g['duplicates']} near duplicates "
+                           f"(similarity >= {g['min_similarity']:.2f})\n")
+                f.write("\n")
+
             if metrics['empty_text_count'] > 0:
                 f.write(f"### ⚠️ Empty Transcripts: {metrics['empty_text_count']}\n\n")
 
@@ -1,16 +1,24 @@
 import os
+import hashlib
 import json
+import shutil
 import subprocess
 import logging
+import tempfile
 import time
 import traceback
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from openai import OpenAI
 from openai import APIStatusError
 from youtube_transcript_api import YouTubeTranscriptApi
 
-from engine.config import OPENAI_API_KEY, TMP_AUDIO_DIR, KEEP_AUDIO_ON_FAIL
+from engine.config import (OPENAI_API_KEY, TMP_AUDIO_DIR, KEEP_AUDIO_ON_FAIL, ASR_COMPUTE_TYPE,
+                           LOCAL_ASR_BACKEND, WHISPER_MODEL, CHUNK_WORKERS, CHUNK_ATTEMPTS,
+                           AUDIO_STREAM, AUDIO_STREAM_DIR)
 from engine import db
 
 logger = logging.getLogger("digital_pulpit")
@@ -31,23 +39,32 @@ def _file_size(path: str) -> int:
         return 0
 
 
-def download_audio(video_id: str) -> str | None:
+def _audio_path(video_id: str) -> str:
+    return os.path.join(AUDIO_STREAM_DIR if AUDIO_STREAM else TMP_AUDIO_DIR, f"{video_id}.mp3")
+
+
+def download_audio(video_id: str, duration_seconds: float | None = None) -> str | None:
     """
     Downloads best audio as MP3 using yt-dlp.
     Returns path to mp3, or None on failure.
+
+    With AUDIO_STREAM, yt-dlp's output is piped into a single ffmpeg encode
+    to 16 kHz mono (see stream_audio), so nothing is transcoded twice.
     """
-    os.makedirs(TMP_AUDIO_DIR, exist_ok=True)
-    output_path = os.path.join(TMP_AUDIO_DIR, f"{video_id}.mp3")
+    output_path = _audio_path(video_id)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
     if os.path.exists(output_path):
         logger.info(f"Audio already exists: {output_path}")
         return output_path
 
     url = f"https://www.youtube.com/watch?v={video_id}"
+    cookies_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cookies.txt")
+    if AUDIO_STREAM:
+        return stream_audio(video_id, url, output_path, cookies_path, duration_seconds)
 
     # NOTE: --audio-quality uses ffmpeg "quality scale" for VBR in some modes;
     # this can still produce large files for long videos.
-    cookies_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cookies.txt")
     cmd = [
         "yt-dlp",
         "-f",
@@ -102,9 +119,85 @@ def download_audio(video_id: str) -> str | None:
         return None
 
 
-def _reencode_mp3(input_path: str, output_path: str, bitrate_kbps: int) -> bool:
+def stream_audio(video_id: str, url: str, output_path: str, cookies_path: str | None = None,
+                 duration_seconds: float | None = None) -> str | None:
+    """
+    yt-dlp bestaudio on stdout -> one ffmpeg encode to 16 kHz mono MP3.
+
+    The bitrate is the highest in PREP_BITRATES that keeps duration_seconds
+    under MAX_UPLOAD_BYTES, so prepare_audio() usually has nothing left to
+    do. The file appears at output_path only once both processes succeed.
+    """
+    kbps = _fitting_bitrate(duration_seconds) if duration_seconds else None
+    kbps = kbps or (PREP_BITRATES[-1] if duration_seconds else PREP_BITRATES[0])
+    partial = output_path + ".part"
+    ytdlp_cmd = ["yt-dlp", "-f", "bestaudio", "-o", "-", "--no-playlist", "--no-warnings", "--quiet"]
+    if cookies_path and os.path.exists(cookies_path) and os.path.getsize(cookies_path) > 0:
+        ytdlp_cmd.extend(["--cookies", cookies_path])
+    ytdlp_cmd.append(url)
+    ffmpeg_cmd = [
+        "ffmpeg", "-y", "-loglevel", "error", "-i", "pipe:0",
+        "-vn", "-ac", "1", "-ar", "16000",
+        "-codec:a", "libmp3lame", "-b:a", f"{kbps}k", "-f", "mp3", partial,
+    ]
+
+    src = enc = None
+    # yt-dlp's stderr goes to a file: nobody reads it until the end, and a
+    # full pipe would stall the download.
+    with tempfile.TemporaryFile(mode="w+") as ytdlp_err:
+        try:
+            src = subprocess.Popen(ytdlp_cmd, stdout=subprocess.PIPE, stderr=ytdlp_err)
+            enc = subprocess.Popen(ffmpeg_cmd, stdin=src.stdout, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE, text=True)
+            # ffmpeg holds the read end now; if it exits, yt-dlp gets SIGPIPE.
+            src.stdout.close()
+            _, enc_err = enc.communicate(timeout=600)
+            src.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            logger.error(f"yt-dlp | ffmpeg timed out for {video_id}")
+            enc_err = None
+        except Exception as e:
+            logger.error(f"Download error for {video_id}: {e}")
+            logger.error(traceback.format_exc())
+            enc_err = None
+        finally:
+            for proc in (src, enc):
+                if proc is not None and proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+
+        ok = (enc_err is not None and src.returncode == 0 and enc.returncode == 0
+              and _file_size(partial) > 0)
+        if not ok:
+            if enc_err is not None:
+                ytdlp_err.seek(0)
+                logger.error(f"yt-dlp | ffmpeg failed for {video_id} (yt-dlp {src.returncode}, "
+                             f"ffmpeg {enc.returncode}): {ytdlp_err.read().strip()} {enc_err.strip()}")
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            return None
+
+    os.replace(partial, output_path)
+    logger.info(f"Streamed audio: {output_path} ({kbps}k mono, {_file_size(output_path)} bytes)")
+    return output_path
+
+
+def _run_ffmpeg(cmd: list[str]) -> tuple[int, str, float]:
+    """Run ffmpeg; returns (returncode, stderr, CPU seconds it used)."""
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    stderr = proc.stderr.read()
+    proc.stderr.close()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, stderr, usage.ru_utime + usage.ru_stime
+
+
+def _reencode_mp3(input_path: str, output_path: str, bitrate_kbps: int) -> float | None:
     """
     Re-encode audio to mono 16kHz MP3 at specified bitrate.
+    Returns the CPU seconds used, or None on failure.
     """
     cmd = [
         "ffmpeg",
@@ -122,17 +215,19 @@ def _reencode_mp3(input_path: str, output_path: str, bitrate_kbps: int) -> bool:
         f"{bitrate_kbps}k",
         output_path,
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        logger.error(f"ffmpeg re-encode failed ({bitrate_kbps}k): {result.stderr}")
-        return False
-    return os.path.exists(output_path)
+    returncode, stderr, cpu = _run_ffmpeg(cmd)
+    if returncode != 0:
+        logger.error(f"ffmpeg re-encode failed ({bitrate_kbps}k): {stderr}")
+        return None
+    return cpu if os.path.exists(output_path) else None
 
 
-def _split_into_chunks(input_path: str, out_dir: str, chunk_seconds: int, bitrate_kbps: int = 32) -> list[str]:
+def _split_into_chunks(input_path: str, out_dir: str, chunk_seconds: int,
+                       bitrate_kbps: int = 32) -> tuple[list[str], float]:
     """
     Split audio into N-second chunks and re-encode each chunk to mono 16kHz MP3.
     Using re-encode during segmentation keeps chunk files small & consistent.
+    Returns (chunk paths, CPU seconds used); no paths on failure.
     """
     os.makedirs(out_dir, exist_ok=True)
     # ffmpeg segment muxer output pattern
@@ -161,17 +256,17 @@ def _split_into_chunks(input_path: str, out_dir: str, chunk_seconds: int, bitrat
         out_pattern,
     ]
 
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        logger.error(f"ffmpeg chunking failed: {result.stderr}")
-        return []
+    returncode, stderr, cpu = _run_ffmpeg(cmd)
+    if returncode != 0:
+        logger.error(f"ffmpeg chunking failed: {stderr}")
+        return [], cpu
 
     chunks = sorted(
         str(Path(out_dir) / p)
         for p in os.listdir(out_dir)
         if p.startswith("chunk_") and p.endswith(".mp3")
     )
-    return chunks
+    return chunks, cpu
 
 
 def _looks_like_413(exc: Exception) -> bool:
@@ -208,19 +303,224 @@ def _response_to_text_segments(response, offset_seconds: float = 0.0) -> tuple[s
     return full_text, segments, language
 
 
-def transcribe_audio(video_id: str, audio_path: str) -> tuple[bool, str | None]:
+@dataclass
+class PreparedAudio:
     """
-    Returns: (success: bool, error_message: str|None)
+    Audio ready for upload: a single file at most MAX_UPLOAD_BYTES
+    (upload_path) or, failing that, a list of CHUNK_SECONDS chunks.
+    """
+    video_id: str
+    audio_path: str
+    upload_path: str | None = None
+    bitrate_kbps: int | None = None  # None = the downloaded file as-is
+    chunks: list[str] = field(default_factory=list)
+    temp_paths: list[str] = field(default_factory=list)
+    ffmpeg_passes: int = 0
+    ffmpeg_cpu_seconds: float = 0.0
+
+    @property
+    def upload_bytes(self) -> int:
+        if self.chunks:
+            return sum(_file_size(p) for p in self.chunks)
+        return _file_size(self.upload_path)
+
+
+@dataclass
+class TranscriptResult:
+    text: str
+    segments: list[dict]
+    language: str
+    model: str = TRANSCRIPTION_MODEL
+    provider: str = "openai_api"
+
+    @property
+    def word_count(self) -> int:
+        return len(self.text.split())
+
+
+# ---------------- AUDIO PREP PLANNER ----------------
+#
+# A download over MAX_UPLOAD_BYTES is sized from its duration: the highest
+# bitrate in PREP_BITRATES whose estimated size fits, else CHUNK_SECONDS
+# chunks at the lowest. Either is one ffmpeg run over the download. The
+# step-down ladder (each bitrate in turn, then chunks) remains for when the
+# duration is unknown or the estimate comes out too big.
+
+# MP3 bitrates (kbps) for a re-encode, highest first
+PREP_BITRATES = (48, 40, 32)
+# Headroom on duration x bitrate for MP3 framing and tags
+SIZE_MARGIN = 1.02
+
+
+@dataclass
+class PrepPlan:
+    bitrate_kbps: int | None  # None = upload the download as-is
+    chunked: bool = False
+    estimated_bytes: int = 0
+
+
+def _estimated_bytes(duration_seconds: float, kbps: int) -> int:
+    return int(duration_seconds * kbps * 125 * SIZE_MARGIN)
+
+
+def _fitting_bitrate(duration_seconds: float) -> int | None:
+    """Highest of PREP_BITRATES whose estimated size fits one upload, or None."""
+    for kbps in PREP_BITRATES:
+        if _estimated_bytes(duration_seconds, kbps) <= MAX_UPLOAD_BYTES:
+            return kbps
+    return None
+
+
+def plan_audio(size_bytes: int, duration_seconds: float) -> PrepPlan:
+    """The rendition to upload for a download of size_bytes / duration_seconds."""
+    if size_bytes <= MAX_UPLOAD_BYTES:
+        return PrepPlan(None, estimated_bytes=size_bytes)
+    kbps = _fitting_bitrate(duration_seconds)
+    if kbps is not None:
+        return PrepPlan(kbps, estimated_bytes=_estimated_bytes(duration_seconds, kbps))
+    kbps = PREP_BITRATES[-1]
+    return PrepPlan(kbps, chunked=True, estimated_bytes=_estimated_bytes(duration_seconds, kbps))
+
+
+def _ladder_passes(prep: PreparedAudio) -> int:
+    """ffmpeg passes the step-down ladder alone takes to reach prep's rendition."""
+    if prep.chunks:
+        return len(PREP_BITRATES) + 1
+    if prep.bitrate_kbps is None:
+        return 0
+    return PREP_BITRATES.index(prep.bitrate_kbps) + 1
+
+
+def _encode_single(prep: PreparedAudio, kbps: int) -> tuple[bool, str | None]:
+    fixed = prep.audio_path.replace(".mp3", f"_fixed_{kbps}k.mp3")
+    cpu = _reencode_mp3(prep.audio_path, fixed, bitrate_kbps=kbps)
+    prep.ffmpeg_passes += 1
+    if cpu is None:
+        return False, f"ffmpeg re-encode failed ({kbps}k)"
+    prep.ffmpeg_cpu_seconds += cpu
+    prep.temp_paths.append(fixed)
+    prep.upload_path, prep.bitrate_kbps = fixed, kbps
+    size = _file_size(fixed)
+    if size > MAX_UPLOAD_BYTES:
+        logger.warning(f"Re-encoded {kbps}k still too big ({size} bytes) for {prep.video_id}")
+    return True, None
+
+
+def _encode_chunks(prep: PreparedAudio) -> tuple[bool, str | None]:
+    kbps = PREP_BITRATES[-1]
+    chunks_dir = os.path.join(TMP_AUDIO_DIR, f"{prep.video_id}_chunks")
+    chunks, cpu = _split_into_chunks(prep.upload_path, chunks_dir, CHUNK_SECONDS, bitrate_kbps=kbps)
+    prep.ffmpeg_passes += 1
+    prep.ffmpeg_cpu_seconds += cpu
+    if not chunks:
+        return False, "Chunking failed (ffmpeg segment)"
+    prep.temp_paths.extend(chunks)
+    for idx, chunk_path in enumerate(chunks):
+        # Ensure chunk is under limit; if not, re-encode chunk harder (rare)
+        if _file_size(chunk_path) > MAX_UPLOAD_BYTES:
+            smaller = chunk_path.replace(".mp3", "_smaller.mp3")
+            cpu = _reencode_mp3(chunk_path, smaller, bitrate_kbps=24)
+            if cpu is not None:
+                prep.ffmpeg_passes += 1
+                prep.ffmpeg_cpu_seconds += cpu
+                prep.temp_paths.append(smaller)
+                chunks[idx] = smaller
+    prep.chunks, prep.upload_path, prep.bitrate_kbps = chunks, None, kbps
+    logger.info(f"Chunked audio for {prep.video_id}: {len(chunks)} x {CHUNK_SECONDS}s")
+    return True, None
+
+
+def _step_down(prep: PreparedAudio) -> tuple[bool, str | None]:
+    """
+    Move to the next smaller rendition: original -> each of PREP_BITRATES
+    -> chunks. Returns (stepped, error_message); (False, None) when already
+    chunked.
+    """
+    if prep.chunks:
+        return False, None
+    lower = [k for k in PREP_BITRATES if prep.bitrate_kbps is None or k < prep.bitrate_kbps]
+    if lower:
+        return _encode_single(prep, lower[0])
+    return _encode_chunks(prep)
+
+
+def _log_prep(prep: PreparedAudio, original_size: int, planned: bool) -> None:
+    if prep.chunks:
+        rendition = f"{len(prep.chunks)} chunks at {prep.bitrate_kbps}k"
+    else:
+        rendition = f"{prep.bitrate_kbps}k re-encode"
+    ladder = _ladder_passes(prep)
+    per_pass = prep.ffmpeg_cpu_seconds / prep.ffmpeg_passes if prep.ffmpeg_passes else 0.0
+    saved = max(0, ladder - prep.ffmpeg_passes)
+    logger.info(
+        f"Prepared {prep.video_id} ({'planned' if planned else 'step-down'}): {rendition}, "
+        f"{prep.ffmpeg_passes} ffmpeg pass(es), {prep.ffmpeg_cpu_seconds:.1f}s CPU "
+        f"(~{saved * per_pass:.1f}s and {saved} pass(es) saved vs step-down); "
+        f"upload {prep.upload_bytes / 1e6:.1f} MB instead of {original_size / 1e6:.1f} MB"
+    )
+
+
+def prepare_audio(video_id: str, audio_path: str,
+                  duration_seconds: float | None = None) -> tuple[PreparedAudio | None, str | None]:
+    """
+    Shrink audio until it can be uploaded, without calling the API.
 
     Strategy:
-    - Attempt original file if <= MAX_UPLOAD_BYTES.
-    - If too large or 413: re-encode at 48k then 32k.
-    - If still too large: chunk into 10-minute segments at 32k and stitch.
+    - Use the original file if <= MAX_UPLOAD_BYTES.
+    - Otherwise take the duration (duration_seconds, else ffprobe) and make
+      the rendition plan_audio() picks in one ffmpeg run.
+    - If the duration is unknown or the result is still too large, step
+      down through PREP_BITRATES and then 10-minute chunks.
+    """
+    original_size = _file_size(audio_path)
+    if original_size <= 0:
+        return None, f"Audio file missing or unreadable: {audio_path}"
+
+    prep = PreparedAudio(video_id=video_id, audio_path=audio_path, upload_path=audio_path)
+    if original_size <= MAX_UPLOAD_BYTES:
+        return prep, None
+    try:
+        duration = duration_seconds or probe_duration(audio_path)
+        planned = bool(duration)
+        if planned:
+            plan = plan_audio(original_size, duration)
+            if plan.chunked:
+                ok, err = _encode_chunks(prep)
+            else:
+                ok, err = _encode_single(prep, plan.bitrate_kbps)
+            if not ok:
+                release_prepared(prep)
+                return None, err
+        while not prep.chunks and _file_size(prep.upload_path) > MAX_UPLOAD_BYTES:
+            stepped, err = _step_down(prep)
+            if not stepped:
+                release_prepared(prep)
+                return None, err
+    except Exception as e:
+        err = f"{type(e).__name__}: {str(e)}"
+        logger.error(f"Audio preparation failed for {video_id}: {err}")
+        logger.error(traceback.format_exc())
+        release_prepared(prep)
+        return None, err
+    _log_prep(prep, original_size, planned)
+    return prep, None
+
+
+def transcribe_prepared(prep: PreparedAudio) -> tuple[TranscriptResult | None, str | None]:
+    """
+    Send prepared audio to the API. Does not touch the database.
+
+    A 413 steps down to a smaller rendition and retries; so does any error
+    on the untouched original (a re-encode sometimes fixes odd MP3 headers).
+    Chunks go up CHUNK_WORKERS at a time, each retried on its own, and are
+    stitched in order with offset timestamps. Every finished chunk is
+    checkpointed, so a failed or crashed run re-sends only the rest.
     """
     if not OPENAI_API_KEY:
-        return False, "OPENAI_API_KEY not set"
+        return None, "OPENAI_API_KEY not set"
 
     client = OpenAI(api_key=OPENAI_API_KEY)
+    video_id = prep.video_id
 
     def _attempt(path_to_use: str, label: str):
         with open(path_to_use, "rb") as audio_file:
@@ -232,179 +532,194 @@ def transcribe_audio(video_id: str, audio_path: str) -> tuple[bool, str | None]:
                 timestamp_granularities=["segment"],
             )
 
-    # If original is too big, don’t even try (avoid guaranteed 413).
-    original_size = _file_size(audio_path)
-    if original_size <= 0:
-        return False, f"Audio file missing or unreadable: {audio_path}"
-
-    work_paths_to_cleanup: list[str] = []
-
-    # Helper to try transcription with automatic downsize steps
-    def _try_with_downsize() -> tuple[object | None, str | None, str | None]:
-        """
-        Returns: (response_or_none, error_or_none, used_path_or_none)
-        """
-        # 1) Try original if it's under the limit
-        if original_size <= MAX_UPLOAD_BYTES:
+    while not prep.chunks:
+        if _file_size(prep.upload_path) > MAX_UPLOAD_BYTES:
+            # Don't even try (avoid a guaranteed 413).
+            stepped, step_err = _step_down(prep)
+            if not stepped:
+                return None, step_err
+            continue
+        label = f"re-encoded mp3 {prep.bitrate_kbps}k" if prep.bitrate_kbps else "original mp3"
+        try:
+            resp = _attempt(prep.upload_path, label)
+            return TranscriptResult(*_response_to_text_segments(resp, offset_seconds=0.0)), None
+        except Exception as e:
+            err = f"{type(e).__name__}: {str(e)}"
+            logger.error(f"Transcription failed for {video_id} ({label}): {err}")
+            logger.error(traceback.format_exc())
+            if not (_looks_like_413(e) or prep.bitrate_kbps is None):
+                return None, err
+            stepped, step_err = _step_down(prep)
+            if not stepped:
+                return None, f"{step_err}; original error: {err}"
+
+    chunks = prep.chunks
+    fingerprint = _chunk_fingerprint(prep)
+    results = [_load_checkpoint(video_id, idx, fingerprint) for idx in range(len(chunks))]
+    pending = [idx for idx, r in enumerate(results) if r is None]
+    if len(pending) < len(chunks):
+        logger.info(f"Resuming {video_id}: {len(chunks) - len(pending)}/{len(chunks)} chunks "
+                    f"already transcribed")
+
+    def _chunk(idx: int):
+        for attempt in range(1, CHUNK_ATTEMPTS + 1):
             try:
-                resp = _attempt(audio_path, "original mp3")
-                return resp, None, audio_path
+                resp = _attempt(chunks[idx], f"chunk {idx+1}/{len(chunks)}")
+                break
             except Exception as e:
                 err = f"{type(e).__name__}: {str(e)}"
-                logger.error(f"Transcription failed for {video_id} (original): {err}")
-                logger.error(traceback.format_exc())
-
-                # If not 413, we still try re-encode once (sometimes fixes weird MP3 headers)
-                # but keep the error context.
-                original_err = err
-        else:
-            original_err = f"File too large: {original_size} bytes"
-
-        # 2) Re-encode at 48k
-        fixed_48 = audio_path.replace(".mp3", "_fixed_48k.mp3")
-        try:
-            ok = _reencode_mp3(audio_path, fixed_48, bitrate_kbps=48)
-            if not ok:
-                return None, f"ffmpeg re-encode failed (48k); original error: {original_err}", None
-            work_paths_to_cleanup.append(fixed_48)
-
-            size_48 = _file_size(fixed_48)
-            if size_48 > MAX_UPLOAD_BYTES:
-                logger.warning(
-                    f"Re-encoded 48k still too big ({size_48} bytes) for {video_id}, trying 32k..."
-                )
-            else:
+                if attempt == CHUNK_ATTEMPTS:
+                    logger.error(f"Chunk transcription failed for {video_id} chunk {idx}: {err}")
+                    logger.error(traceback.format_exc())
+                    raise
+                logger.warning(f"Chunk {idx} of {video_id} failed (attempt {attempt}/"
+                               f"{CHUNK_ATTEMPTS}), retrying: {err}")
+                time.sleep(min(2 ** attempt, 30))
+        # Offset timestamps by chunk start
+        out = _response_to_text_segments(resp, offset_seconds=float(idx * CHUNK_SECONDS))
+        _save_checkpoint(video_id, idx, fingerprint, *out)
+        return out
+
+    failures = []
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(CHUNK_WORKERS, len(pending))),
+                                thread_name_prefix="chunks") as pool:
+            futures = {idx: pool.submit(_chunk, idx) for idx in pending}
+            for idx, future in futures.items():
                 try:
-                    resp = _attempt(fixed_48, "re-encoded mp3 48k")
-                    return resp, None, fixed_48
+                    results[idx] = future.result()
                 except Exception as e:
-                    err = f"{type(e).__name__}: {str(e)}"
-                    logger.error(f"Transcription failed for {video_id} (48k): {err}")
-                    logger.error(traceback.format_exc())
+                    failures.append(f"Chunk {idx} failed: {type(e).__name__}: {str(e)}")
+    if failures:
+        return None, "; ".join(failures)
 
-                    if not _looks_like_413(e):
-                        return None, err, None
-        except Exception as e:
-            err = f"{type(e).__name__}: {str(e)}"
-            logger.error(f"Re-encode attempt (48k) crashed for {video_id}: {err}")
-            logger.error(traceback.format_exc())
+    stitched_text_parts: list[str] = []
+    stitched_segments: list[dict] = []
+    language_final = "en"
+    for text, segs, lang in results:
+        if lang:
+            language_final = lang
+        if text.strip():
+            stitched_text_parts.append(text.strip())
+        if segs:
+            stitched_segments.extend(segs)
 
-        # 3) Re-encode at 32k
-        fixed_32 = audio_path.replace(".mp3", "_fixed_32k.mp3")
-        try:
-            ok = _reencode_mp3(audio_path, fixed_32, bitrate_kbps=32)
-            if not ok:
-                return None, f"ffmpeg re-encode failed (32k); original error: {original_err}", None
-            work_paths_to_cleanup.append(fixed_32)
+    full_text = "\n\n".join(stitched_text_parts).strip()
+    return TranscriptResult(full_text, stitched_segments, language_final), None
 
-            size_32 = _file_size(fixed_32)
-            if size_32 <= MAX_UPLOAD_BYTES:
-                try:
-                    resp = _attempt(fixed_32, "re-encoded mp3 32k")
-                    return resp, None, fixed_32
-                except Exception as e:
-                    err = f"{type(e).__name__}: {str(e)}"
-                    logger.error(f"Transcription failed for {video_id} (32k): {err}")
-                    logger.error(traceback.format_exc())
-                    return None, err, None
-            else:
-                logger.warning(
-                    f"Re-encoded 32k still too big ({size_32} bytes) for {video_id}, will chunk..."
-                )
-        except Exception as e:
-            err = f"{type(e).__name__}: {str(e)}"
-            logger.error(f"Re-encode attempt (32k) crashed for {video_id}: {err}")
-            logger.error(traceback.format_exc())
 
-        return None, "Audio still too large after re-encode; chunking required", None
+# ---------------- CHUNK CHECKPOINTS ----------------
+#
+# Each transcribed chunk is saved as TMP_AUDIO_DIR/checkpoints/<video_id>/
+# chunk_NNN.json until the transcript is saved. The fingerprint (video ID,
+# source size and a hash of its first and last MB, chunk length, chunk
+# count) discards checkpoints of different audio. It leaves out the mtime:
+# a re-download of the same audio after a failed run should still resume.
 
+_FINGERPRINT_SAMPLE = 1024 * 1024
+
+
+def _checkpoint_dir(video_id: str) -> str:
+    return os.path.join(TMP_AUDIO_DIR, "checkpoints", video_id)
+
+
+def _content_hash(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
     try:
-        # First try direct / re-encode path
-        response, err_msg, used_path = _try_with_downsize()
+        with open(path, "rb") as f:
+            h.update(f.read(_FINGERPRINT_SAMPLE))
+            size = os.fstat(f.fileno()).st_size
+            if size > _FINGERPRINT_SAMPLE:
+                f.seek(max(_FINGERPRINT_SAMPLE, size - _FINGERPRINT_SAMPLE))
+                h.update(f.read(_FINGERPRINT_SAMPLE))
+    except OSError:
+        return ""
+    return h.hexdigest()
 
-        if response is not None:
-            # Single-shot transcript
-            full_text, segments, language = _response_to_text_segments(response, offset_seconds=0.0)
-            word_count = len(full_text.split())
 
-            db.insert_transcript(
-                video_id,
-                full_text,
-                json.dumps(segments),
-                language,
-                word_count,
-                TRANSCRIPTION_MODEL,
-            )
-            db.update_video_status(video_id, "transcribed", None)
-            logger.info(f"Transcribed {video_id}: {word_count} words, language={language}")
-            return True, None
+def _chunk_fingerprint(prep: PreparedAudio) -> str:
+    return (f"{prep.video_id}:{_file_size(prep.audio_path)}:{_content_hash(prep.audio_path)}:"
+            f"{CHUNK_SECONDS}:{len(prep.chunks)}")
 
-        # If we get here, we need chunking.
-        logger.info(f"Chunking audio for {video_id} because: {err_msg}")
 
-        # Prefer chunking from the smallest available re-encode if it exists
-        chunk_source = None
-        for candidate in [audio_path.replace(".mp3", "_fixed_32k.mp3"), audio_path.replace(".mp3", "_fixed_48k.mp3"), audio_path]:
-            if os.path.exists(candidate):
-                chunk_source = candidate
-                break
-        if not chunk_source:
-            return False, f"Chunk source missing for {video_id}"
+def _load_checkpoint(video_id: str, idx: int, fingerprint: str):
+    path = os.path.join(_checkpoint_dir(video_id), f"chunk_{idx:03d}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("fingerprint") != fingerprint:
+        return None
+    return data["text"], data["segments"], data["language"]
 
-        chunks_dir = os.path.join(TMP_AUDIO_DIR, f"{video_id}_chunks")
-        chunks = _split_into_chunks(chunk_source, chunks_dir, CHUNK_SECONDS, bitrate_kbps=32)
 
-        if not chunks:
-            db.update_video_status(video_id, "error", "Chunking failed (ffmpeg segment)")
-            return False, "Chunking failed (ffmpeg segment)"
+def _save_checkpoint(video_id: str, idx: int, fingerprint: str,
+                     text: str, segments: list[dict], language: str) -> None:
+    directory = _checkpoint_dir(video_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"chunk_{idx:03d}.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint, "text": text, "segments": segments,
+                   "language": language}, f)
+    os.replace(path + ".tmp", path)
 
-        stitched_text_parts: list[str] = []
-        stitched_segments: list[dict] = []
-        language_final = "en"
 
-        # Transcribe each chunk and offset timestamps by chunk start
-        for idx, chunk_path in enumerate(chunks):
-            offset = float(idx * CHUNK_SECONDS)
+def clear_checkpoints(video_id: str) -> None:
+    shutil.rmtree(_checkpoint_dir(video_id), ignore_errors=True)
 
-            # Ensure chunk is under limit; if not, re-encode chunk harder (rare)
-            if _file_size(chunk_path) > MAX_UPLOAD_BYTES:
-                smaller = chunk_path.replace(".mp3", "_smaller.mp3")
-                ok = _reencode_mp3(chunk_path, smaller, bitrate_kbps=24)
-                if ok:
-                    work_paths_to_cleanup.append(smaller)
-                    chunk_path = smaller
 
-            try:
-                resp = _attempt(chunk_path, f"chunk {idx+1}/{len(chunks)}")
-            except Exception as e:
-                err = f"{type(e).__name__}: {str(e)}"
-                logger.error(f"Chunk transcription failed for {video_id} chunk {idx}: {err}")
-                logger.error(traceback.format_exc())
-                db.update_video_status(video_id, "error", f"Chunk {idx} failed: {err}")
-                return False, f"Chunk {idx} failed: {err}"
-
-            text, segs, lang = _response_to_text_segments(resp, offset_seconds=offset)
-            if lang:
-                language_final = lang
-
-            if text.strip():
-                stitched_text_parts.append(text.strip())
-            if segs:
-                stitched_segments.extend(segs)
-
-        full_text = "\n\n".join(stitched_text_parts).strip()
-        word_count = len(full_text.split())
-
-        db.insert_transcript(
-            video_id,
-            full_text,
-            json.dumps(stitched_segments),
-            language_final,
-            word_count,
-            TRANSCRIPTION_MODEL,
-        )
-        db.update_video_status(video_id, "transcribed", None)
-        logger.info(f"Transcribed {video_id} via chunks: {word_count} words, language={language_final}")
+def save_transcript(video_id: str, result: TranscriptResult) -> None:
+    db.insert_transcript(
+        video_id,
+        result.text,
+        result.segments,
+        result.language,
+        result.word_count,
+        result.model,
+        provider=result.provider,
+    )
+    db.update_video_status(video_id, "transcribed", None)
+    clear_checkpoints(video_id)
+    logger.info(f"Transcribed {video_id}: {result.word_count} words, language={result.language}")
+
+
+def release_prepared(prep: PreparedAudio) -> None:
+    """Remove re-encodes and chunks (not the downloaded mp3; see cleanup_audio)."""
+    for p in prep.temp_paths:
+        try:
+            if os.path.exists(p):
+                os.remove(p)
+        except Exception:
+            pass
+    chunks_dir = os.path.join(TMP_AUDIO_DIR, f"{prep.video_id}_chunks")
+    try:
+        os.rmdir(chunks_dir)
+    except OSError:
+        pass
+    prep.temp_paths = []
+
+
+def transcribe_audio(video_id: str, audio_path: str) -> tuple[bool, str | None]:
+    """
+    Returns: (success: bool, error_message: str|None)
+
+    prepare_audio -> transcribe_prepared -> save_transcript in one call.
+    Vacuum runs the same steps as separate pipeline stages.
+    """
+    if not OPENAI_API_KEY:
+        return False, "OPENAI_API_KEY not set"
+
+    prep, err = prepare_audio(video_id, audio_path)
+    if prep is None:
+        db.update_video_status(video_id, "error", err)
+        return False, err
+    try:
+        result, err = transcribe_prepared(prep)
+        if result is None:
+            db.update_video_status(video_id, "error", err)
+            return False, err
+        save_transcript(video_id, result)
         return True, None
 
     except Exception as e:
@@ -415,13 +730,141 @@ def transcribe_audio(video_id: str, audio_path: str) -> tuple[bool, str | None]:
         return False, err
 
     finally:
-        # Clean up any re-encoded temp files we created (not the original mp3 unless cleanup_audio handles it)
-        for p in work_paths_to_cleanup:
+        release_prepared(prep)
+
+
+# ---------------- ASR BACKENDS ----------------
+#
+# One interface over the speech-to-text engines. transcribe(path, language)
+# returns a TranscriptResult: text, segments [{start, end, text}] in
+# seconds, language.
+#
+#   openai          the hosted API (prepare_audio -> transcribe_prepared)
+#   whisper         openai-whisper on CPU (fp32)
+#   faster_whisper  faster-whisper / CTranslate2, ASR_COMPUTE_TYPE (int8) on CPU
+#
+# engine/whisper_pool.py runs LOCAL_ASR_BACKEND in its worker processes;
+# python -m engine.tools.asr_benchmark compares them.
+
+
+class ASRBackend(ABC):
+    name = ""
+    provider = ""
+
+    def __init__(self, model: str | None = None, threads: int = 0):
+        self.model = model
+        self.threads = threads
+
+    @property
+    def label(self) -> str:
+        """Stored as transcripts.transcript_model."""
+        return self.model or self.name
+
+    @abstractmethod
+    def transcribe(self, audio_path: str, language: str | None = "en") -> TranscriptResult:
+        """Transcribe one audio file; raises on failure."""
+
+    def _result(self, text: str, segments: list[dict], language: str | None) -> TranscriptResult:
+        text = (text or "").strip()
+        if not text:
+            raise ValueError("Empty transcription")
+        return TranscriptResult(text, segments, language or "en", model=self.label,
+                                provider=self.provider)
+
+
+class OpenAIBackend(ASRBackend):
+    name = "openai"
+    provider = "openai_api"
+
+    def __init__(self, model: str | None = None, threads: int = 0):
+        super().__init__(model or TRANSCRIPTION_MODEL, threads)
+
+    def transcribe(self, audio_path: str, language: str | None = "en") -> TranscriptResult:
+        # The API detects the language itself; `language` is not sent.
+        prep, err = prepare_audio(Path(audio_path).stem, str(audio_path))
+        if prep is None:
+            raise RuntimeError(err)
+        try:
+            result, err = transcribe_prepared(prep)
+        finally:
+            release_prepared(prep)
+        if result is None:
+            raise RuntimeError(err)
+        clear_checkpoints(prep.video_id)
+        return result
+
+
+class WhisperBackend(ASRBackend):
+    name = "whisper"
+    provider = "whisper_local"
+
+    def __init__(self, model: str | None = None, threads: int = 0):
+        super().__init__(model or WHISPER_MODEL, threads)
+        import whisper
+
+        if threads:
             try:
-                if os.path.exists(p):
-                    os.remove(p)
-            except Exception:
+                import torch
+                torch.set_num_threads(threads)
+            except ImportError:
                 pass
+        self._model = whisper.load_model(self.model)
+
+    def transcribe(self, audio_path: str, language: str | None = "en") -> TranscriptResult:
+        result = self._model.transcribe(str(audio_path), language=language, fp16=False)
+        segments = [{"start": float(s["start"]), "end": float(s["end"]), "text": s["text"].strip()}
+                    for s in result.get("segments", [])]
+        return self._result(result.get("text"), segments, result.get("language") or language)
+
+
+class FasterWhisperBackend(ASRBackend):
+    name = "faster_whisper"
+    provider = "faster_whisper"
+
+    def __init__(self, model: str | None = None, threads: int = 0,
+                 compute_type: str = ASR_COMPUTE_TYPE):
+        super().__init__(model or WHISPER_MODEL, threads)
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError("The faster_whisper ASR backend needs the faster-whisper package") from e
+        self.compute_type = compute_type
+        self._model = WhisperModel(self.model, device="cpu", compute_type=compute_type,
+                                   cpu_threads=threads)
+
+    @property
+    def label(self) -> str:
+        return f"{self.model}-{self.compute_type}"
+
+    def transcribe(self, audio_path: str, language: str | None = "en") -> TranscriptResult:
+        # Segments come back as a generator: decoding happens while iterating.
+        segs, info = self._model.transcribe(str(audio_path), language=language)
+        segments = [{"start": float(s.start), "end": float(s.end), "text": s.text.strip()}
+                    for s in segs]
+        text = " ".join(s["text"] for s in segments)
+        return self._result(text, segments, getattr(info, "language", None) or language)
+
+
+ASR_BACKENDS = {b.name: b for b in (OpenAIBackend, WhisperBackend, FasterWhisperBackend)}
+
+
+def get_backend(name: str = LOCAL_ASR_BACKEND, model: str | None = None,
+                threads: int = 0) -> ASRBackend:
+    """Instantiate (and load the model of) an ASR backend by name."""
+    if name not in ASR_BACKENDS:
+        raise ValueError(f"Unknown ASR backend {name!r}; choose from {', '.join(ASR_BACKENDS)}")
+    return ASR_BACKENDS[name](model=model, threads=threads)
+
+
+def probe_duration(path: str) -> float | None:
+    """Audio duration in seconds from ffprobe, or None."""
+    cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+           "-of", "default=noprint_wrappers=1:nokey=1", path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        return float(result.stdout.strip())
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
 
 
 def _get_caption_api():
@@ -520,7 +963,7 @@ def fetch_captions(video_id: str, max_retries: int = 4) -> tuple[bool, str | Non
             db.insert_transcript(
                 video_id=video_id,
                 transcript_text=full_text,
-                segments_json=json.dumps(segments),
+                segments_json=segments,
                 language=language,
                 word_count=word_count,
                 model="youtube_captions",
@@ -552,7 +995,7 @@ def cleanup_audio(video_id: str, success: bool):
     """
     Removes audio file after transcription depending on KEEP_AUDIO_ON_FAIL.
     """
-    audio_path = os.path.join(TMP_AUDIO_DIR, f"{video_id}.mp3")
+    audio_path = _audio_path(video_id)
     if os.path.exists(audio_path):
         if success or not KEEP_AUDIO_ON_FAIL:
             try:
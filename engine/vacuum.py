@@ -1,12 +1,21 @@
 import logging
 import os
-from engine.config import load_channels_csv, MAX_MINUTES_PER_RUN, MAX_VIDEOS_PER_RUN, CAPTIONS_ONLY
-from engine import db
-from engine.youtube import resolve_channel_id, discover_videos
-from engine.transcription import download_audio, transcribe_audio, cleanup_audio, fetch_captions
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from engine.config import (load_channels_csv, MAX_MINUTES_PER_RUN, MAX_VIDEOS_PER_RUN, CAPTIONS_ONLY,
+                           DISCOVERY_WORKERS, DISCOVERY_MODE, CHANNEL_SCHEDULE, DOWNLOAD_WORKERS, PREP_WORKERS, TRANSCRIBE_WORKERS,
+                           CAPTION_WORKERS, STAGE_QUEUE_SIZE, VACUUM_TRANSCRIBER, VACUUM_DEFER_SECONDS)
+from engine import db, jobs, scheduler, whisper_pool
+from engine.quota import youtube_quota
+from engine.stages import Pipeline, Stage
+from engine.youtube import resolve_channel_id, discover_videos, discover_uploads
+from engine.transcription import (download_audio, prepare_audio, transcribe_prepared, save_transcript,
+                                  release_prepared, cleanup_audio, fetch_captions)
 
 logger = logging.getLogger("digital_pulpit")
 
+VACUUM_JOB_KIND = "vacuum"
+
 
 def _safe_int(value, default=0):
     try:
@@ -26,7 +35,349 @@ def _safe_int(value, default=0):
         return default
 
 
+def _resolve_channel(ch):
+    """Resolve one channels.csv row and record the channel (worker thread)."""
+    name = ch.get("name", "(unknown)")
+    try:
+        channel_id, method = resolve_channel_id(ch)
+        if not channel_id:
+            return None, f"Failed to resolve: {name}"
+
+        db.upsert_channel(channel_id, ch.get("name", ""),
+                          ch.get("url", ""), method)
+        return channel_id, None
+    except Exception as e:
+        logger.warning(f"Discovery failed for {name}: {type(e).__name__}: {e}")
+        return None, f"Discovery failed: {name} ({type(e).__name__})"
+
+
+def _discover_channel(channel_id, name, writer):
+    """Discover one channel's recent videos with search.list (worker thread)."""
+    try:
+        videos = discover_videos(channel_id, writer=writer)
+        if videos is None:
+            # Not a check: the scheduler must not count it as one.
+            return [], f"Discovery failed: {name}"
+        # No high-water mark in search mode; just record the check for the scheduler.
+        db.set_discovery_mark(channel_id, None, None, None)
+        logger.info(f"  {name}: {len(videos)} videos discovered")
+        return videos, None
+    except Exception as e:
+        logger.warning(f"Discovery failed for {name}: {type(e).__name__}: {e}")
+        return [], f"Discovery failed: {name} ({type(e).__name__})"
+
+
+def discover_channels(channels, writer, workers=DISCOVERY_WORKERS, mode=DISCOVERY_MODE,
+                      schedule=CHANNEL_SCHEDULE):
+    """
+    Resolve and discover channels on a bounded thread pool.
+
+    API calls are paced by the shared quota governor (engine/quota.py) and
+    rate-limit backoff only stalls the worker that hit it. Returns
+    (videos, note) pairs: resolution failures first, then the polled
+    channels, in order of expected yield when scheduled by cadence.
+
+    schedule "cadence" polls only the channels engine/scheduler.py expects
+    to have new uploads; "all" polls every channel in channels.csv order.
+    mode "uploads" reads only what is new in each channel's uploads playlist
+    (engine/youtube.discover_uploads); "search" runs search.list per channel.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers),
+                            thread_name_prefix="discover") as pool:
+        resolved = list(pool.map(_resolve_channel, channels))
+
+        discovered = [([], note) for _, note in resolved if note]
+        names = {}
+        for ch, (cid, _) in zip(channels, resolved):
+            if cid:
+                names.setdefault(cid, ch.get("name", "(unknown)"))
+        channel_ids = list(names)
+        if schedule == "cadence":
+            channel_ids = scheduler.due_channels(channel_ids)
+
+        if mode == "search":
+            return discovered + list(pool.map(
+                lambda cid: _discover_channel(cid, names[cid], writer), channel_ids))
+
+    found = discover_uploads(channel_ids, writer=writer, workers=workers)
+    for cid in channel_ids:
+        if found.get(cid) is None:
+            discovered.append(([], f"Discovery failed: {names[cid]}"))
+        else:
+            discovered.append((found[cid], None))
+    return discovered
+
+
+def _quota_units(spent):
+    return sum(v["units"] for v in spent.values())
+
+
+def _quota_summary(spent):
+    return ", ".join(f"{m}: {v['calls']} calls/{v['units']} units"
+                     for m, v in sorted(spent.items())) or "no API calls"
+
+
+class _RunBudget:
+    """
+    MAX_VIDEOS_PER_RUN / MAX_MINUTES_PER_RUN shared by all pipeline stages.
+
+    Only transcribed videos count toward the totals, but a video is
+    reserved against both limits before it enters the pipeline, so work in
+    flight can never overshoot them. If a video does not fit while others
+    are in flight, reserve() waits for them to finish: a failure hands its
+    reservation back.
+    """
+
+    def __init__(self, max_videos, max_minutes):
+        self.max_videos = max_videos
+        self.max_minutes = max_minutes
+        self.videos = 0
+        self.minutes = 0.0
+        self._inflight_videos = 0
+        self._inflight_minutes = 0.0
+        self._cond = threading.Condition()
+
+    def reserve(self, minutes):
+        """Claim room for one video; False when it cannot fit even with nothing in flight."""
+        with self._cond:
+            while True:
+                fits = (
+                    self.videos + self._inflight_videos < self.max_videos
+                    and self.minutes + self._inflight_minutes + minutes <= self.max_minutes
+                )
+                if fits:
+                    self._inflight_videos += 1
+                    self._inflight_minutes += minutes
+                    return True
+                if not self._inflight_videos:
+                    return False
+                self._cond.wait()
+
+    def settle(self, minutes, success):
+        with self._cond:
+            self._inflight_videos -= 1
+            self._inflight_minutes -= minutes
+            if success:
+                self.videos += 1
+                self.minutes += minutes
+            self._cond.notify_all()
+
+
+def _transcribed_ids(video_ids):
+    done = set()
+    for i in range(0, len(video_ids), 500):
+        chunk = video_ids[i:i + 500]
+        done.update(r[0] for r in db.iter_rows(
+            f"SELECT video_id FROM transcripts WHERE video_id IN ({','.join('?' * len(chunk))})",
+            chunk))
+    return done
+
+
+def _enqueue_discovered(discovered, writer, notes_parts, min_duration_seconds, max_duration_seconds):
+    """Filter discovered videos and add the keepers to the vacuum job queue."""
+    pending = []
+    for videos, note in discovered:
+        if note:
+            notes_parts.append(note)
+            continue
+
+        for v in videos:
+            video_id = v.get("video_id")
+            if not video_id:
+                continue
+
+            duration_seconds = _safe_int(v.get("duration_seconds"), 0)
+
+            # Skip shorts/clips
+            if duration_seconds and duration_seconds < min_duration_seconds:
+                writer.update_video_status(video_id, "skipped",
+                                           f"Too short ({duration_seconds}s)")
+                continue
+
+            # Skip overly long services (cost / time)
+            if duration_seconds and duration_seconds > max_duration_seconds:
+                writer.update_video_status(video_id, "skipped",
+                                           f"Too long ({duration_seconds}s)")
+                notes_parts.append(
+                    f"Skipped too long: {video_id} ({duration_seconds}s)")
+                continue
+
+            pending.append((video_id, {"duration_min": duration_seconds / 60.0}))
+
+    done = _transcribed_ids([vid for vid, _ in pending])
+    return jobs.enqueue_many(VACUUM_JOB_KIND, [p for p in pending if p[0] not in done])
+
+
+class _Job:
+    """One video travelling through the Vacuum pipeline, with its queue lease."""
+
+    def __init__(self, video_id, duration_min, lease=None):
+        self.video_id = video_id
+        self.duration_min = duration_min
+        self.lease = lease
+        self.audio_path = None
+        self.prep = None
+        self.result = None
+        self.settled = False
+
+
+def _build_pipeline(writer, budget, notes_parts):
+    """
+    CAPTIONS_ONLY: a single caption-fetch stage. Otherwise download ->
+    audio prep (ffmpeg) -> transcribe (API) -> persist, each with its own
+    workers and a STAGE_QUEUE_SIZE input queue for backpressure. With
+    VACUUM_TRANSCRIBER=local there is no prep (that only shrinks uploads):
+    downloads go straight to the local Whisper pool.
+    """
+
+    def finish(job, success, error=None):
+        if not job.settled:
+            job.settled = True
+            budget.settle(job.duration_min, success)
+            if job.lease is not None:
+                # Failed downloads / transcriptions are retried with backoff;
+                # "no captions" is a final answer, like success.
+                try:
+                    if error:
+                        job.lease.fail(error)
+                    else:
+                        job.lease.complete()
+                except Exception as e:
+                    # Stop renewing it: the lease expires and the job is reclaimed.
+                    jobs.heartbeat.forget(job.lease.job_id)
+                    logger.error(f"Could not settle job for {job.video_id}: {type(e).__name__}: {e}")
+
+    def fail(job, msg, note):
+        # Settle in any case: an unsettled job holds run budget that
+        # reserve() may be waiting on, and a lease the heartbeat keeps renewing.
+        try:
+            if job.prep is not None:
+                release_prepared(job.prep)
+            if job.audio_path:
+                cleanup_audio(job.video_id, False)
+            writer.update_video_status(job.video_id, "failed", msg)
+        finally:
+            notes_parts.append(note)
+            finish(job, False, msg)
+
+    def on_error(job, stage_name, exc):
+        msg = f"{type(exc).__name__}: {exc}"
+        fail(job, msg, f"Pipeline {stage_name} failed: {job.video_id} ({msg})")
+
+    def captions(job):
+        writer.update_video_status(job.video_id, "fetching_captions", None)
+        success, err = fetch_captions(job.video_id)
+        if success:
+            # Supersede the buffered "fetching_captions" transition.
+            writer.update_video_status(job.video_id, "transcribed", None)
+        else:
+            msg = err or "No captions available"
+            writer.update_video_status(job.video_id, "skipped", msg)
+            notes_parts.append(f"No captions: {job.video_id}")
+        finish(job, success)
+        return None
+
+    def download(job):
+        writer.update_video_status(job.video_id, "downloading_audio", None)
+        job.audio_path = download_audio(job.video_id,
+                                        duration_seconds=job.duration_min * 60.0 or None)
+        if not job.audio_path:
+            fail(job, "Audio download failed", f"Download failed: {job.video_id}")
+            return None
+        writer.update_video_status(job.video_id, "audio_downloaded", None)
+        return job
+
+    def prepare(job):
+        job.prep, err = prepare_audio(job.video_id, job.audio_path,
+                                      duration_seconds=job.duration_min * 60.0 or None)
+        if job.prep is None:
+            msg = err or "Audio preparation failed"
+            fail(job, msg, f"Transcription failed: {job.video_id} ({msg})")
+            return None
+        return job
+
+    def transcribe(job):
+        writer.update_video_status(job.video_id, "transcribing", None)
+        job.result, err = transcribe_prepared(job.prep)
+        if job.result is None:
+            msg = err or "Transcription failed"
+            fail(job, msg, f"Transcription failed: {job.video_id} ({msg})")
+            return None
+        release_prepared(job.prep)
+        job.prep = None
+        return job
+
+    def transcribe_local(job):
+        writer.update_video_status(job.video_id, "transcribing", None)
+        job.result = whisper_pool.get_pool().transcribe(job.audio_path)
+        return job
+
+    def persist(job):
+        save_transcript(job.video_id, job.result)
+        cleanup_audio(job.video_id, True)
+        writer.update_video_status(job.video_id, "transcribed", None)
+        finish(job, True)
+        return None
+
+    if CAPTIONS_ONLY:
+        stages = [Stage("captions", captions, CAPTION_WORKERS, STAGE_QUEUE_SIZE)]
+    elif VACUUM_TRANSCRIBER == "local":
+        stages = [
+            Stage("download", download, DOWNLOAD_WORKERS, STAGE_QUEUE_SIZE),
+            Stage("transcribe", transcribe_local, whisper_pool.get_pool().processes,
+                  STAGE_QUEUE_SIZE),
+            Stage("persist", persist, 1, STAGE_QUEUE_SIZE),
+        ]
+    else:
+        stages = [
+            Stage("download", download, DOWNLOAD_WORKERS, STAGE_QUEUE_SIZE),
+            Stage("prep", prepare, PREP_WORKERS, STAGE_QUEUE_SIZE),
+            Stage("transcribe", transcribe, TRANSCRIBE_WORKERS, STAGE_QUEUE_SIZE),
+            # One writer: SQLite takes one write transaction at a time anyway.
+            Stage("persist", persist, 1, STAGE_QUEUE_SIZE),
+        ]
+    return Pipeline(stages, on_error=on_error)
+
+
+def _claim_into(pipe, budget, notes_parts, min_minutes=0.0):
+    """
+    Feed queued videos to the pipeline until the queue or the run budget
+    runs out. Returns the number submitted.
+
+    A video that does not fit the minutes left is deferred, not the end
+    of the run: shorter ones behind it may still fit. One longer than
+    MAX_MINUTES_PER_RUN never fits and is dead-lettered.
+    """
+    submitted = 0
+    while True:
+        if budget.max_minutes - budget.minutes < min_minutes:
+            notes_parts.append(f"MAX_MINUTES_PER_RUN ({MAX_MINUTES_PER_RUN}) reached")
+            break
+        claimed = jobs.claim(VACUUM_JOB_KIND)
+        if not claimed:
+            break
+        lease = claimed[0]
+        duration_min = float(lease.payload.get("duration_min") or 0.0)
+
+        # Preflight budget check BEFORE starting work
+        if budget.reserve(duration_min):
+            pipe.submit(_Job(lease.key, duration_min, lease))
+            submitted += 1
+        elif budget.videos >= budget.max_videos:
+            lease.release()
+            notes_parts.append(f"MAX_VIDEOS_PER_RUN ({MAX_VIDEOS_PER_RUN}) reached")
+            break
+        elif duration_min > budget.max_minutes:
+            msg = f"{duration_min:.0f} min exceeds MAX_MINUTES_PER_RUN ({MAX_MINUTES_PER_RUN})"
+            lease.fail(msg, retry=False)
+            notes_parts.append(f"Skipped {lease.key}: {msg}")
+        else:
+            lease.release(delay=VACUUM_DEFER_SECONDS)
+    return submitted
+
+
 def run_vacuum():
+    db.init_db()
     run_id = db.create_run("vacuum")
     logger.info(f"Starting Vacuum run #{run_id}")
     logger.info(
@@ -40,13 +391,15 @@ def run_vacuum():
         os.environ.get("MAX_VIDEO_DURATION_SECONDS", "3600"),
         3600)  # 60 minutes
 
-    total_videos = 0
-    total_minutes = 0.0
+    budget = _RunBudget(MAX_VIDEOS_PER_RUN, float(MAX_MINUTES_PER_RUN))
     notes_parts = []
+    quota_before = youtube_quota.report()
 
     status = "completed"
     notes = "All OK"
 
+    writer = db.BatchWriter()
+
     try:
         channels = load_channels_csv()
         if not channels:
@@ -60,108 +413,29 @@ def run_vacuum():
                 "notes": notes
             }
 
-        for ch in channels:
-            if total_videos >= MAX_VIDEOS_PER_RUN:
-                notes_parts.append(
-                    f"MAX_VIDEOS_PER_RUN ({MAX_VIDEOS_PER_RUN}) reached")
-                break
-            if total_minutes >= float(MAX_MINUTES_PER_RUN):
-                notes_parts.append(
-                    f"MAX_MINUTES_PER_RUN ({MAX_MINUTES_PER_RUN}) reached")
-                break
+        discovered = discover_channels(channels, writer)
+        # Video rows must exist before transcripts reference them.
+        writer.flush()
+        spent = youtube_quota.report_since(quota_before)
+        logger.info(
+            f"Discovery ({DISCOVERY_MODE}, schedule={CHANNEL_SCHEDULE}): {sum(len(v) for v, _ in discovered)} videos from "
+            f"{len(channels)} channels, {_quota_units(spent)} quota units ({_quota_summary(spent)})"
+        )
 
-            channel_id, method = resolve_channel_id(ch)
-            if not channel_id:
-                notes_parts.append(
-                    f"Failed to resolve: {ch.get('name','(unknown)')}")
-                continue
+        queued = _enqueue_discovered(discovered, writer, notes_parts,
+                                     min_duration_seconds, max_duration_seconds)
+        logger.info(f"Queued {queued} new videos; {jobs.stats(VACUUM_JOB_KIND).get(VACUUM_JOB_KIND, {})}")
 
-            db.upsert_channel(channel_id, ch.get("name", ""),
-                              ch.get("url", ""), method)
-
-            videos = discover_videos(channel_id)
-            logger.info(
-                f"  {ch.get('name','(unknown)')}: {len(videos)} videos discovered"
-            )
-
-            for v in videos:
-                if total_videos >= MAX_VIDEOS_PER_RUN:
-                    break
-
-                video_id = v.get("video_id")
-                if not video_id:
-                    continue
-
-                duration_seconds = _safe_int(v.get("duration_seconds"), 0)
-                duration_min = duration_seconds / 60.0
-
-                # Insert video row (dedupe safe)
-                db.insert_or_ignore_video(
-                    video_id=video_id,
-                    channel_id=channel_id,
-                    title=v.get("title", "") or "",
-                    published_at=v.get("published_at", "") or "",
-                    duration_seconds=duration_seconds,
-                    status="discovered",
-                    error_message=None,
-                )
-
-                # Skip shorts/clips
-                if duration_seconds and duration_seconds < min_duration_seconds:
-                    db.update_video_status(video_id, "skipped",
-                                           f"Too short ({duration_seconds}s)")
-                    continue
-
-                # Skip overly long services (cost / time)
-                if duration_seconds and duration_seconds > max_duration_seconds:
-                    db.update_video_status(video_id, "skipped",
-                                           f"Too long ({duration_seconds}s)")
-                    notes_parts.append(
-                        f"Skipped too long: {video_id} ({duration_seconds}s)")
-                    continue
-
-                # Preflight budget check BEFORE starting work
-                if (total_minutes + duration_min) > float(MAX_MINUTES_PER_RUN):
-                    notes_parts.append(
-                        f"MAX_MINUTES_PER_RUN ({MAX_MINUTES_PER_RUN}) reached")
-                    break
-
-                if CAPTIONS_ONLY:
-                    db.update_video_status(video_id, "fetching_captions", None)
-                    success, err = fetch_captions(video_id)
-                    if success:
-                        total_videos += 1
-                        total_minutes += duration_min
-                    else:
-                        msg = err or "No captions available"
-                        db.update_video_status(video_id, "skipped", msg)
-                        notes_parts.append(f"No captions: {video_id}")
-                else:
-                    db.update_video_status(video_id, "downloading_audio", None)
-
-                    audio_path = download_audio(video_id)
-                    if not audio_path:
-                        db.update_video_status(video_id, "failed",
-                                               "Audio download failed")
-                        notes_parts.append(f"Download failed: {video_id}")
-                        continue
-
-                    db.update_video_status(video_id, "audio_downloaded", None)
-                    db.update_video_status(video_id, "transcribing", None)
-
-                    success, err = transcribe_audio(video_id, audio_path)
-                    cleanup_audio(video_id, success)
-
-                    if success:
-                        total_videos += 1
-                        total_minutes += duration_min
-                        db.update_video_status(video_id, "transcribed", None)
-                    else:
-                        msg = err or "Transcription failed"
-                        db.update_video_status(video_id, "failed", msg)
-                        notes_parts.append(
-                            f"Transcription failed: {video_id} ({msg})")
+        # Claim from the shared queue rather than the list above: other Vacuum
+        # processes claim from it too, and it holds retries from earlier runs.
+        pipe = _build_pipeline(writer, budget, notes_parts)
+        with pipe:
+            # Videos shorter than this were filtered out when they were queued.
+            _claim_into(pipe, budget, notes_parts, min_minutes=min_duration_seconds / 60.0)
 
+        logger.info(f"Vacuum pipeline ({pipe.elapsed:.0f}s): {pipe.summary()}")
+        if VACUUM_TRANSCRIBER == "local" and not CAPTIONS_ONLY:
+            logger.info(whisper_pool.get_pool().summary())
         notes = "; ".join(notes_parts) if notes_parts else "All OK"
 
     except Exception as e:
@@ -169,10 +443,16 @@ def run_vacuum():
         notes = f"Run failed: {type(e).__name__}: {str(e)}"
         logger.error(notes, exc_info=True)
 
-    db.finish_run(run_id, status, total_videos, round(total_minutes, 2), notes)
+    finally:
+        writer.close()
+
+    quota_units = _quota_units(youtube_quota.report_since(quota_before))
+    db.finish_run(run_id, status, budget.videos, round(budget.minutes, 2), notes,
+                  quota_units=quota_units)
     return {
         "ok": status == "completed",
         "run_type": "vacuum",
         "run_id": run_id,
-        "notes": notes
+        "notes": notes,
+        "quota_units": quota_units,
     }
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+engine/whisper_pool.py - Local Whisper transcription service
+
+Loading a Whisper model reads its weights from disk (hundreds of MB for
+"small" and up). Here every worker process loads WHISPER_MODEL once, with
+the LOCAL_ASR_BACKEND engine (openai-whisper or faster-whisper, see ASR
+BACKENDS in engine/transcription.py), when it starts, and transcribes every
+file it is given with that copy.
+
+  WHISPER_WORKERS processes (0 = one per WHISPER_THREADS available cores),
+  each limited to cores / processes threads so the workers do not
+  oversubscribe the CPU.
+
+The pool is process-wide: podcast ingestion (engine/podcasts.py) and Vacuum
+(VACUUM_TRANSCRIBER=local) submit audio to the same workers. Throughput is
+reported in audio minutes per wall minute.
+
+    pool = whisper_pool.get_pool()
+    future = pool.submit("tmp_audio/ep.mp3")    # Future -> TranscriptResult
+    result = pool.transcribe("tmp_audio/ep.mp3")
+    logger.info(pool.summary())
+
+    python -m engine.whisper_pool FILE [FILE ...]
+"""
+
+import argparse
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from engine.config import LOCAL_ASR_BACKEND, WHISPER_MODEL, WHISPER_THREADS, WHISPER_WORKERS
+from engine.transcription import TranscriptResult, get_backend
+
+logger = logging.getLogger("digital_pulpit")
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        return os.cpu_count() or 1
+
+
+# ---------------- WORKER PROCESS ----------------
+
+_backend = None
+
+
+def _init_worker(backend: str, model: str, threads: int) -> None:
+    global _backend
+    _backend = get_backend(backend, model=model, threads=threads)
+
+
+def _transcribe(path: str, language: Optional[str]) -> TranscriptResult:
+    return _backend.transcribe(path, language)
+
+
+# ---------------- POOL ----------------
+
+
+class WhisperPool:
+    """Worker processes with the model loaded, fed through submit()."""
+
+    def __init__(self, model: str = WHISPER_MODEL, processes: int = WHISPER_WORKERS,
+                 language: Optional[str] = "en", backend: str = LOCAL_ASR_BACKEND):
+        cores = available_cores()
+        self.backend = backend
+        self.model = model
+        self.language = language
+        self.processes = processes if processes > 0 else max(1, cores // max(1, WHISPER_THREADS))
+        self.threads = max(1, cores // self.processes)
+        self._lock = threading.Lock()
+        self._executor = self._start()
+        self.files = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self._first_submit: Optional[float] = None
+        self._last_done: Optional[float] = None
+
+    def _start(self) -> ProcessPoolExecutor:
+        logger.info(f"Starting {self.processes} {self.backend} {self.model} workers "
+                    f"({self.threads} threads each)")
+        # spawn, not fork: the parent runs threads and may hold a torch runtime.
+        return ProcessPoolExecutor(max_workers=self.processes,
+                                   mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker,
+                                   initargs=(self.backend, self.model, self.threads))
+
+    def submit(self, audio_path) -> "Future[TranscriptResult]":
+        with self._lock:
+            if self._first_submit is None:
+                self._first_submit = time.monotonic()
+            try:
+                future = self._executor.submit(_transcribe, str(audio_path), self.language)
+            except BrokenProcessPool:
+                # A worker died (out of memory, killed); files in flight fail,
+                # the pool starts over for new ones.
+                logger.warning("Whisper worker pool broke; restarting it")
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._start()
+                future = self._executor.submit(_transcribe, str(audio_path), self.language)
+        future.add_done_callback(self._record)
+        return future
+
+    def transcribe(self, audio_path) -> TranscriptResult:
+        return self.submit(audio_path).result()
+
+    def _record(self, future: Future) -> None:
+        with self._lock:
+            self._last_done = time.monotonic()
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+                return
+            result = future.result()
+            self.files += 1
+            if result.segments:
+                self.audio_seconds += result.segments[-1]["end"]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            wall = 0.0
+            if self._first_submit is not None and self._last_done is not None:
+                wall = self._last_done - self._first_submit
+            audio_min = self.audio_seconds / 60.0
+            return {
+                "files": self.files,
+                "failed": self.failed,
+                "audio_minutes": audio_min,
+                "wall_minutes": wall / 60.0,
+                "audio_min_per_wall_min": audio_min / (wall / 60.0) if wall > 0 else 0.0,
+            }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (f"{self.backend} {self.model} x{self.processes}: {s['files']} files "
+                f"({s['failed']} failed), {s['audio_minutes']:.1f} audio min in "
+                f"{s['wall_minutes']:.1f} wall min = {s['audio_min_per_wall_min']:.1f} "
+                f"audio min / wall min")
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool: Optional[WhisperPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(processes: int = WHISPER_WORKERS) -> WhisperPool:
+    """The process-wide pool; processes only applies when it is first created."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WhisperPool(processes=processes)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        logger.info(pool.summary())
+        pool.shutdown()
+
+
+atexit.register(shutdown_pool)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Transcribe audio files with the local Whisper pool.")
+    ap.add_argument("files", nargs="+")
+    ap.add_argument("--workers", type=int, default=WHISPER_WORKERS,
+                    help="Worker processes (0 = one per WHISPER_THREADS cores)")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    pool = get_pool(args.workers)
+    futures = {path: pool.submit(path) for path in args.files}
+    for path, future in futures.items():
+        try:
+            result = future.result()
+            print(f"{path}: {result.word_count} words, language={result.language}")
+        except Exception as e:
+            print(f"{path}: failed ({type(e).__name__}: {e})")
+    print(pool.summary())
+
+
+if __name__ == "__main__":
+    main()
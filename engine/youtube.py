@@ -1,40 +1,77 @@
 import os
+import random
 import re
 import logging
+import threading
 import time
 import requests
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from engine.config import YOUTUBE_API_KEY
+from engine.config import (CHANNEL_CACHE_NEGATIVE_TTL_HOURS, CHANNEL_CACHE_TTL_DAYS,
+                           CHANNEL_RESOLVE_RATE, DISCOVERY_WORKERS, YOUTUBE_API_KEY)
 from engine import db
+from engine.quota import QuotaExhausted, TokenBucket, youtube_quota
 
 logger = logging.getLogger("digital_pulpit")
 
 
+_local = threading.local()
+
+
 def get_youtube_service():
+    # googleapiclient services wrap an httplib2 client, which is not
+    # thread-safe: keep one per thread (also saves rebuilding per call).
     if not YOUTUBE_API_KEY:
         raise ValueError("YOUTUBE_API_KEY not set")
-    return build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+    yt = getattr(_local, "youtube", None)
+    if yt is None:
+        yt = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+        _local.youtube = yt
+    return yt
+
 
+def _is_quota_exceeded(e) -> bool:
+    text = str(e)
+    content = getattr(e, "content", b"") or b""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", "replace")
+    return any(r in text or r in content for r in ("quotaExceeded", "dailyLimitExceeded"))
 
-def _api_call_with_backoff(fn, max_retries=4):
+
+def _api_call_with_backoff(fn, max_retries=4, method=None):
+    """
+    Call fn() with quota accounting for `method` (e.g. "search.list") and
+    exponential backoff on rate limiting. Backoff sleeps only the calling
+    worker; a spent daily quota raises QuotaExhausted at once, for all workers.
+    """
     for attempt in range(max_retries):
+        if method:
+            youtube_quota.acquire(method)
         try:
             return fn()
         except HttpError as e:
             if e.resp.status in (429, 403):
-                wait = 2 ** (attempt + 1)
-                logger.warning(f"YouTube API {e.resp.status}, backing off {wait}s (attempt {attempt+1}/{max_retries})")
+                if _is_quota_exceeded(e):
+                    youtube_quota.mark_exhausted()
+                    raise QuotaExhausted(str(e)) from e
+                wait = 2 ** (attempt + 1) * random.uniform(0.5, 1.0)
+                logger.warning(f"YouTube API {e.resp.status}, backing off {wait:.1f}s (attempt {attempt+1}/{max_retries})")
                 time.sleep(wait)
                 continue
             raise
+        except QuotaExhausted:
+            raise
         except Exception as e:
             err_str = str(e)
-            if "429" in err_str or "quotaExceeded" in err_str:
-                wait = 2 ** (attempt + 1)
-                logger.warning(f"YouTube API rate limit, backing off {wait}s (attempt {attempt+1}/{max_retries})")
+            if "quotaExceeded" in err_str:
+                youtube_quota.mark_exhausted()
+                raise QuotaExhausted(err_str) from e
+            if "429" in err_str:
+                wait = 2 ** (attempt + 1) * random.uniform(0.5, 1.0)
+                logger.warning(f"YouTube API rate limit, backing off {wait:.1f}s (attempt {attempt+1}/{max_retries})")
                 time.sleep(wait)
                 continue
             raise
@@ -92,18 +129,91 @@ def _search_channel_id(query: str):
                 q=q,
                 type="channel",
                 maxResults=1,
-            ).execute()
+            ).execute(),
+            method="search.list",
         )
         items = resp.get("items") or []
         if not items:
             return None
         return items[0]["id"].get("channelId")
+    except QuotaExhausted:
+        raise
     except Exception as e:
         logger.warning(f"Channel search fallback failed for '{q}': {e}")
         return None
 
 
-def resolve_channel_id(channel_info):
+def channel_cache_key(channel_info):
+    """
+    Normalized channel_resolution key: '@handle' when there is one,
+    else 'url:host/path', else 'name:...'. None for a provided or
+    /channel/UC... ID, which needs no lookup.
+    """
+    if _clean(channel_info.get("channel_id")):
+        return None
+    url = _clean(channel_info.get("url"))
+    if re.search(r"/channel/UC[\w-]+", url):
+        return None
+
+    handle = _clean_handle(
+        channel_info.get("handle") or channel_info.get("youtube_handle")
+        or channel_info.get("YouTube Handle") or "")
+    if not handle:
+        m = re.search(r"/@([\w.-]+)", url)
+        if m:
+            handle = m.group(1)
+    if handle:
+        return "@" + handle.lower()
+
+    if url:
+        u = re.sub(r"^[a-z]+://", "", url.lower())
+        u = re.sub(r"^(www\.|m\.)", "", u)
+        u = re.split(r"[?#]", u)[0].rstrip("/")
+        return "url:" + u
+
+    name = _clean(channel_info.get("name")).lower()
+    return ("name:" + " ".join(name.split())) if name else None
+
+
+_resolve_bucket = TokenBucket(CHANNEL_RESOLVE_RATE, max(1.0, CHANNEL_RESOLVE_RATE))
+
+
+def set_resolve_rate(per_second):
+    """Change the pace of uncached channel lookups (all threads)."""
+    global _resolve_bucket
+    _resolve_bucket = TokenBucket(per_second, max(1.0, per_second))
+
+
+def resolve_channel_id(channel_info, use_cache=True, refresh=False):
+    """
+    (channel_id, method) for a channels.csv row, or (None, "failed").
+
+    Lookups are cached in channel_resolution for CHANNEL_CACHE_TTL_DAYS
+    (failures for CHANNEL_CACHE_NEGATIVE_TTL_HOURS), so a steady-state run
+    does no resolution work. Uncached lookups are paced at
+    CHANNEL_RESOLVE_RATE per second across threads. refresh=True ignores
+    the cached entry but still stores the new result.
+    """
+    key = channel_cache_key(channel_info) if use_cache else None
+    if key and not refresh:
+        cached = db.get_channel_resolution(
+            key, CHANNEL_CACHE_TTL_DAYS * 86400, CHANNEL_CACHE_NEGATIVE_TTL_HOURS * 3600)
+        if cached is not None:
+            if cached["channel_id"]:
+                return cached["channel_id"], cached["method"]
+            logger.info(f"Skipping {_clean(channel_info.get('name'))}: unresolvable "
+                        f"as of {cached['resolved_at']} (cached)")
+            return None, "failed"
+    if key:
+        _resolve_bucket.acquire()
+
+    cid, method = _resolve_channel_id_uncached(channel_info)
+    if key:
+        db.set_channel_resolution(key, cid, method)
+    return cid, method
+
+
+def _resolve_channel_id_uncached(channel_info):
     url = _clean(channel_info.get("url"))
     provided_id = _clean(channel_info.get("channel_id"))
     name = _clean(channel_info.get("name"))
@@ -144,12 +254,15 @@ def resolve_channel_id(channel_info):
         try:
             resp = _api_call_with_backoff(
                 lambda: yt.channels().list(part="id,snippet",
-                                           forHandle=handle).execute()
+                                           forHandle=handle).execute(),
+                method="channels.list",
             )
             if resp.get("items"):
                 cid = resp["items"][0]["id"]
                 logger.info(f"Resolved @{handle} to {cid}")
                 return cid, "handle"
+        except QuotaExhausted:
+            raise
         except Exception as e:
             logger.warning(f"Handle resolution failed for @{handle}: {e}")
 
@@ -194,7 +307,8 @@ def parse_duration(duration_str):
     return hours * 3600 + minutes * 60 + seconds
 
 
-def discover_videos(channel_id, max_results=25):
+def discover_videos(channel_id, max_results=25, writer=None):
+    """Recent candidate videos of a channel via search.list, or None if the search failed."""
     yt = get_youtube_service()
     fourteen_days_ago = (datetime.now(timezone.utc) -
                          timedelta(days=14)).isoformat()
@@ -208,11 +322,12 @@ def discover_videos(channel_id, max_results=25):
                 order="date",
                 publishedAfter=fourteen_days_ago,
                 maxResults=max_results,
-            ).execute()
+            ).execute(),
+            method="search.list",
         )
     except Exception as e:
         logger.error(f"Search failed for channel {channel_id}: {e}")
-        return []
+        return None
 
     video_ids = [
         item["id"]["videoId"] for item in search_resp.get("items", [])
@@ -226,11 +341,22 @@ def discover_videos(channel_id, max_results=25):
         lambda: yt.videos().list(
             part="contentDetails,snippet",
             id=",".join(video_ids),
-        ).execute()
+        ).execute(),
+        method="videos.list",
     )
 
+    candidates = _candidates(details_resp.get("items", []), channel_id)
+    _record_candidates(candidates, writer)
+
+    logger.info(
+        f"Discovered {len(candidates)} candidate videos for channel {channel_id}"
+    )
+    return candidates
+
+
+def _candidates(items, channel_id):
     candidates = []
-    for item in details_resp.get("items", []):
+    for item in items:
         duration = parse_duration(item["contentDetails"]["duration"])
         if duration < 62:
             continue
@@ -243,12 +369,196 @@ def discover_videos(channel_id, max_results=25):
         })
 
     candidates.sort(key=lambda x: x["published_at"], reverse=True)
+    return candidates
+
 
+def _record_candidates(candidates, writer=None):
+    upsert = writer.upsert_video if writer is not None else db.upsert_video
     for v in candidates:
-        db.upsert_video(v["video_id"], v["channel_id"], v["title"],
-                        v["published_at"], v["duration_seconds"], "discovered")
+        upsert(v["video_id"], v["channel_id"], v["title"],
+               v["published_at"], v["duration_seconds"], "discovered")
+
+
+# ---------------- INCREMENTAL DISCOVERY ----------------
+#
+# search.list costs 100 units per channel per run. Instead, read the
+# channel's uploads playlist (playlistItems.list, 1 unit per 50 items),
+# newest first, and stop at the newest video seen on the previous run
+# (channel_discovery high-water mark). Details for the new IDs of every
+# channel are then fetched together, 50 per videos.list call (1 unit).
+
+
+def uploads_playlist_id(channel_id):
+    # A channel's uploads playlist is its ID with UC -> UU.
+    if channel_id and channel_id.startswith("UC"):
+        return "UU" + channel_id[2:]
+    return None
+
+
+def _lookup_uploads_playlist(channel_id):
+    yt = get_youtube_service()
+    resp = _api_call_with_backoff(
+        lambda: yt.channels().list(part="contentDetails", id=channel_id).execute(),
+        method="channels.list",
+    )
+    items = resp.get("items") or []
+    if not items:
+        return None
+    return items[0].get("contentDetails", {}).get("relatedPlaylists", {}).get("uploads")
+
+
+def list_new_uploads(channel_id, mark=None, max_results=25, window_days=14):
+    """
+    Newest uploads of a channel not seen before, as (video_id, published_at)
+    pairs, newest first, plus the uploads playlist ID used.
+
+    Stops at the high-water mark (mark["last_video_id"] / last_published_at)
+    or, for a channel without one, at videos older than window_days.
+    """
+    mark = mark or {}
+    playlist_id = mark.get("uploads_playlist_id") or uploads_playlist_id(channel_id)
+    if not playlist_id:
+        playlist_id = _lookup_uploads_playlist(channel_id)
+        if not playlist_id:
+            return [], None
+
+    last_id = mark.get("last_video_id")
+    last_at = mark.get("last_published_at")
+    cutoff = None
+    if not last_id and not last_at:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=window_days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    yt = get_youtube_service()
+    found = []
+    page_token = None
+    looked_up = bool(mark.get("uploads_playlist_id"))
+    while len(found) < max_results:
+        try:
+            resp = _api_call_with_backoff(
+                lambda: yt.playlistItems().list(
+                    part="contentDetails",
+                    playlistId=playlist_id,
+                    maxResults=50,
+                    pageToken=page_token,
+                ).execute(),
+                method="playlistItems.list",
+            )
+        except HttpError as e:
+            # The UU guess does not hold for every channel; ask once.
+            if e.resp.status == 404 and not looked_up:
+                looked_up = True
+                playlist_id = _lookup_uploads_playlist(channel_id)
+                if not playlist_id:
+                    return [], None
+                continue
+            raise
+
+        done = False
+        for item in resp.get("items", []):
+            details = item.get("contentDetails") or {}
+            video_id = details.get("videoId")
+            published_at = details.get("videoPublishedAt") or ""
+            if not video_id:
+                continue
+            if video_id == last_id or (last_at and published_at and published_at <= last_at):
+                done = True
+                break
+            if cutoff and published_at and published_at < cutoff:
+                done = True
+                break
+            found.append((video_id, published_at))
+            if len(found) >= max_results:
+                break
+
+        page_token = resp.get("nextPageToken")
+        if done or not page_token:
+            break
+
+    return found, playlist_id
+
+
+def fetch_video_details(video_ids):
+    """videos.list items keyed by ID, looked up 50 IDs per call."""
+    yt = get_youtube_service()
+    ids = list(dict.fromkeys(video_ids))
+    details = {}
+    for i in range(0, len(ids), 50):
+        batch = ids[i:i + 50]
+        resp = _api_call_with_backoff(
+            lambda: yt.videos().list(
+                part="contentDetails,snippet",
+                id=",".join(batch),
+                maxResults=50,
+            ).execute(),
+            method="videos.list",
+        )
+        for item in resp.get("items", []):
+            details[item["id"]] = item
+    return details
+
+
+def discover_uploads(channel_ids, writer=None, max_results=25, workers=DISCOVERY_WORKERS):
+    """
+    Incremental discovery for many channels at once.
+
+    Returns {channel_id: candidates} like discover_videos per channel, or
+    None for a channel whose listing failed. A channel's high-water mark
+    only moves once the details of its new videos have been recorded, so
+    a failed run is retried from the same point next time.
+    """
+    marks = db.get_discovery_marks(channel_ids)
+
+    def _list(cid):
+        try:
+            return list_new_uploads(cid, marks.get(cid), max_results=max_results)
+        except Exception as e:
+            logger.error(f"Uploads listing failed for channel {cid}: {type(e).__name__}: {e}")
+            return None
+
+    def _details(batch):
+        try:
+            return fetch_video_details(batch), set()
+        except Exception as e:
+            logger.error(f"videos.list failed for {len(batch)} IDs: {type(e).__name__}: {e}")
+            return {}, set(batch)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers),
+                            thread_name_prefix="uploads") as pool:
+        listed = dict(zip(channel_ids, pool.map(_list, channel_ids)))
+
+        new_ids = [vid for r in listed.values() if r for vid, _ in r[0]]
+        batches = [new_ids[i:i + 50] for i in range(0, len(new_ids), 50)]
+        details, failed = {}, set()
+        for found, missed in pool.map(_details, batches):
+            details.update(found)
+            failed |= missed
+
+    results, moves = {}, []
+    for cid, r in listed.items():
+        if r is None:
+            results[cid] = None
+            continue
+        uploads, playlist_id = r
+        if any(vid in failed for vid, _ in uploads):
+            results[cid] = None
+            continue
+        candidates = _candidates([details[vid] for vid, _ in uploads if vid in details], cid)
+        _record_candidates(candidates, writer)
+        newest_id, newest_at = max(uploads, key=lambda u: u[1]) if uploads else (None, None)
+        moves.append((cid, playlist_id, newest_id, newest_at or None))
+        results[cid] = candidates
+        logger.info(f"Discovered {len(candidates)} candidate videos for channel {cid} "
+                    f"({len(uploads)} new uploads)")
+
+    # The writer only buffers the candidates: commit them before any mark
+    # moves past them, or a crash in between would lose them for good.
+    if writer is not None:
+        writer.flush()
+    for mark in moves:
+        db.set_discovery_mark(*mark)
 
     logger.info(
-        f"Discovered {len(candidates)} candidate videos for channel {channel_id}"
+        f"Incremental discovery: {len(new_ids)} new uploads across {len(channel_ids)} channels "
+        f"in {len(batches)} videos.list call(s)"
     )
-    return candidates
+    return results
@@ -5,29 +5,28 @@ final_calibration_report.py
 Final calibration report after full corpus recompute.
 """
 
-import sqlite3
-from typing import List, Dict
+from typing import Dict, List
 
+from engine import db
 
-def get_all_results(db_path: str) -> List[Dict]:
-    """Get all brain results."""
-    con = sqlite3.connect(db_path)
-    con.row_factory = sqlite3.Row
+AXIS_COLUMNS = [
+    "grace_vs_effort", "hope_vs_fear", "doctrine_vs_experience",
+    "scripture_vs_story", "theological_density",
+]
 
-    query = """
-        SELECT video_id, grace_vs_effort, hope_vs_fear,
-               doctrine_vs_experience, scripture_vs_story, theological_density
-        FROM brain_results
-    """
 
-    results = [dict(row) for row in con.execute(query)]
-    con.close()
-    return results
+def get_all_results(db_path: str) -> Dict[str, List[float]]:
+    """Axis columns of every brain result, streamed column-wise."""
+    columns: Dict[str, List[float]] = {c: [] for c in AXIS_COLUMNS}
+    for row in db.iter_table("brain_results", AXIS_COLUMNS, db_path=db_path):
+        for c in AXIS_COLUMNS:
+            columns[c].append(row[c])
+    return columns
 
 
 def main():
     results = get_all_results('db/digital_pulpit.db')
-    total = len(results)
+    total = len(results['hope_vs_fear'])
 
     print("=" * 80)
     print("FINAL CALIBRATION REPORT - v2.1 + Config v5.4")
@@ -47,7 +46,8 @@ def main():
     print("1. HOPE_VS_FEAR DISTRIBUTION")
     print("-" * 80)
 
-    hope_scores = [r['hope_vs_fear'] for r in results]
+    hope_scores = results['hope_vs_fear']
+    grace_scores = results['grace_vs_effort']
 
     bins = [
         (1.0, 1.0, "Exactly 1.000"),
@@ -79,10 +79,10 @@ def main():
     print("2. CORPUS-WIDE AVERAGES")
     print("-" * 80)
 
-    avg_gve = sum(r['grace_vs_effort'] for r in results) / total
-    avg_hvf = sum(r['hope_vs_fear'] for r in results) / total
-    avg_dve = sum(r['doctrine_vs_experience'] for r in results) / total
-    avg_svs = sum(r['scripture_vs_story'] for r in results) / total
+    avg_gve = sum(results['grace_vs_effort']) / total
+    avg_hvf = sum(results['hope_vs_fear']) / total
+    avg_dve = sum(results['doctrine_vs_experience']) / total
+    avg_svs = sum(results['scripture_vs_story']) / total
 
     print(f"{'Axis':<30} {'Average':<15}")
     print("-" * 80)
@@ -96,7 +96,7 @@ def main():
     print("3. SERMONS WITH NEGATIVE HOPE_VS_FEAR")
     print("-" * 80)
 
-    negative = sum(1 for r in results if r['hope_vs_fear'] < -0.05)
+    negative = sum(1 for s in hope_scores if s < -0.05)
     print(f"Count: {negative} sermons ({negative/total*100:.1f}%)")
     print()
 
@@ -104,7 +104,7 @@ def main():
     print("4. THEOLOGICAL DENSITY")
     print("-" * 80)
 
-    avg_density = sum(r['theological_density'] for r in results) / total
+    avg_density = sum(results['theological_density']) / total
     print(f"Average: {avg_density:.1f}")
     print()
 
@@ -115,10 +115,10 @@ def main():
     print()
 
     # Perfect scores
-    perfect_hope_pos = sum(1 for r in results if abs(r['hope_vs_fear'] - 1.0) < 0.0001)
-    perfect_hope_neg = sum(1 for r in results if abs(r['hope_vs_fear'] - (-1.0)) < 0.0001)
-    perfect_grace_pos = sum(1 for r in results if abs(r['grace_vs_effort'] - 1.0) < 0.0001)
-    perfect_grace_neg = sum(1 for r in results if abs(r['grace_vs_effort'] - (-1.0)) < 0.0001)
+    perfect_hope_pos = sum(1 for s in hope_scores if abs(s - 1.0) < 0.0001)
+    perfect_hope_neg = sum(1 for s in hope_scores if abs(s - (-1.0)) < 0.0001)
+    perfect_grace_pos = sum(1 for s in grace_scores if abs(s - 1.0) < 0.0001)
+    perfect_grace_neg = sum(1 for s in grace_scores if abs(s - (-1.0)) < 0.0001)
 
     print(f"Perfect scores (±1.000):")
     print(f"  hope_vs_fear = +1.000: {perfect_hope_pos} ({perfect_hope_pos/total*100:.1f}%)")
@@ -128,8 +128,8 @@ def main():
     print()
 
     # Strong signals
-    strong_hope = sum(1 for r in results if r['hope_vs_fear'] > 0.5)
-    strong_fear = sum(1 for r in results if r['hope_vs_fear'] < -0.5)
+    strong_hope = sum(1 for s in hope_scores if s > 0.5)
+    strong_fear = sum(1 for s in hope_scores if s < -0.5)
 
     print(f"Strong signals:")
     print(f"  Strong hope (>0.5): {strong_hope} ({strong_hope/total*100:.1f}%)")
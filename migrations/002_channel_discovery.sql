@@ -0,0 +1,15 @@
+-- Migration: Per-channel discovery high-water marks and run quota accounting
+-- Purpose: Incremental discovery reads each channel's uploads playlist only
+--          back to the newest video seen last time (see engine/youtube.py)
+-- Date: 2026-10-16
+
+CREATE TABLE IF NOT EXISTS channel_discovery (
+    channel_id TEXT PRIMARY KEY,
+    uploads_playlist_id TEXT,
+    last_video_id TEXT,                  -- newest upload seen
+    last_published_at TEXT,              -- its publish time (ISO 8601, UTC)
+    checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- YouTube Data API units spent by the run (NULL for runs that made no calls)
+ALTER TABLE runs ADD COLUMN quota_units INTEGER;
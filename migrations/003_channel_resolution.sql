@@ -0,0 +1,13 @@
+-- Migration: Channel resolution cache
+-- Purpose: Remember how each channels.csv URL / @handle / name resolved to a
+--          channel ID (or that it did not), so steady-state runs skip
+--          yt-dlp, HTML scraping and search.list (see engine/youtube.py)
+-- Date: 2026-10-16
+
+CREATE TABLE IF NOT EXISTS channel_resolution (
+    key TEXT PRIMARY KEY,                -- '@handle', 'url:host/path' or 'name:...'
+    channel_id TEXT,                     -- NULL = could not be resolved
+    method TEXT,                         -- 'ytdlp', 'handle', 'html_fallback', ...
+    resolved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    attempts INTEGER NOT NULL DEFAULT 1  -- failed attempts since the last success
+);
@@ -0,0 +1,24 @@
+-- Migration: Durable job queue
+-- Purpose: Leased work items so several Vacuum / RSS / sermon_analyst
+--          processes can share one database without duplicating work,
+--          and a crash mid-item is retried instead of stuck (see engine/jobs.py)
+-- Date: 2026-10-16
+
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,                  -- 'vacuum', 'rss_episode', 'sermon_analysis'
+    key TEXT NOT NULL,                   -- video / episode ID
+    payload_json TEXT,
+    state TEXT NOT NULL DEFAULT 'queued',  -- queued | leased | done | dead
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_after REAL NOT NULL DEFAULT 0,   -- unix time; retry backoff
+    lease_owner TEXT,
+    lease_expires_at REAL,               -- unix time
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(kind, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(kind, state, run_after);
@@ -0,0 +1,17 @@
+-- Migration: Conditional-GET state per RSS feed
+-- Purpose: The feed poller (engine/feeds.py) replays each feed's ETag /
+--          Last-Modified so unchanged feeds cost a 304, not a full download
+-- Date: 2026-10-16
+
+CREATE TABLE IF NOT EXISTS feed_state (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,                   -- sha256 of the last body (servers without validators)
+    http_status INTEGER,
+    last_error TEXT,
+    polls INTEGER NOT NULL DEFAULT 0,
+    not_modified INTEGER NOT NULL DEFAULT 0,  -- polls answered 304 / identical body
+    checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    changed_at TIMESTAMP
+);
@@ -0,0 +1,23 @@
+-- Migration: Content-addressed audio store
+-- Purpose: Downloaded enclosures are kept by sha256 (engine/downloads.py) so
+--          re-runs and the same file behind several feeds skip the download
+-- Date: 2026-10-16
+
+CREATE TABLE IF NOT EXISTS audio_blobs (
+    sha256 TEXT PRIMARY KEY,
+    size_bytes INTEGER NOT NULL,
+    path TEXT NOT NULL,                  -- relative to AUDIO_STORE_DIR
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS audio_urls (
+    url TEXT PRIMARY KEY,                -- as requested
+    final_url TEXT,                      -- after redirects (tracking prefixes differ per feed)
+    sha256 TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_audio_urls_final ON audio_urls(final_url);
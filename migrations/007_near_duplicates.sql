@@ -0,0 +1,29 @@
+-- Migration: Near-duplicate transcript index
+-- Purpose: MinHash signatures and LSH buckets per transcript (engine/dedupe.py),
+--          and the near-duplicate -> canonical mapping downstream stages skip
+-- Date: 2026-10-16
+
+CREATE TABLE IF NOT EXISTS transcript_minhash (
+    video_id TEXT PRIMARY KEY,
+    signature BLOB NOT NULL,             -- NUM_PERM little-endian uint64
+    indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS minhash_bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,             -- hash of the band's signature values
+    video_id TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, video_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_minhash_bands_video ON minhash_bands(video_id);
+
+CREATE TABLE IF NOT EXISTS near_duplicates (
+    video_id TEXT PRIMARY KEY,
+    canonical_id TEXT NOT NULL,          -- first transcript of the group
+    matched_id TEXT NOT NULL,            -- most similar transcript when detected
+    similarity REAL NOT NULL,            -- estimated Jaccard of word 3-shingles
+    detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_near_duplicates_canonical ON near_duplicates(canonical_id);
@@ -5,7 +5,7 @@ import sys
 import sqlite3
 sys.path.insert(0, '.')
 
-from engine import brain
+from engine import brain, db
 
 DATABASE_PATH = "db/digital_pulpit.db"
 
@@ -15,19 +15,20 @@ print("="*80)
 
 conn = sqlite3.connect(DATABASE_PATH)
 conn.row_factory = sqlite3.Row
+db.register_functions(conn)
 
 # Fetch all transcripts (not just unanalyzed)
-q = """
+q = f"""
 SELECT
     t.video_id,
-    t.full_text,
+    {db.transcript_text_sql("t", conn)} AS full_text,
     t.word_count,
     v.channel_id,
     v.title,
     v.published_at
 FROM transcripts t
 JOIN videos v ON t.video_id = v.video_id
-WHERE t.full_text IS NOT NULL
+WHERE {db.has_transcript_text_sql("t", conn)}
   AND t.word_count IS NOT NULL
 ORDER BY v.published_at DESC
 """
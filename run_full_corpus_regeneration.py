@@ -19,6 +19,8 @@ import sys
 import sqlite3
 from typing import Dict, Any
 
+from engine import db
+
 
 def run_command(cmd: list, description: str) -> bool:
     """Run a command and return success status."""
@@ -44,12 +46,11 @@ def run_command(cmd: list, description: str) -> bool:
 def get_sermon_count(db_path: str) -> int:
     """Count sermons with transcripts."""
     con = sqlite3.connect(db_path)
-    count = con.execute("""
+    count = con.execute(f"""
         SELECT COUNT(*)
         FROM transcripts t
         JOIN videos v ON t.video_id = v.video_id
-        WHERE t.full_text IS NOT NULL
-          AND LENGTH(t.full_text) > 0
+        WHERE {db.has_transcript_text_sql("t", con)}
     """).fetchone()[0]
     con.close()
     return count
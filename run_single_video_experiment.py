@@ -18,6 +18,7 @@ from typing import Any, Dict, List, Optional
 
 # Import from brain_experiment
 sys.path.insert(0, os.path.dirname(__file__))
+from engine import db
 from engine.brain_experiment import (
     _connect,
     _build_variants,
@@ -36,11 +37,11 @@ def run_single_experiment(db_path: str, video_id: str) -> Dict[str, Any]:
 
     try:
         # Get video info
-        row = con.execute("""
+        row = con.execute(f"""
             SELECT
                 v.video_id, v.title,
                 c.channel_name,
-                t.full_text, t.summary_text,
+                {db.transcript_text_sql("t", con)} AS full_text, t.summary_text,
                 sa.claims_json,
                 br.theological_density as db_density,
                 br.grace_vs_effort as db_gve,
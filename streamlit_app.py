@@ -4,8 +4,8 @@ import sqlite3
 import pandas as pd
 import streamlit as st
 
-from engine import db
-from engine.config import DASHBOARD_PASSWORD, DATABASE_PATH
+from engine import db, snapshot
+from engine.config import DASHBOARD_PASSWORD, DATABASE_PATH, DB_SNAPSHOT_PATH
 from engine.pipeline import run_vacuum, run_brain, run_assembly, run_all
 
 logging.basicConfig(level=logging.INFO,
@@ -21,6 +21,10 @@ if hasattr(db, "init_db"):
 
 st.set_page_config(page_title="Digital Pulpit", page_icon=None, layout="wide")
 
+# Dashboard reads come from a read-only snapshot of the DB (engine/snapshot.py),
+# refreshed in the background and after every run started from Controls.
+snapshot.start_scheduler()
+
 
 # -------------------------
 # SQLite direct-read helpers
@@ -31,8 +35,14 @@ class _ReadOnlyConnection:
         self.conn = None
     
     def __enter__(self):
+        path = snapshot.ensure_snapshot()
+        if path:
+            self.conn = snapshot.connect(path)
+            return self.conn
+        # No snapshot yet (fresh install): fall back to the live DB.
         self.conn = sqlite3.connect(DATABASE_PATH, timeout=15)
         self.conn.row_factory = sqlite3.Row
+        db.register_functions(self.conn)
         try:
             self.conn.execute("PRAGMA busy_timeout=5000")
         except Exception:
@@ -156,15 +166,73 @@ def _get_transcript_text(video_id: str) -> str:
         if "video_id" not in tcols:
             return ""
 
-        text_col = "transcript_text" if "transcript_text" in tcols else None
-        if not text_col:
+        if "text_codec" in tcols:
+            # Plain or compressed (TRANSCRIPT_CODEC) rows alike
+            text_sql = db.transcript_text_sql("")
+        elif "full_text" in tcols:
+            text_sql = "full_text"
+        elif "transcript_text" in tcols:
+            text_sql = "transcript_text"
+        else:
             return ""
 
         row = conn.execute(
-            f"SELECT {text_col} FROM transcripts WHERE video_id = ? LIMIT 1",
+            f"SELECT {text_sql} AS text FROM transcripts WHERE video_id = ? LIMIT 1",
             (video_id, ),
         ).fetchone()
-        return (row[text_col] if row and row[text_col] else "") or ""
+        return (row["text"] if row and row["text"] else "") or ""
+
+
+def _search_transcripts(query: str, limit: int = 25):
+    with _connect_readonly() as conn:
+        try:
+            return db.search_transcripts(query, limit=limit, conn=conn)
+        except sqlite3.OperationalError:
+            # Not valid FTS syntax (stray quote, bare operator): search the words.
+            return db.search_transcripts(db.fts_query(query.split()),
+                                         limit=limit, conn=conn)
+
+
+def _build_download_package() -> bytes:
+    """Zip the source tree plus the latest DB snapshot (never the live DB file)."""
+    import zipfile, io
+    buf = io.BytesIO()
+    include_dirs = ["engine", "data", "db"]
+    include_root = [
+        "main.py", "streamlit_app.py", "schema.sql", "replit.md",
+        "cookies.txt", "pyproject.toml", ".replit",
+    ]
+    live_db = os.path.normpath(DATABASE_PATH)
+    skip = {live_db, live_db + "-wal", live_db + "-shm", live_db + "-journal",
+            os.path.normpath(DB_SNAPSHOT_PATH)}
+
+    def _add(zf, arc, fp):
+        info = zipfile.ZipInfo(arc)
+        info.date_time = (1980, 1, 1, 0, 0, 0)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with open(fp, "rb") as f:
+            zf.writestr(info, f.read())
+
+    snap = snapshot.ensure_snapshot()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for fname in include_root:
+            if os.path.exists(fname):
+                _add(zf, fname, fname)
+        for d in include_dirs:
+            if not os.path.isdir(d):
+                continue
+            for root, dirs, files in os.walk(d):
+                dirs[:] = [x for x in dirs if x != "__pycache__"]
+                for file in files:
+                    fp = os.path.join(root, file)
+                    if os.path.normpath(fp) in skip or fp.endswith(".tmp"):
+                        continue
+                    _add(zf, fp.lstrip("./"), fp)
+        if snap:
+            # Shipped under the live DB's name so the package runs as-is.
+            _add(zf, live_db.lstrip("./"), snap)
+    buf.seek(0)
+    return buf.getvalue()
 
 
 def _get_video_row(video_id: str):
@@ -219,36 +287,7 @@ with st.sidebar:
     st.markdown("### Download Project")
     st.caption("Includes all source files + database.")
     if st.button("Build Download Package", key="sidebar_dl_build"):
-        import zipfile, io
-        buf = io.BytesIO()
-        include_dirs = ["engine", "data", "db"]
-        include_root = [
-            "main.py", "streamlit_app.py", "schema.sql", "replit.md",
-            "cookies.txt", "pyproject.toml", ".replit",
-        ]
-        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-            for fname in include_root:
-                if os.path.exists(fname):
-                    info = zipfile.ZipInfo(fname)
-                    info.date_time = (1980, 1, 1, 0, 0, 0)
-                    info.compress_type = zipfile.ZIP_DEFLATED
-                    with open(fname, "rb") as f:
-                        zf.writestr(info, f.read())
-            for d in include_dirs:
-                if not os.path.isdir(d):
-                    continue
-                for root, dirs, files in os.walk(d):
-                    dirs[:] = [x for x in dirs if x != "__pycache__"]
-                    for file in files:
-                        fp = os.path.join(root, file)
-                        arc = fp.lstrip("./")
-                        info = zipfile.ZipInfo(arc)
-                        info.date_time = (1980, 1, 1, 0, 0, 0)
-                        info.compress_type = zipfile.ZIP_DEFLATED
-                        with open(fp, "rb") as f:
-                            zf.writestr(info, f.read())
-        buf.seek(0)
-        st.session_state["dl_buf"] = buf.getvalue()
+        st.session_state["dl_buf"] = _build_download_package()
 
     if "dl_buf" in st.session_state:
         st.download_button(
@@ -268,34 +307,7 @@ st.caption("v5.2 — Theological Intelligence from Global Sermon Data")
 # --- Download bar (always visible) ---
 with st.expander("⬇ Download Full Project (source + database)", expanded=True):
     if st.button("Build Download Package", key="top_dl_build"):
-        import zipfile, io
-        buf = io.BytesIO()
-        include_dirs = ["engine", "data", "db"]
-        include_root = ["main.py", "streamlit_app.py", "schema.sql", "replit.md",
-                        "cookies.txt", "pyproject.toml", ".replit"]
-        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-            for fname in include_root:
-                if os.path.exists(fname):
-                    info = zipfile.ZipInfo(fname)
-                    info.date_time = (1980, 1, 1, 0, 0, 0)
-                    info.compress_type = zipfile.ZIP_DEFLATED
-                    with open(fname, "rb") as f:
-                        zf.writestr(info, f.read())
-            for d in include_dirs:
-                if not os.path.isdir(d):
-                    continue
-                for root, dirs, files in os.walk(d):
-                    dirs[:] = [x for x in dirs if x != "__pycache__"]
-                    for file in files:
-                        fp = os.path.join(root, file)
-                        arc = fp.lstrip("./")
-                        info = zipfile.ZipInfo(arc)
-                        info.date_time = (1980, 1, 1, 0, 0, 0)
-                        info.compress_type = zipfile.ZIP_DEFLATED
-                        with open(fp, "rb") as f:
-                            zf.writestr(info, f.read())
-        buf.seek(0)
-        st.session_state["dl_buf"] = buf.getvalue()
+        st.session_state["dl_buf"] = _build_download_package()
     if "dl_buf" in st.session_state:
         st.download_button("⬇ Click here to download digital-pulpit-FULL.zip",
                            data=st.session_state["dl_buf"],
@@ -334,7 +346,7 @@ with tab_status:
         display_cols = [
             c for c in [
                 "run_id", "run_type", "status", "videos_processed",
-                "minutes_processed", "started_at", "finished_at", "notes"
+                "minutes_processed", "quota_units", "started_at", "finished_at", "notes"
             ] if c in runs_df.columns
         ]
         st.dataframe(runs_df[display_cols], use_container_width=True)
@@ -343,6 +355,9 @@ with tab_status:
 
     with st.expander("Database Path / Debug"):
         st.code(f"DATABASE_PATH = {DATABASE_PATH}")
+        age = snapshot.snapshot_age()
+        st.code(f"DB_SNAPSHOT_PATH = {DB_SNAPSHOT_PATH}"
+                + (f"  (published {age:.0f}s ago)" if age is not None else "  (not published yet)"))
 
 with tab_videos:
     st.header("Videos")
@@ -425,6 +440,15 @@ with tab_transcripts:
     st.header("Transcripts")
     st.caption("Browse transcripts and open the full text.")
 
+    search = st.text_input("Search transcripts (words or \"a phrase\")", "")
+    if search.strip():
+        hits = _search_transcripts(search.strip())
+        if hits:
+            for h in hits:
+                st.markdown(f"**{h['video_id']}** — …{h['snippet']}…")
+        else:
+            st.info("No matching transcripts.")
+
     transcripts = _get_recent_transcripts(50)
     if not transcripts:
         st.info("No transcripts yet. Run the Vacuum to transcribe sermons.")
@@ -0,0 +1,26 @@
+"""Shared fixtures: every test gets its own migrated database file."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from engine import db
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A fresh, migrated database that db's default-path helpers use."""
+    path = str(tmp_path / "digital_pulpit.db")
+    monkeypatch.setattr(db, "DATABASE_PATH", path)
+    db.init_db(path)
+    yield path
+    db.close_pools()
+
+
+@pytest.fixture
+def channel(db_path):
+    db.upsert_channel("UC_test", "Test Church", "https://example.org/feed", "test")
+    return "UC_test"
@@ -0,0 +1,73 @@
+"""ASR benchmark: WER computation, backend selection and CLI errors."""
+
+import sys
+
+import pytest
+
+for _mod in ("openai", "youtube_transcript_api"):
+    pytest.importorskip(_mod)
+
+from engine import transcription
+from engine.tools import asr_benchmark
+from engine.tools.asr_benchmark import normalize_words, word_errors
+
+
+def test_normalize_words_lowercases_and_drops_punctuation():
+    assert normalize_words("Grace, GRACE! It's by faith -- Romans 5:1.") == [
+        "grace", "grace", "it's", "by", "faith", "romans", "5", "1"]
+    assert normalize_words("") == []
+    assert normalize_words(None) == []
+
+
+@pytest.mark.parametrize("reference, hypothesis, errors", [
+    ("the lord is my shepherd", "the lord is my shepherd", 0),
+    ("the lord is my shepherd", "the lord was my shepherd", 1),   # substitution
+    ("the lord is my shepherd", "the lord my shepherd", 1),       # deletion
+    ("the lord is my shepherd", "the lord is is my shepherd", 1), # insertion
+    ("the lord is my shepherd", "", 5),
+    ("", "amen amen", 2),
+    ("i shall not want", "shall not want i", 2),
+])
+def test_word_errors(reference, hypothesis, errors):
+    assert word_errors(normalize_words(reference), normalize_words(hypothesis)) == errors
+
+
+class _FakeBackend(transcription.ASRBackend):
+    name = "fake"
+    provider = "fake"
+
+    def transcribe(self, audio_path, language="en"):
+        return self._result("amen", [], language)
+
+
+def test_get_backend_by_name(monkeypatch):
+    monkeypatch.setitem(transcription.ASR_BACKENDS, "fake", _FakeBackend)
+    backend = transcription.get_backend("fake", model="tiny", threads=2)
+    assert isinstance(backend, _FakeBackend)
+    assert (backend.model, backend.threads, backend.label) == ("tiny", 2, "tiny")
+    assert backend.transcribe("x.mp3").text == "amen"
+
+
+def test_get_backend_unknown_name():
+    with pytest.raises(ValueError, match="Unknown ASR backend 'nope'"):
+        transcription.get_backend("nope")
+
+
+def test_backend_must_implement_transcribe():
+    class Incomplete(transcription.ASRBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    with pytest.raises(TypeError):
+        transcription.ASRBackend()
+
+
+def test_missing_manifest_is_a_usage_error(tmp_path, monkeypatch, capsys):
+    missing = tmp_path / "manifest.csv"
+    monkeypatch.setattr(sys, "argv", ["asr_benchmark", "--manifest", str(missing)])
+    with pytest.raises(SystemExit) as exc:
+        asr_benchmark.main()
+    assert exc.value.code == 2
+    err = capsys.readouterr().err
+    assert "--manifest" in err and str(missing) in err
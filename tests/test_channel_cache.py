@@ -0,0 +1,105 @@
+"""Channel resolution cache: key normalization, TTLs and refresh."""
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("requests")
+
+from engine import db, youtube
+
+
+@pytest.mark.parametrize("info, key", [
+    ({"handle": "@GraceChurch"}, "@gracechurch"),
+    ({"youtube_handle": "GraceChurch", "url": "https://example.org"}, "@gracechurch"),
+    ({"url": "https://www.youtube.com/@GraceChurch/videos"}, "@gracechurch"),
+    ({"url": "HTTPS://M.YouTube.com/c/GraceChurch/?si=abc#top"}, "url:youtube.com/c/gracechurch"),
+    ({"url": "youtube.com/c/GraceChurch"}, "url:youtube.com/c/gracechurch"),
+    ({"name": "  Grace   Community\tChurch "}, "name:grace community church"),
+    ({"channel_id": "UC123", "handle": "@GraceChurch"}, None),
+    ({"url": "https://www.youtube.com/channel/UC123abc"}, None),
+    ({}, None),
+])
+def test_channel_cache_key(info, key):
+    assert youtube.channel_cache_key(info) == key
+
+
+@pytest.fixture
+def lookups(db_path, monkeypatch):
+    """Uncached resolutions made, answered from `lookups.answer`."""
+    class _Lookups(list):
+        answer = ("UC_grace", "ytdlp")
+
+    made = _Lookups()
+
+    def _resolve(info):
+        made.append(info)
+        return made.answer
+
+    monkeypatch.setattr(youtube, "_resolve_channel_id_uncached", _resolve)
+    monkeypatch.setattr(youtube, "_resolve_bucket", youtube.TokenBucket(1e6, 1e6))
+    return made
+
+
+def _age(key, seconds):
+    """Move a cache entry's resolved_at `seconds` into the past."""
+    with db.transaction() as conn:
+        conn.execute("UPDATE channel_resolution SET resolved_at = datetime('now', ?) WHERE key = ?",
+                     (f"-{int(seconds)} seconds", key))
+
+
+def test_rows_sharing_a_key_share_one_lookup(lookups):
+    assert youtube.resolve_channel_id({"handle": "GraceChurch"}) == ("UC_grace", "ytdlp")
+    same = {"url": "https://youtube.com/@gracechurch"}
+    assert youtube.resolve_channel_id(same) == ("UC_grace", "ytdlp")
+    assert len(lookups) == 1
+
+
+def test_positive_entries_expire_after_the_ttl(lookups, monkeypatch):
+    monkeypatch.setattr(youtube, "CHANNEL_CACHE_TTL_DAYS", 30)
+    info = {"handle": "@GraceChurch"}
+    youtube.resolve_channel_id(info)
+
+    _age("@gracechurch", 29 * 86400)
+    youtube.resolve_channel_id(info)
+    assert len(lookups) == 1
+
+    _age("@gracechurch", 31 * 86400)
+    youtube.resolve_channel_id(info)
+    assert len(lookups) == 2
+
+
+def test_negative_entries_expire_sooner(lookups, monkeypatch):
+    monkeypatch.setattr(youtube, "CHANNEL_CACHE_TTL_DAYS", 30)
+    monkeypatch.setattr(youtube, "CHANNEL_CACHE_NEGATIVE_TTL_HOURS", 24)
+    info = {"name": "Lost Church"}
+    lookups.answer = (None, "failed")
+    assert youtube.resolve_channel_id(info) == (None, "failed")
+
+    _age("name:lost church", 23 * 3600)
+    assert youtube.resolve_channel_id(info) == (None, "failed")
+    assert len(lookups) == 1
+
+    _age("name:lost church", 25 * 3600)
+    lookups.answer = ("UC_lost", "search_name")
+    assert youtube.resolve_channel_id(info) == ("UC_lost", "search_name")
+    assert len(lookups) == 2
+    cached = db.get_channel_resolution("name:lost church", 86400, 3600)
+    assert (cached["channel_id"], cached["attempts"]) == ("UC_lost", 0)
+
+
+def test_refresh_bypasses_a_fresh_entry_and_stores_the_result(lookups):
+    info = {"handle": "@GraceChurch"}
+    youtube.resolve_channel_id(info)
+    lookups.answer = ("UC_moved", "handle")
+
+    assert youtube.resolve_channel_id(info, refresh=True) == ("UC_moved", "handle")
+    assert youtube.resolve_channel_id(info) == ("UC_moved", "handle")
+    assert len(lookups) == 2
+
+
+def test_use_cache_false_neither_reads_nor_writes(lookups):
+    info = {"handle": "@GraceChurch"}
+    youtube.resolve_channel_id(info, use_cache=False)
+    youtube.resolve_channel_id(info, use_cache=False)
+    assert len(lookups) == 2
+    assert db.get_channel_resolution("@gracechurch", 86400, 3600) is None
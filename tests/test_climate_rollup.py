@@ -0,0 +1,124 @@
+"""Climate rollups: the trigger-maintained tables agree with the raw rows."""
+
+import json
+
+import pytest
+
+from engine import db
+from engine.climate_rollup import window_stats
+from engine.climate_snapshot import compute_climate_stats, fetch_period_data
+
+START, END = "2026-03-01", "2026-04-01"
+
+
+def _scores(density, axes, categories, books, drift):
+    grace, hope, doctrine, scripture = axes
+    raw = {"category_density": categories, "scripture_refs": books, "drift_level": drift}
+    return (density, grace, hope, doctrine, scripture, json.dumps(raw))
+
+
+RESULTS = {
+    "vA": _scores(0.6, (0.2, 0.4, -0.1, 0.3), {"grace": 0.5, "law": 0.1}, {"Romans": 3}, "low"),
+    "vB": _scores(0.3, (-0.5, 0.1, 0.2, -0.2), {"grace": 0.2, "hope": 0.4}, {"John": 2}, "high"),
+    "vC": _scores(0.9, (0.7, -0.3, 0.5, 0.1), {"law": 0.7}, {"Romans": 1, "Psalms": 5}, "medium"),
+    "vD": _scores(0.1, (0.0, 0.9, -0.6, 0.4), {"hope": 0.9}, {}, "low"),
+}
+
+
+@pytest.fixture
+def corpus(db_path):
+    """Two channels, four analyzed videos; vD is published before the window."""
+    for cid in ("UC_one", "UC_two"):
+        db.upsert_channel(cid, cid, f"https://example.org/{cid}", "test")
+    videos = [("vA", "UC_one", "2026-03-05T10:00:00Z"), ("vB", "UC_one", "2026-03-10T10:00:00Z"),
+              ("vC", "UC_two", "2026-03-12T10:00:00Z"), ("vD", "UC_two", "2026-02-20T10:00:00Z")]
+    for vid, cid, at in videos:
+        db.upsert_video(vid, cid, "Sermon", at, 2700)
+    with db.transaction() as conn:
+        for vid, scores in RESULTS.items():
+            _insert_result(conn, vid, scores)
+    return db_path
+
+
+def _insert_result(conn, video_id, scores):
+    conn.execute(
+        "INSERT INTO brain_results (video_id, theological_density, grace_vs_effort, hope_vs_fear, "
+        "doctrine_vs_experience, scripture_vs_story, raw_scores_json) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (video_id, *scores),
+    )
+
+
+def _same(a, b):
+    if isinstance(a, dict):
+        assert a.keys() == b.keys()
+        for k in a:
+            _same(a[k], b[k])
+    elif isinstance(a, (list, tuple)):
+        assert len(a) == len(b)
+        for x, y in zip(a, b):
+            _same(x, y)
+    elif isinstance(a, float) or isinstance(b, float):
+        assert a == pytest.approx(b, abs=1e-9)
+    else:
+        assert a == b
+
+
+def _check(channel_id=None):
+    """window_stats over the rollups equals compute_climate_stats over raw rows."""
+    with db.connection() as conn:
+        owners = dict(conn.execute("SELECT video_id, channel_id FROM videos").fetchall())
+        items = [i for i in fetch_period_data(conn, START, END)
+                 if channel_id is None or owners[i["video_id"]] == channel_id]
+        rolled = window_stats(conn, START, END, channel_id)
+    _same(rolled, compute_climate_stats(items))
+    return rolled
+
+
+def _check_all():
+    """Sermon counts (all, UC_one, UC_two), each window checked against raw rows."""
+    return [_check(cid)["count"] for cid in (None, "UC_one", "UC_two")]
+
+
+def test_rollup_follows_result_changes(corpus):
+    assert _check_all() == [3, 2, 1]
+
+    with db.transaction() as conn:
+        conn.execute("UPDATE brain_results SET theological_density = 0.8, raw_scores_json = ? "
+                     "WHERE video_id = 'vB'", (RESULTS["vC"][5],))
+    assert _check_all() == [3, 2, 1]
+
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM brain_results WHERE video_id = 'vC'")
+    assert _check_all() == [2, 2, 0]
+
+    with db.transaction() as conn:
+        _insert_result(conn, "vC", RESULTS["vC"])
+    assert _check_all() == [3, 2, 1]
+
+
+def test_rollup_follows_video_moves(corpus):
+    with db.transaction() as conn:
+        # Re-dated into the window, and moved to the other channel.
+        conn.execute("UPDATE videos SET published_at = '2026-03-20T10:00:00Z' "
+                     "WHERE video_id = 'vD'")
+        conn.execute("UPDATE videos SET channel_id = 'UC_two' WHERE video_id = 'vA'")
+    assert _check_all() == [4, 1, 3]
+
+    with db.transaction() as conn:
+        # Re-dated out of the window.
+        conn.execute("UPDATE videos SET published_at = '2026-04-02T10:00:00Z' "
+                     "WHERE video_id = 'vB'")
+    assert _check_all() == [3, 0, 3]
+
+
+def test_rollup_follows_near_duplicate_flags(corpus):
+    with db.transaction() as conn:
+        conn.execute(
+            "INSERT INTO near_duplicates (video_id, canonical_id, matched_id, similarity) "
+            "VALUES ('vB', 'vA', 'vA', 0.93)"
+        )
+    assert _check_all() == [2, 1, 1]
+
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM near_duplicates WHERE video_id = 'vB'")
+    assert _check_all() == [3, 2, 1]
@@ -0,0 +1,138 @@
+"""Connection pool: re-entrant checkouts, nested transactions, slot release."""
+
+import sqlite3
+import threading
+
+import pytest
+
+from engine import db
+
+
+def _count(path):
+    with db.connection(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM channels").fetchone()[0]
+
+
+def test_pool_is_reentrant_per_thread(db_path):
+    pool = db.get_pool(db_path)
+    with db.connection(db_path) as outer:
+        with db.connection(db_path) as inner:
+            assert inner is outer
+        # The inner exit must not hand the connection back yet.
+        assert pool._local.conn is outer
+        other = []
+        t = threading.Thread(target=lambda: other.append(pool.acquire()))
+        t.start()
+        t.join()
+        assert other[0] is not outer
+        pool.release(other[0])
+    assert pool._local.conn is None
+
+
+def test_legacy_close_returns_connection(db_path):
+    pool = db.get_pool(db_path)
+    conn = db.get_conn(db_path)
+    conn.close()
+    assert db.get_conn(db_path) is conn
+    conn.close()
+    assert pool.reused >= 1
+
+
+def test_nested_transaction_rolls_back_only_inner(db_path):
+    with db.transaction(db_path) as conn:
+        conn.execute("INSERT INTO channels (channel_id, channel_name) VALUES ('UC_a', 'A')")
+        with pytest.raises(RuntimeError):
+            with db.transaction(db_path) as inner:
+                assert inner is conn
+                inner.execute("INSERT INTO channels (channel_id, channel_name) VALUES ('UC_b', 'B')")
+                raise RuntimeError("inner failure")
+        with db.transaction(db_path) as inner:
+            inner.execute("INSERT INTO channels (channel_id, channel_name) VALUES ('UC_c', 'C')")
+
+    with db.connection(db_path) as conn:
+        ids = {r[0] for r in conn.execute("SELECT channel_id FROM channels")}
+    assert ids == {"UC_a", "UC_c"}
+
+
+def test_outer_failure_rolls_back_everything(db_path):
+    with pytest.raises(RuntimeError):
+        with db.transaction(db_path):
+            with db.transaction(db_path) as inner:
+                inner.execute("INSERT INTO channels (channel_id, channel_name) VALUES ('UC_a', 'A')")
+            raise RuntimeError("outer failure")
+    assert _count(db_path) == 0
+
+
+def test_slot_released_after_error(tmp_path):
+    path = str(tmp_path / "small.db")
+    pool = db.ConnectionPool(path, size=1, timeout=0.2)
+    with pytest.raises(sqlite3.OperationalError):
+        conn = pool.acquire()
+        try:
+            conn.execute("SELECT * FROM missing_table")
+        finally:
+            pool.release(conn)
+    # The only slot is free again, even from another thread.
+    got = []
+    t = threading.Thread(target=lambda: got.append(pool.acquire()))
+    t.start()
+    t.join()
+    assert got and got[0] is conn
+    pool.release(got[0])
+    pool.close_all()
+
+
+def test_exhausted_pool_times_out(tmp_path):
+    pool = db.ConnectionPool(str(tmp_path / "small.db"), size=1, timeout=0.1)
+    held = pool.acquire()
+    errors = []
+
+    def worker():
+        try:
+            pool.acquire()
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert errors and "exhausted" in str(errors[0])
+    pool.release(held)
+    pool.close_all()
+
+
+def test_climate_snapshot_releases_its_slot(db_path):
+    from engine.climate_snapshot import generate_climate_snapshot
+
+    pool = db.get_pool(db_path)
+    generate_climate_snapshot(days=30)
+    assert getattr(pool._local, "conn", None) is None
+    assert pool._slots._value == pool.size
+
+
+def test_climate_agenda_releases_its_slot(db_path):
+    pytest.importorskip("docx")
+    from engine.climate_agenda import generate_climate_agenda
+
+    pool = db.get_pool(db_path)
+    agenda = generate_climate_agenda(days=30)
+    assert agenda["metadata"]["total_sermons"] == 0
+    assert getattr(pool._local, "conn", None) is None
+    assert pool._slots._value == pool.size
+
+
+def test_get_conn_rows_and_per_cursor_tuples(db_path, channel):
+    conn = db.get_conn(db_path)
+    try:
+        row = conn.execute("SELECT channel_id, channel_name FROM channels").fetchone()
+        assert row[0] == row["channel_id"] == "UC_test"
+        cid, name = row
+        assert (cid, name) == ("UC_test", "Test Church")
+
+        cur = conn.cursor()
+        cur.row_factory = None
+        assert cur.execute("SELECT channel_id FROM channels").fetchall() == [("UC_test",)]
+        # The shared connection itself is untouched.
+        assert conn.row_factory is sqlite3.Row
+    finally:
+        conn.close()
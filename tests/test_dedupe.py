@@ -0,0 +1,92 @@
+"""Near-duplicate index: LSH inserts through db.insert_transcript, and readers."""
+
+import random
+
+import pytest
+
+from engine import db, dedupe
+from engine.climate_snapshot import fetch_period_data
+
+WORDS = ("grace faith hope love mercy cross sin law gospel church spirit word prayer "
+         "kingdom glory truth peace joy lord heaven repent believe servant shepherd").split()
+
+
+def _sermon(seed, n=400):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randrange(50)) for _ in range(n))
+
+
+def _reupload(text, every=25):
+    # A second ASR pass: every 25th word heard differently.
+    words = text.split()
+    return " ".join("amen" if i % every == 0 else w for i, w in enumerate(words))
+
+
+@pytest.fixture(autouse=True)
+def _index_on(monkeypatch):
+    monkeypatch.setattr(db, "NEAR_DUP_INDEX", True)
+
+
+def _insert(video_id, text, published_at="2026-10-01 10:00:00"):
+    db.upsert_video(video_id, "UC_test", video_id, published_at, 1800)
+    db.insert_transcript(video_id, text, [], "en", len(text.split()), "test")
+
+
+def _duplicates():
+    with db.connection() as conn:
+        return {r[0]: r[1] for r in conn.execute(
+            "SELECT video_id, canonical_id FROM near_duplicates")}
+
+
+def test_insert_indexes_and_links_near_duplicates(channel):
+    original = _sermon(1)
+    _insert("yt_1", original)
+    _insert("rss_1", _reupload(original))
+    _insert("other", _sermon(2))
+    assert _duplicates() == {"rss_1": "yt_1"}
+
+    # A copy of the copy joins the same group, under the first canonical.
+    _insert("reup_1", _reupload(_reupload(original), every=31))
+    assert _duplicates() == {"rss_1": "yt_1", "reup_1": "yt_1"}
+    with db.connection() as conn:
+        bands = conn.execute("SELECT COUNT(*) FROM minhash_bands WHERE video_id = 'yt_1'").fetchone()[0]
+    assert bands == dedupe.NUM_BANDS
+
+
+def test_rewritten_transcript_leaves_its_group(channel):
+    original = _sermon(1)
+    _insert("yt_1", original)
+    _insert("rss_1", _reupload(original))
+    assert "rss_1" in _duplicates()
+
+    db.insert_transcript("rss_1", _sermon(3), [], "en", 400, "test")
+    assert _duplicates() == {}
+
+
+def test_short_transcripts_are_not_indexed(channel):
+    _insert("clip_1", "grace and peace to you")
+    _insert("clip_2", "grace and peace to you")
+    assert _duplicates() == {}
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM transcript_minhash").fetchone()[0] == 0
+
+
+def test_similarity_separates_copies_from_other_sermons():
+    a = dedupe.signature(_sermon(1))
+    assert dedupe.similarity(a, dedupe.signature(_reupload(_sermon(1)))) >= dedupe.NEAR_DUP_THRESHOLD
+    assert dedupe.similarity(a, dedupe.signature(_sermon(2))) < 0.2
+
+
+def test_climate_fallback_counts_a_sermon_once(channel):
+    original = _sermon(1)
+    _insert("yt_1", original)
+    _insert("rss_1", _reupload(original))
+    _insert("other", _sermon(2))
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO brain_results (video_id, theological_density, raw_scores_json) VALUES (?, ?, '{}')",
+            [("yt_1", 2.0), ("rss_1", 2.0), ("other", 4.0)])
+
+    with db.connection() as conn:
+        items = fetch_period_data(conn, "2026-09-01 00:00:00", "2026-11-01 00:00:00")
+    assert sorted(i["video_id"] for i in items) == ["other", "yt_1"]
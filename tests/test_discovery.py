@@ -0,0 +1,38 @@
+"""Incremental discovery: the high-water mark never moves past unsaved videos."""
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("requests")
+
+from engine import db, youtube
+
+
+def _item(video_id, published_at):
+    return {"id": video_id,
+            "snippet": {"title": f"Sermon {video_id}", "publishedAt": published_at},
+            "contentDetails": {"duration": "PT45M"}}
+
+
+def test_candidates_are_committed_before_the_mark_moves(db_path, channel, monkeypatch):
+    uploads = [("v2", "2026-03-08T15:00:00Z"), ("v1", "2026-03-01T15:00:00Z")]
+    monkeypatch.setattr(youtube, "list_new_uploads",
+                        lambda cid, mark, max_results=25: (uploads, "UU_test"))
+    monkeypatch.setattr(youtube, "fetch_video_details",
+                        lambda ids: {vid: _item(vid, at) for vid, at in uploads if vid in ids})
+
+    seen = []
+    set_mark = db.set_discovery_mark
+
+    def _spy(channel_id, *args):
+        with db.connection() as conn:
+            seen.extend(r[0] for r in conn.execute("SELECT video_id FROM videos ORDER BY video_id"))
+        set_mark(channel_id, *args)
+
+    monkeypatch.setattr(db, "set_discovery_mark", _spy)
+    with db.BatchWriter(batch_size=1000) as writer:
+        found = youtube.discover_uploads([channel], writer=writer, workers=1)
+
+    assert [v["video_id"] for v in found[channel]] == ["v2", "v1"]
+    assert seen == ["v1", "v2"]
+    assert db.get_discovery_marks([channel])[channel]["last_video_id"] == "v2"
@@ -0,0 +1,105 @@
+"""Resumable downloads: what counts as resumed when the server does or not honor Range."""
+
+import json
+
+import pytest
+
+pytest.importorskip("feedparser")
+pytest.importorskip("requests")
+
+from engine import downloads, feeds
+
+URL = "https://cdn.example.org/sermon.mp3"
+BODY = bytes(range(256)) * 40   # 10240 bytes
+
+
+class _Response:
+    def __init__(self, status_code, body, headers, fail_after=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.url = URL
+        self._body = body
+        self._fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self._body), 1024):
+            if self._fail_after is not None and i >= self._fail_after:
+                raise ConnectionError("connection reset")
+            yield self._body[i:i + 1024]
+
+
+class _Server:
+    def __init__(self, honor_range=True, fail_first_after=None):
+        self.honor_range = honor_range
+        self.fail_first_after = fail_first_after
+        self.sent = 0
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        rng = (headers or {}).get("Range")
+        fail, self.fail_first_after = self.fail_first_after, None
+        if rng and self.honor_range:
+            start = int(rng.split("=")[1].rstrip("-"))
+            body = BODY[start:]
+            resp = _Response(206, body, {
+                "Content-Range": f"bytes {start}-{len(BODY) - 1}/{len(BODY)}",
+                "ETag": '"e1"'}, fail)
+        else:
+            body = BODY
+            resp = _Response(200, body, {"Content-Length": str(len(BODY)), "ETag": '"e1"'}, fail)
+        self.sent += len(body) if fail is None else min(fail, len(body))
+        return resp
+
+
+@pytest.fixture
+def store(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloads, "AUDIO_STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(downloads.time, "sleep", lambda s: None)
+    return tmp_path / "store"
+
+
+def _serve(monkeypatch, server):
+    monkeypatch.setattr(feeds, "_session", server)
+    return server
+
+
+def _leave_part(nbytes):
+    # What an interrupted earlier run leaves behind.
+    part, meta = downloads._partial_paths(URL)
+    part.parent.mkdir(parents=True, exist_ok=True)
+    part.write_bytes(BODY[:nbytes])
+    meta.write_text(json.dumps({"url": URL, "etag": '"e1"', "total": len(BODY)}))
+
+
+def test_accepted_range_counts_as_resumed(store, monkeypatch):
+    server = _serve(monkeypatch, _Server(honor_range=True))
+    _leave_part(4096)
+    result = downloads.download(URL)
+    assert result.path.read_bytes() == BODY
+    assert result.resumed_bytes == 4096
+    assert result.size - result.resumed_bytes == server.sent
+
+
+def test_ignored_range_refetches_everything(store, monkeypatch):
+    server = _serve(monkeypatch, _Server(honor_range=False))
+    _leave_part(4096)
+    result = downloads.download(URL)
+    assert result.path.read_bytes() == BODY
+    assert result.resumed_bytes == 0
+    assert result.size - result.resumed_bytes == server.sent
+
+
+def test_retry_within_one_call_is_not_resumed(store, monkeypatch):
+    server = _serve(monkeypatch, _Server(honor_range=True, fail_first_after=3072))
+    result = downloads.download(URL, attempts=2)
+    assert result.path.read_bytes() == BODY
+    assert result.resumed_bytes == 0
+    assert result.size == server.sent
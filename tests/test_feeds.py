@@ -0,0 +1,99 @@
+"""Conditional-GET feed polling and when the validators are persisted."""
+
+import pytest
+
+pytest.importorskip("feedparser")
+pytest.importorskip("requests")
+
+from engine import db, feeds, jobs, podcasts, whisper_pool
+
+URL = "https://example.org/rss"
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Grace Church</title>
+<item><title>Romans 8</title>
+<enclosure url="https://example.org/ep1.mp3" type="audio/mpeg" length="1"/></item>
+</channel></rss>"""
+
+
+class _Response:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.url = URL
+
+    def raise_for_status(self):
+        pass
+
+
+class _Server:
+    """Answers 304 to the current ETag, else the feed with that ETag."""
+
+    def __init__(self):
+        self.sent = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.sent.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return _Response(304)
+        return _Response(200, RSS, {"ETag": '"v1"', "Content-Type": "application/rss+xml"})
+
+
+@pytest.fixture
+def server(monkeypatch):
+    srv = _Server()
+    monkeypatch.setattr(feeds, "_session", srv)
+    return srv
+
+
+def _etag(url=URL):
+    state = feeds.get_feed_state(url)
+    return state and state["etag"]
+
+
+def test_fetch_saves_validators(db_path, server):
+    assert feeds.fetch_feed(URL).changed
+    assert _etag() == '"v1"'
+    assert feeds.fetch_feed(URL).status == "not_modified"
+    assert server.sent[-1]["If-None-Match"] == '"v1"'
+
+
+def test_deferred_validators_wait_for_save(db_path, server):
+    result = feeds.poll_feeds([URL], defer_validators=True)[URL]
+    assert result.changed and _etag() is None
+    # Not saved yet: the next poll fetches the body again.
+    assert feeds.fetch_feed(URL, defer_validators=True).changed
+
+    assert feeds.save_validators([result]) == 1
+    assert _etag() == '"v1"'
+    assert feeds.save_validators([result]) == 0
+
+
+class _Pool:
+    processes = 1
+
+    def summary(self):
+        return ""
+
+
+def test_ingest_commits_validators_with_queued_episodes(db_path, server, tmp_path, monkeypatch):
+    monkeypatch.setattr(podcasts, "TMP_AUDIO_DIR", str(tmp_path))
+    monkeypatch.setattr(whisper_pool, "get_pool", lambda workers: _Pool())
+    feed = podcasts.PodcastFeed("sub_1", URL)
+    enqueue_many = jobs.enqueue_many
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("enqueue failed")
+
+    monkeypatch.setattr(jobs, "enqueue_many", crash)
+    with pytest.raises(RuntimeError):
+        podcasts.ingest([feed])
+    assert _etag() is None
+
+    monkeypatch.setattr(jobs, "enqueue_many", enqueue_many)
+    monkeypatch.setattr(jobs, "claim", lambda *a, **k: [])
+    podcasts.ingest([feed])
+    assert _etag() == '"v1"'
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM jobs WHERE kind = ?",
+                            (podcasts.RSS_EPISODE_JOB_KIND,)).fetchone()[0] == 1
@@ -0,0 +1,188 @@
+"""Leased job queue: exclusive claims, lease expiry, retries and dead-lettering."""
+
+import threading
+import time
+
+import pytest
+
+from engine import db, jobs
+from engine.config import JOB_MAX_ATTEMPTS
+
+KIND = "test_job"
+
+
+class _NoHeartbeat(jobs.Heartbeat):
+    """Leases only change when a test says so."""
+
+    def track(self, claimed, lease_seconds):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def _quiet_heartbeat(monkeypatch):
+    monkeypatch.setattr(jobs, "heartbeat", _NoHeartbeat())
+
+
+def _row(key):
+    with db.connection() as conn:
+        return conn.execute(
+            "SELECT state, attempts, run_after, lease_owner, last_error FROM jobs "
+            "WHERE kind = ? AND key = ?", (KIND, key)).fetchone()
+
+
+def _later(monkeypatch, seconds):
+    now = time.time()
+    monkeypatch.setattr(jobs.time, "time", lambda: now + seconds)
+
+
+def test_claims_are_exclusive(db_path):
+    assert jobs.enqueue_many(KIND, [(f"k{i}", None) for i in range(3)]) == 3
+    assert jobs.enqueue_many(KIND, [("k0", None)]) == 0
+
+    a = jobs.claim(KIND, worker="a", limit=2)
+    b = jobs.claim(KIND, worker="b", limit=5)
+    assert [j.key for j in a] == ["k0", "k1"]
+    assert [j.key for j in b] == ["k2"]
+    assert jobs.claim(KIND, worker="c") == []
+
+
+def test_concurrent_claims_never_share_an_item(db_path):
+    jobs.enqueue_many(KIND, [(f"k{i}", None) for i in range(40)])
+    taken, lock = [], threading.Lock()
+
+    def worker(name):
+        while True:
+            got = jobs.claim(KIND, worker=name)
+            if not got:
+                return
+            with lock:
+                taken.append(got[0].key)
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(taken) == sorted(f"k{i}" for i in range(40))
+
+
+def test_claim_key_is_exclusive(db_path):
+    job = jobs.claim_key(KIND, "ep1", {"feed_id": "f1"}, worker="a")
+    assert job is not None and job.payload == {"feed_id": "f1"}
+    assert jobs.claim_key(KIND, "ep1", worker="b") is None
+
+    assert job.complete()
+    assert jobs.claim_key(KIND, "ep1", worker="b") is None
+    again = jobs.claim_key(KIND, "ep1", worker="b", reopen=True)
+    assert again is not None and again.attempts == 1
+
+
+def test_expired_lease_is_reclaimed(db_path):
+    jobs.enqueue(KIND, "k1")
+    [first] = jobs.claim(KIND, worker="a", lease_seconds=-1)
+    [second] = jobs.claim(KIND, worker="b")
+    assert second.job_id == first.job_id and second.attempts == 2
+
+    # The first worker lost the item: its outcome is not recorded.
+    assert not first.complete()
+    assert _row("k1")[0] == "leased" and _row("k1")[3] == "b"
+    assert second.complete()
+    assert _row("k1")[0] == "done"
+
+
+def test_expired_final_attempt_is_dead_lettered(db_path):
+    jobs.enqueue(KIND, "k1", max_attempts=1)
+    jobs.claim(KIND, worker="a", lease_seconds=-1)
+    assert jobs.claim(KIND, worker="b") == []
+    state, _, _, _, error = _row("k1")
+    assert state == "dead" and "lease expired" in error
+
+
+def test_renew_extends_only_held_leases(db_path, monkeypatch):
+    jobs.enqueue(KIND, "k1")
+    [job] = jobs.claim(KIND, worker="a", lease_seconds=5)
+    assert jobs.renew([job.job_id], "a", lease_seconds=600) == [job.job_id]
+    assert jobs.renew([job.job_id], "b") == []
+
+    # Past the original 5 s lease, inside the renewed one.
+    _later(monkeypatch, 60)
+    assert jobs.claim(KIND, worker="b") == []
+
+    job.release()
+    assert jobs.renew([job.job_id], "a") == []
+
+
+def test_backoff_grows_and_is_capped(monkeypatch):
+    monkeypatch.setattr(jobs.random, "uniform", lambda lo, hi: 1.0)
+    assert jobs.backoff_seconds(1, base=10) == 10
+    assert jobs.backoff_seconds(2, base=10) == 20
+    assert jobs.backoff_seconds(4, base=10) == 80
+    assert jobs.backoff_seconds(40, base=10) == jobs.MAX_BACKOFF_SECONDS
+
+
+def test_failed_item_waits_out_its_backoff(db_path, monkeypatch):
+    jobs.enqueue(KIND, "k1")
+    [job] = jobs.claim(KIND, worker="a")
+    assert job.fail("boom") == "queued"
+    state, attempts, run_after, owner, error = _row("k1")
+    assert (state, attempts, owner, error) == ("queued", 1, None, "boom")
+    assert run_after > time.time()
+    assert jobs.claim(KIND, worker="a") == []
+
+    _later(monkeypatch, jobs.MAX_BACKOFF_SECONDS * 2)
+    [retry] = jobs.claim(KIND, worker="a")
+    assert retry.attempts == 2
+
+
+def test_dead_letter_after_max_attempts(db_path, monkeypatch):
+    monkeypatch.setattr(jobs, "backoff_seconds", lambda attempts: 0)
+    jobs.enqueue(KIND, "k1")
+    states = []
+    for _ in range(JOB_MAX_ATTEMPTS):
+        [job] = jobs.claim(KIND, worker="a")
+        states.append(job.fail("boom"))
+    assert states == ["queued"] * (JOB_MAX_ATTEMPTS - 1) + ["dead"]
+    assert jobs.claim(KIND, worker="a") == []
+    assert jobs.stats(KIND) == {KIND: {"dead": 1}}
+
+    assert jobs.retry_dead(KIND) == 1
+    assert _row("k1")[4] is None
+    [job] = jobs.claim(KIND, worker="a")
+    assert job.attempts == 1
+
+
+def test_fail_without_retry_is_dead_at_once(db_path):
+    jobs.enqueue(KIND, "k1")
+    [job] = jobs.claim(KIND, worker="a")
+    assert job.fail("bad input", retry=False) == "dead"
+    assert _row("k1")[0] == "dead"
+
+
+def test_fail_on_a_lost_lease_changes_nothing(db_path):
+    jobs.enqueue(KIND, "k1")
+    [job] = jobs.claim(KIND, worker="a")
+    jobs.fail(job.job_id, "b", "not mine")
+    state, attempts, _, owner, error = _row("k1")
+    assert (state, attempts, owner, error) == ("leased", 1, "a", None)
+
+
+def test_release_does_not_count_an_attempt(db_path):
+    jobs.enqueue(KIND, "k1")
+    [job] = jobs.claim(KIND, worker="a")
+    assert job.release()
+    [again] = jobs.claim(KIND, worker="b")
+    assert again.attempts == 1
+
+
+def test_payload_in_filters_claims(db_path):
+    jobs.enqueue_many(KIND, [
+        ("e1", {"feed_id": "f1"}),
+        ("e2", {"feed_id": "f2"}),
+        ("e3", {"feed_id": "f1"}),
+        ("e4", None),
+    ])
+    got = jobs.claim(KIND, worker="a", limit=10, payload_in=("feed_id", ["f1"]))
+    assert [j.key for j in got] == ["e1", "e3"]
+    assert jobs.claim(KIND, worker="a", limit=10, payload_in=("feed_id", [])) == []
+    rest = jobs.claim(KIND, worker="a", limit=10)
+    assert [j.key for j in rest] == ["e2", "e4"]
@@ -0,0 +1,63 @@
+"""Podcast pipeline failure handling: a failed episode always settles its lease."""
+
+import pytest
+
+pytest.importorskip("feedparser")
+pytest.importorskip("requests")
+
+from engine import jobs, podcasts
+
+
+class _BrokenWriter:
+    """A BatchWriter whose flush fails on the "error" status write."""
+
+    def update_video_status(self, video_id, status, error=None):
+        if status == "error":
+            raise RuntimeError("database is locked")
+
+
+class _Lease:
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.failed = None
+
+    def fail(self, error, retry=True):
+        self.failed = error
+        return "queued"
+
+
+def _fail_download(url, output_path, timeout=300):
+    raise IOError("connection reset")
+
+
+def _run(tmp_path, lease):
+    report = podcasts.IngestReport(results={})
+    pipe = podcasts._build_pipeline(_BrokenWriter(), report, tmp_path, 1, 1)
+    with pipe:
+        pipe.submit(podcasts.Episode("ep1", "sub_1", "Romans 8", "https://example.org/ep1.mp3",
+                                     lease=lease))
+    return report
+
+
+def test_failed_status_write_still_fails_the_lease(tmp_path, monkeypatch):
+    monkeypatch.setattr(podcasts, "download_enclosure", _fail_download)
+    lease = _Lease(job_id=3)
+    report = _run(tmp_path, lease)
+
+    assert lease.failed == "download failed: OSError: connection reset"
+    assert report.failed == 1
+    assert report.results["sub_1"][0]["status"] == "error"
+
+
+def test_lease_error_stops_heartbeat(tmp_path, monkeypatch):
+    monkeypatch.setattr(podcasts, "download_enclosure", _fail_download)
+    forgotten = []
+    monkeypatch.setattr(jobs.heartbeat, "forget", forgotten.append)
+
+    class _DeadLease(_Lease):
+        def fail(self, error, retry=True):
+            raise RuntimeError("database is locked")
+
+    report = _run(tmp_path, _DeadLease(job_id=4))
+    assert forgotten == [4]
+    assert report.failed == 1
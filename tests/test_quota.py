@@ -0,0 +1,91 @@
+"""YouTube quota pacing and the daily budget, on a fake clock."""
+
+import pytest
+
+from engine import quota
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """quota's monotonic clock and quota day, moved by hand."""
+    state = {"now": 1000.0, "day": "2026-03-14"}
+    monkeypatch.setattr(quota.time, "monotonic", lambda: state["now"])
+    monkeypatch.setattr(quota, "_quota_day", lambda: state["day"])
+    return state
+
+
+def test_bucket_refills_at_rate_up_to_capacity(clock):
+    bucket = quota.TokenBucket(rate=1.0, capacity=2.0)
+    assert bucket.acquire(2, timeout=0)
+    assert not bucket.acquire(1, timeout=0)
+
+    clock["now"] += 1.0
+    assert bucket.acquire(1, timeout=0)
+    assert not bucket.acquire(1, timeout=0)
+
+    # Idle time beyond a full bucket is not banked.
+    clock["now"] += 60.0
+    assert bucket.acquire(2, timeout=0)
+    assert not bucket.acquire(0.5, timeout=0)
+
+
+def test_bucket_call_above_capacity_waits_for_a_full_bucket(clock):
+    bucket = quota.TokenBucket(rate=1.0, capacity=2.0)
+    bucket.acquire(2, timeout=0)
+    clock["now"] += 1.0
+    assert not bucket.acquire(5, timeout=0)
+    clock["now"] += 1.0
+    assert bucket.acquire(5, timeout=0)
+
+
+def _governor(daily):
+    return quota.QuotaGovernor({"search.list": 100, "videos.list": 1},
+                               rate=1000, burst=1000, daily=daily)
+
+
+def test_daily_budget_cuts_off_before_the_api_does(clock):
+    gov = _governor(daily=102)
+    assert gov.acquire("search.list") == 100
+    assert gov.acquire("videos.list") == 1
+    assert gov.acquire("videos.list") == 1
+    with pytest.raises(quota.QuotaExhausted):
+        gov.acquire("videos.list")
+    with pytest.raises(quota.QuotaExhausted):
+        gov.acquire("search.list")
+    # Refused calls are not charged.
+    assert gov.report() == {"search.list": {"calls": 1, "units": 100},
+                            "videos.list": {"calls": 2, "units": 2}}
+
+    clock["day"] = "2026-03-15"
+    assert gov.acquire("search.list") == 100
+    assert gov.total() == 202
+
+
+def test_budget_is_checked_before_a_call_that_would_cross_it(clock):
+    gov = _governor(daily=150)
+    gov.acquire("search.list")
+    with pytest.raises(quota.QuotaExhausted):
+        gov.acquire("search.list")
+    assert gov.acquire("videos.list") == 1
+
+
+def test_mark_exhausted_stops_calls_until_the_reset(clock):
+    gov = _governor(daily=0)  # no local budget: only the API's word counts
+    for _ in range(5):
+        gov.acquire("search.list")
+    gov.mark_exhausted()
+    with pytest.raises(quota.QuotaExhausted):
+        gov.acquire("videos.list")
+
+    clock["day"] = "2026-03-15"
+    assert gov.acquire("videos.list") == 1
+
+
+def test_report_since_counts_only_the_calls_in_between(clock):
+    gov = _governor(daily=0)
+    gov.acquire("videos.list")
+    before = gov.report()
+    gov.acquire("videos.list")
+    gov.acquire("search.list")
+    assert gov.report_since(before) == {"videos.list": {"calls": 1, "units": 1},
+                                        "search.list": {"calls": 1, "units": 100}}
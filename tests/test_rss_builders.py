@@ -0,0 +1,45 @@
+"""Smoke runs of the RSS builder scripts through to their reports."""
+
+import pytest
+
+pytest.importorskip("feedparser")
+pytest.importorskip("requests")
+
+from engine import db, podcasts
+
+FEED = {"feed_id": "sub_1", "url": "https://example.org/rss", "church": "Grace Church",
+        "avg_duration": 45, "episodes": 120, "has_exposition": True, "tier": 1}
+
+
+def _fake_ingest(feeds, max_episodes=None):
+    report = podcasts.IngestReport(results={})
+    ep = podcasts.Episode(feed_id=FEED["feed_id"], episode_id="ep1", title="Romans 8",
+                          audio_url="https://example.org/ep1.mp3")
+    report.record(ep, "success", word_count=4200)
+    return report
+
+
+def _last_run():
+    with db.connection() as conn:
+        return conn.execute("SELECT status, notes FROM runs ORDER BY run_id DESC LIMIT 1").fetchone()
+
+
+@pytest.mark.parametrize("module_name, extract", [
+    ("build_rss_transcript_database", "extract_tier1_feeds"),
+    ("build_rss_transcript_database_tier1_tier2", "extract_tier_feeds"),
+])
+def test_builder_completes_with_report(db_path, monkeypatch, module_name, extract):
+    module = __import__(module_name)
+    monkeypatch.setattr(module, extract, lambda *a, **k: [dict(FEED)])
+    monkeypatch.setattr(podcasts, "ingest", _fake_ingest)
+
+    module.main()
+
+    status, notes = _last_run()
+    assert status == "completed", notes
+    report_file = notes.split("Report: ")[1]
+    path = module.Path(module.__file__).parent / report_file
+    try:
+        assert "Grace Church" in path.read_text(encoding="utf-8")
+    finally:
+        path.unlink(missing_ok=True)
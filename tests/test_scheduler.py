@@ -0,0 +1,134 @@
+"""Cadence-aware polling: learned rates, weekday weighting and the run plan."""
+
+import math
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from engine import db, scheduler
+
+UTC = timezone.utc
+# A Saturday; the weekly channel below publishes on Sundays.
+SAT = datetime(2026, 3, 14, 12, 0, tzinfo=UTC)
+MON = SAT + timedelta(days=2)
+LAST_SUNDAY = datetime(2026, 3, 8, 15, 0, tzinfo=UTC)
+
+
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _weekly(last=LAST_SUNDAY, count=10):
+    return [_iso(last - timedelta(weeks=i)) for i in range(count)]
+
+
+WEEKLY = _weekly()
+QUIET = _weekly(last=LAST_SUNDAY - timedelta(days=200), count=5)
+SPARSE = _weekly(count=2)
+CHECKED = LAST_SUNDAY + timedelta(hours=5)
+
+
+def test_learn_weekly_sunday_channel():
+    cad = scheduler.learn_cadence("UC_weekly", WEEKLY, _iso(CHECKED), now=SAT)
+    assert cad.uploads == 10
+    assert cad.interval_days == pytest.approx(7.0)
+    assert (cad.schedule, cad.weekday) == ("Weekly", "Sun")
+    # Ten uploads since the oldest one sampled, nine weeks before the last.
+    span_days = (SAT - (LAST_SUNDAY - timedelta(weeks=9))).total_seconds() / 86400
+    assert cad.rate_per_day == pytest.approx(10 / span_days)
+    assert sum(cad.weekday_share) == pytest.approx(1.0)
+    assert cad.weekday_share[6] > 10 * cad.weekday_share[0]
+    assert cad.checked_at == CHECKED
+
+
+def test_learn_with_too_little_history():
+    cad = scheduler.learn_cadence("UC_sparse", SPARSE, None, now=SAT)
+    assert cad.uploads == 2
+    assert cad.interval_days is None and cad.weekday_share is None
+    assert cad.schedule == "Unknown"
+
+
+def test_expected_between_follows_the_weekday_profile():
+    cad = scheduler.learn_cadence("UC_weekly", WEEKLY, None, now=SAT)
+    week = cad.rate_per_day * 7
+    monday = datetime(2026, 3, 9, tzinfo=UTC)
+
+    # A whole week expects the plain rate; each day its weekday's share.
+    assert scheduler._expected_between(cad, monday, monday + timedelta(weeks=1)) == pytest.approx(week)
+    sunday = monday + timedelta(days=6)
+    assert scheduler._expected_between(cad, sunday, sunday + timedelta(days=1)) == pytest.approx(
+        week * cad.weekday_share[6])
+    # Spans split at midnight: half of Sunday plus half of Monday.
+    noon = sunday + timedelta(hours=12)
+    assert scheduler._expected_between(cad, noon, noon + timedelta(days=1)) == pytest.approx(
+        week * (cad.weekday_share[6] + cad.weekday_share[0]) / 2)
+    assert scheduler._expected_between(cad, noon, noon) == 0.0
+
+
+def test_score_waits_for_the_publishing_day():
+    before = scheduler.score(scheduler.learn_cadence("UC_weekly", WEEKLY, _iso(CHECKED), now=SAT),
+                             SAT, min_probability=0.5, max_stale_days=10)
+    assert (before.due, before.reason) == (False, "not due")
+    assert before.probability == pytest.approx(1 - math.exp(-before.expected_new))
+    assert before.probability < 0.5
+
+    after = scheduler.score(scheduler.learn_cadence("UC_weekly", WEEKLY, _iso(CHECKED), now=MON),
+                            MON, min_probability=0.5, max_stale_days=10)
+    assert (after.due, after.reason) == (True, "likely new")
+    assert after.expected_new > 1.0
+
+
+def test_score_quiet_never_checked_and_learning_channels():
+    quiet = scheduler.learn_cadence("UC_quiet", QUIET, _iso(SAT - timedelta(days=3)), now=SAT)
+    assert scheduler.score(quiet, SAT, min_probability=0.5, max_stale_days=10).due is False
+    stale = scheduler.score(quiet, SAT, min_probability=0.5, max_stale_days=3)
+    assert (stale.due, stale.reason) == (True, "stale (3d)")
+
+    never = scheduler.score(scheduler.learn_cadence("UC_new", WEEKLY, None, now=SAT), SAT)
+    assert (never.due, never.reason) == (True, "never checked")
+    assert never.expected_new == scheduler.PRIOR_EXPECTED
+
+    learning = scheduler.score(scheduler.learn_cadence("UC_sparse", SPARSE, _iso(CHECKED), now=SAT), SAT)
+    assert (learning.due, learning.reason, learning.probability) == (True, "learning", 1.0)
+
+
+@pytest.fixture
+def channels(db_path):
+    """weekly/quiet/sparse checked at the given times; "UC_new" never checked."""
+    histories = {"UC_weekly": WEEKLY, "UC_quiet": QUIET, "UC_sparse": SPARSE, "UC_new": WEEKLY}
+    for cid, published in histories.items():
+        db.upsert_channel(cid, cid, f"https://example.org/{cid}", "test")
+        for i, at in enumerate(published):
+            db.upsert_video(f"{cid}_{i}", cid, "Sermon", at, 2700)
+    checked = {"UC_weekly": CHECKED, "UC_quiet": MON - timedelta(days=3), "UC_sparse": CHECKED}
+    for cid, at in checked.items():
+        db.set_discovery_mark(cid, None, None, None)
+        with db.transaction() as conn:
+            conn.execute("UPDATE channel_discovery SET checked_at = ? WHERE channel_id = ?",
+                         (at.strftime("%Y-%m-%d %H:%M:%S"), cid))
+    return ["UC_quiet", "UC_sparse", "UC_new", "UC_weekly"]
+
+
+def test_plan_orders_due_channels_by_expected_uploads(channels):
+    cadences = scheduler.plan(channels, now=MON, min_probability=0.5, max_stale_days=10,
+                              max_channels=0)
+    assert [(c.channel_id, c.due, c.reason) for c in cadences] == [
+        ("UC_weekly", True, "likely new"),
+        ("UC_sparse", True, "learning"),
+        ("UC_new", True, "never checked"),
+        ("UC_quiet", False, "not due"),
+    ]
+
+
+def test_plan_defers_due_channels_past_the_cap(channels):
+    cadences = scheduler.plan(channels, now=MON, min_probability=0.5, max_stale_days=10,
+                              max_channels=2)
+    assert [(c.channel_id, c.due) for c in cadences] == [
+        ("UC_weekly", True), ("UC_sparse", True), ("UC_new", False), ("UC_quiet", False)]
+    assert cadences[2].reason == "deferred (SCHEDULE_MAX_CHANNELS)"
+    assert cadences[3].reason == "not due"
+
+    # Before Sunday the weekly channel is not due and so takes no slot.
+    early = scheduler.plan(channels, now=SAT, min_probability=0.5, max_stale_days=10,
+                           max_channels=2)
+    assert [c.channel_id for c in early if c.due] == ["UC_sparse", "UC_new"]
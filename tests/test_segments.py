@@ -0,0 +1,68 @@
+"""Packed segment format: round trips, version 1 buffers, and scoring parity."""
+
+import json
+
+import pytest
+
+from engine.segments import (_HEADER, MAGIC, PackedSegments, encode_segments, is_packed,
+                             load_segments)
+
+SEGMENTS = [
+    {"start": 0.0, "end": 30.0, "text": "Turn with me to Romans 8:1.",
+     "verse_citation_match": True},
+    {"start": 30.0, "end": 60.0, "text": "There is now no condemnation in Christ Jesus."},
+    {"start": 60.0, "end": 90.0, "text": "So repent and believe the gospel of grace!",
+     "imperative_language_match": True, "verse_citation_match": True},
+]
+
+
+def test_round_trip_keeps_flags():
+    packed = PackedSegments(encode_segments(SEGMENTS))
+    assert len(packed) == 3
+    assert packed.to_list() == SEGMENTS
+    assert [packed.flag(i, "verse_citation_match") for i in range(3)] == [True, False, True]
+    assert [packed.flag(i, "imperative_language_match") for i in range(3)] == [False, False, True]
+    assert packed.duration == 90.0
+
+
+def test_version_1_buffer_reads_without_flags():
+    blob = encode_segments(SEGMENTS)
+    count, text_bytes = len(SEGMENTS), len(blob) - _HEADER.size - 13 * len(SEGMENTS) - 4
+    columns = blob[_HEADER.size:_HEADER.size + 12 * count + 4]
+    v1 = (_HEADER.pack(MAGIC, 1, 0, count, text_bytes) + columns
+          + blob[_HEADER.size + 13 * count + 4:])
+
+    packed = load_segments(v1)
+    assert is_packed(v1)
+    assert [s["text"] for s in packed] == [s["text"] for s in SEGMENTS]
+    assert not any(packed.flag(i, "verse_citation_match") for i in range(count))
+
+
+BRAIN_CONFIG = {
+    "theological_brain": {
+        "L1_Soteriology": ["Gospel", "Grace", "Repent"],
+        "L3_Christology": ["Christ Jesus"],
+    },
+    "weighting_logic": {
+        "layer_weights": {"L1_Soteriology": 3.0, "L3_Christology": 2.5},
+        "tag_overrides": {},
+        "multipliers": {"Verse_Citation_Match": 1.3, "Imperative_Language_Match": 1.2,
+                        "Gospel_Anchor_Proximity": 1.25},
+    },
+}
+
+
+def test_packed_and_json_segments_score_the_same(tmp_path):
+    pytest.importorskip("numpy")
+    from analysis_engine import DigitalPulpitBrain
+
+    config = tmp_path / "brain.json"
+    config.write_text(json.dumps(BRAIN_CONFIG))
+    brain = DigitalPulpitBrain(str(config))
+    packed = PackedSegments(encode_segments(SEGMENTS))
+    unflagged = [{k: s[k] for k in ("start", "end", "text")} for s in SEGMENTS]
+
+    score = brain.analyze_sermon(SEGMENTS)
+    assert brain.analyze_sermon(packed) == pytest.approx(score)
+    # The flags carry weight, so parity is not just both paths ignoring them.
+    assert score > brain.analyze_sermon(unflagged)
@@ -0,0 +1,79 @@
+"""Dashboard snapshots: copy only on change, paged copies, non-blocking reads."""
+
+import os
+import time
+
+import pytest
+
+from engine import db, snapshot
+
+
+@pytest.fixture
+def snap_path(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "_PUBLISHED", {})
+    return str(tmp_path / "dash.snapshot.db")
+
+
+@pytest.fixture
+def copies(monkeypatch):
+    calls = []
+    real = snapshot._copy
+
+    def counting(src, dst):
+        calls.append(1)
+        real(src, dst)
+
+    monkeypatch.setattr(snapshot, "_copy", counting)
+    return calls
+
+
+def _channels(path):
+    conn = snapshot.connect(path)
+    try:
+        return [r[0] for r in conn.execute("SELECT channel_id FROM channels ORDER BY channel_id")]
+    finally:
+        conn.close()
+
+
+def test_unchanged_database_is_not_copied_again(db_path, snap_path, copies, channel):
+    snapshot.publish_snapshot(db_path, snap_path, if_changed=True)
+    old = time.time() - 3600
+    os.utime(snap_path, (old, old))
+
+    snapshot.publish_snapshot(db_path, snap_path, if_changed=True)
+    assert len(copies) == 1
+    assert snapshot.snapshot_age(snap_path) < 60   # touched: the age restarts
+
+    db.upsert_channel("UC_new", "New Church", "https://example.org/new", "test")
+    snapshot.publish_snapshot(db_path, snap_path, if_changed=True)
+    assert len(copies) == 2
+    assert _channels(snap_path) == ["UC_new", "UC_test"]
+
+    # A plain publish (end of a run) always copies.
+    snapshot.publish_snapshot(db_path, snap_path)
+    assert len(copies) == 3
+
+
+def test_paged_copy_is_complete(db_path, snap_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "DB_SNAPSHOT_PAGES", 1)
+    monkeypatch.setattr(snapshot, "DB_SNAPSHOT_STEP_SLEEP", 0)
+    with db.transaction(db_path) as conn:
+        conn.executemany("INSERT INTO channels (channel_id, channel_name) VALUES (?, ?)",
+                         [(f"UC_{i:04d}", "x" * 500) for i in range(200)])
+
+    snapshot.publish_snapshot(db_path, snap_path)
+    assert len(_channels(snap_path)) == 200
+
+
+def test_stale_snapshot_is_refreshed_in_background(db_path, snap_path, copies, monkeypatch):
+    assert snapshot.ensure_snapshot(db_path=db_path, snapshot_path=snap_path) == snap_path
+    assert len(copies) == 1   # the first snapshot is published inline
+
+    refreshes = []
+    monkeypatch.setattr(snapshot, "refresh_in_background",
+                        lambda db_path, snapshot_path: refreshes.append(snapshot_path))
+    old = time.time() - 3600
+    os.utime(snap_path, (old, old))
+    assert snapshot.ensure_snapshot(max_age=60, db_path=db_path, snapshot_path=snap_path) == snap_path
+    assert refreshes == [snap_path]
+    assert len(copies) == 1
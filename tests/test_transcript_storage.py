@@ -0,0 +1,100 @@
+"""Compressed transcript storage is readable everywhere plain text is."""
+
+import sqlite3
+
+import pytest
+
+from engine import db
+
+TEXT = "Grace abounds in the letter to the Romans, chapter eight, verse one."
+
+
+@pytest.fixture
+def videos(channel):
+    for vid in ("plain1", "zlib1"):
+        db.upsert_video(vid, channel, f"Sermon {vid}", "2026-01-04", 2400)
+    db.insert_transcript("plain1", TEXT, [], "en", 12, "whisper-1", codec="none")
+    db.insert_transcript("zlib1", TEXT, [], "en", 12, "whisper-1", codec="zlib")
+    return ["plain1", "zlib1"]
+
+
+def test_compressed_row_has_no_plain_text(videos):
+    with db.connection() as conn:
+        row = conn.execute("SELECT full_text, full_text_z FROM transcripts WHERE video_id = 'zlib1'").fetchone()
+    assert row["full_text"] is None and row["full_text_z"] is not None
+    assert db.get_transcript("zlib1").text == TEXT
+
+
+def test_sql_helpers_read_both_storages(videos):
+    with db.connection() as conn:
+        rows = conn.execute(
+            f"SELECT t.video_id, {db.transcript_text_sql('t')} AS text FROM transcripts t "
+            f"WHERE {db.has_transcript_text_sql('t')} ORDER BY t.video_id").fetchall()
+    assert [(r["video_id"], r["text"]) for r in rows] == [("plain1", TEXT), ("zlib1", TEXT)]
+
+
+
+def test_sql_helpers_with_conn_read_a_raw_connection(videos, db_path):
+    # Plain sqlite3, no dp_text() registered: the helpers register it.
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            f"SELECT t.video_id, {db.transcript_text_sql('t', conn)} FROM transcripts t "
+            f"WHERE {db.has_transcript_text_sql('t', conn)} ORDER BY t.video_id").fetchall()
+    finally:
+        conn.close()
+    assert rows == [("plain1", TEXT), ("zlib1", TEXT)]
+
+
+def test_sql_helpers_with_conn_fall_back_to_plain_columns(tmp_path):
+    # A database from before the storage columns, never migrated by init_db().
+    conn = sqlite3.connect(str(tmp_path / "old.db"))
+    try:
+        conn.execute("CREATE TABLE transcripts (video_id TEXT, full_text TEXT)")
+        conn.executemany("INSERT INTO transcripts VALUES (?, ?)", [("a", TEXT), ("b", "  "), ("c", None)])
+        rows = conn.execute(
+            f"SELECT video_id, {db.transcript_text_sql('', conn)} FROM transcripts "
+            f"WHERE {db.has_transcript_text_sql('', conn)}").fetchall()
+    finally:
+        conn.close()
+    assert rows == [("a", TEXT)]
+
+def test_search_finds_compressed_transcripts(videos):
+    hits = db.search_transcripts(db.fts_query(["romans"]))
+    assert sorted(h["video_id"] for h in hits) == videos
+    assert all("Romans" in h["snippet"] for h in hits)
+
+
+def test_search_follows_codec_conversion(videos):
+    db.convert_transcripts("zlib")
+    assert len(db.search_transcripts(db.fts_query(["romans"]))) == 2
+    db.convert_transcripts("none")
+    assert len(db.search_transcripts(db.fts_query(["romans"]))) == 2
+
+
+def test_old_index_definition_is_rebuilt(videos, db_path):
+    with db.transaction() as conn:
+        conn.execute("DROP TRIGGER transcripts_fts_ai")
+        conn.execute("CREATE TRIGGER transcripts_fts_ai AFTER INSERT ON transcripts BEGIN "
+                     "INSERT INTO transcripts_fts(rowid, full_text) "
+                     "VALUES (new.transcript_id, new.full_text); END")
+    db.init_db(db_path)
+    with db.connection() as conn:
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'transcripts_fts_ai'").fetchone()[0]
+    assert "dp_text" in sql
+
+    db.upsert_video("zlib2", "UC_test", "Sermon zlib2", "2026-01-11", 2400)
+    db.insert_transcript("zlib2", "Romans again", [], "en", 2, "whisper-1", codec="zlib")
+    assert len(db.search_transcripts(db.fts_query(["romans"]))) == 3
+
+
+def test_sermon_analyst_sees_compressed_transcripts(videos):
+    from engine import sermon_analyst
+
+    with db.connection() as con:
+        sermon_analyst._ensure_sermon_analysis_table(con)
+        rows = sermon_analyst._fetch_candidates(con, days=36500, limit=10)
+        one = sermon_analyst._fetch_candidates(con, days=0, limit=1, video_id="zlib1")
+    assert sorted(r["video_id"] for r in rows) == videos
+    assert all(r["full_text"] == TEXT for r in rows)
+    assert one[0]["full_text"] == TEXT
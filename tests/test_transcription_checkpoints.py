@@ -0,0 +1,35 @@
+"""Chunk checkpoints only resume the audio they were made from."""
+
+import pytest
+
+for _mod in ("openai", "youtube_transcript_api"):
+    pytest.importorskip(_mod)
+
+from engine import transcription
+
+
+def test_chunk_fingerprint_follows_audio_content(tmp_path):
+    audio = tmp_path / "a.mp3"
+    audio.write_bytes(b"\x01" * 3_000_000)
+    prep = transcription.PreparedAudio("vid1", str(audio), chunks=["c0", "c1"])
+    first = transcription._chunk_fingerprint(prep)
+    assert transcription._chunk_fingerprint(prep) == first
+
+    # Same size and chunk count, different audio: checkpoints must not match.
+    data = bytearray(audio.read_bytes())
+    data[-10] = 0x02
+    audio.write_bytes(bytes(data))
+    assert transcription._chunk_fingerprint(prep) != first
+
+    other = transcription.PreparedAudio("vid2", str(audio), chunks=["c0", "c1"])
+    assert transcription._chunk_fingerprint(other) != transcription._chunk_fingerprint(prep)
+
+
+def test_checkpoint_of_other_audio_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcription, "TMP_AUDIO_DIR", str(tmp_path))
+    transcription._save_checkpoint("vid1", 0, "fp-a", "Amen.", [{"start": 0.0}], "en")
+    assert transcription._load_checkpoint("vid1", 0, "fp-a") == ("Amen.", [{"start": 0.0}], "en")
+    assert transcription._load_checkpoint("vid1", 0, "fp-b") is None
+    assert transcription._load_checkpoint("vid1", 1, "fp-a") is None
+    transcription.clear_checkpoints("vid1")
+    assert transcription._load_checkpoint("vid1", 0, "fp-a") is None
@@ -0,0 +1,134 @@
+"""Vacuum pipeline failure handling: every job settles its budget and lease."""
+
+import threading
+import time
+
+import pytest
+
+for _mod in ("openai", "googleapiclient", "youtube_transcript_api"):
+    pytest.importorskip(_mod)
+
+from engine import db, jobs, vacuum
+
+
+class _BrokenWriter:
+    """A BatchWriter whose flush fails on the "failed" status write."""
+
+    def update_video_status(self, video_id, status, error=None):
+        if status == "failed":
+            raise RuntimeError("flush failed")
+
+
+class _Lease:
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.failed = None
+
+    def fail(self, error, retry=True):
+        self.failed = error
+        return "queued"
+
+
+def test_failed_status_write_still_settles(monkeypatch):
+    monkeypatch.setattr(vacuum, "CAPTIONS_ONLY", False)
+    monkeypatch.setattr(vacuum, "VACUUM_TRANSCRIBER", "openai")
+    monkeypatch.setattr(vacuum, "download_audio", lambda video_id, **kw: None)
+
+    budget = vacuum._RunBudget(max_videos=1, max_minutes=100)
+    lease = _Lease(job_id=7)
+    assert budget.reserve(30)
+    with vacuum._build_pipeline(_BrokenWriter(), budget, []) as pipe:
+        pipe.submit(vacuum._Job("vid1", 30, lease))
+
+    assert lease.failed == "Audio download failed"
+    # The reservation came back: a second video fits without waiting.
+    reserved = []
+    t = threading.Thread(target=lambda: reserved.append(budget.reserve(30)), daemon=True)
+    t.start()
+    t.join(timeout=2)
+    assert reserved == [True]
+
+
+def test_lease_error_stops_heartbeat(monkeypatch):
+    monkeypatch.setattr(vacuum, "CAPTIONS_ONLY", False)
+    monkeypatch.setattr(vacuum, "VACUUM_TRANSCRIBER", "openai")
+    monkeypatch.setattr(vacuum, "download_audio", lambda video_id, **kw: None)
+    forgotten = []
+    monkeypatch.setattr(jobs.heartbeat, "forget", forgotten.append)
+
+    class _DeadLease(_Lease):
+        def fail(self, error, retry=True):
+            raise RuntimeError("database is locked")
+
+    budget = vacuum._RunBudget(max_videos=1, max_minutes=100)
+    assert budget.reserve(30)
+    with vacuum._build_pipeline(_BrokenWriter(), budget, []) as pipe:
+        pipe.submit(vacuum._Job("vid1", 30, _DeadLease(job_id=9)))
+
+    assert forgotten == [9]
+    assert budget._inflight_videos == 0
+
+
+class _Pipe:
+    """Runs each job to success at once, so the budget only holds finished work."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.keys = []
+
+    def submit(self, job):
+        self.keys.append(job.video_id)
+        self.budget.settle(job.duration_min, True)
+        job.lease.complete()
+
+
+def _job_row(key):
+    with db.connection() as conn:
+        return conn.execute("SELECT state, run_after, last_error FROM jobs WHERE kind = ? AND key = ?",
+                            (vacuum.VACUUM_JOB_KIND, key)).fetchone()
+
+
+def test_claim_defers_what_does_not_fit_and_keeps_going(db_path, monkeypatch):
+    monkeypatch.setattr(jobs, "heartbeat", jobs.Heartbeat())
+    monkeypatch.setattr(jobs.heartbeat, "track", lambda claimed, lease_seconds: None)
+    jobs.enqueue_many(vacuum.VACUUM_JOB_KIND, [
+        ("long", {"duration_min": 50.0}),
+        ("medium", {"duration_min": 30.0}),   # does not fit after "long"
+        ("huge", {"duration_min": 90.0}),     # never fits a 60-minute run
+        ("short", {"duration_min": 10.0}),
+    ])
+    budget = vacuum._RunBudget(max_videos=10, max_minutes=60)
+    pipe, notes = _Pipe(budget), []
+
+    assert vacuum._claim_into(pipe, budget, notes) == 2
+    assert pipe.keys == ["long", "short"]
+
+    state, run_after, _ = _job_row("medium")
+    assert state == "queued" and run_after > time.time()
+    state, _, error = _job_row("huge")
+    assert state == "dead" and "MAX_MINUTES_PER_RUN" in error
+    # The deferred video is not back at the head of the queue.
+    assert jobs.claim(vacuum.VACUUM_JOB_KIND) == []
+
+
+def test_claim_stops_at_video_limit(db_path, monkeypatch):
+    monkeypatch.setattr(jobs, "heartbeat", jobs.Heartbeat())
+    monkeypatch.setattr(jobs.heartbeat, "track", lambda claimed, lease_seconds: None)
+    jobs.enqueue_many(vacuum.VACUUM_JOB_KIND, [(f"v{i}", {"duration_min": 10.0}) for i in range(3)])
+    budget = vacuum._RunBudget(max_videos=2, max_minutes=600)
+    pipe, notes = _Pipe(budget), []
+
+    assert vacuum._claim_into(pipe, budget, notes) == 2
+    assert notes == [f"MAX_VIDEOS_PER_RUN ({vacuum.MAX_VIDEOS_PER_RUN}) reached"]
+    assert _job_row("v2")[:2] == ("queued", 0)
+
+
+def test_failed_search_is_not_recorded_as_a_check(db_path, channel, monkeypatch):
+    monkeypatch.setattr(vacuum, "discover_videos", lambda cid, writer=None: None)
+    videos, note = vacuum._discover_channel(channel, "Test Church", writer=None)
+    assert (videos, note) == ([], "Discovery failed: Test Church")
+    assert db.get_discovery_marks([channel]) == {}
+
+    monkeypatch.setattr(vacuum, "discover_videos", lambda cid, writer=None: [])
+    assert vacuum._discover_channel(channel, "Test Church", writer=None) == ([], None)
+    assert db.get_discovery_marks([channel])[channel]["checked_at"]
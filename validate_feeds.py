@@ -11,6 +11,8 @@ import requests
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+from engine.scheduler import format_schedule
+
 
 # Quality criteria configuration
 SERMON_KEYWORDS = [
@@ -453,22 +455,6 @@ def detect_series(titles):
     return "Various topics"
 
 
-def format_schedule(interval_days):
-    """Convert interval to readable schedule"""
-    if interval_days is None:
-        return "Unknown"
-    if interval_days <= 1.5:
-        return "Daily"
-    elif interval_days <= 4:
-        return "2-3 times per week"
-    elif interval_days <= 8:
-        return "Weekly"
-    elif interval_days <= 15:
-        return "Bi-weekly"
-    else:
-        return f"Every {interval_days:.0f} days"
-
-
 def write_output_file(results, filename):
     """Write comprehensive analysis report"""
     with open(filename, 'w', encoding='utf-8') as f: